@@ -0,0 +1,116 @@
+"""
+Mails sent for a storm of alerts, by how the alerting service mails them.
+
+    python -m benchmarks.alert_notifier_benchmark [--alerts 5000]
+        [--recipients 20] [--rate 2000] [--window 1.0]
+
+Replays `--alerts` speeding alerts spread over `--recipients` rules at
+`--rate` alerts per second against a local aiosmtpd server, and reports the
+mails it received and how long they took to arrive for:
+
+    per-message  a new SMTP connection for every alert
+    pooled       `EmailNotifier` with no digest window, on pooled connections
+    digest       `EmailNotifier` with a `--window` second digest window
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+from typing import Callable
+
+import aiosmtplib
+from aiosmtpd.controller import Controller
+
+from src.alert.notifications import EmailNotifier, SMTPPool, build_message
+from src.alert.rules import AlertRule
+
+
+class Counter:
+    def __init__(self):
+        self.mails = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.mails += 1
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+async def storm(args, notify: Callable[[AlertRule, str, str], None]) -> None:
+    rules = [
+        AlertRule(f"ops{i}@example.com", ["gps"], {"speed": 70.0})
+        for i in range(args.recipients)
+    ]
+    interval = 1 / args.rate
+    started = time.perf_counter()
+    for i in range(args.alerts):
+        notify(rules[i % len(rules)], f"Alert: gps [speed={70 + i % 50}]", "{}")
+        # Hold the arrival rate without sleeping per alert
+        ahead = started + (i + 1) * interval - time.perf_counter()
+        if ahead > 0.001:
+            await asyncio.sleep(ahead)
+
+
+async def per_message(args, port: int) -> None:
+    sending = set()
+
+    def notify(rule: AlertRule, subject: str, body: str) -> None:
+        message = build_message(rule.email, subject, body)
+        task = asyncio.create_task(
+            aiosmtplib.send(message, hostname="127.0.0.1", port=port)
+        )
+        sending.add(task)
+        task.add_done_callback(sending.discard)
+
+    await storm(args, notify)
+    await asyncio.gather(*sending, return_exceptions=True)
+
+
+async def with_notifier(args, port: int, window: float) -> None:
+    pool = SMTPPool("127.0.0.1", port, args.pool_size)
+    notifier = EmailNotifier(pool, window, 1000, retries=3, retry_seconds=0.1)
+    await storm(args, notifier.notify)
+    # The last digests go out at the end of their window
+    await asyncio.sleep(window)
+    await notifier.close(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--alerts", type=int, default=5000)
+    parser.add_argument("--recipients", type=int, default=20)
+    parser.add_argument("--rate", type=int, default=2000)
+    parser.add_argument("--window", type=float, default=1.0)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{args.alerts} alerts at {args.rate}/s over {args.recipients} rules")
+    print(f"{'mode':<12} {'mails':>7} {'seconds':>8} {'alerts/s':>9} {'mails/s':>8}")
+    for name, run in (
+        ("per-message", lambda port: per_message(args, port)),
+        ("pooled", lambda port: with_notifier(args, port, 0.0)),
+        ("digest", lambda port: with_notifier(args, port, args.window)),
+    ):
+        handler = Counter()
+        port = free_port()
+        controller = Controller(handler, hostname="127.0.0.1", port=port)
+        controller.start()
+        try:
+            started = time.perf_counter()
+            asyncio.run(run(port))
+            elapsed = time.perf_counter() - started
+        finally:
+            controller.stop()
+        print(
+            f"{name:<12} {handler.mails:>7} {elapsed:>8.2f} "
+            f"{args.alerts / elapsed:>9,.0f} {handler.mails / elapsed:>8,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Compare rule matching in the alerting service: every rule through
+`matches_rule` against the compiled, indexed `RuleSet`.
+
+    python -m benchmarks.alert_rules_benchmark [--rules 5000] [--rate 2000]
+
+Builds `--rules` rules shaped like ours (fault-code lists, speed thresholds,
+status equality) spread over a few event types, and a stream that is mostly
+GPS events with some faults. Reports the time per event and the share of one
+core the matching takes at `--rate` events per second.
+"""
+
+import argparse
+import random
+import timeit
+from typing import Any, Dict, List
+
+from src.alert.rules import AlertRule, RuleSet, matches_rule
+from src.alert.schemas import AlertEvent
+
+EVENT_TYPES = ["gps", "fault", "idle", "geofence"]
+
+
+def make_rules(count: int, rng: random.Random) -> List[AlertRule]:
+    rules = []
+    for i in range(count):
+        kind = i % 4
+        email = f"ops{i}@example.com"
+        if kind == 0:
+            codes = [str(c) for c in rng.sample(range(1, 1000), 100)]
+            rules.append(AlertRule(email, ["fault"], {"fault_code": codes}))
+        elif kind == 1:
+            speed = float(rng.randint(60, 140))
+            rules.append(AlertRule(email, ["gps"], {"speed": speed}))
+        elif kind == 2:
+            status = f"zone-{rng.randint(0, 500)}"
+            rules.append(AlertRule(email, ["geofence", "idle"], {"zone": status}))
+        else:
+            codes = [str(c) for c in rng.sample(range(1, 1000), 5)]
+            rules.append(
+                AlertRule(email, ["fault"], {"fault_code": codes, "level": 2.0})
+            )
+    return rules
+
+
+def make_events(count: int, rng: random.Random) -> List[AlertEvent]:
+    events = []
+    for _ in range(count):
+        data: Dict[str, Any]
+        roll = rng.random()
+        if roll < 0.9:
+            event_type, data = "gps", {"speed": rng.uniform(0, 120)}
+        elif roll < 0.97:
+            event_type = "fault"
+            data = {"fault_code": str(rng.randint(1, 1200)), "level": 3}
+        else:
+            event_type, data = "idle", {"zone": f"zone-{rng.randint(0, 500)}"}
+        events.append(
+            AlertEvent(
+                event_type=event_type,
+                device_id="1007",
+                device_name="truck-07",
+                timestamp="2025-05-06T08:00:00",
+                data=data,
+            )
+        )
+    return events
+
+
+def linear(rules: List[AlertRule], events: List[AlertEvent]) -> None:
+    for event in events:
+        [rule for rule in rules if matches_rule(event, rule)]
+
+
+def compiled(ruleset: RuleSet, events: List[AlertEvent]) -> None:
+    for event in events:
+        ruleset.match(event)
+
+
+def per_event_us(func, events: List[AlertEvent], repeat: int) -> float:
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    return best * 1_000_000 / len(events)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rules", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--rate", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    rules = make_rules(args.rules, rng)
+    events = make_events(args.events, rng)
+    build = min(timeit.repeat(lambda: RuleSet(rules), number=1, repeat=3))
+    ruleset = RuleSet(rules)
+
+    # Both must agree before their speed means anything
+    for event in events[:200]:
+        assert ruleset.match(event) == [r for r in rules if matches_rule(event, r)]
+
+    print(f"{args.rules} rules, compiled in {build * 1000:.1f} ms")
+    print(f"{'engine':<10} {'us/event':>10} {'events/s':>12} {'core @rate':>11}")
+    for name, func in (
+        ("linear", lambda: linear(rules, events)),
+        ("compiled", lambda: compiled(ruleset, events)),
+    ):
+        us = per_event_us(func, events, repeat=3)
+        print(
+            f"{name:<10} {us:>10.1f} {1_000_000 / us:>12,.0f} "
+            f"{us * args.rate / 10_000:>10.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Alerts per second the alerting service takes at different process counts.
+
+    python -m benchmarks.alert_service_benchmark [--processes 1 2 4 8]
+        [--connections 16] [--clients 4] [--seconds 10] [--batch 50]
+
+For each process count, starts `src.alert.launcher` on a free port and has
+`--clients` client processes push GPS alerts over `--connections` WebSockets
+in array frames of `--batch`, as the producers' outbox does. Alerts acked
+`busy` are sent again, so the rate counted is that of alerts the service
+accepted and processed, not just parsed. Needs Redis for the rules source
+and suppression as configured for the service; without it the service logs
+the failures and matches against the built-in rules.
+
+Unverified: the scaling has not been measured on a multi-core host yet. On
+fewer cores than processes the servers and clients share the CPU, so the
+speedup column says nothing about the service there; the run warns of it.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import List
+
+import websockets
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def make_frames(batch: int, rng: random.Random) -> List[dict]:
+    return [
+        {
+            "event_type": "gps",
+            "device_id": str(rng.randint(1000, 1999)),
+            "device_name": "truck",
+            "timestamp": "2025-05-06T08:00:00",
+            "data": {"speed": rng.uniform(0, 120)},
+            "id": str(i),
+        }
+        for i in range(batch)
+    ]
+
+
+async def push(url: str, batch: int, until: float, seed: int) -> int:
+    """Alerts accepted over one connection until `until`."""
+    frames = make_frames(batch, random.Random(seed))
+    accepted = 0
+    async with websockets.connect(url, max_size=None) as websocket:
+        pending = frames
+        while time.monotonic() < until:
+            await websocket.send(json.dumps(pending))
+            acks = json.loads(await websocket.recv())
+            busy = [f for f, ack in zip(pending, acks) if ack["status"] == "busy"]
+            accepted += len(pending) - len(busy)
+            pending = busy or frames
+            if busy:
+                await asyncio.sleep(0.01)
+    return accepted
+
+
+async def run_connections(url: str, connections: int, batch: int, until: float) -> int:
+    counts = await asyncio.gather(
+        *(push(url, batch, until, seed) for seed in range(connections))
+    )
+    return sum(counts)
+
+
+def run_client(args) -> int:
+    url, connections, batch, until_wall = args
+    # Wall clock across processes; monotonic inside each
+    until = time.monotonic() + (until_wall - time.time())
+    return asyncio.run(run_connections(url, connections, batch, until))
+
+
+def wait_until_serving(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Alerting service did not start on port {port}")
+
+
+def measure(processes: int, args) -> float:
+    port = free_port()
+    env = {
+        **os.environ,
+        "ALERT_PROCESSES": str(processes),
+        "ALERTING_PORT": str(port),
+        "RULES_RELOAD_SECONDS": "0",
+    }
+    launcher = subprocess.Popen(
+        [sys.executable, "-m", "src.alert.launcher"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_serving(port)
+        # Let every server bind before the connections are spread
+        time.sleep(1 + processes * 0.5)
+        url = f"ws://127.0.0.1:{port}"
+        per_client = max(1, args.connections // args.clients)
+        until = time.time() + args.seconds
+        with multiprocessing.get_context("spawn").Pool(args.clients) as pool:
+            accepted = sum(
+                pool.map(
+                    run_client,
+                    [(url, per_client, args.batch, until)] * args.clients,
+                )
+            )
+        return accepted / float(args.seconds)
+    finally:
+        launcher.send_signal(signal.SIGTERM)
+        launcher.wait(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--batch", type=int, default=50)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    print(f"{cores} cores, {args.connections} connections")
+    if cores < max(args.processes):
+        print("warning: fewer cores than processes, the speedup is not a result")
+    print(f"{'processes':>9} {'alerts/s':>12} {'speedup':>8}")
+    baseline = None
+    for processes in args.processes:
+        rate = measure(processes, args)
+        baseline = baseline or rate
+        print(f"{processes:>9} {rate:>12,.0f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compare the decode cost of the text (v1) and binary (v2) GPS wire formats.
+
+    python -m benchmarks.gps_decode_benchmark [--events 100000]
+
+Reports payload size and the time to decode one million events: the raw
+field parsing alone, the full `GPSEventCreate.from_base64` path, and the
+same fields built with `model_construct` instead of validation.
+"""
+
+import argparse
+import base64
+import logging
+import timeit
+from datetime import datetime
+from typing import Any, Dict
+
+from src.fastapi.rabbitmq_handlers.gps.codec import decode_gps_frame, encode_gps_frame
+from src.fastapi.rabbitmq_handlers.gps.schemas import GPSEventCreate, parse_gps_payload
+
+EVENT: Dict[str, Any] = {
+    "device_id": "1007",
+    "timestamp": 1746518400.123456,
+    "speed": 62.5,
+    "odometer": 48213.37,
+    "power_on": True,
+    "latitude": 13.52,
+    "longitude": 107.45,
+    "fuel_gauge": 71.25,
+}
+
+
+def text_payload() -> str:
+    raw = ":".join(str(value) for value in EVENT.values())
+    return base64.b64encode(raw.encode()).decode()
+
+
+def binary_payload() -> str:
+    return base64.b64encode(encode_gps_frame(**EVENT)).decode()
+
+
+def parse_text(payload: str) -> dict:
+    fields = base64.b64decode(payload).decode().split(":")
+    return {
+        "device_id": fields[0],
+        "timestamp": datetime.fromtimestamp(float(fields[1])),
+        "speed": float(fields[2]),
+        "odometer": float(fields[3]),
+        "power_on": fields[4].lower() == "true",
+        "latitude": float(fields[5]),
+        "longitude": float(fields[6]),
+        "fuel_gauge": float(fields[7]),
+    }
+
+
+def parse_binary(payload: str) -> dict:
+    fields = decode_gps_frame(base64.b64decode(payload))
+    fields["timestamp"] = datetime.fromtimestamp(fields["timestamp"])
+    return fields
+
+
+def constructed(payload: str) -> GPSEventCreate:
+    return GPSEventCreate.model_construct(**parse_gps_payload(payload))
+
+
+def per_million(func, payload: str, events: int) -> float:
+    best = min(timeit.repeat(lambda: func(payload), number=events, repeat=3))
+    return best * 1_000_000 / events
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=100_000)
+    args = parser.parse_args()
+    # from_base64 logs every event; keep the numbers about decoding
+    logging.disable(logging.CRITICAL)
+
+    payloads = {"text v1": text_payload(), "binary v2": binary_payload()}
+    parsers = {"text v1": parse_text, "binary v2": parse_binary}
+
+    print(
+        f"{'format':<10} {'bytes':>6} {'parse':>8} {'from_base64':>12} "
+        f"{'construct':>10}   (seconds per 1M events)"
+    )
+    for name, payload in payloads.items():
+        parse = per_million(parsers[name], payload, args.events)
+        fast = per_million(GPSEventCreate.from_base64, payload, args.events)
+        full = per_million(constructed, payload, args.events)
+        print(
+            f"{name:<10} {len(payload):>6} {parse:>8.2f} {fast:>12.2f} "
+            f"{full:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
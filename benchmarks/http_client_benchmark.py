@@ -0,0 +1,118 @@
+"""
+Compare device-name lookups over a new `aiohttp.ClientSession` per call with
+lookups over the shared, pooled session of `http_client_manager`.
+
+    python -m benchmarks.http_client_benchmark [--requests 2000] [--concurrency 20]
+
+Starts a local stub of the device API and reports the latency of sequential
+lookups and the throughput of concurrent ones. The stub answers instantly, so
+the difference is the connection setup the pool saves; over TLS or a real
+network it grows.
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+import aiohttp
+from aiohttp import web
+
+from src.fastapi.http_client.client import http_client_manager
+from src.fastapi.rabbitmq_handlers.gps import utils as gps_utils
+
+Lookup = Callable[[str], Awaitable[object]]
+
+
+async def device(request: web.Request) -> web.Response:
+    return web.json_response({"name": f"Truck {request.match_info['device_id']}"})
+
+
+async def start_stub() -> tuple[web.AppRunner, str]:
+    app = web.Application()
+    app.router.add_get("/devices/{device_id}", device)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+    return runner, f"http://127.0.0.1:{port}/devices"
+
+
+def per_call_lookup(base_url: str) -> Lookup:
+    """The lookup as it was: one session, and so one connection, per call."""
+
+    async def lookup(device_id: str) -> object:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{base_url}/{device_id}") as response:
+                return await response.json()
+
+    return lookup
+
+
+async def shared_lookup(device_id: str) -> object:
+    # Bypass the Redis cache: every call goes to the stub
+    return await gps_utils.fetch_device_name.__wrapped__(device_id)  # type: ignore
+
+
+async def sequential_ms(lookup: Lookup, requests: int) -> List[float]:
+    latencies = []
+    for i in range(requests):
+        started = time.perf_counter()
+        await lookup(str(i % 100))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def concurrent_rps(lookup: Lookup, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(i: int) -> None:
+        async with semaphore:
+            await lookup(str(i % 100))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(bounded(i) for i in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+async def run(requests: int, concurrency: int) -> None:
+    runner, base_url = await start_stub()
+    gps_utils.DEVICE_API_URL = base_url
+    await http_client_manager.init_session()
+    lookups = {
+        "session per call": per_call_lookup(base_url),
+        "shared session": shared_lookup,
+    }
+    try:
+        print(
+            f"{'client':<18} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8} "
+            f"{'req/s @' + str(concurrency):>12}"
+        )
+        for name, lookup in lookups.items():
+            latencies = sorted(await sequential_ms(lookup, requests))
+            rps = await concurrent_rps(lookup, requests, concurrency)
+            print(
+                f"{name:<18} {statistics.mean(latencies):>8.3f} "
+                f"{latencies[len(latencies) // 2]:>8.3f} "
+                f"{latencies[int(len(latencies) * 0.99)]:>8.3f} {rps:>12.0f}"
+            )
+    finally:
+        await http_client_manager.close_session()
+        await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    # fetch_device_name logs every lookup; keep the numbers about HTTP
+    logging.disable(logging.CRITICAL)
+    asyncio.run(run(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -34,3 +34,10 @@ CREATE TABLE IF NOT EXISTS idling_hotspots (
   latitude                FLOAT           NOT NULL,
   longitude               FLOAT           NOT NULL
 );
+
+-- Create table for the device directory replica
+CREATE TABLE IF NOT EXISTS devices (
+  device_id     VARCHAR(50)     PRIMARY KEY,
+  name          VARCHAR(100)    NOT NULL,
+  updated_at    TIMESTAMP       DEFAULT CURRENT_TIMESTAMP
+);
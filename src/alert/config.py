@@ -50,10 +50,41 @@ class Settings(BaseSettings):
     SMTP_USER: str = os.getenv("SMTP_USER", "")
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
     SMTP_FROM: str = os.getenv("SMTP_FROM", "alerts@example.com")
+    SMTP_POOL_SIZE: int = int(os.getenv("SMTP_POOL_SIZE", "4"))
+    SMTP_TIMEOUT_SECONDS: float = float(os.getenv("SMTP_TIMEOUT_SECONDS", "10"))
+
+    # Alerts of one recipient and rule are mailed as one digest per
+    # NOTIFY_DIGEST_SECONDS (0 mails each alert), or once it holds
+    # NOTIFY_DIGEST_MAX_ALERTS; failed mails are retried with backoff
+    NOTIFY_DIGEST_SECONDS: float = float(os.getenv("NOTIFY_DIGEST_SECONDS", "60"))
+    NOTIFY_DIGEST_MAX_ALERTS: int = int(os.getenv("NOTIFY_DIGEST_MAX_ALERTS", "100"))
+    NOTIFY_RETRIES: int = int(os.getenv("NOTIFY_RETRIES", "3"))
+    NOTIFY_RETRY_SECONDS: float = float(os.getenv("NOTIFY_RETRY_SECONDS", "2"))
 
     ALERTING_HOST: str = os.getenv("ALERTING_HOST", "alert")
     ALERTING_PORT: int = int(os.getenv("ALERTING_PORT", "8001"))
 
+    # Rules load from a JSON file, else from a JSON string in Redis, else from
+    # `rules.RULES`, and are reloaded when the source changes
+    ALERT_RULES_FILE: str = os.getenv("ALERT_RULES_FILE", "")
+    ALERT_RULES_REDIS_KEY: str = os.getenv("ALERT_RULES_REDIS_KEY", "alert_rules")
+    RULES_RELOAD_SECONDS: float = float(os.getenv("RULES_RELOAD_SECONDS", "30"))
+
+    # Fault suppression windows are shared per fault code, or per device and
+    # fault code; open windows are also remembered in process
+    SUPPRESSION_SCOPE: Literal["code", "device"] = "code"
+    SUPPRESSION_LOCAL_SIZE: int = int(os.getenv("SUPPRESSION_LOCAL_SIZE", "100000"))
+
+    # Received alerts are processed by ALERT_WORKERS workers; beyond
+    # ALERT_QUEUE_SIZE waiting alerts, new ones are acked as `busy`
+    ALERT_WORKERS: int = int(os.getenv("ALERT_WORKERS", "8"))
+    ALERT_QUEUE_SIZE: int = int(os.getenv("ALERT_QUEUE_SIZE", "1000"))
+
+    # `src.alert.launcher` runs ALERT_PROCESSES servers on ALERTING_PORT and
+    # gives them ALERT_DRAIN_SECONDS to finish their alerts on shutdown
+    ALERT_PROCESSES: int = int(os.getenv("ALERT_PROCESSES", "1"))
+    ALERT_DRAIN_SECONDS: float = float(os.getenv("ALERT_DRAIN_SECONDS", "15"))
+
 
 @lru_cache()
 def get_settings() -> Settings:
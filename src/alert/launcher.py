@@ -0,0 +1,100 @@
+"""
+Multi-process alerting service.
+
+Run with `python -m src.alert.launcher`. Starts ALERT_PROCESSES copies of the
+alerting server, all bound to ALERTING_PORT with SO_REUSEPORT, so the kernel
+spreads the producers' connections over them and alert parsing and rule
+matching use as many cores. Suppression windows are claimed in Redis, so a
+fault is suppressed the same way whichever process receives it; counters and
+timers on `/health` and `/metrics` are those of the process that answers.
+
+SIGTERM or SIGINT is forwarded to every child, which stops accepting alerts,
+finishes its queued ones and exits. Children still running after
+ALERT_DRAIN_SECONDS are killed.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing.process import BaseProcess
+from typing import List
+
+from src.alert.config import get_settings
+from src.alert.logging_config import setup_logging
+from src.alert.main import main as serve_alerts
+
+logger = logging.getLogger(__name__)
+
+
+def run_server() -> None:
+    """Entry point of one child process."""
+    setup_logging()
+    asyncio.run(serve_alerts(reuse_port=True))
+
+
+def start_servers(processes: int) -> List[BaseProcess]:
+    # spawn keeps children free of the parent's event loop and connections
+    context = multiprocessing.get_context("spawn")
+    servers: List[BaseProcess] = []
+    for index in range(processes):
+        process = context.Process(target=run_server, name=f"alert-server-{index}")
+        process.start()
+        servers.append(process)
+    return servers
+
+
+def drain(servers: List[BaseProcess], timeout: float) -> None:
+    """Wait up to `timeout` seconds in all for the servers to exit; kill the rest."""
+    deadline = time.monotonic() + timeout
+    for process in servers:
+        process.join(max(0.0, deadline - time.monotonic()))
+    for process in servers:
+        if process.is_alive():
+            logger.warning(f"{process.name} did not drain in time, killing it")
+            process.kill()
+            process.join()
+
+
+def main() -> int:
+    setup_logging()
+    settings = get_settings()
+    processes = max(1, settings.ALERT_PROCESSES)
+    servers = start_servers(processes)
+    logger.info(
+        f"Started {processes} alert server processes on port "
+        f"{settings.ALERTING_PORT}"
+    )
+
+    stopping = False
+
+    def forward_signal(signum, _frame):
+        nonlocal stopping
+        logger.info(f"Received signal {signum}, draining alert servers")
+        stopping = True
+        for process in servers:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, forward_signal)
+    signal.signal(signal.SIGINT, forward_signal)
+
+    exit_code = 0
+    for process in servers:
+        # A server that crashes leaves the others serving the port
+        while process.is_alive() and not stopping:
+            process.join(0.5)
+        if stopping:
+            break
+    if stopping:
+        drain(servers, settings.ALERT_DRAIN_SECONDS)
+    for process in servers:
+        if process.exitcode:
+            logger.error(f"{process.name} exited with code {process.exitcode}")
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,7 +3,7 @@ import json
 import logging
 import signal
 from http import HTTPStatus
-from typing import Awaitable, Optional, Union
+from typing import Any, Awaitable, List, Optional, Union
 
 from websockets.asyncio.server import ServerConnection, serve
 from websockets.datastructures import Headers
@@ -12,9 +12,12 @@ from websockets.http11 import Request, Response
 
 from src.alert.config import get_settings
 from src.alert.logging_config import setup_logging
+from src.alert.metrics import metrics
+from src.alert.notifications import notifier
 from src.alert.redis.redis import redis_manager
+from src.alert.rule_store import rule_store
 from src.alert.schemas import AlertEvent
-from src.alert.utils import process_alert
+from src.alert.workers import alert_workers
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -25,43 +28,98 @@ def process_request(
     connection: ServerConnection, request: Request
 ) -> Union[Response, Awaitable[Optional[Response]], None]:
     if request.path == "/health":
-        return Response(
-            status_code=HTTPStatus.OK, reason_phrase="OK", headers=Headers(), body=b"OK"
-        )
+        health = {
+            "status": "busy" if alert_workers.saturated else "ok",
+            **metrics.snapshot(),
+        }
+        headers = Headers({"Content-Type": "application/json"})
+        return Response(HTTPStatus.OK, "OK", headers, json.dumps(health).encode())
+    if request.path == "/rules":
+        return rules_response(request)
+    if request.path == "/metrics":
+        body = json.dumps(metrics.snapshot()).encode()
+        headers = Headers({"Content-Type": "application/json"})
+        return Response(HTTPStatus.OK, "OK", headers, body)
     return None
 
 
+def rules_response(request: Request) -> Response:
+    """The rule spec producers filter on; 304 if they hold this version."""
+    spec = rule_store.ruleset.spec
+    etag = f'"{spec["version"]}"'
+    headers = Headers(ETag=etag)
+    if request.headers.get("If-None-Match") == etag:
+        return Response(HTTPStatus.NOT_MODIFIED, "Not Modified", headers, b"")
+    headers["Content-Type"] = "application/json"
+    return Response(HTTPStatus.OK, "OK", headers, json.dumps(spec).encode())
+
+
+def id_of(frame: Any) -> Optional[str]:
+    """Correlation ID of a frame that failed validation, if it has one."""
+    if not isinstance(frame, dict):
+        return None
+    value = frame.get("id")
+    return value if isinstance(value, str) else None
+
+
+def frame_id(raw_msg) -> Optional[str]:
+    try:
+        return id_of(json.loads(raw_msg))
+    except ValueError:
+        return None
+
+
+def is_array_frame(raw_msg) -> bool:
+    head = raw_msg.lstrip()[:1]
+    return head in ("[", b"[")
+
+
+def received(event: AlertEvent) -> dict:
+    """Queue the alert for the workers; a full queue acks it as `busy`."""
+    return {
+        "status": "received" if alert_workers.submit(event) else "busy",
+        "event_type": event.event_type,
+        "device_id": event.device_id,
+        "id": event.id,
+    }
+
+
+def rejected(e: Exception, id: Optional[str]) -> dict:
+    logger.error(f"Invalid payload: {e}")
+    return {"status": "error", "reason": str(e), "id": id}
+
+
+def handle_array_frame(raw_msg) -> Union[dict, List[dict]]:
+    """Ack each alert of an array frame on its own, in one array ack."""
+    try:
+        frames = json.loads(raw_msg)
+    except ValueError as e:
+        # No ids to echo; the client fails the whole frame on an ack without one
+        return rejected(e, None)
+    acks = []
+    for frame in frames:
+        try:
+            acks.append(received(AlertEvent.model_validate(frame)))
+        except Exception as e:
+            acks.append(rejected(e, id_of(frame)))
+    return acks
+
+
 async def alerts_handler(websocket: ServerConnection):
     logger.info("Client connected to alert system")
     try:
         async for raw_msg in websocket:
+            if is_array_frame(raw_msg):
+                await websocket.send(json.dumps(handle_array_frame(raw_msg)))
+                continue
+
             try:
                 event = AlertEvent.model_validate_json(raw_msg)
-
             except Exception as e:
-                logger.error(f"Invalid payload: {e}")
-
-                await websocket.send(
-                    json.dumps(
-                        {
-                            "status": "error",
-                            "reason": str(e),
-                        }
-                    )
-                )
+                await websocket.send(json.dumps(rejected(e, frame_id(raw_msg))))
                 continue
 
-            asyncio.create_task(process_alert(event))
-
-            await websocket.send(
-                json.dumps(
-                    {
-                        "status": "received",
-                        "event_type": event.event_type,
-                        "device_id": event.device_id,
-                    }
-                )
-            )
+            await websocket.send(json.dumps(received(event)))
     except ConnectionClosedOK:
         logger.info("Client disconnected cleanly")
     except ConnectionClosedError as e:
@@ -70,25 +128,52 @@ async def alerts_handler(websocket: ServerConnection):
         logger.exception(f"Unexpected handler error: {e}")
 
 
-async def start_alert_server(host: str, port: int, shutdown_future: asyncio.Future):
+async def start_alert_server(
+    host: str, port: int, shutdown_future: asyncio.Future, reuse_port: bool = False
+):
+    """
+    Serve until `shutdown_future` resolves. With `reuse_port`, several
+    processes bind the same port and the kernel spreads connections over
+    them (see `src.alert.launcher`).
+    """
     await redis_manager.init_redis()
+    await rule_store.start()
+    await alert_workers.start()
     logger.info("Redis initialized; alerting service started.")
 
-    async with serve(alerts_handler, host, port, process_request=process_request):
+    async with serve(
+        alerts_handler,
+        host,
+        port,
+        process_request=process_request,
+        reuse_port=reuse_port,
+    ):
         logger.info(f"WebSocket server listening on ws://{host}:{port}")
         await shutdown_future
-        await redis_manager.close_redis()
-        logger.info("Alerting service stopped.")
+    # No more alerts come in; finish the queued ones
+    await alert_workers.stop()
+    # Mail the digests still open
+    await notifier.close()
+    await rule_store.stop()
+    await redis_manager.close_redis()
+    logger.info("Alerting service stopped.")
+
+
+def request_shutdown(shutdown: asyncio.Future) -> None:
+    # Under the launcher a Ctrl+C reaches a child twice: from the terminal
+    # and forwarded by the parent
+    if not shutdown.done():
+        shutdown.set_result(None)
 
 
-async def main():
-    shutdown = asyncio.Future()
+async def main(reuse_port: bool = False):
+    shutdown: asyncio.Future = asyncio.Future()
     loop = asyncio.get_running_loop()
     for sig in (signal.SIGINT, signal.SIGTERM):
-        loop.add_signal_handler(sig, shutdown.set_result, None)
+        loop.add_signal_handler(sig, request_shutdown, shutdown)
 
     port = settings.ALERTING_PORT or 8001
-    await start_alert_server("0.0.0.0", port, shutdown)
+    await start_alert_server("0.0.0.0", port, shutdown, reuse_port=reuse_port)
 
 
 def run_app():
@@ -0,0 +1,94 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterator
+
+
+class Counter:
+    """Monotonic in-process counter."""
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+
+class Timer:
+    """Latency of one stage: totals, plus percentiles of the recent samples."""
+
+    __slots__ = ("count", "total", "max", "recent")
+
+    def __init__(self, window: int = 1024) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def summary(self) -> dict:
+        recent = sorted(self.recent)
+
+        def percentile(p: float) -> float:
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(p * len(recent)))] * 1000
+
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": percentile(0.5),
+            "p99_ms": percentile(0.99),
+            "max_ms": self.max * 1000,
+        }
+
+
+class MetricsRegistry:
+    """
+    Counters, gauges and stage timers of the alerting service, served on
+    /health and /metrics.
+    """
+
+    def __init__(self) -> None:
+        self.counters: Dict[str, Counter] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+        self.timers: Dict[str, Timer] = {}
+
+    def counter(self, name: str) -> Counter:
+        if name not in self.counters:
+            self.counters[name] = Counter()
+        return self.counters[name]
+
+    def timer(self, name: str) -> Timer:
+        if name not in self.timers:
+            self.timers[name] = Timer()
+        return self.timers[name]
+
+    def gauge(self, name: str, read: Callable[[], float]) -> None:
+        """Register a value read lazily on every snapshot."""
+        self.gauges[name] = read
+
+    def snapshot(self) -> dict:
+        return {
+            "counters": {name: c.value for name, c in sorted(self.counters.items())},
+            "gauges": {name: read() for name, read in sorted(self.gauges.items())},
+            "timers": {name: t.summary() for name, t in sorted(self.timers.items())},
+        }
+
+
+metrics = MetricsRegistry()
@@ -1,23 +1,220 @@
+import asyncio
+import json
 import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from email.message import EmailMessage
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+import aiosmtplib
 
 from src.alert.config import get_settings
+from src.alert.metrics import metrics
+from src.alert.rules import AlertRule
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
-async def send_email(to: str, subject: str, body: str) -> None:
-    """
-    Send an email using SMTP settings from config.
-    """
+def build_message(to: str, subject: str, body: str) -> EmailMessage:
     message = EmailMessage()
     message["From"] = settings.SMTP_FROM
     message["To"] = to
     message["Subject"] = subject
     message.set_content(body)
+    return message
+
+
+def rule_key(rule: AlertRule) -> str:
+    """Identifies a rule across reloads, which build new `AlertRule`s."""
+    return json.dumps([rule.event_types, rule.thresholds], sort_keys=True, default=str)
+
+
+def is_permanent(e: Exception) -> bool:
+    """Failures that sending the same mail again cannot fix."""
+    if isinstance(e, aiosmtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(e, aiosmtplib.SMTPResponseException) and e.code >= 500
+
+
+class SMTPPool:
+    """
+    Up to `size` SMTP connections, kept open between mails. A mail goes out
+    on an idle connection when there is one, else on a new one; a connection
+    a send failed on is closed rather than reused.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        size: int,
+        username: str = "",
+        password: str = "",
+        timeout: float = 10.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.slots = asyncio.Semaphore(size)
+        self.idle: List[aiosmtplib.SMTP] = []
+        self.opened = metrics.counter("smtp.connections_opened")
+
+    async def connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            username=self.username or None,
+            password=self.password or None,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        self.opened.inc()
+        return client
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        async with self.slots:
+            client = self.idle.pop() if self.idle else None
+            if client is None or not client.is_connected:
+                client = await self.connect()
+            try:
+                yield client
+            except BaseException:
+                client.close()
+                raise
+            self.idle.append(client)
+
+    async def send(self, message: EmailMessage) -> None:
+        async with self.connection() as client:
+            await client.send_message(message)
+
+    async def close(self) -> None:
+        idle, self.idle = self.idle, []
+        for client in idle:
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+
+
+@dataclass
+class Digest:
+    to: str
+    alerts: List[Tuple[str, str]] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+    def message(self) -> EmailMessage:
+        if len(self.alerts) == 1:
+            subject, body = self.alerts[0]
+            return build_message(self.to, subject, body)
+        subject = f"[{len(self.alerts)} alerts] {self.alerts[0][0]}"
+        body = "\n\n".join(f"{s}\n{b}" for s, b in self.alerts)
+        return build_message(self.to, subject, body)
+
+
+class EmailNotifier:
+    """
+    Mails the alerts a rule matched to the rule's recipient. Alerts of one
+    recipient and rule arriving within `window` seconds of the first go out
+    as one digest, sent early once it holds `max_alerts`, so a storm costs
+    one mail per window instead of one per alert. A mail that fails is sent
+    again up to `retries` times, backing off from `retry_seconds`.
+    """
+
+    def __init__(
+        self,
+        pool: SMTPPool,
+        window: float,
+        max_alerts: int,
+        retries: int,
+        retry_seconds: float,
+    ):
+        self.pool = pool
+        self.window = window
+        self.max_alerts = max_alerts
+        self.retries = retries
+        self.retry_seconds = retry_seconds
+        self.digests: Dict[Tuple[str, str], Digest] = {}
+        self.sending: Set[asyncio.Task] = set()
+        self.alerts = metrics.counter("notifications.alerts")
+        self.sent = metrics.counter("notifications.sent")
+        self.retried = metrics.counter("notifications.retried")
+        self.failed = metrics.counter("notifications.failed")
+        self.send_time = metrics.timer("notifications.send")
+        metrics.gauge(
+            "notifications.pending",
+            lambda: sum(len(d.alerts) for d in self.digests.values()),
+        )
+
+    def notify(self, rule: AlertRule, subject: str, body: str) -> None:
+        self.alerts.inc()
+        key = (rule.email, rule_key(rule))
+        digest = self.digests.get(key)
+        if digest is None:
+            digest = self.digests[key] = Digest(rule.email)
+            if self.window > 0:
+                loop = asyncio.get_running_loop()
+                digest.timer = loop.call_later(self.window, self.flush, key)
+        digest.alerts.append((subject, body))
+        if self.window <= 0 or len(digest.alerts) >= self.max_alerts:
+            self.flush(key)
+
+    def flush(self, key: Tuple[str, str]) -> None:
+        digest = self.digests.pop(key, None)
+        if digest is None:
+            return
+        if digest.timer is not None:
+            digest.timer.cancel()
+        task = asyncio.create_task(self.deliver(digest))
+        self.sending.add(task)
+        task.add_done_callback(self.sending.discard)
+
+    async def deliver(self, digest: Digest) -> None:
+        message = digest.message()
+        for attempt in range(self.retries + 1):
+            try:
+                with self.send_time.time():
+                    await self.pool.send(message)
+            except Exception as e:
+                if is_permanent(e) or attempt == self.retries:
+                    self.failed.inc()
+                    logger.error(f"Failed to send email to {digest.to}: {e}")
+                    return
+                self.retried.inc()
+                logger.warning(f"Email to {digest.to} failed, retrying: {e}")
+                await asyncio.sleep(self.retry_seconds * 2**attempt)
+            else:
+                self.sent.inc()
+                logger.info(f"Email sent to {digest.to}: {message['Subject']}")
+                return
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Send the open digests now, then close the SMTP connections."""
+        for key in list(self.digests):
+            self.flush(key)
+        if self.sending:
+            _, pending = await asyncio.wait(self.sending, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.warning(f"Dropped {len(pending)} unsent emails")
+        await self.pool.close()
+
 
-    try:
-        logger.info(f"Email sent to {to}: {subject}")
-    except Exception as e:
-        logger.error(f"Failed to send email to {to}: {e}")
+notifier = EmailNotifier(
+    SMTPPool(
+        settings.SMTP_HOST,
+        settings.SMTP_PORT,
+        settings.SMTP_POOL_SIZE,
+        settings.SMTP_USER,
+        settings.SMTP_PASSWORD,
+        settings.SMTP_TIMEOUT_SECONDS,
+    ),
+    settings.NOTIFY_DIGEST_SECONDS,
+    settings.NOTIFY_DIGEST_MAX_ALERTS,
+    settings.NOTIFY_RETRIES,
+    settings.NOTIFY_RETRY_SECONDS,
+)
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import os
+from typing import List, Optional, Tuple
+
+from pydantic import TypeAdapter
+
+from src.alert.config import get_settings
+from src.alert.redis.redis import redis_manager
+from src.alert.rules import RULES, AlertRule, RuleSet
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+alert_rules = TypeAdapter(List[AlertRule])
+
+
+def parse_rules(raw: str) -> List[AlertRule]:
+    """Rules from a JSON list of `{"email", "event_types", "thresholds"}`."""
+    return alert_rules.validate_json(raw)
+
+
+class RuleStore:
+    """
+    The compiled rule set the alerts are matched against.
+
+    Rules come from ALERT_RULES_FILE, else from the ALERT_RULES_REDIS_KEY
+    string in Redis, else from `RULES`. The source is polled every
+    RULES_RELOAD_SECONDS and a changed rule list is compiled before it
+    replaces `ruleset`, so an alert is always matched against one complete
+    version. Rules that fail to load leave the current ones in place.
+    """
+
+    def __init__(self) -> None:
+        self.ruleset = RuleSet(RULES)
+        # What the last load read, to skip reloads of unchanged rules
+        self.file_stamp: Optional[Tuple[int, int]] = None
+        self.raw: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    async def read_source(self) -> Optional[str]:
+        """The raw rules if they changed since the last load, else None."""
+        if settings.ALERT_RULES_FILE:
+            stat = os.stat(settings.ALERT_RULES_FILE)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if stamp == self.file_stamp:
+                return None
+            with open(settings.ALERT_RULES_FILE, encoding="utf-8") as f:
+                raw = f.read()
+            self.file_stamp = stamp
+        elif settings.ALERT_RULES_REDIS_KEY and redis_manager.redis_client:
+            raw = await redis_manager.redis_client.get(settings.ALERT_RULES_REDIS_KEY)
+            if raw is None:
+                return None
+        else:
+            return None
+        return None if raw == self.raw else raw
+
+    async def reload(self) -> bool:
+        """Swap in the rules of the source; False if they did not change."""
+        raw = await self.read_source()
+        if raw is None:
+            return False
+        ruleset = RuleSet(parse_rules(raw))
+        self.raw = raw
+        if ruleset.version == self.ruleset.version:
+            return False
+        self.ruleset = ruleset
+        logger.info(
+            f"Loaded {len(ruleset.rules)} alert rules, version {ruleset.version}"
+        )
+        return True
+
+    async def run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Alert rules reload failed: {e}")
+
+    async def start(self) -> None:
+        try:
+            await self.reload()
+        except Exception as e:
+            logger.error(f"Failed to load the alert rules: {e}")
+        if settings.RULES_RELOAD_SECONDS > 0:
+            self.task = asyncio.create_task(self.run(settings.RULES_RELOAD_SECONDS))
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                logger.info("Alert rules reload cancelled.")
+            self.task = None
+
+
+rule_store = RuleStore()
@@ -1,5 +1,8 @@
+import bisect
+import hashlib
+import json
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
 
 from src.alert.schemas import AlertEvent
 
@@ -68,3 +71,213 @@ def matches_rule(event: AlertEvent, rule: AlertRule) -> bool:
                 return False
 
     return True
+
+
+def threshold_condition(key: str, threshold: Any) -> Dict[str, Any]:
+    """One threshold as an explicit `{field, op, value}` condition."""
+    if isinstance(threshold, (int, float)):
+        return {"field": key, "op": "gte", "value": float(threshold)}
+    if isinstance(threshold, list):
+        return {"field": key, "op": "in", "value": threshold}
+    return {"field": key, "op": "eq", "value": threshold}
+
+
+def rule_spec(rules: List[AlertRule]) -> Dict[str, Any]:
+    """
+    The rules as a predicate spec for the producers, without recipients. An
+    event can only match if it passes every condition of some rule of its
+    event type. `version` is a digest of the spec, so it changes with any rule.
+    """
+    spec = [
+        {
+            "event_types": sorted(rule.event_types),
+            "conditions": [
+                threshold_condition(key, threshold)
+                for key, threshold in rule.thresholds.items()
+            ],
+        }
+        for rule in rules
+    ]
+    canonical = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+    version = hashlib.sha256(canonical.encode()).hexdigest()[:16]
+    return {"version": version, "rules": spec}
+
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+def compile_threshold(key: str, threshold: Any) -> Predicate:
+    """One threshold as a typed predicate, with the semantics of `matches_rule`."""
+    if isinstance(threshold, (int, float)):
+        minimum = float(threshold)
+
+        def at_least(data: Dict[str, Any]) -> bool:
+            value = data.get(key)
+            if value is None:
+                return False
+            try:
+                # Written like `matches_rule`, under which NaN passes
+                return not float(value) < minimum
+            except (TypeError, ValueError):
+                return False
+
+        return at_least
+    if isinstance(threshold, list):
+        members = hashable_members(threshold)
+        if members is None:
+            return lambda data: data.get(key) is not None and data[key] in threshold
+
+        def one_of(data: Dict[str, Any]) -> bool:
+            value = data.get(key)
+            try:
+                return value is not None and value in members
+            except TypeError:
+                # Unhashable values compare unequal to hashable members
+                return False
+
+        return one_of
+    return lambda data: data.get(key) is not None and data[key] == threshold
+
+
+def hashable_members(values: List[Any]) -> Optional[FrozenSet[Any]]:
+    try:
+        return frozenset(values)
+    except TypeError:
+        return None
+
+
+class CompiledRule:
+    """
+    A rule with its thresholds compiled. One membership or equality
+    threshold may serve as the rule's index `key`, or failing that one
+    numeric threshold as its `floor`; the other thresholds are left in
+    `predicates`.
+    """
+
+    __slots__ = ("position", "rule", "key", "floor", "predicates")
+
+    def __init__(self, position: int, rule: AlertRule):
+        self.position = position
+        self.rule = rule
+        self.key: Optional[Tuple[str, FrozenSet[Any]]] = None
+        self.floor: Optional[Tuple[str, float]] = None
+        for field, threshold in rule.thresholds.items():
+            values = index_values(threshold)
+            if values is not None:
+                self.key = (field, values)
+                break
+        if self.key is None:
+            for field, threshold in rule.thresholds.items():
+                if isinstance(threshold, (int, float)):
+                    self.floor = (field, float(threshold))
+                    break
+        indexed = (self.key or self.floor or (None,))[0]
+        self.predicates: Tuple[Predicate, ...] = tuple(
+            compile_threshold(field, threshold)
+            for field, threshold in rule.thresholds.items()
+            if field != indexed
+        )
+
+    def matches(self, data: Dict[str, Any]) -> bool:
+        return all(predicate(data) for predicate in self.predicates)
+
+
+def index_values(threshold: Any) -> Optional[FrozenSet[Any]]:
+    """The values a threshold accepts, if a hash lookup can test it."""
+    if isinstance(threshold, (int, float)):
+        return None
+    if isinstance(threshold, list):
+        return hashable_members(threshold)
+    return hashable_members([threshold])
+
+
+class RuleBucket:
+    """
+    The rules of one event type. Rules with an index key are found through
+    `keyed[field][value]`, rules with a floor by bisecting the sorted
+    `floors[field]`; the rest are checked one by one.
+    """
+
+    __slots__ = ("keyed", "floors", "scan")
+
+    def __init__(self, rules: List[CompiledRule]):
+        keyed: Dict[str, Dict[Any, List[CompiledRule]]] = {}
+        by_floor: Dict[str, List[Tuple[float, CompiledRule]]] = {}
+        scan = []
+        for rule in rules:
+            if rule.key is not None:
+                field, values = rule.key
+                by_value = keyed.setdefault(field, {})
+                for value in values:
+                    by_value.setdefault(value, []).append(rule)
+            elif rule.floor is not None:
+                field, minimum = rule.floor
+                by_floor.setdefault(field, []).append((minimum, rule))
+            else:
+                scan.append(rule)
+        self.keyed = keyed
+        self.floors: Dict[str, Tuple[List[float], List[CompiledRule]]] = {}
+        for field, floors in by_floor.items():
+            floors.sort(key=lambda floor: floor[0])
+            self.floors[field] = ([f[0] for f in floors], [f[1] for f in floors])
+        self.scan: Tuple[CompiledRule, ...] = tuple(scan)
+
+    def match(self, data: Dict[str, Any]) -> List[CompiledRule]:
+        matched = [rule for rule in self.scan if rule.matches(data)]
+        for field, (minimums, floored) in self.floors.items():
+            value = data.get(field)
+            if value is None:
+                continue
+            try:
+                numeric = float(value)
+            except (TypeError, ValueError):
+                continue
+            # Every rule whose minimum is at most the value passes its floor
+            passed = floored[: bisect.bisect_right(minimums, numeric)]
+            matched.extend(rule for rule in passed if rule.matches(data))
+        for field, by_value in self.keyed.items():
+            value = data.get(field)
+            if value is None:
+                continue
+            try:
+                candidates = by_value.get(value, ())
+            except TypeError:
+                continue
+            matched.extend(rule for rule in candidates if rule.matches(data))
+        return matched
+
+
+class RuleSet:
+    """
+    Rules compiled once, at load time, into per-event-type buckets. A rule
+    set is never changed after it is built; reloading the rules builds a new
+    one and swaps it in whole.
+    """
+
+    __slots__ = ("rules", "buckets", "spec")
+
+    def __init__(self, rules: List[AlertRule]):
+        self.rules: Tuple[AlertRule, ...] = tuple(rules)
+        by_type: Dict[str, List[CompiledRule]] = {}
+        for position, rule in enumerate(self.rules):
+            compiled = CompiledRule(position, rule)
+            for event_type in dict.fromkeys(rule.event_types):
+                by_type.setdefault(event_type, []).append(compiled)
+        self.buckets = {
+            event_type: RuleBucket(rules) for event_type, rules in by_type.items()
+        }
+        self.spec = rule_spec(list(self.rules))
+
+    @property
+    def version(self) -> str:
+        return str(self.spec["version"])
+
+    def match(self, event: AlertEvent) -> List[AlertRule]:
+        """The rules `event` matches, in the order they were defined."""
+        bucket = self.buckets.get(event.event_type)
+        if bucket is None:
+            return []
+        matched = bucket.match(event.data)
+        if len(matched) > 1:
+            matched.sort(key=lambda rule: rule.position)
+        return [compiled.rule for compiled in matched]
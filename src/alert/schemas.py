@@ -1,4 +1,4 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from pydantic import BaseModel, ConfigDict
 
@@ -11,6 +11,8 @@ class AlertEvent(BaseModel):
     device_name: str
     timestamp: str
     data: Dict[str, Any]
+    # Correlation ID echoed in the ack
+    id: Optional[str] = None
 
     # Allow population from attribute names
     model_config = ConfigDict(from_attributes=True)
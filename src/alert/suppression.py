@@ -0,0 +1,51 @@
+import time
+from typing import Callable, Dict, Optional
+
+from src.alert.config import get_settings
+
+settings = get_settings()
+
+
+def suppression_key(fault_code: str, device_id: Optional[str] = None) -> str:
+    """Per fault code, or per device and fault code with SUPPRESSION_SCOPE=device."""
+    if settings.SUPPRESSION_SCOPE == "device" and device_id is not None:
+        return f"suppression:{device_id}:{fault_code}"
+    return f"suppression:{fault_code}"
+
+
+class SuppressionWindows:
+    """
+    Ends of the suppression windows this process has seen, as Unix times.
+    A key whose window is still open here is suppressed without asking
+    Redis; windows are never shortened, so the answer cannot be stale.
+    Holds at most `max_size` keys, dropping the expired ones first.
+    """
+
+    def __init__(self, max_size: int, clock: Callable[[], float] = time.time):
+        self.max_size = max_size
+        self.clock = clock
+        self.until: Dict[str, float] = {}
+
+    def active(self, key: str) -> bool:
+        until = self.until.get(key)
+        if until is None:
+            return False
+        if until > self.clock():
+            return True
+        del self.until[key]
+        return False
+
+    def remember(self, key: str, until: float) -> None:
+        if key not in self.until and len(self.until) >= self.max_size:
+            self.purge()
+        self.until[key] = until
+
+    def purge(self) -> None:
+        now = self.clock()
+        self.until = {k: until for k, until in self.until.items() if until > now}
+        while len(self.until) >= self.max_size:
+            # Oldest insertion first
+            del self.until[next(iter(self.until))]
+
+
+suppression_windows = SuppressionWindows(settings.SUPPRESSION_LOCAL_SIZE)
@@ -1,42 +1,65 @@
-import asyncio
 import base64
 import logging
+import time
+from typing import Optional
 
-from src.alert.notifications import send_email
+from src.alert.metrics import metrics
+from src.alert.notifications import notifier
 from src.alert.redis.redis import redis_manager
-from src.alert.rules import RULES, matches_rule
+from src.alert.rule_store import rule_store
 from src.alert.schemas import AlertEvent
+from src.alert.suppression import suppression_key, suppression_windows
 
 logger = logging.getLogger(__name__)
 
 
-async def check_suppression_period(fault_code: str, payload: bytes) -> bool:
+async def check_suppression_period(
+    fault_code: str, payload: bytes, device_id: Optional[str] = None
+) -> bool:
+    """
+    True while the fault is within the suppression window an earlier
+    occurrence opened; otherwise opens a window of the payload's last two
+    bytes, in seconds, and returns False.
+    """
+    cache_key = suppression_key(fault_code, device_id)
+    if suppression_windows.active(cache_key):
+        metrics.counter("suppression.local_hit").inc()
+        metrics.counter("suppression.suppressed").inc()
+        logger.info(f"Fault {fault_code} on device {device_id} suppressed")
+        return True
     try:
         last_2_bytes = payload[-2:]
         suppression_secs = int.from_bytes(last_2_bytes, byteorder="big")
 
-        cache_key = f"suppression:{fault_code}"
-        if redis_manager.redis_client:
-            existing = await redis_manager.redis_client.get(cache_key)
-
-            if existing:
+        if redis_manager.redis_client and suppression_secs > 0:
+            until = time.time() + suppression_secs
+            # One round trip: SET NX claims the window, and GET returns the
+            # end of the window already open if the claim failed
+            existing = await redis_manager.redis_client.set(
+                cache_key, str(until), nx=True, ex=suppression_secs, get=True
+            )
+            if existing is not None:
+                try:
+                    suppression_windows.remember(cache_key, float(existing))
+                except ValueError:
+                    # Marker of an older version, without the window end
+                    pass
+                metrics.counter("suppression.suppressed").inc()
                 logger.info(
-                    f"Fault {fault_code} on device suppressed "
-                    f"(still within {suppression_secs}s window)"
+                    f"Fault {fault_code} on device {device_id} suppressed "
+                    f"(still within its window)"
                 )
                 return True
 
-            await redis_manager.redis_client.setex(
-                cache_key, suppression_secs, "suppressed"
-            )
+            suppression_windows.remember(cache_key, until)
             logger.info(
                 f"Started suppression for fault {fault_code} on device "
-                f"for {suppression_secs}s"
+                f"{device_id} for {suppression_secs}s"
             )
-            return False
     except Exception as e:
         logger.error(f"Suppression check error: {str(e)}")
 
+    metrics.counter("suppression.passed").inc()
     return False
 
 
@@ -51,9 +74,13 @@ async def process_alert(event: AlertEvent):
 
         payload_bytes = base64.b64decode(b64_fault_payload)
         try:
-            if await check_suppression_period(
-                fault_code=fault_code, payload=payload_bytes
-            ):
+            with metrics.timer("alerts.suppression").time():
+                suppressed = await check_suppression_period(
+                    fault_code=fault_code,
+                    payload=payload_bytes,
+                    device_id=event.device_id,
+                )
+            if suppressed:
                 logger.info(
                     f"Suppressed fault {fault_code}" f"for device {event.device_id}"
                 )
@@ -62,7 +89,8 @@ async def process_alert(event: AlertEvent):
             logger.warning(f"Suppression check failed: {e}")
 
     # Rule evaluation
-    matching_rules = [rule for rule in RULES if matches_rule(event, rule)]
+    with metrics.timer("alerts.rules").time():
+        matching_rules = rule_store.ruleset.match(event)
     if not matching_rules:
         logger.info(f"No matching rules for event: {event}")
         return
@@ -88,7 +116,7 @@ async def process_alert(event: AlertEvent):
 
             subject = f"Alert: {event.event_type} [{detail}]"
 
-            asyncio.create_task(send_email(rule.email, subject, payload_json))
+            notifier.notify(rule, subject, payload_json)
             logger.info(f"Scheduled notification for {rule.email}")
 
         except Exception as e:
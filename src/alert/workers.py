@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional, Tuple
+
+from src.alert.config import get_settings
+from src.alert.metrics import metrics
+from src.alert.schemas import AlertEvent
+from src.alert.utils import process_alert
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class AlertWorkerPool:
+    """
+    A fixed number of workers processing the received alerts from a bounded
+    queue. `submit` never waits: when the queue is full it returns False and
+    the handler acks the alert as `busy`, which tells the producer to back
+    off and send it again later.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.queue: Optional[asyncio.Queue[Tuple[AlertEvent, float]]] = None
+        self.tasks: List[asyncio.Task] = []
+        self.accepted = metrics.counter("alerts.accepted")
+        self.busy = metrics.counter("alerts.busy")
+        self.failed = metrics.counter("alerts.failed")
+        self.queue_wait = metrics.timer("alerts.queue_wait")
+        self.processing = metrics.timer("alerts.process")
+        metrics.gauge("alerts.queue_depth", lambda: self.depth)
+        metrics.gauge("alerts.queue_size", lambda: self.queue_size)
+
+    @property
+    def depth(self) -> int:
+        return 0 if self.queue is None else self.queue.qsize()
+
+    @property
+    def saturated(self) -> bool:
+        return self.queue is not None and self.queue.full()
+
+    def submit(self, event: AlertEvent) -> bool:
+        if self.queue is None:
+            raise RuntimeError("Alert workers are not running")
+        try:
+            self.queue.put_nowait((event, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.busy.inc()
+            return False
+        self.accepted.inc()
+        return True
+
+    async def run(self, queue: asyncio.Queue) -> None:
+        while True:
+            event, enqueued_at = await queue.get()
+            started_at = time.perf_counter()
+            self.queue_wait.observe(started_at - enqueued_at)
+            try:
+                await process_alert(event)
+            except Exception as e:
+                self.failed.inc()
+                logger.exception(f"Failed to process alert {event.id}: {e}")
+            finally:
+                self.processing.observe(time.perf_counter() - started_at)
+                queue.task_done()
+
+    async def start(self) -> None:
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.tasks = [
+            asyncio.create_task(self.run(self.queue)) for _ in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} alert workers")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Let the workers finish the queued alerts for up to `timeout` seconds."""
+        queue = self.queue
+        if queue is None:
+            return
+        try:
+            await asyncio.wait_for(queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {queue.qsize()} queued alerts")
+        self.queue = None
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+
+alert_workers = AlertWorkerPool(settings.ALERT_WORKERS, settings.ALERT_QUEUE_SIZE)
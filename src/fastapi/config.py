@@ -64,6 +64,103 @@ class Settings(BaseSettings):
     RABBITMQ_USER: str = os.getenv("RABBITMQ_USER", "guest")
     RABBITMQ_PASSWORD: str = os.getenv("RABBITMQ_PASSWORD", "guest")
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def rabbitmq_url(self) -> str:
+        return (
+            f"amqp://{self.RABBITMQ_USER}:{self.RABBITMQ_PASSWORD}@"
+            f"{self.RABBITMQ_HOST}:{self.RABBITMQ_PORT}/"
+        )
+
+    # Ingest settings
+    GPS_BATCH_ENABLED: bool = False
+    GPS_BATCH_SIZE: int = int(os.getenv("GPS_BATCH_SIZE", "100"))
+    GPS_BATCH_LINGER_MS: int = int(os.getenv("GPS_BATCH_LINGER_MS", "50"))
+    CONSUMER_WORKERS: int = int(os.getenv("CONSUMER_WORKERS", "1"))
+    CONSUMER_MAILBOX_SIZE: int = int(os.getenv("CONSUMER_MAILBOX_SIZE", "100"))
+    # GPS and fault queues are consumed on separate channels with their own
+    # prefetch; fault handling keeps FAULT_WORKER_SHARE of CONSUMER_WORKERS
+    GPS_PREFETCH_COUNT: int = int(os.getenv("GPS_PREFETCH_COUNT", "200"))
+    FAULT_PREFETCH_COUNT: int = int(os.getenv("FAULT_PREFETCH_COUNT", "50"))
+    FAULT_WORKER_SHARE: float = float(os.getenv("FAULT_WORKER_SHARE", "0.25"))
+    FAULT_DEDICATED_CONNECTION: bool = False
+    # Disable to leave consumption to the standalone `src.fastapi.worker`
+    INGEST_IN_PROCESS: bool = True
+    INGEST_SHARDS: int = int(os.getenv("INGEST_SHARDS", "1"))
+    # Failed messages wait RETRY_BASE_DELAY_MS * 2^n in retry tier n
+    RETRY_TIERS: int = int(os.getenv("RETRY_TIERS", "4"))
+    RETRY_BASE_DELAY_MS: int = int(os.getenv("RETRY_BASE_DELAY_MS", "1000"))
+    # GPS dedup settles keys locally from a Bloom filter + LRU covering the
+    # last DEDUP_WINDOW_SECONDS, sized for DEDUP_PEAK_EVENTS_PER_SECOND. Keys
+    # it has not seen are confirmed in Redis, unless a sharded worker owns
+    # its devices (INGEST_SHARDS > 1) and DEDUP_EXACT is off
+    DEDUP_WINDOW_SECONDS: int = int(os.getenv("DEDUP_WINDOW_SECONDS", "3600"))
+    DEDUP_LRU_SIZE: int = int(os.getenv("DEDUP_LRU_SIZE", "100000"))
+    DEDUP_PEAK_EVENTS_PER_SECOND: int = int(
+        os.getenv("DEDUP_PEAK_EVENTS_PER_SECOND", "500")
+    )
+    DEDUP_BLOOM_ERROR_RATE: float = float(os.getenv("DEDUP_BLOOM_ERROR_RATE", "0.001"))
+    DEDUP_EXACT: bool = False
+
+    # Shared HTTP client of the device and fault-label APIs
+    HTTP_POOL_SIZE: int = int(os.getenv("HTTP_POOL_SIZE", "100"))
+    HTTP_POOL_SIZE_PER_HOST: int = int(os.getenv("HTTP_POOL_SIZE_PER_HOST", "30"))
+    HTTP_DNS_CACHE_SECONDS: int = int(os.getenv("HTTP_DNS_CACHE_SECONDS", "300"))
+    HTTP_KEEPALIVE_SECONDS: float = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30"))
+    HTTP_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = float(
+        os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "3")
+    )
+    # Global budget of every process towards the device and fault-label APIs,
+    # paced through a token bucket in Redis; a rate of 0 disables pacing
+    DEVICE_API_RATE_PER_SECOND: float = float(
+        os.getenv("DEVICE_API_RATE_PER_SECOND", "20")
+    )
+    DEVICE_API_BURST: int = int(os.getenv("DEVICE_API_BURST", "20"))
+    FAULT_API_RATE_PER_SECOND: float = float(
+        os.getenv("FAULT_API_RATE_PER_SECOND", "20")
+    )
+    FAULT_API_BURST: int = int(os.getenv("FAULT_API_BURST", "20"))
+    # A call waits for its token in the worker slot it holds, so the wait is
+    # kept short; calls that would wait longer go to the retry queues instead
+    UPSTREAM_MAX_WAIT_MS: int = int(os.getenv("UPSTREAM_MAX_WAIT_MS", "250"))
+    # The breaker opens after BREAKER_FAILURE_THRESHOLD failures within
+    # BREAKER_WINDOW_SECONDS and lets one probe through after BREAKER_OPEN_SECONDS
+    BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "10"))
+    BREAKER_WINDOW_SECONDS: float = float(os.getenv("BREAKER_WINDOW_SECONDS", "30"))
+    BREAKER_OPEN_SECONDS: float = float(os.getenv("BREAKER_OPEN_SECONDS", "15"))
+
+    # In-process tier of `cache_api_call` in front of Redis
+    CACHE_LOCAL_SIZE: int = int(os.getenv("CACHE_LOCAL_SIZE", "10000"))
+    CACHE_LOCAL_TTL_SECONDS: float = float(os.getenv("CACHE_LOCAL_TTL_SECONDS", "30"))
+    # Rejections of unknown devices are remembered this long, in process and
+    # in Redis
+    DEVICE_NEGATIVE_TTL_SECONDS: int = int(
+        os.getenv("DEVICE_NEGATIVE_TTL_SECONDS", "60")
+    )
+    UNKNOWN_DEVICE_FILTER_SIZE: int = int(
+        os.getenv("UNKNOWN_DEVICE_FILTER_SIZE", "10000")
+    )
+    # Device names are replicated from the Device API in pages of
+    # DEVICE_SYNC_PAGE_SIZE; 0 disables the periodic sync
+    DEVICE_SYNC_INTERVAL_SECONDS: float = float(
+        os.getenv("DEVICE_SYNC_INTERVAL_SECONDS", "300")
+    )
+    DEVICE_SYNC_PAGE_SIZE: int = int(os.getenv("DEVICE_SYNC_PAGE_SIZE", "500"))
+    # Partial multi-part faults are kept this long after their last segment
+    FAULT_SEGMENT_TTL_SECONDS: int = int(os.getenv("FAULT_SEGMENT_TTL_SECONDS", "3600"))
+    # Reassemble faults in the ingest worker processes instead of Redis; only
+    # honoured with INGEST_SHARDS > 1, where a device sticks to one process
+    FAULT_REASSEMBLY_LOCAL: bool = False
+    FAULT_SWEEP_INTERVAL_SECONDS: float = float(
+        os.getenv("FAULT_SWEEP_INTERVAL_SECONDS", "30")
+    )
+    # The whole fault-label table is reloaded from the Fault API this often;
+    # 0 loads it once at startup
+    FAULT_CATALOG_REFRESH_SECONDS: float = float(
+        os.getenv("FAULT_CATALOG_REFRESH_SECONDS", "3600")
+    )
+
     # Redis settings
     REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
@@ -82,6 +179,30 @@ class Settings(BaseSettings):
     # Alerting settings
     ALERTING_HOST: str = os.getenv("ALERTING_HOST", "http://localhost")
     ALERTING_PORT: int = int(os.getenv("ALERTING_PORT", "8001"))
+    # Long-lived WebSockets to the alerting service, with pipelined acks
+    ALERT_POOL_SIZE: int = int(os.getenv("ALERT_POOL_SIZE", "2"))
+    ALERT_ACK_TIMEOUT_SECONDS: float = float(
+        os.getenv("ALERT_ACK_TIMEOUT_SECONDS", "10")
+    )
+    ALERT_RECONNECT_MAX_SECONDS: float = float(
+        os.getenv("ALERT_RECONNECT_MAX_SECONDS", "5")
+    )
+    # Handlers queue alerts in a bounded outbox that background senders flush
+    # in array frames; a full outbox drops its oldest alert, blocks the
+    # handler, or spills to Redis
+    ALERT_OUTBOX_SIZE: int = int(os.getenv("ALERT_OUTBOX_SIZE", "10000"))
+    ALERT_OUTBOX_BATCH_SIZE: int = int(os.getenv("ALERT_OUTBOX_BATCH_SIZE", "50"))
+    ALERT_OUTBOX_SENDERS: int = int(os.getenv("ALERT_OUTBOX_SENDERS", "2"))
+    ALERT_OUTBOX_OVERFLOW: Literal["drop_oldest", "block", "spill"] = "drop_oldest"
+    ALERT_OUTBOX_RETRY_SECONDS: float = float(
+        os.getenv("ALERT_OUTBOX_RETRY_SECONDS", "1")
+    )
+    # Alerts no rule can match are dropped before queueing, using the rule
+    # spec the alerting service publishes on /rules
+    ALERT_PREFILTER_ENABLED: bool = True
+    ALERT_RULES_REFRESH_SECONDS: float = float(
+        os.getenv("ALERT_RULES_REFRESH_SECONDS", "60")
+    )
 
     TIMEZONE: str = os.getenv("TIMEZONE", "Asia/Ho_Chi_Minh")
 
@@ -0,0 +1,31 @@
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+
+class DeadLetterException(HTTPException):
+    """Base exception class for dead-letter queue errors."""
+
+    status_code = HTTPStatus.INTERNAL_SERVER_ERROR
+    message = "An error occurred while handling the dead-letter queue."
+
+    def __init__(
+        self,
+        status_code: HTTPStatus = HTTPStatus.INTERNAL_SERVER_ERROR,
+        message: str = "An error occurred while handling the dead-letter queue.",
+    ):
+        self.status_code = status_code
+        self.message = message or self.message
+        super().__init__(status_code=status_code, detail=self.message)
+
+
+class DeadLetterQueueNotFoundException(DeadLetterException):
+    """Exception for queues that have no dead-letter queue."""
+
+    status_code = HTTPStatus.NOT_FOUND
+    message = "Dead-letter queue does not exist."
+
+    def __init__(self, queue_name: str):
+        self.queue_name = queue_name
+        message = f"{self.message} Queue: {queue_name}"
+        super().__init__(status_code=self.status_code, message=message)
@@ -0,0 +1,72 @@
+import logging
+from http import HTTPStatus
+
+from fastapi import APIRouter, Depends, Path, Query
+from src.fastapi.config import get_settings
+from src.fastapi.dead_letters.exceptions import (
+    DeadLetterException,
+    DeadLetterQueueNotFoundException,
+)
+from src.fastapi.dead_letters.schemas import (
+    DeadLetterReplayResponse,
+    DeadLetterStatsResponse,
+)
+from src.fastapi.dead_letters.services import DeadLetterService
+from src.fastapi.middleware.auth import validate_api_key
+from src.fastapi.rabbitmq_handlers.retry import dead_letter_queue_name
+
+logger = logging.getLogger(__name__)
+dead_letters_router = APIRouter(prefix="/dead_letters", tags=["Dead Letters"])
+
+dead_letter_service = DeadLetterService(get_settings().rabbitmq_url)
+
+QUEUE_NAME_PATTERN = r"^(gps|fault)_queue(\.\d+)?$"
+
+
+@dead_letters_router.get(
+    "/{queue_name}",
+    response_model=DeadLetterStatsResponse,
+    status_code=HTTPStatus.OK,
+)
+async def get_dead_letter_stats(
+    queue_name: str = Path(..., pattern=QUEUE_NAME_PATTERN),
+    _: str = Depends(validate_api_key),
+):
+    logger.info(f"Request dead-letter stats for {queue_name}")
+    try:
+        message_count = await dead_letter_service.count(queue_name)
+    except DeadLetterQueueNotFoundException as e:
+        logger.error("Error: %s", e)
+        raise e
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        raise DeadLetterException(message=str(e))
+    return DeadLetterStatsResponse(
+        queue_name=queue_name,
+        dead_letter_queue=dead_letter_queue_name(queue_name),
+        message_count=message_count,
+    )
+
+
+@dead_letters_router.post(
+    "/{queue_name}/replay",
+    response_model=DeadLetterReplayResponse,
+    status_code=HTTPStatus.OK,
+)
+async def replay_dead_letters(
+    queue_name: str = Path(..., pattern=QUEUE_NAME_PATTERN),
+    limit: int = Query(100, ge=1, le=10000),
+    _: str = Depends(validate_api_key),
+):
+    logger.info(f"Replay up to {limit} dead letters onto {queue_name}")
+    try:
+        replayed, remaining = await dead_letter_service.replay(queue_name, limit)
+    except DeadLetterQueueNotFoundException as e:
+        logger.error("Error: %s", e)
+        raise e
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        raise DeadLetterException(message=str(e))
+    return DeadLetterReplayResponse(
+        queue_name=queue_name, replayed=replayed, remaining=remaining
+    )
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+
+
+class DeadLetterStatsResponse(BaseModel):
+    """Schema for the number of messages parked in a dead-letter queue."""
+
+    queue_name: str
+    dead_letter_queue: str
+    message_count: int
+
+
+class DeadLetterReplayResponse(BaseModel):
+    """Schema for the result of a dead-letter replay."""
+
+    queue_name: str
+    replayed: int
+    remaining: int
@@ -0,0 +1,73 @@
+import logging
+from typing import Tuple
+
+import aio_pika
+from aio_pika.abc import AbstractChannel, AbstractQueue
+from aiormq.exceptions import ChannelNotFoundEntity
+
+from src.fastapi.dead_letters.exceptions import DeadLetterQueueNotFoundException
+from src.fastapi.rabbitmq_handlers.retry import (
+    LAST_ERROR_HEADER,
+    RETRY_COUNT_HEADER,
+    dead_letter_queue_name,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class DeadLetterService:
+    """Inspects dead-letter queues and moves their messages back for replay."""
+
+    def __init__(self, rabbitmq_url: str):
+        self.rabbitmq_url = rabbitmq_url
+
+    async def _get_queue(
+        self, channel: AbstractChannel, queue_name: str
+    ) -> AbstractQueue:
+        try:
+            # Passive declare: fail instead of creating an unknown queue
+            return await channel.declare_queue(
+                dead_letter_queue_name(queue_name), passive=True
+            )
+        except ChannelNotFoundEntity:
+            raise DeadLetterQueueNotFoundException(queue_name)
+
+    async def count(self, queue_name: str) -> int:
+        connection = await aio_pika.connect_robust(self.rabbitmq_url)
+        async with connection:
+            channel = await connection.channel()
+            queue = await self._get_queue(channel, queue_name)
+            return queue.declaration_result.message_count or 0
+
+    async def replay(self, queue_name: str, limit: int) -> Tuple[int, int]:
+        """
+        Republish up to `limit` dead letters onto their original queue with a
+        fresh retry budget. Returns the number replayed and the number left.
+        """
+        connection = await aio_pika.connect_robust(self.rabbitmq_url)
+        async with connection:
+            channel = await connection.channel()
+            queue = await self._get_queue(channel, queue_name)
+            replayed = 0
+            while replayed < limit:
+                message = await queue.get(no_ack=False, fail=False)
+                if message is None:
+                    break
+                headers = dict(message.headers or {})
+                headers.pop(RETRY_COUNT_HEADER, None)
+                headers.pop(LAST_ERROR_HEADER, None)
+                await channel.default_exchange.publish(
+                    aio_pika.Message(
+                        body=message.body,
+                        headers=headers,
+                        content_type=message.content_type,
+                        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                    ),
+                    routing_key=queue_name,
+                )
+                await message.ack()
+                replayed += 1
+
+            remaining = await self._get_queue(channel, queue_name)
+            logger.info(f"Replayed {replayed} dead letters onto {queue_name}")
+            return replayed, remaining.declaration_result.message_count or 0
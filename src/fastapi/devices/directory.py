@@ -0,0 +1,157 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.fastapi.config import get_settings
+from src.fastapi.database.database import DatabaseManager
+from src.fastapi.devices.exceptions import DeviceDiscardException, DeviceSyncException
+from src.fastapi.devices.repositories import DeviceRepository, IDeviceRepository
+from src.fastapi.devices.schemas import DeviceRecord
+from src.fastapi.http_client.client import http_client_manager
+from src.fastapi.http_client.guard import device_api_guard
+from src.fastapi.metrics.registry import metrics
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+device_records = TypeAdapter(List[DeviceRecord])
+
+
+async def fetch_device_page(
+    page: int, page_size: int, updated_since: Optional[datetime] = None
+) -> List[DeviceRecord]:
+    """
+    One page of `GET DEVICE_API_URL?page=&page_size=[&updated_since=]`. The
+    body is a list of `{"device_id" | "id", "name"}` objects, bare or under
+    `items`. Pages share the budget of `device_api_guard` with the lookups.
+    """
+    params = {"page": str(page), "page_size": str(page_size)}
+    if updated_since is not None:
+        params["updated_since"] = updated_since.isoformat()
+    session = await http_client_manager.get_session()
+    url = settings.DEVICE_API_URL
+    async with device_api_guard.call(), session.get(url, params=params) as response:
+        if response.status != 200:
+            raise DeviceSyncException(page, response.status, await response.text())
+        data = await response.json()
+    if isinstance(data, dict):
+        data = data.get("items", [])
+    return device_records.validate_python(data)
+
+
+class DeviceDirectory:
+    """
+    In-memory replica of the device names, backed by the `devices` table.
+
+    `start` loads the table and runs a background job that pulls the Device
+    API in pages every DEVICE_SYNC_INTERVAL_SECONDS, asking only for devices
+    updated since the previous sync. Names the consumers had to fetch one by
+    one are learned on the way and stored with the next sync.
+    """
+
+    def __init__(self, repo: IDeviceRepository):
+        self.repo = repo
+        self.names: Dict[str, str] = {}
+        self.pending: Dict[str, str] = {}
+        self.synced_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+        self.hits = metrics.counter("device_directory.hit")
+        self.misses = metrics.counter("device_directory.miss")
+        metrics.gauge("device_directory.devices", lambda: len(self.names))
+
+    def get(self, device_id: str) -> Optional[str]:
+        name = self.names.get(device_id)
+        if name is None:
+            self.misses.inc()
+        else:
+            self.hits.inc()
+        return name
+
+    def learn(self, device_id: str, name: str) -> None:
+        """Record a name resolved through the Device API."""
+        if self.names.get(device_id) != name:
+            self.names[device_id] = name
+            self.pending[device_id] = name
+
+    async def discard(self, device_id: str) -> None:
+        """
+        Forget a device's name, in memory and in the `devices` table, so that
+        a restart does not load it back; the next lookup asks the Device API.
+        """
+        self.names.pop(device_id, None)
+        self.pending.pop(device_id, None)
+        try:
+            async with await DatabaseManager.get_client() as db:
+                await self.repo.delete_name(db, device_id)
+        except Exception as e:
+            logger.error(f"Failed to delete the stored name of {device_id}: {e}")
+            raise DeviceDiscardException(device_id, str(e))
+
+    async def load(self, db: AsyncSession) -> None:
+        self.names.update(await self.repo.fetch_names(db))
+        logger.info(f"Loaded {len(self.names)} devices into the directory")
+
+    async def sync(self, db: AsyncSession) -> int:
+        """Pull new and changed devices from the Device API and store them."""
+        started_at = datetime.now(timezone.utc)
+        page_size = settings.DEVICE_SYNC_PAGE_SIZE
+        changed: Dict[str, str] = {}
+        page = 1
+        while True:
+            records = await fetch_device_page(page, page_size, self.synced_at)
+            for record in records:
+                changed[record.device_id] = record.name
+            if len(records) < page_size:
+                break
+            page += 1
+
+        self.names.update(changed)
+        # Names learned while the upsert runs wait for the next sync
+        pending, self.pending = self.pending, {}
+        changed.update(pending)
+        try:
+            await self.repo.upsert_names(db, changed)
+        except BaseException:
+            self.pending = {**pending, **self.pending}
+            raise
+        self.synced_at = started_at
+        logger.info(f"Synced {len(changed)} devices in {page} pages")
+        return len(changed)
+
+    async def run(self, interval: float) -> None:
+        while True:
+            try:
+                async with await DatabaseManager.get_client() as db:
+                    await self.sync(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Device directory sync failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def start(self) -> None:
+        try:
+            async with await DatabaseManager.get_client() as db:
+                await self.load(db)
+        except Exception as e:
+            logger.error(f"Failed to load the device directory: {e}")
+        if settings.DEVICE_SYNC_INTERVAL_SECONDS > 0:
+            self.task = asyncio.create_task(
+                self.run(settings.DEVICE_SYNC_INTERVAL_SECONDS)
+            )
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                logger.info("Device directory sync cancelled.")
+            self.task = None
+
+
+device_directory = DeviceDirectory(DeviceRepository())
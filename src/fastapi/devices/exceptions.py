@@ -0,0 +1,39 @@
+class DeviceDirectoryException(Exception):
+    """Base exception class for device directory errors."""
+
+    message = "An error occurred in the device directory."
+
+    def __init__(self, message: str = "An error occurred in the device directory."):
+        self.message = message or self.message
+        super().__init__(self.message)
+
+
+class DeviceSyncException(DeviceDirectoryException):
+    """Exception for failed bulk reads of the Device API."""
+
+    message = "Failed to sync devices from the Device API."
+
+    def __init__(self, page: int, status_code: int = -1, details: str = ""):
+        self.page = page
+        self.status_code = status_code
+        self.details = details
+        message = f"{self.message} Page: {page}"
+        if status_code != -1:
+            message += f", Status Code: {status_code}"
+        if details != "":
+            message += f" Details: {details}"
+        super().__init__(message)
+
+
+class DeviceDiscardException(DeviceDirectoryException):
+    """Exception for failed removals of a stored device name."""
+
+    message = "Failed to remove a device from the directory."
+
+    def __init__(self, device_id: str, details: str = ""):
+        self.device_id = device_id
+        self.details = details
+        message = f"{self.message} Device ID: {device_id}"
+        if details != "":
+            message += f" Details: {details}"
+        super().__init__(message)
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from sqlalchemy import TIMESTAMP, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.fastapi.database.database import Base
+
+
+class DeviceModel(Base):
+    __tablename__ = "devices"
+
+    device_id: Mapped[str] = mapped_column(String(50), primary_key=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP, server_default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,50 @@
+from abc import ABC, abstractmethod
+from typing import Dict
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.fastapi.devices.models import DeviceModel
+
+# Two bind parameters per row, well below the PostgreSQL limit of 32767
+UPSERT_CHUNK_SIZE = 1000
+
+
+class IDeviceRepository(ABC):
+    @abstractmethod
+    async def fetch_names(self, db: AsyncSession) -> Dict[str, str]:
+        pass
+
+    @abstractmethod
+    async def upsert_names(self, db: AsyncSession, names: Dict[str, str]) -> None:
+        pass
+
+    @abstractmethod
+    async def delete_name(self, db: AsyncSession, device_id: str) -> None:
+        pass
+
+
+class DeviceRepository(IDeviceRepository):
+    async def fetch_names(self, db: AsyncSession) -> Dict[str, str]:
+        q = await db.execute(select(DeviceModel.device_id, DeviceModel.name))
+        return {device_id: name for device_id, name in q.all()}
+
+    async def upsert_names(self, db: AsyncSession, names: Dict[str, str]) -> None:
+        if not names:
+            return
+        rows = [{"device_id": d, "name": name} for d, name in names.items()]
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            end = start + UPSERT_CHUNK_SIZE
+            stmt = insert(DeviceModel).values(rows[start:end])
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["device_id"],
+                    set_={"name": stmt.excluded.name, "updated_at": func.now()},
+                )
+            )
+        await db.commit()
+
+    async def delete_name(self, db: AsyncSession, device_id: str) -> None:
+        await db.execute(delete(DeviceModel).where(DeviceModel.device_id == device_id))
+        await db.commit()
@@ -0,0 +1,6 @@
+from pydantic import AliasChoices, BaseModel, Field
+
+
+class DeviceRecord(BaseModel):
+    device_id: str = Field(validation_alias=AliasChoices("device_id", "id"))
+    name: str
@@ -0,0 +1,55 @@
+import logging
+from typing import Optional
+
+import aiohttp
+
+from src.fastapi.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPClientManager:
+    """
+    One `aiohttp.ClientSession` shared by the device and fault-label
+    fetchers, so lookups reuse pooled keep-alive connections instead of
+    opening a new connection per call.
+    """
+
+    def __init__(self) -> None:
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def init_session(self) -> aiohttp.ClientSession:
+        """Open the shared session"""
+        settings = get_settings()
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_POOL_SIZE,
+            limit_per_host=settings.HTTP_POOL_SIZE_PER_HOST,
+            ttl_dns_cache=settings.HTTP_DNS_CACHE_SECONDS,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_SECONDS,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=settings.HTTP_TIMEOUT_SECONDS,
+            connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+        )
+        self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        logger.info("HTTP client session initialized")
+        return self.session
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """
+        The shared session, opened on first use for callers running outside
+        the API lifespan or the ingest worker.
+        """
+        if self.session is None or self.session.closed:
+            return await self.init_session()
+        return self.session
+
+    async def close_session(self):
+        """Close the shared session and its pooled connections"""
+        if self.session:
+            await self.session.close()
+            logger.info("HTTP client session closed")
+            self.session = None
+
+
+http_client_manager = HTTPClientManager()
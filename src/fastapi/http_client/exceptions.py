@@ -0,0 +1,31 @@
+from src.fastapi.rabbitmq_handlers.exceptions import RetryableEventException
+
+
+class UpstreamException(Exception):
+    """Base exception class for calls held back before reaching an upstream."""
+
+    message = "The upstream API was not called."
+
+    def __init__(self, upstream: str, details: str = ""):
+        self.upstream = upstream
+        self.details = details
+        message = f"{self.message} Upstream: {upstream}"
+        if details != "":
+            message += f" Details: {details}"
+        super().__init__(message)
+
+
+class CircuitOpenException(UpstreamException, RetryableEventException):
+    """Exception for calls failed fast while the upstream is unhealthy."""
+
+    message = "Circuit breaker is open."
+
+
+class UpstreamThrottledException(UpstreamException, RetryableEventException):
+    """Exception for calls that would wait too long for a token."""
+
+    message = "Upstream budget exhausted."
+
+    def __init__(self, upstream: str, wait_ms: int):
+        self.wait_ms = wait_ms
+        super().__init__(upstream, f"next token in {wait_ms} ms")
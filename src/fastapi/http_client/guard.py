@@ -0,0 +1,251 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator
+
+import aiohttp
+
+from src.fastapi.config import get_settings
+from src.fastapi.http_client.exceptions import (
+    CircuitOpenException,
+    UpstreamThrottledException,
+)
+from src.fastapi.metrics.registry import metrics
+from src.fastapi.rabbitmq_handlers.exceptions import RetryableEventException
+from src.fastapi.redis.redis import redis_manager
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# KEYS: bucket, open, half_open, probe
+# ARGV: tokens per second, burst, max wait in ms, probe lease in ms
+# Returns {verdict, wait in ms}. Tokens may go negative: a caller that gets
+# one of them reserved it and sleeps for `wait` before calling.
+ACQUIRE_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+  return {2, 0}
+end
+local verdict = 0
+if redis.call('EXISTS', KEYS[3]) == 1 then
+  if not redis.call('SET', KEYS[4], '1', 'NX', 'PX', ARGV[4]) then
+    return {2, 0}
+  end
+  verdict = 1
+end
+local rate = tonumber(ARGV[1]) / 1000
+if rate <= 0 then
+  return {verdict, 0}
+end
+local burst = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens < 1 then
+  wait = math.ceil((1 - tokens) / rate)
+end
+if wait > tonumber(ARGV[3]) then
+  if verdict == 1 then
+    redis.call('DEL', KEYS[4])
+  end
+  return {3, wait}
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - 1), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate) + wait + 1000)
+return {verdict, wait}
+"""
+
+# KEYS: failures, open, half_open, probe
+# ARGV: threshold, window in ms, open time in ms, 1 if the call was the probe
+# Returns 1 if the breaker opened.
+FAILURE_SCRIPT = """
+local failures = redis.call('INCR', KEYS[1])
+if failures == 1 then
+  redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+if ARGV[4] ~= '1' and failures < tonumber(ARGV[1]) then
+  return 0
+end
+redis.call('SET', KEYS[2], '1', 'PX', ARGV[3])
+redis.call('SET', KEYS[3], '1', 'PX', tonumber(ARGV[3]) + tonumber(ARGV[2]))
+redis.call('DEL', KEYS[1], KEYS[4])
+return 1
+"""
+
+# Verdict of ACQUIRE_SCRIPT for a call past the maximum wait
+OVER_BUDGET = 3
+# Failures that count against the upstream; other errors are answers
+UPSTREAM_FAILURES = (RetryableEventException, aiohttp.ClientError, asyncio.TimeoutError)
+
+
+class BreakerState(IntEnum):
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+class UpstreamGuard:
+    """
+    Client-side protection of one upstream API, shared by every process
+    through Redis.
+
+    A token bucket of `rate` tokens per second, holding up to `burst`, paces
+    the calls: a caller reserves the next token and sleeps until it is due,
+    or fails with `UpstreamThrottledException` when that is more than
+    `max_wait_ms` away. The sleep holds the caller's worker slot, so
+    `max_wait_ms` stays small and longer waits are left to the retry queues.
+
+    A circuit breaker opens after `failure_threshold` failures within
+    `failure_window` seconds and fails every call fast with
+    `CircuitOpenException` for `open_seconds`; then one probe call at a time
+    is let through, closing it on success and reopening it on failure.
+
+    The guard fails open: without Redis calls go straight through.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int,
+        max_wait_ms: int,
+        failure_threshold: int,
+        failure_window: float,
+        open_seconds: float,
+    ):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_wait_ms = max_wait_ms
+        self.failure_threshold = failure_threshold
+        self.failure_window_ms = int(failure_window * 1000)
+        self.open_ms = int(open_seconds * 1000)
+        prefix = f"upstream:{name}"
+        self.bucket_key = f"{prefix}:bucket"
+        self.failures_key = f"{prefix}:failures"
+        self.open_key = f"{prefix}:open"
+        self.half_open_key = f"{prefix}:half_open"
+        self.probe_key = f"{prefix}:probe"
+        # Last state this process saw
+        self.state = BreakerState.CLOSED
+
+        self.throttled = metrics.counter(f"upstream.{name}.throttled")
+        self.throttle_wait_ms = metrics.counter(f"upstream.{name}.throttle_wait_ms")
+        self.over_budget = metrics.counter(f"upstream.{name}.over_budget")
+        self.rejected = metrics.counter(f"upstream.{name}.rejected")
+        self.failures = metrics.counter(f"upstream.{name}.failure")
+        self.opened = metrics.counter(f"upstream.{name}.opened")
+        metrics.gauge(f"upstream.{name}.breaker_state", lambda: int(self.state))
+
+    async def acquire(self) -> bool:
+        """
+        Wait for a token. Returns True if the call is the half-open probe.
+        """
+        if redis_manager.redis_client is None:
+            return False
+        try:
+            reply = await redis_manager.script(ACQUIRE_SCRIPT)(
+                keys=[
+                    self.bucket_key,
+                    self.open_key,
+                    self.half_open_key,
+                    self.probe_key,
+                ],
+                args=[self.rate, self.burst, self.max_wait_ms, self.open_ms],
+            )
+        except Exception as e:
+            logger.error(f"Failed to acquire a token for {self.name}: {e}")
+            return False
+        verdict, wait_ms = int(reply[0]), int(reply[1])
+        if verdict == BreakerState.OPEN:
+            self.state = BreakerState.OPEN
+            self.rejected.inc()
+            raise CircuitOpenException(self.name)
+        if verdict == OVER_BUDGET:
+            self.over_budget.inc()
+            raise UpstreamThrottledException(self.name, wait_ms)
+        self.state = BreakerState(verdict)
+        if wait_ms > 0:
+            self.throttled.inc()
+            self.throttle_wait_ms.inc(wait_ms)
+            await asyncio.sleep(wait_ms / 1000)
+        return verdict == BreakerState.HALF_OPEN
+
+    async def record_failure(self, probe: bool) -> None:
+        self.failures.inc()
+        if redis_manager.redis_client is None:
+            return
+        try:
+            opened = await redis_manager.script(FAILURE_SCRIPT)(
+                keys=[
+                    self.failures_key,
+                    self.open_key,
+                    self.half_open_key,
+                    self.probe_key,
+                ],
+                args=[
+                    self.failure_threshold,
+                    self.failure_window_ms,
+                    self.open_ms,
+                    int(probe),
+                ],
+            )
+        except Exception as e:
+            logger.error(f"Failed to record a failure of {self.name}: {e}")
+            return
+        if int(opened):
+            logger.warning(f"Circuit breaker of {self.name} opened")
+            self.state = BreakerState.OPEN
+            self.opened.inc()
+
+    async def record_success(self, probe: bool) -> None:
+        """Only a successful probe writes to Redis: it closes the breaker."""
+        if not probe or redis_manager.redis_client is None:
+            return
+        try:
+            await redis_manager.redis_client.delete(
+                self.half_open_key, self.probe_key, self.failures_key
+            )
+        except Exception as e:
+            logger.error(f"Failed to close the breaker of {self.name}: {e}")
+            return
+        logger.info(f"Circuit breaker of {self.name} closed")
+        self.state = BreakerState.CLOSED
+
+    @asynccontextmanager
+    async def call(self) -> AsyncIterator[None]:
+        """Guard the calls of the block, recording how the upstream answered."""
+        probe = await self.acquire()
+        try:
+            yield
+        except UPSTREAM_FAILURES:
+            await self.record_failure(probe)
+            raise
+        except Exception:
+            await self.record_success(probe)
+            raise
+        await self.record_success(probe)
+
+
+device_api_guard = UpstreamGuard(
+    "device_api",
+    rate=settings.DEVICE_API_RATE_PER_SECOND,
+    burst=settings.DEVICE_API_BURST,
+    max_wait_ms=settings.UPSTREAM_MAX_WAIT_MS,
+    failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+    failure_window=settings.BREAKER_WINDOW_SECONDS,
+    open_seconds=settings.BREAKER_OPEN_SECONDS,
+)
+fault_api_guard = UpstreamGuard(
+    "fault_api",
+    rate=settings.FAULT_API_RATE_PER_SECOND,
+    burst=settings.FAULT_API_BURST,
+    max_wait_ms=settings.UPSTREAM_MAX_WAIT_MS,
+    failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+    failure_window=settings.BREAKER_WINDOW_SECONDS,
+    open_seconds=settings.BREAKER_OPEN_SECONDS,
+)
@@ -18,6 +18,24 @@ idling_repo: IdlingDataRepository = IdlingDataRepository()
 class IdlingEventDetector:
     async def process_event(self, db_session: AsyncSession, event: GPSEventResponse):
         idling_event = await self.get_saved_idling_events_from_cache(event.device_id)
+        updated = await self.apply_event(db_session, idling_event, event)
+        if updated is not None:
+            await self.save_idling_event_to_cache(event.device_id, updated)
+        elif idling_event:
+            # Clear the saved idling event
+            await self.clear_idling_event_cache(event.device_id)
+
+    async def apply_event(
+        self,
+        db_session: AsyncSession,
+        idling_event: Optional[IdlingDetectedEvent],
+        event: GPSEventResponse,
+    ) -> Optional[IdlingDetectedEvent]:
+        """
+        Advance the idling state of a device by one GPS event, without any
+        Redis I/O. Returns the idling event to cache, or None once the device
+        is no longer idling, in which case the finished event is stored.
+        """
         if event.power_on and event.speed == 0:
             logger.info(f"Vehicle {event.device_id} starts idling")
             # Device is idling
@@ -31,17 +49,15 @@ class IdlingEventDetector:
                     longitude=event.longitude,
                 )
             idling_event.end_time = event.timestamp
-            await self.save_idling_event_to_cache(event.device_id, idling_event)
-        else:
-            logger.info("abcdxyz")
-            if idling_event:
-                logger.info(f"Vehicle {event.device_id} is no longer idling")
-                # Device is no longer idling, save the event
-                await idling_repo.save_idling_event(
-                    db_session=db_session, idling_event=idling_event
-                )
-                # Clear the saved idling event
-                await self.clear_idling_event_cache(event.device_id)
+            return idling_event
+
+        if idling_event:
+            logger.info(f"Vehicle {event.device_id} is no longer idling")
+            # Device is no longer idling, save the event
+            await idling_repo.save_idling_event(
+                db_session=db_session, idling_event=idling_event
+            )
+        return None
 
     def idling_key(self, device_id: str) -> str:
         return f"idling_events:{device_id}"
@@ -53,23 +69,28 @@ class IdlingEventDetector:
         saved_event_str = await redis_manager.redis_client.get(key)
         if saved_event_str:
             logger.info(f"Found cached idling of vehicle {device_id}")
-            saved_event = json.loads(saved_event_str)
-            return cast(
-                IdlingDetectedEvent, IdlingDetectedEvent.model_validate(saved_event)
-            )
+            return self.deserialize_idling_event(saved_event_str)
         return None
 
-    async def save_idling_event_to_cache(
-        self, device_id: str, event: IdlingDetectedEvent
-    ):
-        key = self.idling_key(device_id)
-
+    def serialize_idling_event(self, event: IdlingDetectedEvent) -> str:
         def custom_serializer(obj):
             if isinstance(obj, datetime):
                 return obj.isoformat()
             return None
 
-        serialized = json.dumps(event.model_dump(), default=custom_serializer)
+        return json.dumps(event.model_dump(), default=custom_serializer)
+
+    def deserialize_idling_event(self, saved_event_str: str) -> IdlingDetectedEvent:
+        saved_event = json.loads(saved_event_str)
+        return cast(
+            IdlingDetectedEvent, IdlingDetectedEvent.model_validate(saved_event)
+        )
+
+    async def save_idling_event_to_cache(
+        self, device_id: str, event: IdlingDetectedEvent
+    ):
+        key = self.idling_key(device_id)
+        serialized = self.serialize_idling_event(event)
         await redis_manager.redis_client.set(key, serialized)
         logger.info(f"Save idling event to cache with key: {key}")
 
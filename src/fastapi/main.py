@@ -1,6 +1,7 @@
 import asyncio
 import logging
 from contextlib import asynccontextmanager
+from functools import partial
 from http import HTTPStatus
 
 import aio_pika
@@ -15,14 +16,37 @@ from src.fastapi.config import get_settings
 from src.fastapi.daily_summary.repositories import DailySummaryRepository
 from src.fastapi.daily_summary.scheduler import DailySummaryScheduler
 from src.fastapi.database.database import Base, DatabaseManager, db, engine
+from src.fastapi.dead_letters.routes import dead_letters_router
+from src.fastapi.devices.directory import device_directory
 from src.fastapi.fleet_efficiency.routes import fleet_efficiency_router
 from src.fastapi.gps_devices.routes import gps_router
 from src.fastapi.health_check.routes import health_router
+from src.fastapi.http_client.client import http_client_manager
 from src.fastapi.idling_hotspots.routes import idling_hotspots_router
 from src.fastapi.logging_config import setup_logging
+from src.fastapi.metrics.routes import metrics_router
+from src.fastapi.rabbitmq_handlers.batching import collect_batch
+from src.fastapi.rabbitmq_handlers.fault.catalog import fault_catalog
 from src.fastapi.rabbitmq_handlers.fault.handler import handle_fault_event
-from src.fastapi.rabbitmq_handlers.gps.handler import handle_gps_event
+from src.fastapi.rabbitmq_handlers.gps.handler import (
+    handle_gps_event,
+    handle_gps_events,
+)
+from src.fastapi.rabbitmq_handlers.retry import retry_manager
+from src.fastapi.rabbitmq_handlers.sharding import (
+    EXCHANGE_NAME,
+    shard_binding_key,
+    shard_queue_name,
+)
+from src.fastapi.rabbitmq_handlers.utils import peek_device_id
+from src.fastapi.rabbitmq_handlers.worker_pool import (
+    PartitionedWorkerPool,
+    split_workers,
+)
 from src.fastapi.redis.redis import redis_manager
+from src.fastapi.websocket.client import alert_pool
+from src.fastapi.websocket.outbox import alert_outbox
+from src.fastapi.websocket.prefilter import alert_prefilter
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -30,13 +54,17 @@ settings = get_settings()
 PROJECT_NAME = settings.PROJECT_NAME
 FastAPI_API_KEY_HEADER = settings.FASTAPI_API_KEY_HEADER
 ALL_CORS_ORIGINS = settings.all_cors_origins
-RABBITMQ_HOST = settings.RABBITMQ_HOST
-RABBITMQ_PORT = settings.RABBITMQ_PORT
-RABBITMQ_USER = settings.RABBITMQ_USER
-RABBITMQ_PASSWORD = settings.RABBITMQ_PASSWORD
-RABBITMQ_URL = (
-    f"amqp://{RABBITMQ_USER}:{RABBITMQ_PASSWORD}@" f"{RABBITMQ_HOST}:{RABBITMQ_PORT}/"
-)
+RABBITMQ_URL = settings.rabbitmq_url
+GPS_BATCH_ENABLED = settings.GPS_BATCH_ENABLED
+GPS_BATCH_SIZE = settings.GPS_BATCH_SIZE
+GPS_BATCH_LINGER_MS = settings.GPS_BATCH_LINGER_MS
+CONSUMER_WORKERS = settings.CONSUMER_WORKERS
+CONSUMER_MAILBOX_SIZE = settings.CONSUMER_MAILBOX_SIZE
+GPS_PREFETCH_COUNT = settings.GPS_PREFETCH_COUNT
+FAULT_PREFETCH_COUNT = settings.FAULT_PREFETCH_COUNT
+FAULT_WORKER_SHARE = settings.FAULT_WORKER_SHARE
+FAULT_DEDICATED_CONNECTION = settings.FAULT_DEDICATED_CONNECTION
+INGEST_IN_PROCESS = settings.INGEST_IN_PROCESS
 
 
 # Initialize the database engine
@@ -76,54 +104,180 @@ def custom_openapi():
     return app.openapi_schema
 
 
+async def process_message(db_session, queue_name, message):
+    # Requeue only if handing the failure over to the retry queues failed too
+    async with message.process(requeue=True):
+        try:
+            payload = message.body.decode()
+
+            # Sharded queues are named e.g. `gps_queue.3`
+            queue_kind = queue_name.split(".")[0]
+            if payload:
+                if queue_kind == "gps_queue":
+                    logger.info("Consume GPS event")
+                    await handle_gps_event(db_session, payload)
+                elif queue_kind == "fault_queue":
+                    logger.info("Consume fault event")
+                    await handle_fault_event(db_session, payload)
+                else:
+                    logger.warning(f"Unknown queue: {queue_name}")
+
+        except Exception as e:
+            logger.error(f"[{queue_name}] Failed to process message: " f"{str(e)}")
+            await retry_manager.handle_failure(queue_name, message, e)
+
+
 async def consume_queue(channel, queue_name):
     queue = await channel.declare_queue(queue_name, durable=True)
     async with await db.get_client() as db_session:
         async with queue.iterator() as queue_iter:
             async for message in queue_iter:
-                async with message.process():
-                    try:
-                        payload = message.body.decode()
-
-                        if payload:
-                            if queue_name == "gps_queue":
-                                logger.info("Consume GPS event")
-                                await handle_gps_event(db_session, payload)
-                            elif queue_name == "fault_queue":
-                                logger.info("Consume fault event")
-                                await handle_fault_event(db_session, payload)
-                            else:
-                                logger.warning(f"Unknown queue: {queue_name}")
-
-                    except Exception as e:
-                        logger.error(
-                            f"[{queue_name}] Failed to process message: " f"{str(e)}"
-                        )
-
-
-async def ingest_event():
+                await process_message(db_session, queue_name, message)
+
+
+async def consume_queue_partitioned(channel, queue_name, pool):
+    """
+    Hand each message to the pool worker owning its device, so events of one
+    device stay ordered while different devices are processed in parallel.
+    """
+    queue = await channel.declare_queue(queue_name, durable=True)
+    async with queue.iterator() as queue_iter:
+        async for message in queue_iter:
+            await pool.submit(
+                peek_device_id(message.body),
+                partial(process_message, queue_name=queue_name, message=message),
+            )
+
+
+async def consume_gps_batches(channel, queue_name):
+    """
+    Consume GPS events in micro-batches of up to GPS_BATCH_SIZE messages or
+    GPS_BATCH_LINGER_MS milliseconds, acknowledging each batch at once.
+
+    The channel must not be shared with other consumers, since a multiple-ack
+    covers every outstanding delivery tag on it, and its prefetch must be at
+    least GPS_BATCH_SIZE.
+    """
+    queue = await channel.declare_queue(queue_name, durable=True)
+    buffer = asyncio.Queue()
+    await queue.consume(buffer.put)
+
+    async with await db.get_client() as db_session:
+        while True:
+            batch = await collect_batch(
+                buffer, GPS_BATCH_SIZE, GPS_BATCH_LINGER_MS / 1000
+            )
+            logger.info(f"Consume GPS batch of {len(batch)} events")
+            try:
+                payloads = [message.body.decode() for message in batch]
+                results = await handle_gps_events(db_session, payloads)
+                failures = [
+                    (message, result)
+                    for message, result in zip(batch, results)
+                    if isinstance(result, BaseException)
+                ]
+            except Exception as e:
+                logger.error(
+                    f"[{queue_name}] Failed to process batch of {len(batch)} "
+                    f"messages: {str(e)}"
+                )
+                failures = [(message, e) for message in batch]
+
+            try:
+                for message, failure in failures:
+                    await retry_manager.handle_failure(queue_name, message, failure)
+            except Exception as e:
+                logger.error(f"[{queue_name}] Failed to reroute batch: {str(e)}")
+                await batch[-1].nack(multiple=True, requeue=True)
+                continue
+            await batch[-1].ack(multiple=True)
+
+
+async def open_consumer_channel(connection, prefetch_count):
+    channel = await connection.channel()
+    await channel.set_qos(prefetch_count=prefetch_count)
+    return channel
+
+
+async def ingest_event(shard: int = 0, shards: int = 1):
+    """
+    Declare the event topology and consume the GPS and fault queues of one
+    shard. With a single shard the legacy `gps_queue` / `fault_queue` are used.
+
+    Each queue is consumed on its own channel with its own prefetch, so a GPS
+    backlog cannot hold back fault deliveries at the broker.
+    """
     connection = await aio_pika.connect_robust(RABBITMQ_URL)
     channel = await connection.channel()
 
     # Declare the exchange (direct type for routing via routing key)
     exchange = await channel.declare_exchange(
-        "events_exchange", aio_pika.ExchangeType.DIRECT, durable=True
+        EXCHANGE_NAME, aio_pika.ExchangeType.DIRECT, durable=True
     )
 
     # Declare and bind GPS queue
-    gps_queue = await channel.declare_queue("gps_queue", durable=True)
-    await gps_queue.bind(exchange, routing_key="gps")
+    gps_queue_name = shard_queue_name("gps", shard, shards)
+    gps_queue = await channel.declare_queue(gps_queue_name, durable=True)
+    await gps_queue.bind(exchange, routing_key=shard_binding_key("gps", shard, shards))
 
     # Declare and bind Fault queue
-    fault_queue = await channel.declare_queue("fault_queue", durable=True)
-    await fault_queue.bind(exchange, routing_key="fault")
+    fault_queue_name = shard_queue_name("fault", shard, shards)
+    fault_queue = await channel.declare_queue(fault_queue_name, durable=True)
+    await fault_queue.bind(
+        exchange, routing_key=shard_binding_key("fault", shard, shards)
+    )
+
+    # Failed messages are republished to delay queues and, once out of
+    # attempts, to the dead-letter queue
+    await retry_manager.setup(channel, [gps_queue_name, fault_queue_name])
+
+    gps_prefetch = GPS_PREFETCH_COUNT
+    if GPS_BATCH_ENABLED:
+        gps_prefetch = max(gps_prefetch, GPS_BATCH_SIZE * 2)
+    gps_channel = await open_consumer_channel(connection, gps_prefetch)
+    fault_connection = connection
+    if FAULT_DEDICATED_CONNECTION:
+        fault_connection = await aio_pika.connect_robust(RABBITMQ_URL)
+    fault_channel = await open_consumer_channel(fault_connection, FAULT_PREFETCH_COUNT)
+
+    # With more than one worker, messages are fanned out over pools that are
+    # partitioned by device ID instead of being handled one after another.
+    # Fault events get a reserved pool so a GPS flood cannot starve them.
+    gps_pool = fault_pool = None
+    if CONSUMER_WORKERS > 1:
+        gps_workers, fault_workers = split_workers(CONSUMER_WORKERS, FAULT_WORKER_SHARE)
+        gps_pool = PartitionedWorkerPool(
+            gps_workers, CONSUMER_MAILBOX_SIZE, db.get_client, name="gps"
+        )
+        fault_pool = PartitionedWorkerPool(
+            fault_workers, CONSUMER_MAILBOX_SIZE, db.get_client, name="fault"
+        )
+        gps_pool.start()
+        fault_pool.start()
+
+    def consume(consume_channel, queue_name, pool):
+        if pool is not None:
+            return consume_queue_partitioned(consume_channel, queue_name, pool)
+        return consume_queue(consume_channel, queue_name)
 
     # Create two tasks to consume from both queues
-    gps_task = asyncio.create_task(consume_queue(channel, "gps_queue"))
-    fault_task = asyncio.create_task(consume_queue(channel, "fault_queue"))
+    if GPS_BATCH_ENABLED:
+        gps_task = asyncio.create_task(consume_gps_batches(gps_channel, gps_queue_name))
+    else:
+        gps_task = asyncio.create_task(consume(gps_channel, gps_queue_name, gps_pool))
+    fault_task = asyncio.create_task(
+        consume(fault_channel, fault_queue_name, fault_pool)
+    )
 
     # Keep them alive
-    await asyncio.gather(gps_task, fault_task)
+    try:
+        await asyncio.gather(gps_task, fault_task)
+    finally:
+        for pool in (gps_pool, fault_pool):
+            if pool is not None:
+                await pool.stop()
+        if fault_connection is not connection:
+            await fault_connection.close()
 
 
 @asynccontextmanager
@@ -132,12 +286,21 @@ async def lifespan(app: FastAPI):  # type: ignore
         await DatabaseManager.connect()
         await init_db()
         await redis_manager.init_redis()
+        await http_client_manager.init_session()
+        await device_directory.start()
+        await fault_catalog.start()
+        await alert_pool.start()
+        await alert_outbox.start()
+        await alert_prefilter.start()
         daily_summary_repo = DailySummaryRepository()
         loop = asyncio.get_running_loop()
         daily_summary_scheduler = DailySummaryScheduler(daily_summary_repo, loop)
 
-        # Create background task for RabbitMQ consumer
-        app.state.rabbitmq_consumer_task = asyncio.create_task(ingest_event())
+        # Create background task for RabbitMQ consumer, unless ingest runs in
+        # the standalone worker processes
+        app.state.rabbitmq_consumer_task = None
+        if INGEST_IN_PROCESS:
+            app.state.rabbitmq_consumer_task = asyncio.create_task(ingest_event())
 
         daily_summary_scheduler.run()
 
@@ -147,12 +310,19 @@ async def lifespan(app: FastAPI):  # type: ignore
         logger.info("Shutting down...")
 
         # Cancel the RabbitMQ consumer task
-        app.state.rabbitmq_consumer_task.cancel()
-        try:
-            await app.state.rabbitmq_consumer_task
-        except asyncio.CancelledError:
-            logger.info("RabbitMQ consumer task cancelled.")
-
+        if app.state.rabbitmq_consumer_task is not None:
+            app.state.rabbitmq_consumer_task.cancel()
+            try:
+                await app.state.rabbitmq_consumer_task
+            except asyncio.CancelledError:
+                logger.info("RabbitMQ consumer task cancelled.")
+
+        await alert_prefilter.stop()
+        await alert_outbox.stop()
+        await alert_pool.close()
+        await fault_catalog.stop()
+        await device_directory.stop()
+        await http_client_manager.close_session()
         await redis_manager.close_redis()
     except Exception as e:
         logger.error(f"Startup failed: {str(e)}")
@@ -194,5 +364,7 @@ api_router.include_router(gps_router)
 api_router.include_router(asset_utilization_router)
 api_router.include_router(fleet_efficiency_router)
 api_router.include_router(idling_hotspots_router)
+api_router.include_router(dead_letters_router)
+api_router.include_router(metrics_router)
 app.include_router(api_router)
 app.include_router(health_router)
@@ -0,0 +1,42 @@
+from typing import Callable, Dict
+
+
+class Counter:
+    """Monotonic in-process counter."""
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+
+class MetricsRegistry:
+    """
+    Counters and gauges of the current process. Every ingest worker process
+    keeps its own registry; the API exposes the one of the API process.
+    """
+
+    def __init__(self) -> None:
+        self.counters: Dict[str, Counter] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+
+    def counter(self, name: str) -> Counter:
+        if name not in self.counters:
+            self.counters[name] = Counter()
+        return self.counters[name]
+
+    def gauge(self, name: str, read: Callable[[], float]) -> None:
+        """Register a value read lazily on every snapshot."""
+        self.gauges[name] = read
+
+    def snapshot(self) -> dict:
+        return {
+            "counters": {name: c.value for name, c in sorted(self.counters.items())},
+            "gauges": {name: read() for name, read in sorted(self.gauges.items())},
+        }
+
+
+metrics = MetricsRegistry()
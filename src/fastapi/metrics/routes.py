@@ -0,0 +1,17 @@
+import logging
+from http import HTTPStatus
+
+from fastapi import APIRouter, Depends
+from src.fastapi.metrics.registry import metrics
+from src.fastapi.metrics.schemas import MetricsResponse
+from src.fastapi.middleware.auth import validate_api_key
+
+logger = logging.getLogger(__name__)
+metrics_router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@metrics_router.get("", response_model=MetricsResponse, status_code=HTTPStatus.OK)
+async def get_metrics(_: str = Depends(validate_api_key)):
+    """Counters and gauges of the API process."""
+    logger.info("Metrics requested")
+    return MetricsResponse(**metrics.snapshot())
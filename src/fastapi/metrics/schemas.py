@@ -0,0 +1,8 @@
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class MetricsResponse(BaseModel):
+    counters: Dict[str, int]
+    gauges: Dict[str, float]
@@ -0,0 +1,31 @@
+import asyncio
+from typing import List, TypeVar
+
+T = TypeVar("T")
+
+
+async def collect_batch(buffer: asyncio.Queue, max_size: int, linger: float) -> List[T]:
+    """
+    Wait for the first item in the buffer, then keep collecting until either
+    `max_size` items are gathered or `linger` seconds have passed since the
+    first item arrived.
+    """
+    batch = [await buffer.get()]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + linger
+
+    while len(batch) < max_size:
+        # Drain whatever is already buffered without touching the timer
+        if not buffer.empty():
+            batch.append(buffer.get_nowait())
+            continue
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(buffer.get(), timeout=remaining))
+        except asyncio.TimeoutError:
+            break
+
+    return batch
@@ -0,0 +1,169 @@
+import math
+import time
+from collections import OrderedDict, deque
+from enum import Enum, auto
+from hashlib import blake2b
+from typing import Callable, Deque, Tuple
+
+from src.fastapi.config import get_settings
+from src.fastapi.metrics.registry import metrics
+
+settings = get_settings()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, sized for `capacity` keys."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, key: str):
+        # Double hashing: two 64-bit halves of one digest give all k positions
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(key)
+        )
+
+
+class DedupVerdict(Enum):
+    # Seen by this process within the window
+    DUPLICATE = auto()
+    # Never seen by this process, and this process is trusted to know:
+    # devices are pinned to it and no key of the window was dropped
+    NEW = auto()
+    # The Bloom filter may have seen it: Redis decides
+    POSSIBLE = auto()
+    # Not seen locally, but exact mode, warm-up or a capacity rotation asks
+    # Redis anyway
+    UNCONFIRMED = auto()
+
+
+class DedupCache:
+    """
+    Per-process front cache for GPS dedup keys.
+
+    Two Bloom filter generations, rotated every `window_seconds`, remember
+    every key claimed in the last one to two windows; an LRU of the most
+    recent keys answers exact hits. Each generation should be sized for the
+    keys of one window. Should one fill up anyway it is rotated early, which
+    drops keys still inside the window, so until a full window has passed
+    misses are confirmed in Redis.
+
+    In exact mode, the default, every key the cache cannot settle as a
+    duplicate is confirmed in Redis, since a redelivery may have gone to
+    another consumer. Only a worker that device-affinity sharding pins
+    devices to turns it off; a Bloom miss is then authoritative, except
+    during the first window after start (redeliveries of a crashed
+    predecessor) and after a capacity rotation.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        lru_size: int,
+        bloom_capacity: int,
+        bloom_error_rate: float,
+        exact: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window_seconds = window_seconds
+        self.lru_size = lru_size
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.exact = exact
+        self.clock = clock
+        # Misses are confirmed in Redis until then: after start, and after
+        # a rotation that dropped keys of the current window
+        self.warm_at = clock() + window_seconds
+        self.generations: Deque[Tuple[float, BloomFilter]] = deque(maxlen=2)
+        self.recent: OrderedDict[str, float] = OrderedDict()
+        self.rotate()
+
+        self.hits = metrics.counter("dedup.hit")
+        self.misses = metrics.counter("dedup.miss")
+        self.false_positives = metrics.counter("dedup.false_positive")
+        self.redis_hits = metrics.counter("dedup.redis_hit")
+        self.overflows = metrics.counter("dedup.bloom_overflow")
+
+    def rotate(self) -> None:
+        self.generations.append(
+            (self.clock(), BloomFilter(self.bloom_capacity, self.bloom_error_rate))
+        )
+
+    def check(self, key: str) -> DedupVerdict:
+        """Classify a key and claim it locally."""
+        now = self.clock()
+        seen_at = self.recent.get(key)
+        if seen_at is not None and now - seen_at < self.window_seconds:
+            self.recent.move_to_end(key)
+            self.hits.inc()
+            return DedupVerdict.DUPLICATE
+
+        maybe_seen = any(key in bloom for _, bloom in self.generations)
+        started_at, current = self.generations[-1]
+        if now - started_at >= self.window_seconds:
+            self.rotate()
+            current = self.generations[-1][1]
+        elif current.count >= current.capacity:
+            # Keeps the error rate bounded, but the oldest generation still
+            # holds keys of the window
+            self.overflows.inc()
+            self.rotate()
+            current = self.generations[-1][1]
+            self.warm_at = now + self.window_seconds
+        current.add(key)
+        self.recent[key] = now
+        self.recent.move_to_end(key)
+        if len(self.recent) > self.lru_size:
+            self.recent.popitem(last=False)
+
+        if maybe_seen:
+            return DedupVerdict.POSSIBLE
+        self.misses.inc()
+        if self.exact or now < self.warm_at:
+            return DedupVerdict.UNCONFIRMED
+        return DedupVerdict.NEW
+
+    def record_redis_reply(self, verdict: DedupVerdict, is_new: bool) -> None:
+        """Account for the answer Redis gave to a POSSIBLE or UNCONFIRMED key."""
+        if not is_new:
+            self.redis_hits.inc()
+        elif verdict is DedupVerdict.POSSIBLE:
+            self.false_positives.inc()
+
+    def forget(self, *keys: str) -> None:
+        """
+        Drop keys of events that were not processed, so their redelivery is
+        not a local hit. The Bloom filter keeps them, which only costs a
+        Redis check.
+        """
+        for key in keys:
+            self.recent.pop(key, None)
+
+
+dedup_cache = DedupCache(
+    window_seconds=settings.DEDUP_WINDOW_SECONDS,
+    lru_size=settings.DEDUP_LRU_SIZE,
+    # One generation holds the keys of one window at the peak rate
+    bloom_capacity=max(
+        1000, settings.DEDUP_PEAK_EVENTS_PER_SECOND * settings.DEDUP_WINDOW_SECONDS
+    ),
+    bloom_error_rate=settings.DEDUP_BLOOM_ERROR_RATE,
+)
@@ -0,0 +1,6 @@
+class RetryableEventException(Exception):
+    """
+    Mixin for event processing errors caused by a transient upstream failure.
+    Messages failing with one of these are redelivered through the retry
+    queues instead of being dropped.
+    """
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import List, Mapping, Optional
+
+from pydantic import TypeAdapter
+
+from src.fastapi.config import get_settings
+from src.fastapi.http_client.client import http_client_manager
+from src.fastapi.http_client.guard import fault_api_guard
+from src.fastapi.metrics.registry import metrics
+from src.fastapi.rabbitmq_handlers.fault.exceptions import FaultCatalogException
+from src.fastapi.rabbitmq_handlers.fault.schemas import FaultLabelRecord
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+fault_label_records = TypeAdapter(List[FaultLabelRecord])
+
+
+async def fetch_fault_catalog() -> List[FaultLabelRecord]:
+    """
+    The whole label table from `GET FAULT_API_URL`: a list of
+    `{"fault_code" | "code", "label"}` objects, bare or under `items`.
+    """
+    session = await http_client_manager.get_session()
+    url = settings.FAULT_API_URL
+    async with fault_api_guard.call(), session.get(url) as response:
+        if response.status != 200:
+            raise FaultCatalogException(response.status, await response.text())
+        data = await response.json()
+    if isinstance(data, dict):
+        data = data.get("items", [])
+    return fault_label_records.validate_python(data)
+
+
+class FaultCatalog:
+    """
+    Labels of every fault code, loaded in bulk at startup and reloaded every
+    FAULT_CATALOG_REFRESH_SECONDS.
+
+    `labels` is a read-only mapping that a refresh replaces as a whole, so a
+    handler always reads one consistent version without locking. Codes missing
+    from it are looked up one by one through `fetch_fault_label`.
+    """
+
+    def __init__(self) -> None:
+        self.labels: Mapping[str, str] = MappingProxyType({})
+        self.refreshed_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+        self.hits = metrics.counter("fault_catalog.hit")
+        self.misses = metrics.counter("fault_catalog.miss")
+        metrics.gauge("fault_catalog.codes", lambda: len(self.labels))
+
+    def get(self, fault_code: str) -> Optional[str]:
+        label = self.labels.get(fault_code)
+        if label is None:
+            self.misses.inc()
+        else:
+            self.hits.inc()
+        return label
+
+    def learn(self, fault_code: str, label: str) -> None:
+        """Add a label fetched on its own; kept until the next refresh."""
+        if self.labels.get(fault_code) != label:
+            self.labels = MappingProxyType({**self.labels, fault_code: label})
+
+    async def refresh(self) -> int:
+        records = await fetch_fault_catalog()
+        self.labels = MappingProxyType({r.fault_code: r.label for r in records})
+        self.refreshed_at = datetime.now(timezone.utc)
+        logger.info(f"Loaded {len(self.labels)} fault labels")
+        return len(self.labels)
+
+    async def run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Fault catalog refresh failed: {e}")
+
+    async def start(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Failed to load the fault catalog: {e}")
+        if settings.FAULT_CATALOG_REFRESH_SECONDS > 0:
+            self.task = asyncio.create_task(
+                self.run(settings.FAULT_CATALOG_REFRESH_SECONDS)
+            )
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                logger.info("Fault catalog refresh cancelled.")
+            self.task = None
+
+
+fault_catalog = FaultCatalog()
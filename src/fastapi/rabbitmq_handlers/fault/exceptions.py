@@ -1,3 +1,6 @@
+from src.fastapi.rabbitmq_handlers.exceptions import RetryableEventException
+
+
 class FaultEventException(Exception):
     """Base exception class for Fault event processing errors."""
 
@@ -41,6 +44,14 @@ class FaultLabelAPIException(FaultEventException):
         super().__init__(f"Failed to fetch label for fault code '{fault_code}'")
 
 
+class FaultCatalogException(FaultEventException):
+    def __init__(self, status_code: int, details: str = ""):
+        message = f"Failed to load the fault catalog, status: {status_code}"
+        if details != "":
+            message += f" Details: {details}"
+        super().__init__(message)
+
+
 class FaultDatabaseSaveException(FaultEventException):
     def __init__(self, device_id: str, fault_code: str):
         super().__init__(
@@ -57,7 +68,11 @@ class FaultSendAlertException(FaultEventException):
         )
 
 
-class FaultRateLimitException(FaultLabelAPIException):
+class FaultLabelUnavailableException(FaultLabelAPIException, RetryableEventException):
+    """Exception for Fault label API server errors."""
+
+
+class FaultRateLimitException(FaultLabelAPIException, RetryableEventException):
     """Exception for Device API rate limit errors."""
 
     message = "Rate limit exceeded for Device API."
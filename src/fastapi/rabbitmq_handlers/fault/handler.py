@@ -1,8 +1,11 @@
 import base64
 import logging
+from typing import List, cast
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.fastapi.devices.directory import device_directory
+from src.fastapi.rabbitmq_handlers.fault.catalog import fault_catalog
 from src.fastapi.rabbitmq_handlers.fault.exceptions import (
     FaultCacheSegmentException,
     FaultConstructPayloadException,
@@ -17,15 +20,22 @@ from src.fastapi.rabbitmq_handlers.fault.schemas import (
     FaultEventResponse,
 )
 from src.fastapi.rabbitmq_handlers.fault.utils import (
-    assemble_all_fault_segments,
-    cache_fault_segment,
+    assemble_fault_payload,
     fetch_fault_label,
+    restore_fault_segments,
     save_fault_event,
+    store_fault_segment,
+)
+from src.fastapi.rabbitmq_handlers.gps.device_filter import unknown_devices
+from src.fastapi.rabbitmq_handlers.gps.exceptions import (
+    GPSDeviceAPIException,
+    GPSDeviceNotFoundException,
 )
-from src.fastapi.rabbitmq_handlers.gps.exceptions import GPSDeviceAPIException
 from src.fastapi.rabbitmq_handlers.gps.utils import fetch_device_name
-from src.fastapi.websocket.client import send_alert_event
+from src.fastapi.rabbitmq_handlers.retry import is_retryable
 from src.fastapi.websocket.models import AlertEvent
+from src.fastapi.websocket.outbox import alert_outbox
+from src.fastapi.websocket.prefilter import alert_prefilter
 
 logger = logging.getLogger(__name__)
 
@@ -37,13 +47,23 @@ async def handle_fault_event(db: AsyncSession, payload: str) -> dict:
         logger.error(f"Fault decode error: {str(e)}")
         return {"error": str(FaultDecodeException(payload=payload, reason=str(e)))}
 
+    if unknown_devices.is_rejected(fault_event.device_id):
+        return {"error": str(FaultDeviceAPIException(fault_event.device_id))}
+
     try:
-        device_name = await fetch_device_name(fault_event.device_id)
-        if not device_name:
-            logger.error(f"Device name not found for {fault_event.device_id}")
-            return {"error": str(GPSDeviceAPIException(fault_event.device_id))}
+        device_name = device_directory.get(fault_event.device_id)
+        if device_name is None:
+            device_name = await fetch_device_name(fault_event.device_id)
+            if not device_name:
+                logger.error(f"Device name not found for {fault_event.device_id}")
+                return {"error": str(GPSDeviceAPIException(fault_event.device_id))}
+            device_directory.learn(fault_event.device_id, device_name)
     except Exception as e:
         logger.error(f"Device API error: {str(e)}")
+        if is_retryable(e):
+            raise
+        if isinstance(e, GPSDeviceNotFoundException):
+            unknown_devices.add(fault_event.device_id)
         return {"error": str(FaultDeviceAPIException(fault_event.device_id))}
 
     device_id = fault_event.device_id
@@ -53,46 +73,53 @@ async def handle_fault_event(db: AsyncSession, payload: str) -> dict:
     sequence = fault_event.sequence
     total_number = fault_event.total_number
 
-    # Cache fault segment
+    # Cache fault segment; the call storing the last one gets all of them
     try:
-        parts_received = await cache_fault_segment(
-            device_id, fault_code, timestamp, sequence, fault_bits
+        parts_received, segments = await store_fault_segment(
+            device_id, fault_code, timestamp, sequence, fault_bits, total_number
         )
     except Exception as e:
         logger.error(f"Error caching fault segment for {device_id}/{fault_code}: {e}")
         return {"error": str(FaultCacheSegmentException(device_id, fault_code))}
 
     # Check if enough segments are received
-    if parts_received < total_number:
+    if segments is None:
         logger.info(
             f"[{device_id}] Fault {fault_code}: segment {sequence+1}/{total_number}, "
             f"{parts_received}/{total_number} stored, awaiting remainder"
         )
         return {"status": "pending", "received": parts_received, "total": total_number}
 
+    # Look up the human-readable label for this fault code, from the API if
+    # the catalog lacks it. The segments are put back on a transient failure,
+    # so the retried message completes them.
+    fault_label = fault_catalog.get(fault_code)
+    if fault_label is None:
+        try:
+            fault_label = await fetch_fault_label(fault_code)
+        except Exception as e:
+            logger.error(f"Fault label API error for code {fault_code}: {e}")
+            if is_retryable(e):
+                await restore_fault_segments(device_id, fault_code, timestamp, segments)
+                raise
+            return {"error": str(FaultLabelAPIException(fault_code))}
+        fault_catalog.learn(fault_code, fault_label)
+
     # Construct the whole fault payload
     try:
-        fault_payload, payload_bytes = await assemble_all_fault_segments(
-            device_id, fault_code, timestamp, total_number
-        )
+        payload_bytes = assemble_fault_payload(segments)
     except Exception as e:
         logger.error(
             f"Error constructing fault payload for " f"{device_id}/{fault_code}: {e}"
         )
         return {"error": str(FaultConstructPayloadException(device_id, fault_code))}
 
-    # Fetch the human-readable label for this fault code
-    try:
-        fault_label = await fetch_fault_label(fault_code)
-    except Exception as e:
-        logger.error(f"Fault label API error for code {fault_code}: {e}")
-        return {"error": str(FaultLabelAPIException(fault_code))}
-
-    result = {
+    result: dict = {
         "device_id": device_id,
         "device_name": device_name,
         "timestamp": timestamp,
-        "fault_payload": fault_payload,
+        # The fault_events row keeps the bit-string
+        "fault_payload": "".join(cast(List[str], segments)),
         "fault_code": fault_code,
         "fault_label": fault_label,
     }
@@ -109,6 +136,8 @@ async def handle_fault_event(db: AsyncSession, payload: str) -> dict:
     b64_payload_bytes = base64.b64encode(payload_bytes).decode("ascii")
 
     result["fault_payload"] = b64_payload_bytes
+    if not alert_prefilter.allows("fault", result):
+        return result
 
     # Send to alerting system via WebSocket
     alert_event = AlertEvent(
@@ -119,7 +148,7 @@ async def handle_fault_event(db: AsyncSession, payload: str) -> dict:
         data=result,
     )
     try:
-        await send_alert_event(alert_event)
+        await alert_outbox.publish(alert_event)
     except Exception as e:
         logger.error(f"WebSocket error: {str(e)}")
         return {"error": str(FaultSendAlertException(fault_code))}
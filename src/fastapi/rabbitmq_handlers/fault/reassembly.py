@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from src.fastapi.config import get_settings
+from src.fastapi.metrics.registry import metrics
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class PartialFault:
+    """Segments of one multi-part fault received so far."""
+
+    __slots__ = ("segments", "count", "expires_at")
+
+    def __init__(self, total: int):
+        self.segments: List[Optional[str]] = [None] * total
+        self.count = 0
+        self.expires_at = 0.0
+
+    def missing(self) -> List[int]:
+        return [i for i, bits in enumerate(self.segments) if bits is None]
+
+
+class LocalFaultSegments:
+    """
+    In-process reassembly of multi-part faults, keyed like the Redis hashes
+    (`fault_parts:{device}:{code}:{ts}`).
+
+    Only correct while every segment of a device reaches the same process,
+    which device-affinity sharding guarantees; `start` switches it on and
+    `store_fault_segment` uses Redis otherwise. Partials live `ttl` seconds
+    after their last segment; a background sweeper drops expired ones and
+    reports the segment indexes that never arrived. Partials of a process
+    that stops are lost with it.
+    """
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self.active = False
+        # Ordered by expiry, as every segment moves its fault to the end
+        self.partials: OrderedDict[str, PartialFault] = OrderedDict()
+        self.task: Optional[asyncio.Task] = None
+        self.completed = metrics.counter("fault_reassembly.completed")
+        self.expired = metrics.counter("fault_reassembly.expired_incomplete")
+        self.missing_segments = metrics.counter("fault_reassembly.missing_segments")
+        metrics.gauge("fault_reassembly.partials", lambda: len(self.partials))
+
+    def store(
+        self, key: str, sequence: int, fault_bits: str, total_number: int
+    ) -> tuple[int, Optional[List[Optional[str]]]]:
+        """Same contract as `store_fault_segment`."""
+        partial = self.partials.get(key)
+        if partial is None:
+            partial = self.partials[key] = PartialFault(total_number)
+        if not 0 <= sequence < len(partial.segments):
+            raise ValueError(f"Segment {sequence} out of range for {key}")
+        if partial.segments[sequence] is None:
+            partial.count += 1
+        partial.segments[sequence] = fault_bits
+        if partial.count < len(partial.segments):
+            partial.expires_at = self.clock() + self.ttl
+            self.partials.move_to_end(key)
+            return partial.count, None
+        del self.partials[key]
+        self.completed.inc()
+        return partial.count, partial.segments
+
+    def restore(self, key: str, segments: List[Optional[str]]) -> None:
+        partial = PartialFault(len(segments))
+        partial.segments = list(segments)
+        partial.count = len(segments) - len(partial.missing())
+        partial.expires_at = self.clock() + self.ttl
+        self.partials[key] = partial
+        self.partials.move_to_end(key)
+
+    def sweep(self) -> int:
+        """Drop the expired partials and report what they were missing."""
+        now = self.clock()
+        expired = 0
+        while self.partials:
+            key, partial = next(iter(self.partials.items()))
+            if partial.expires_at > now:
+                break
+            del self.partials[key]
+            missing = partial.missing()
+            logger.warning(
+                f"Fault {key} expired incomplete, "
+                f"{partial.count}/{len(partial.segments)} segments, missing {missing}"
+            )
+            self.missing_segments.inc(len(missing))
+            expired += 1
+        self.expired.inc(expired)
+        return expired
+
+    async def run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.sweep()
+
+    async def start(self) -> None:
+        """Take over reassembly from Redis, if FAULT_REASSEMBLY_LOCAL is set."""
+        if not settings.FAULT_REASSEMBLY_LOCAL:
+            return
+        self.active = True
+        self.task = asyncio.create_task(self.run(settings.FAULT_SWEEP_INTERVAL_SECONDS))
+        logger.info("Fault segments are reassembled in process")
+
+    async def stop(self) -> None:
+        self.active = False
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                logger.info("Fault segment sweeper cancelled.")
+            self.task = None
+        if self.partials:
+            logger.warning(f"Dropping {len(self.partials)} incomplete faults")
+            self.partials.clear()
+
+
+local_fault_segments = LocalFaultSegments(ttl=settings.FAULT_SEGMENT_TTL_SECONDS)
@@ -2,7 +2,7 @@ import base64
 import logging
 from datetime import datetime
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
 
 from src.fastapi.rabbitmq_handlers.fault.exceptions import FaultDecodeException
 
@@ -60,3 +60,12 @@ class FaultEventResponse(BaseModel):
     fault_label: str
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class FaultLabelRecord(BaseModel):
+    """One entry of the fault-label table served by the Fault API"""
+
+    fault_code: str = Field(validation_alias=AliasChoices("fault_code", "code"))
+    label: str
+
+    model_config = ConfigDict(coerce_numbers_to_str=True)
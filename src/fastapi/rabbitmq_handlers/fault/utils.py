@@ -1,23 +1,21 @@
 import logging
 from datetime import datetime
+from typing import List, Optional
 
-import aiohttp
-from aiohttp import ClientResponseError
 from sqlalchemy.ext.asyncio import AsyncSession
-from tenacity import (
-    retry,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_exponential,
-)
 
 from src.fastapi.config import get_settings
+from src.fastapi.http_client.client import http_client_manager
+from src.fastapi.http_client.guard import fault_api_guard
+from src.fastapi.rabbitmq_handlers.exceptions import RetryableEventException
 from src.fastapi.rabbitmq_handlers.fault.exceptions import (
     FaultDatabaseSaveException,
     FaultLabelAPIException,
+    FaultLabelUnavailableException,
     FaultRateLimitException,
 )
 from src.fastapi.rabbitmq_handlers.fault.models import FaultEventModel
+from src.fastapi.rabbitmq_handlers.fault.reassembly import local_fault_segments
 from src.fastapi.rabbitmq_handlers.fault.schemas import FaultEventResponse
 from src.fastapi.redis.decorators import cache_api_call
 from src.fastapi.redis.redis import redis_manager
@@ -28,51 +26,50 @@ DEVICE_API_URL = get_settings().DEVICE_API_URL
 FAULT_API_URL = get_settings().FAULT_API_URL
 
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=1, max=10),
-    retry=retry_if_exception_type((FaultLabelAPIException, ClientResponseError)),
+@cache_api_call(
+    cache_key_prefix="fault_label",
+    ttl=300,
+    last_known_on=(RetryableEventException,),
 )
-@cache_api_call(cache_key_prefix="fault_label", ttl=300)
 async def fetch_fault_label(fault_code: str) -> str:
     """
     Fetch the human-readable label for a fault code via aiohttp
     """
     url = f"{FAULT_API_URL}/{fault_code}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            logger.info(f"Fetching fault label for code {fault_code} from {url}")
+    session = await http_client_manager.get_session()
+    async with fault_api_guard.call(), session.get(url) as response:
+        logger.info(f"Fetching fault label for code {fault_code} from {url}")
 
-            if response.status == 200:
-                data = await response.json()
+        if response.status == 200:
+            data = await response.json()
 
-                # Explicitly narrow and coerce into a str
-                if isinstance(data, list) and data:
-                    raw = data[0].get("label", None)
-                    label: str = raw if isinstance(raw, str) else "Unknown"
+            # Explicitly narrow and coerce into a str
+            if isinstance(data, list) and data:
+                raw = data[0].get("label", None)
+                label: str = raw if isinstance(raw, str) else "Unknown"
 
-                elif isinstance(data, dict):
-                    raw = data.get("label", None)
-                    label = raw if isinstance(raw, str) else "Unknown"
+            elif isinstance(data, dict):
+                raw = data.get("label", None)
+                label = raw if isinstance(raw, str) else "Unknown"
 
-                else:
-                    label = "Unknown"
+            else:
+                label = "Unknown"
 
-                logger.info(f"Fault label: {label}")
-                return label
+            logger.info(f"Fault label: {label}")
+            return label
 
-            elif response.status == 429:
-                logger.warning(f"Rate limit exceeded for fault code {fault_code}")
-                raise FaultRateLimitException(fault_code)
+        elif response.status == 429:
+            logger.warning(f"Rate limit exceeded for fault code {fault_code}")
+            raise FaultRateLimitException(fault_code)
 
-            elif response.status >= 500:
-                text = await response.text()
-                logger.error(f"Server error for fault code {fault_code}: {text}")
-                raise FaultLabelAPIException(fault_code)
+        elif response.status >= 500:
+            text = await response.text()
+            logger.error(f"Server error for fault code {fault_code}: {text}")
+            raise FaultLabelUnavailableException(fault_code)
 
-            else:
-                logger.error(f"Failed to fetch fault label, status: {response.status}")
-                raise FaultLabelAPIException(fault_code)
+        else:
+            logger.error(f"Failed to fetch fault label, status: {response.status}")
+            raise FaultLabelAPIException(fault_code)
 
 
 async def save_fault_event(
@@ -101,60 +98,105 @@ async def save_fault_event(
         )
 
 
-async def cache_fault_segment(
+# KEYS: the segments hash
+# ARGV: sequence, bits, total number of segments, TTL in seconds
+# Returns {count} while segments are missing, and {count, segment 0, ...} once
+# the set is complete, after deleting it: only one caller gets the payload.
+STORE_SEGMENT_SCRIPT = """
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+local count = redis.call('HLEN', KEYS[1])
+local total = tonumber(ARGV[3])
+if count < total then
+  redis.call('EXPIRE', KEYS[1], ARGV[4])
+  return {count}
+end
+local fields = {}
+for i = 1, total do
+  fields[i] = tostring(i - 1)
+end
+local segments = redis.call('HMGET', KEYS[1], unpack(fields))
+redis.call('DEL', KEYS[1])
+table.insert(segments, 1, count)
+return segments
+"""
+
+
+def fault_segments_key(device_id: str, fault_code: str, timestamp: datetime) -> str:
+    return f"fault_parts:{device_id}:{fault_code}:{timestamp}"
+
+
+async def store_fault_segment(
     device_id: str,
     fault_code: str,
     timestamp: datetime,
     sequence: int,
     fault_bits: str,
-    expire_secs: int = 3600,
-) -> int:
+    total_number: int,
+    expire_secs: int = settings.FAULT_SEGMENT_TTL_SECONDS,
+) -> tuple[int, Optional[List[Optional[str]]]]:
     """
-    Store one segment of a multi-part fault in Redis.
-    Returns the total number of parts now stored.
+    Store one segment of a multi-part fault in Redis, in one atomic round-trip,
+    or in process while `local_fault_segments` is active. Returns the number
+    of parts stored and, for the call that completed the set, every segment in
+    order; the set is removed at that point. A segment index that never
+    arrived comes back as None.
     """
-    key = f"fault_parts:{device_id}:{fault_code}:{timestamp}"
+    key = fault_segments_key(device_id, fault_code, timestamp)
+    if local_fault_segments.active:
+        return local_fault_segments.store(key, sequence, fault_bits, total_number)
     try:
-        # HSET sequence → bit-string
-        await redis_manager.redis_client.hset(key, sequence, fault_bits)
-        # Ensure key auto-expires
-        await redis_manager.redis_client.expire(key, expire_secs)
-        # Count how many segments we have so far
-        count_any = await redis_manager.redis_client.hlen(key)
-        count = int(count_any)
-        return count
+        reply = await redis_manager.script(STORE_SEGMENT_SCRIPT)(
+            keys=[key], args=[sequence, fault_bits, total_number, expire_secs]
+        )
     except Exception as e:
         logger.error(f"[{device_id}] Redis aggregation error: {e}")
         raise
+    count = int(reply[0])
+    if len(reply) == 1:
+        return count, None
+    return count, list(reply[1:])
 
 
-async def assemble_all_fault_segments(
-    device_id: str, fault_code: str, timestamp: datetime, total_number: int
-) -> tuple[str, bytes]:
+async def restore_fault_segments(
+    device_id: str,
+    fault_code: str,
+    timestamp: datetime,
+    segments: List[Optional[str]],
+    expire_secs: int = settings.FAULT_SEGMENT_TTL_SECONDS,
+) -> None:
     """
-    Once all parts have arrived, pull them out of Redis, reconstruct:
-      - the concatenated bit-string
-      - the raw bytes payload
-    Deletes the Redis key before returning.
+    Put a completed set back, for a fault whose processing failed transiently:
+    its redelivered last segment completes the set again.
     """
-    key = f"fault_parts:{device_id}:{fault_code}:{timestamp}"
+    key = fault_segments_key(device_id, fault_code, timestamp)
+    if local_fault_segments.active:
+        local_fault_segments.restore(key, segments)
+        return
+    mapping = {str(i): bits for i, bits in enumerate(segments) if bits is not None}
     try:
-        raw_map = await redis_manager.redis_client.hgetall(key)
-        # raw_map: {b"0": b"01010101", b"1": b"10101010", ...}
-        seq_to_bits = {
-            int(k.decode() if isinstance(k, bytes) else k): (
-                v.decode() if isinstance(v, bytes) else v
-            )
-            for k, v in raw_map.items()
-        }
-        ordered_bits = [seq_to_bits[i] for i in range(total_number)]
-        bitstring = "".join(ordered_bits)
-        # pack each 8-bit substring into a byte
-        payload_bytes = bytes(int(ordered_bits[i], 2) for i in range(total_number))
-        return bitstring, payload_bytes
+        pipe = redis_manager.redis_client.pipeline(transaction=True)
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, expire_secs)
+        await pipe.execute()
     except Exception as e:
-        logger.error(f"[{device_id}] Error reconstructing fault payload: {e}")
-        raise
-    finally:
-        # remove the temporary aggregation data
-        await redis_manager.redis_client.delete(key)
+        logger.error(f"[{device_id}] Failed to restore fault segments: {e}")
+
+
+# Byte value of every 8-bit segment, so packing a payload parses nothing
+BYTE_OF_BITS = {format(value, "08b"): value for value in range(256)}
+
+
+def assemble_fault_payload(segments: List[Optional[str]]) -> bytes:
+    """
+    Pack the ordered segments, one 8-bit substring each, into the raw
+    payload bytes.
+    """
+    payload = bytearray(len(segments))
+    for i, bits in enumerate(segments):
+        if bits is None:
+            missing = [i for i, bits in enumerate(segments) if bits is None]
+            raise ValueError(f"Missing fault segments {missing}")
+        value = BYTE_OF_BITS.get(bits)
+        # Shorter segments of older devices
+        payload[i] = int(bits, 2) if value is None else value
+    return bytes(payload)
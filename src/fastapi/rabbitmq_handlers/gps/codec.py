@@ -0,0 +1,97 @@
+import struct
+from typing import Any, Dict
+
+# v2 binary GPS frame, little-endian:
+#   version   uint8    always GPS_FRAME_V2
+#   flags     uint8    FLAG_* bits below
+#   id_len    uint8    length of the trailing UTF-8 device ID
+#   timestamp float64  unix seconds
+#   speed     float32  km/h
+#   odometer  float64  km
+#   latitude  int32    microdegrees
+#   longitude int32    microdegrees
+#   fuel      float32  liters
+#   device_id id_len bytes
+GPS_FRAME_V2 = 2
+GPS_FRAME = struct.Struct("<BBBdfdiif")
+DEVICE_ID_OFFSET = GPS_FRAME.size
+
+FLAG_POWER_ON = 0x01
+FLAG_HAS_SPEED = 0x02
+FLAG_HAS_ODOMETER = 0x04
+
+MICRODEGREES = 1_000_000
+
+
+def is_gps_frame_v2(data: bytes) -> bool:
+    """Text payloads start with a printable character, never with 0x02."""
+    return len(data) > 0 and data[0] == GPS_FRAME_V2
+
+
+def encode_gps_frame(
+    device_id: str,
+    timestamp: float,
+    speed: float | None,
+    odometer: float | None,
+    power_on: bool,
+    latitude: float,
+    longitude: float,
+    fuel_gauge: float,
+) -> bytes:
+    encoded_id = device_id.encode()
+    if len(encoded_id) > 255:
+        raise ValueError("device_id must be at most 255 bytes")
+    flags = FLAG_POWER_ON if power_on else 0
+    if speed is not None:
+        flags |= FLAG_HAS_SPEED
+    if odometer is not None:
+        flags |= FLAG_HAS_ODOMETER
+    return (
+        GPS_FRAME.pack(
+            GPS_FRAME_V2,
+            flags,
+            len(encoded_id),
+            timestamp,
+            speed or 0.0,
+            odometer or 0.0,
+            round(latitude * MICRODEGREES),
+            round(longitude * MICRODEGREES),
+            fuel_gauge,
+        )
+        + encoded_id
+    )
+
+
+def decode_gps_frame(data: bytes) -> Dict[str, Any]:
+    """
+    Unpack a v2 frame into raw field values; `timestamp` stays a unix
+    timestamp. Raises ValueError for truncated frames or missing fields.
+    """
+    (
+        version,
+        flags,
+        id_len,
+        timestamp,
+        speed,
+        odometer,
+        latitude,
+        longitude,
+        fuel_gauge,
+    ) = GPS_FRAME.unpack_from(data)
+    if version != GPS_FRAME_V2:
+        raise ValueError(f"unsupported GPS frame version {version}")
+    if len(data) != GPS_FRAME.size + id_len:
+        raise ValueError("truncated GPS frame")
+    # The text format cannot carry empty fields either
+    if not flags & FLAG_HAS_SPEED or not flags & FLAG_HAS_ODOMETER:
+        raise ValueError("GPS frame is missing speed or odometer")
+    return {
+        "device_id": data[DEVICE_ID_OFFSET:].decode(),
+        "timestamp": timestamp,
+        "speed": speed,
+        "odometer": odometer,
+        "power_on": bool(flags & FLAG_POWER_ON),
+        "latitude": latitude / MICRODEGREES,
+        "longitude": longitude / MICRODEGREES,
+        "fuel_gauge": fuel_gauge,
+    }
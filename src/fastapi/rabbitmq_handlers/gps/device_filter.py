@@ -0,0 +1,39 @@
+from src.fastapi.config import get_settings
+from src.fastapi.metrics.registry import metrics
+from src.fastapi.redis.local_cache import LocalCache
+
+settings = get_settings()
+
+
+class UnknownDeviceFilter:
+    """
+    Device IDs the Device API recently rejected as unknown. Consumers check it
+    right after decoding, so events of unregistered hardware are dropped
+    before any Redis or HTTP work. Entries expire after the negative TTL, so
+    a device registered since is picked up again.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.devices = LocalCache(maxsize=maxsize, ttl=ttl)
+        self.rejected = metrics.counter("unknown_device.rejected")
+        self.registered = metrics.counter("unknown_device.registered")
+        metrics.gauge("unknown_device.ids", lambda: len(self.devices))
+
+    def add(self, device_id: str) -> None:
+        self.devices.set(device_id, True)
+        self.registered.inc()
+
+    def is_rejected(self, device_id: str) -> bool:
+        if device_id in self.devices:
+            self.rejected.inc()
+            return True
+        return False
+
+    def discard(self, device_id: str) -> None:
+        self.devices.discard(device_id)
+
+
+unknown_devices = UnknownDeviceFilter(
+    maxsize=settings.UNKNOWN_DEVICE_FILTER_SIZE,
+    ttl=settings.DEVICE_NEGATIVE_TTL_SECONDS,
+)
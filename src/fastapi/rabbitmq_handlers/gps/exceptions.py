@@ -1,3 +1,6 @@
+from src.fastapi.rabbitmq_handlers.exceptions import RetryableEventException
+
+
 class GPSEventException(Exception):
     """Base exception class for GPS event processing errors."""
 
@@ -54,7 +57,13 @@ class GPSDeviceAPIException(GPSEventException):
         super().__init__(message)
 
 
-class GPSRateLimitException(GPSDeviceAPIException):
+class GPSDeviceUnavailableException(GPSDeviceAPIException, RetryableEventException):
+    """Exception for Device API server errors."""
+
+    message = "Device API is unavailable."
+
+
+class GPSRateLimitException(GPSDeviceAPIException, RetryableEventException):
     """Exception for Device API rate limit errors."""
 
     message = "Rate limit exceeded for Device API."
@@ -63,6 +72,15 @@ class GPSRateLimitException(GPSDeviceAPIException):
         super().__init__(device_id, status_code=429)
 
 
+class GPSDeviceNotFoundException(GPSDeviceAPIException):
+    """Exception for devices unknown to the Device API."""
+
+    message = "Device is unknown to the Device API."
+
+    def __init__(self, device_id: str):
+        super().__init__(device_id, status_code=404)
+
+
 class GPSDatabaseException(GPSEventException):
     """Exception for database operation errors."""
 
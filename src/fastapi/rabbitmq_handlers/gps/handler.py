@@ -1,5 +1,6 @@
+import asyncio
 import logging
-from typing import cast
+from typing import List, cast
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,18 +12,23 @@ from src.fastapi.daily_summary.strategies import (
     ITripDefinitionStrategy,
 )
 from src.fastapi.idling_hotspots.detector import IdlingEventDetector
+from src.fastapi.rabbitmq_handlers.gps.exceptions import GPSDecodeException
 from src.fastapi.rabbitmq_handlers.gps.repositories import (
     GpsEventRepository,
     IGpsEventRepository,
 )
-from src.fastapi.rabbitmq_handlers.gps.schemas import GPSEventResponse
+from src.fastapi.rabbitmq_handlers.gps.schemas import GPSEventCreate, GPSEventResponse
+from src.fastapi.rabbitmq_handlers.gps.state import DeviceStates
 from src.fastapi.rabbitmq_handlers.gps.utils import (
-    cache_processed_key,
-    check_duplicate_event,
     decode_payload,
+    decode_payloads,
     dispatch_alert_event,
     get_device_name,
+    get_device_names,
     persist_gps_event,
+    persist_gps_events,
+    processed_key,
+    reject_unknown_device,
 )
 
 logger = logging.getLogger(__name__)
@@ -37,45 +43,129 @@ daily_aggregator: DailyAggregator = DailyAggregator(
 idling_detector: IdlingEventDetector = IdlingEventDetector()
 
 
+def new_device_states() -> DeviceStates:
+    return DeviceStates(daily_aggregator, idling_detector)
+
+
 async def handle_gps_event(db: AsyncSession, payload: str) -> dict:
     gps_event_or_error = await decode_payload(payload)
     if isinstance(gps_event_or_error, dict):
         return gps_event_or_error
     gps_event = gps_event_or_error
 
-    duplicate_check = await check_duplicate_event(gps_event)
+    rejected = reject_unknown_device(gps_event.device_id)
+    if rejected:
+        return rejected
+
+    # Dedup and the summary / idling state of the device in one round-trip
+    states = new_device_states()
+    (duplicate_check,) = await states.load([gps_event])
     if duplicate_check:
         return duplicate_check
 
-    key = f"gps_event:{gps_event.device_id}:{gps_event.timestamp}"
+    key = processed_key(gps_event)
 
-    device_name_or_error = await get_device_name(gps_event.device_id)
+    try:
+        device_name_or_error = await get_device_name(gps_event.device_id)
+    except Exception:
+        # The message will be redelivered, so it must pass the dedup check again
+        await states.release(key)
+        raise
     if isinstance(device_name_or_error, dict):
         return device_name_or_error
     device_name = device_name_or_error
 
-    response = GPSEventResponse(
-        device_id=gps_event.device_id,
-        device_name=device_name,
-        timestamp=gps_event.timestamp,
-        speed=gps_event.speed,
-        odometer=gps_event.odometer,
-        power_on=gps_event.power_on,
-        latitude=gps_event.latitude,
-        longitude=gps_event.longitude,
-        fuel_gauge=gps_event.fuel_gauge,
-    )
+    response = GPSEventResponse.from_event(gps_event, device_name)
+
+    try:
+        await persist_gps_event(db, response)
+    except Exception:
+        await states.release(key)
+        raise
+
+    data = response.model_dump()
+    await dispatch_alert_event(gps_event, device_name, response, data)
+
+    await states.apply(db, response)
+    await states.save()
 
-    cache_error = await cache_processed_key(key)
-    if cache_error:
-        return cache_error
+    return cast(dict, data)
 
-    await persist_gps_event(db, response)
 
-    await dispatch_alert_event(gps_event, device_name, response)
+async def handle_gps_events(
+    db: AsyncSession, payloads: List[str]
+) -> List[dict | BaseException]:
+    """
+    Batch variant of `handle_gps_event`. Dedup and device state are loaded in
+    one pipelined round-trip and written back in another, device names are
+    resolved once per device and all rows are written in one transaction.
+    The aggregator and idling detector still see events in order.
 
-    await daily_aggregator.process_event(response)
+    Events that failed transiently get their exception in place of a result,
+    so the consumer can redeliver just those messages.
+    """
+    results: List[dict | BaseException] = [{} for _ in payloads]
+
+    decoded = []
+    for index, gps_event in enumerate(await decode_payloads(payloads)):
+        if isinstance(gps_event, GPSDecodeException):
+            results[index] = {"error": str(gps_event)}
+            continue
+        rejected = reject_unknown_device(gps_event.device_id)
+        if rejected:
+            results[index] = rejected
+        else:
+            decoded.append((index, gps_event))
+    if not decoded:
+        return results
+
+    states = new_device_states()
+    duplicate_checks = await states.load([e for _, e in decoded])
+    fresh: List[tuple[int, GPSEventCreate]] = []
+    for (index, gps_event), duplicate_check in zip(decoded, duplicate_checks):
+        if duplicate_check:
+            results[index] = duplicate_check
+        else:
+            fresh.append((index, gps_event))
+    if not fresh:
+        return results
+
+    device_names = await get_device_names([e.device_id for _, e in fresh])
+
+    accepted: List[tuple[int, GPSEventCreate, GPSEventResponse]] = []
+    released_keys: List[str] = []
+    for index, gps_event in fresh:
+        device_name_or_error = device_names[gps_event.device_id]
+        if isinstance(device_name_or_error, BaseException):
+            results[index] = device_name_or_error
+            released_keys.append(processed_key(gps_event))
+            continue
+        if isinstance(device_name_or_error, dict):
+            results[index] = device_name_or_error
+            continue
+        response = GPSEventResponse.from_event(gps_event, device_name_or_error)
+        accepted.append((index, gps_event, response))
+    await states.release(*released_keys)
+    if not accepted:
+        return results
+
+    try:
+        await persist_gps_events(db, [response for _, _, response in accepted])
+    except Exception:
+        await states.release(*(processed_key(e) for _, e, _ in accepted))
+        raise
+
+    dumped = [response.model_dump() for _, _, response in accepted]
+    await asyncio.gather(
+        *(
+            dispatch_alert_event(gps_event, response.device_name, response, data)
+            for (_, gps_event, response), data in zip(accepted, dumped)
+        )
+    )
 
-    await idling_detector.process_event(db, response)
+    for (index, _, response), data in zip(accepted, dumped):
+        await states.apply(db, response)
+        results[index] = data
+    await states.save()
 
-    return cast(dict, response.model_dump())
+    return results
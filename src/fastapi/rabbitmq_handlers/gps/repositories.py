@@ -24,6 +24,10 @@ class IGpsEventRepository(ABC):
     async def save(self, db: AsyncSession, event: GPSEventResponse) -> None:
         pass
 
+    @abstractmethod
+    async def save_many(self, db: AsyncSession, events: List[GPSEventResponse]) -> None:
+        pass
+
 
 class GpsEventRepository(IGpsEventRepository):
     async def exists(self, db: AsyncSession, device_id: str) -> bool:
@@ -53,3 +57,12 @@ class GpsEventRepository(IGpsEventRepository):
         db.add(model)
         await db.commit()
         await db.refresh(model)
+
+    async def save_many(self, db: AsyncSession, events: List[GPSEventResponse]) -> None:
+        try:
+            db.add_all([GPSEventModel(**event.model_dump()) for event in events])
+            await db.commit()
+        except Exception:
+            # The batched consumer keeps its session; leave it usable
+            await db.rollback()
+            raise
@@ -1,9 +1,11 @@
 import base64
 import logging
 from datetime import datetime
+from typing import Any, Dict, Iterable, List
 
 from pydantic import BaseModel, ConfigDict, Field
 
+from src.fastapi.rabbitmq_handlers.gps.codec import decode_gps_frame, is_gps_frame_v2
 from src.fastapi.rabbitmq_handlers.gps.exceptions import GPSDecodeException
 
 logger = logging.getLogger(__name__)
@@ -22,42 +24,68 @@ class GPSEventBase(BaseModel):
     fuel_gauge: float = Field(...)
 
 
+def parse_gps_payload(payload: str) -> Dict[str, Any]:
+    """
+    Parse a text (v1) or binary (v2) GPS payload into field values. Raises on
+    malformed input; the range checks are left to `GPSEventBase`.
+    """
+    raw = base64.b64decode(payload)
+    if is_gps_frame_v2(raw):
+        fields = decode_gps_frame(raw)
+        fields["timestamp"] = datetime.fromtimestamp(fields["timestamp"])
+    else:
+        decoded_data = raw.decode("utf-8")
+        if decoded_data.startswith('"') and decoded_data.endswith('"'):
+            decoded_data = decoded_data[1:-1]
+        logger.debug("Decoded data: %s", decoded_data)
+        (
+            device_id,
+            str_timestamp,
+            speed,
+            odometer,
+            power_on,
+            latitude,
+            longitude,
+            fuel_gauge,
+        ) = decoded_data.split(":")
+        fields = {
+            "device_id": device_id,
+            "timestamp": datetime.fromtimestamp(float(str_timestamp)),
+            "speed": float(speed),
+            "odometer": float(odometer),
+            "power_on": power_on.lower() == "true",
+            "latitude": float(latitude),
+            "longitude": float(longitude),
+            "fuel_gauge": float(fuel_gauge),
+        }
+    return fields
+
+
 class GPSEventCreate(GPSEventBase):
     """Schema used when creating GPSEvent from base64"""
 
     @classmethod
     def from_base64(cls, payload: str) -> "GPSEventCreate":
+        """Decode a text (v1) or binary (v2) GPS payload."""
         try:
-            decoded_data = base64.b64decode(payload).decode("utf-8")
-            if decoded_data.startswith('"') and decoded_data.endswith('"'):
-                decoded_data = decoded_data[1:-1]
-            logger.info(f"Decoded data: {decoded_data}")
-            (
-                device_id,
-                str_timestamp,
-                speed,
-                odometer,
-                power_on,
-                latitude,
-                longitude,
-                fuel_gauge,
-            ) = decoded_data.split(":")
-            timestamp = datetime.fromtimestamp(float(str_timestamp))
-            logger.info(f"Device ID: {device_id}")
-            return cls(
-                device_id=device_id,
-                timestamp=timestamp,
-                speed=float(speed),
-                odometer=float(odometer),
-                power_on=power_on.lower() == "true",
-                latitude=float(latitude),
-                longitude=float(longitude),
-                fuel_gauge=float(fuel_gauge),
-            )
+            return cls(**parse_gps_payload(payload))
         except Exception as e:
             logger.error(f"Failed to decode base64 event: {str(e)}")
             raise GPSDecodeException(payload, str(e))
 
+    @classmethod
+    def decode_many(
+        cls, payloads: Iterable[str]
+    ) -> List["GPSEventCreate | GPSDecodeException"]:
+        """Decode a batch of payloads; a bad payload gets its error in place."""
+        events: List[GPSEventCreate | GPSDecodeException] = []
+        for payload in payloads:
+            try:
+                events.append(cls.from_base64(payload))
+            except GPSDecodeException as e:
+                events.append(e)
+        return events
+
 
 class GPSEventResponse(GPSEventBase):
     """Schema used when returning GPSEvent"""
@@ -65,3 +93,13 @@ class GPSEventResponse(GPSEventBase):
     device_name: str
 
     model_config = ConfigDict(from_attributes=True)
+
+    @classmethod
+    def from_event(
+        cls, gps_event: GPSEventCreate, device_name: str
+    ) -> "GPSEventResponse":
+        """
+        Build a response from a decoded event. Its fields are validated again,
+        which is cheaper than `model_construct`, which runs in pure Python.
+        """
+        return cls.model_validate({**gps_event.__dict__, "device_name": device_name})
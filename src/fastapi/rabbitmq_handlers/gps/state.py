@@ -0,0 +1,179 @@
+import logging
+from itertools import islice
+from typing import Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.fastapi.daily_summary.aggregator import DailyAggregator
+from src.fastapi.daily_summary.schemas import DailyVehicleSummary
+from src.fastapi.idling_hotspots.detector import IdlingEventDetector
+from src.fastapi.idling_hotspots.schemas import IdlingDetectedEvent
+from src.fastapi.rabbitmq_handlers.dedup import DedupCache, DedupVerdict, dedup_cache
+from src.fastapi.rabbitmq_handlers.gps.exceptions import (
+    GPSRedisException,
+    GPSRedisNotInitializedException,
+)
+from src.fastapi.rabbitmq_handlers.gps.schemas import (
+    GPSEventBase,
+    GPSEventCreate,
+    GPSEventResponse,
+)
+from src.fastapi.rabbitmq_handlers.gps.utils import (
+    PROCESSED_KEY_TTL,
+    processed_key,
+    release_processed_keys,
+)
+from src.fastapi.redis.redis import redis_manager
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceStates:
+    """
+    Redis-backed state touched by a batch of GPS events: the dedup keys, the
+    daily summaries and the idling events of their devices.
+
+    `load` settles the dedup keys, locally through the `DedupCache` where it
+    can, writes them to Redis and reads every summary and idling entry in one
+    pipelined round-trip; `apply` runs the aggregator and idling detector in
+    memory; `save` writes back whatever changed in a second round-trip.
+    """
+
+    def __init__(
+        self,
+        aggregator: DailyAggregator,
+        detector: IdlingEventDetector,
+        dedup: DedupCache = dedup_cache,
+    ):
+        self.aggregator = aggregator
+        self.detector = detector
+        self.dedup = dedup
+        self.summaries: Dict[str, Optional[DailyVehicleSummary]] = {}
+        self.idling: Dict[str, Optional[IdlingDetectedEvent]] = {}
+        self.changed_summaries: Dict[str, DailyVehicleSummary] = {}
+        self.changed_idling: Dict[str, Optional[IdlingDetectedEvent]] = {}
+
+    def summary_key(self, gps_event: GPSEventBase) -> str:
+        return self.aggregator.generate_key(
+            gps_event.device_id, gps_event.timestamp.date()
+        )
+
+    async def load(self, gps_events: List[GPSEventCreate]) -> List[dict | None]:
+        """
+        Claim the processed key of every event and load the state of their
+        devices. Returns None for fresh events and an error dict otherwise.
+        Keys the front cache cannot settle are claimed with `SET NX EX`; keys
+        it knows to be new are written in the same round-trip, before the
+        event is persisted, so a redelivery after a crash finds them.
+        """
+        if redis_manager.redis_client is None:
+            logger.error("Redis client is not initialized")
+            error = {"error": str(GPSRedisNotInitializedException("load_state"))}
+            return [error for _ in gps_events]
+
+        keys = [processed_key(e) for e in gps_events]
+        verdicts = [self.dedup.check(key) for key in keys]
+        checked = [
+            (key, verdict)
+            for key, verdict in zip(keys, verdicts)
+            if verdict in (DedupVerdict.POSSIBLE, DedupVerdict.UNCONFIRMED)
+        ]
+        fresh = [key for key, v in zip(keys, verdicts) if v is DedupVerdict.NEW]
+        candidates = [
+            e
+            for e, verdict in zip(gps_events, verdicts)
+            if verdict is not DedupVerdict.DUPLICATE
+        ]
+        if not candidates:
+            return [self.duplicate(e) for e in gps_events]
+
+        summary_keys = list(dict.fromkeys(self.summary_key(e) for e in candidates))
+        device_ids = list(dict.fromkeys(e.device_id for e in candidates))
+        try:
+            pipe = redis_manager.redis_client.pipeline(transaction=False)
+            for key, _ in checked:
+                pipe.set(key, "processed", nx=True, ex=PROCESSED_KEY_TTL)
+            for key in summary_keys:
+                pipe.get(key)
+            for device_id in device_ids:
+                pipe.get(self.detector.idling_key(device_id))
+            for key in fresh:
+                pipe.set(key, "processed", ex=PROCESSED_KEY_TTL)
+            replies = await pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis error: {e}")
+            self.dedup.forget(*keys)
+            return [
+                {"error": str(GPSRedisException("load_state", key, str(e)))}
+                for key in keys
+            ]
+
+        reply_iter = iter(replies)
+        claimed = {
+            key: bool(is_new)
+            for (key, _), is_new in zip(checked, islice(reply_iter, len(checked)))
+        }
+        for key, verdict in checked:
+            self.dedup.record_redis_reply(verdict, claimed[key])
+        raw_summaries = list(islice(reply_iter, len(summary_keys)))
+        raw_idling = list(islice(reply_iter, len(device_ids)))
+        for key, raw in zip(summary_keys, raw_summaries):
+            self.summaries[key] = (
+                self.aggregator.deserialize_summary(raw) if raw else None
+            )
+        for device_id, raw in zip(device_ids, raw_idling):
+            self.idling[device_id] = (
+                self.detector.deserialize_idling_event(raw) if raw else None
+            )
+
+        results: List[dict | None] = []
+        for gps_event, key, verdict in zip(gps_events, keys, verdicts):
+            if verdict is DedupVerdict.NEW:
+                results.append(None)
+            elif verdict is not DedupVerdict.DUPLICATE and claimed[key]:
+                results.append(None)
+            else:
+                results.append(self.duplicate(gps_event))
+        return results
+
+    def duplicate(self, gps_event: GPSEventCreate) -> dict:
+        logger.info(
+            "Duplicate event: %s at %s", gps_event.device_id, gps_event.timestamp
+        )
+        return {"error": "Duplicate event"}
+
+    async def release(self, *keys: str) -> None:
+        """Forget the keys of events that failed, locally and in Redis."""
+        self.dedup.forget(*keys)
+        await release_processed_keys(*keys)
+
+    async def apply(self, db: AsyncSession, response: GPSEventResponse) -> None:
+        """Fold an accepted event into the loaded state of its device."""
+        key = self.summary_key(response)
+        summary = self.aggregator.apply_event(self.summaries[key], response)
+        self.summaries[key] = self.changed_summaries[key] = summary
+
+        device_id = response.device_id
+        previous = self.idling[device_id]
+        idling_event = await self.detector.apply_event(db, previous, response)
+        if idling_event is not None or previous is not None:
+            self.idling[device_id] = self.changed_idling[device_id] = idling_event
+
+    async def save(self) -> None:
+        """Write every changed summary and idling entry back in one round-trip."""
+        if not (self.changed_summaries or self.changed_idling):
+            return
+        pipe = redis_manager.redis_client.pipeline(transaction=False)
+        ttl = self.aggregator.summary_ttl()
+        for key, summary in self.changed_summaries.items():
+            self.aggregator.track_key(key)
+            pipe.setex(key, ttl, self.aggregator.serialize_summary(summary))
+        for device_id, idling_event in self.changed_idling.items():
+            idling_key = self.detector.idling_key(device_id)
+            if idling_event is None:
+                pipe.delete(idling_key)
+            else:
+                pipe.set(idling_key, self.detector.serialize_idling_event(idling_event))
+        await pipe.execute()
+        self.changed_summaries.clear()
+        self.changed_idling.clear()
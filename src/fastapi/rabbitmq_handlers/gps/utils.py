@@ -1,21 +1,23 @@
+import asyncio
 import hashlib
 import json
 import logging
-from typing import Optional
+from typing import List, Optional
 
-import aiohttp
 from sqlalchemy.ext.asyncio import AsyncSession
-from tenacity import (
-    retry,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_exponential,
-)
 
 from src.fastapi.config import get_settings
+from src.fastapi.devices.directory import device_directory
+from src.fastapi.http_client.client import http_client_manager
+from src.fastapi.http_client.guard import device_api_guard
+from src.fastapi.rabbitmq_handlers.exceptions import RetryableEventException
+from src.fastapi.rabbitmq_handlers.gps.device_filter import unknown_devices
 from src.fastapi.rabbitmq_handlers.gps.exceptions import (
     GPSDatabaseException,
+    GPSDecodeException,
     GPSDeviceAPIException,
+    GPSDeviceNotFoundException,
+    GPSDeviceUnavailableException,
     GPSRateLimitException,
     GPSRedisException,
     GPSRedisNotInitializedException,
@@ -24,54 +26,81 @@ from src.fastapi.rabbitmq_handlers.gps.models import GPSEventModel
 from src.fastapi.rabbitmq_handlers.gps.schemas import GPSEventCreate, GPSEventResponse
 from src.fastapi.redis.decorators import cache_api_call
 from src.fastapi.redis.redis import redis_manager
-from src.fastapi.websocket.client import send_alert_event
 from src.fastapi.websocket.models import AlertEvent
+from src.fastapi.websocket.outbox import alert_outbox
+from src.fastapi.websocket.prefilter import alert_prefilter
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 DEVICE_API_URL = get_settings().DEVICE_API_URL
+PROCESSED_KEY_TTL = 3600
 
 
 async def decode_payload(payload: str) -> GPSEventCreate:
     return GPSEventCreate.from_base64(payload)
 
 
-async def check_duplicate_event(gps_event: GPSEventCreate) -> dict | None:
-    if redis_manager.redis_client is None:
-        logger.error("Redis client is not initialized")
-        return {"error": str(GPSRedisNotInitializedException("check_duplicate"))}
+async def decode_payloads(
+    payloads: List[str],
+) -> List[GPSEventCreate | GPSDecodeException]:
+    return GPSEventCreate.decode_many(payloads)
 
-    key = f"gps_event:{gps_event.device_id}:{gps_event.timestamp}"
-    try:
-        if not await redis_manager.redis_client.setnx(key, "processed"):
-            logger.info(
-                "Duplicate event: %s at %s", gps_event.device_id, gps_event.timestamp
-            )
-            return {"error": "Duplicate event"}
-    except Exception as e:
-        logger.error(f"Redis error: {e}")
-        return {"error": str(GPSRedisException("setnx", key, str(e)))}
-    return None
+
+def processed_key(gps_event: GPSEventCreate) -> str:
+    return f"gps_event:{gps_event.device_id}:{gps_event.timestamp}"
 
 
 async def get_device_name(device_id: str) -> str | dict:
+    device_name = device_directory.get(device_id)
+    if device_name is not None:
+        return device_name
     try:
         device_name = await fetch_device_name(device_id)
         if not device_name:
             raise GPSDeviceAPIException(device_id)
+        device_directory.learn(device_id, str(device_name))
         return str(device_name)
     except GPSDeviceAPIException as e:
         logger.error(f"Device API error: {e}")
+        if isinstance(e, RetryableEventException):
+            raise
+        if isinstance(e, GPSDeviceNotFoundException):
+            unknown_devices.add(device_id)
         return {"error": str(e)}
 
 
-async def cache_processed_key(key: str) -> dict | None:
+def reject_unknown_device(device_id: str) -> dict | None:
+    """Error of a device the Device API recently rejected, without any I/O."""
+    if unknown_devices.is_rejected(device_id):
+        return {"error": str(GPSDeviceNotFoundException(device_id))}
+    return None
+
+
+async def get_device_names(
+    device_ids: List[str],
+) -> dict[str, str | dict | BaseException]:
+    """
+    Resolve the name of every distinct device in a batch concurrently.
+    Transient lookup failures are returned in place of the name.
+    """
+    unique_ids = list(dict.fromkeys(device_ids))
+    names = await asyncio.gather(
+        *(get_device_name(d) for d in unique_ids), return_exceptions=True
+    )
+    return dict(zip(unique_ids, names))
+
+
+async def release_processed_keys(*keys: str) -> None:
+    """
+    Drop dedup keys of events that failed transiently, so their redelivery is
+    not mistaken for a duplicate.
+    """
+    if not keys or redis_manager.redis_client is None:
+        return
     try:
-        await redis_manager.redis_client.setex(key, 3600, "processed")
+        await redis_manager.redis_client.delete(*keys)
     except Exception as e:
-        logger.error(f"Redis cache error: {e}")
-        return {"error": str(GPSRedisException("setex", key, str(e)))}
-    return None
+        logger.error(f"Failed to release processed keys: {e}")
 
 
 async def persist_gps_event(db: AsyncSession, response: GPSEventResponse) -> None:
@@ -84,58 +113,89 @@ async def persist_gps_event(db: AsyncSession, response: GPSEventResponse) -> Non
         raise e
 
 
+async def persist_gps_events(
+    db: AsyncSession, responses: List[GPSEventResponse]
+) -> None:
+    try:
+        from src.fastapi.rabbitmq_handlers.gps.handler import gps_repo
+
+        await gps_repo.save_many(db, responses)
+    except Exception as e:
+        logger.error(f"Error saving GPS event batch: {e}")
+        raise e
+
+
 async def dispatch_alert_event(
-    gps_event: GPSEventCreate, device_name: str, response: GPSEventResponse
+    gps_event: GPSEventCreate,
+    device_name: str,
+    response: GPSEventResponse,
+    data: Optional[dict] = None,
 ) -> None:
+    """`data` is the already dumped `response`, if the caller has it."""
+    if data is None:
+        data = response.model_dump()
+    if not alert_prefilter.allows("gps", data):
+        return
     alert = AlertEvent(
         event_type="gps",
         device_id=gps_event.device_id,
         device_name=device_name,
         timestamp=gps_event.timestamp,
-        data=response.model_dump(),
+        data=data,
     )
     try:
-        await send_alert_event(alert)
+        await alert_outbox.publish(alert)
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
 
 
-# API calls
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=1, max=10),
-    retry=retry_if_exception_type((GPSRateLimitException, aiohttp.ClientResponseError)),
+# API calls. Transient failures are raised to the consumer, which redelivers
+# the message through the retry queues instead of sleeping in-line, unless a
+# name fetched before can be served. `device_api_guard` paces the calls and
+# fails them fast while the Device API is unhealthy.
+@cache_api_call(
+    cache_key_prefix="device_name",
+    ttl=300,
+    negative_on=(GPSDeviceNotFoundException,),
+    negative_ttl=settings.DEVICE_NEGATIVE_TTL_SECONDS,
+    last_known_on=(RetryableEventException,),
 )
-@cache_api_call(cache_key_prefix="device_name", ttl=300)
 async def fetch_device_name(device_id: str) -> Optional[str]:
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{DEVICE_API_URL}/{device_id}") as response:
-            logger.info(f"Fetching {device_id} from {DEVICE_API_URL}")
-            if response.status == 200:
-                data = await response.json()
-                return str(data.get("name", ""))
-            elif response.status == 429:
-                logger.warning(f"Rate limit exceeded for device {device_id}")
-                raise GPSRateLimitException(device_id)
-            elif response.status == 500:
-                logger.error(
-                    f"Server error for device {device_id}: " f"{await response.text()}"
-                )
-                raise GPSDeviceAPIException(
-                    device_id, response.status, await response.text()
-                )
-            else:
-                logger.error(
-                    f"Failed to fetch device name for {device_id}, "
-                    f"status: {response.status}"
-                )
-                raise GPSDeviceAPIException(device_id, response.status)
+    session = await http_client_manager.get_session()
+    url = f"{DEVICE_API_URL}/{device_id}"
+    async with device_api_guard.call(), session.get(url) as response:
+        logger.info(f"Fetching {device_id} from {DEVICE_API_URL}")
+        if response.status == 200:
+            data = await response.json()
+            return str(data.get("name", ""))
+        elif response.status == 429:
+            logger.warning(f"Rate limit exceeded for device {device_id}")
+            raise GPSRateLimitException(device_id)
+        elif response.status >= 500:
+            logger.error(
+                f"Server error for device {device_id}: " f"{await response.text()}"
+            )
+            raise GPSDeviceUnavailableException(
+                device_id, response.status, await response.text()
+            )
+        elif response.status == 404:
+            logger.warning(f"Unknown device {device_id}")
+            raise GPSDeviceNotFoundException(device_id)
+        else:
+            logger.error(
+                f"Failed to fetch device name for {device_id}, "
+                f"status: {response.status}"
+            )
+            raise GPSDeviceAPIException(device_id, response.status)
 
 
 async def invalidate_device_cache(device_id: str):
     cache_key = f"device_name:{hashlib.md5(
         json.dumps([device_id], sort_keys=True).encode()).hexdigest()}"
 
+    fetch_device_name.invalidate(device_id)
+    unknown_devices.discard(device_id)
+    await device_directory.discard(device_id)
     if not redis_manager.redis_client:
         logger.error("Redis client is not initialized")
         raise GPSRedisNotInitializedException("invalidate_cache")
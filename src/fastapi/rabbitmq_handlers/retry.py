@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from typing import Iterable, Optional
+
+import aio_pika
+import aiohttp
+import redis.exceptions
+from aio_pika.abc import AbstractChannel, AbstractExchange, AbstractIncomingMessage
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from src.fastapi.config import get_settings
+from src.fastapi.rabbitmq_handlers.exceptions import RetryableEventException
+from src.fastapi.rabbitmq_handlers.fault.exceptions import FaultDecodeException
+from src.fastapi.rabbitmq_handlers.gps.exceptions import GPSDecodeException
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+DEAD_LETTER_EXCHANGE = "events_dlx"
+RETRY_COUNT_HEADER = "x-retry-count"
+LAST_ERROR_HEADER = "x-last-error"
+
+# Failures worth another attempt once the upstream has recovered
+TRANSIENT_EXCEPTIONS = (
+    RetryableEventException,
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+    ConnectionError,
+    redis.exceptions.ConnectionError,
+    redis.exceptions.TimeoutError,
+    OperationalError,
+    InterfaceError,
+)
+# Malformed payloads are filtered on purpose and never retried or parked
+DISCARDED_EXCEPTIONS = (GPSDecodeException, FaultDecodeException)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    return isinstance(exc, TRANSIENT_EXCEPTIONS)
+
+
+def retry_queue_name(queue_name: str, tier: int) -> str:
+    return f"{queue_name}.retry.{tier}"
+
+
+def dead_letter_queue_name(queue_name: str) -> str:
+    return f"{queue_name}.dlq"
+
+
+def retry_delay_ms(tier: int, base_delay_ms: int) -> int:
+    """Exponential delay of a retry tier: base, 2x base, 4x base, ..."""
+    return int(base_delay_ms * 2**tier)
+
+
+class RetryManager:
+    """
+    Redelivers failed messages without blocking the consumer.
+
+    Each consumed queue gets one delay queue per tier. A delay queue has no
+    consumer: its messages expire after the tier's TTL and are dead-lettered
+    back onto the original queue through the default exchange. Once every
+    tier is used up, or for failures that are not transient, the message is
+    parked in `<queue>.dlq` behind the `events_dlx` exchange.
+    """
+
+    def __init__(self) -> None:
+        self.channel: Optional[AbstractChannel] = None
+        self.dead_letter_exchange: Optional[AbstractExchange] = None
+        self.tiers = settings.RETRY_TIERS
+        self.base_delay_ms = settings.RETRY_BASE_DELAY_MS
+
+    async def setup(self, channel: AbstractChannel, queue_names: Iterable[str]):
+        """Declare the retry and dead-letter topology for the given queues."""
+        self.dead_letter_exchange = await channel.declare_exchange(
+            DEAD_LETTER_EXCHANGE, aio_pika.ExchangeType.DIRECT, durable=True
+        )
+        for queue_name in queue_names:
+            for tier in range(self.tiers):
+                await channel.declare_queue(
+                    retry_queue_name(queue_name, tier),
+                    durable=True,
+                    arguments={
+                        "x-message-ttl": retry_delay_ms(tier, self.base_delay_ms),
+                        "x-dead-letter-exchange": "",
+                        "x-dead-letter-routing-key": queue_name,
+                    },
+                )
+            dead_letter_queue = await channel.declare_queue(
+                dead_letter_queue_name(queue_name), durable=True
+            )
+            await dead_letter_queue.bind(
+                self.dead_letter_exchange, routing_key=queue_name
+            )
+        self.channel = channel
+        logger.info("Retry and dead-letter queues declared")
+
+    async def handle_failure(
+        self, queue_name: str, message: AbstractIncomingMessage, exc: BaseException
+    ) -> None:
+        """
+        Republish a failed message to its next retry tier or to the DLQ.
+        The caller acks the original afterwards.
+        """
+        if isinstance(exc, DISCARDED_EXCEPTIONS):
+            logger.warning(f"[{queue_name}] Dropping malformed message: {exc}")
+            return
+        if self.channel is None or self.dead_letter_exchange is None:
+            logger.error(f"[{queue_name}] Retry queues not set up, dropping message")
+            return
+
+        headers = dict(message.headers or {})
+        attempt = int(str(headers.get(RETRY_COUNT_HEADER, 0)))
+        headers[RETRY_COUNT_HEADER] = attempt + 1
+        headers[LAST_ERROR_HEADER] = str(exc)[:255]
+        retry_message = aio_pika.Message(
+            body=message.body,
+            headers=headers,
+            content_type=message.content_type,
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+        )
+
+        if is_retryable(exc) and attempt < self.tiers:
+            logger.warning(
+                f"[{queue_name}] Retry {attempt + 1}/{self.tiers} in "
+                f"{retry_delay_ms(attempt, self.base_delay_ms)}ms: {exc}"
+            )
+            await self.channel.default_exchange.publish(
+                retry_message, routing_key=retry_queue_name(queue_name, attempt)
+            )
+        else:
+            logger.error(
+                f"[{queue_name}] Moving message to dead-letter queue after "
+                f"{attempt + 1} attempts: {exc}"
+            )
+            await self.dead_letter_exchange.publish(
+                retry_message, routing_key=queue_name
+            )
+
+
+retry_manager = RetryManager()
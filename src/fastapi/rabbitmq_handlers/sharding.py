@@ -0,0 +1,32 @@
+from src.fastapi.rabbitmq_handlers.worker_pool import partition_for
+
+EXCHANGE_NAME = "events_exchange"
+
+
+def shard_for_device(device_id: str, shards: int) -> int:
+    """Stable shard owning a device, identical for publishers and consumers."""
+    return partition_for(device_id, shards)
+
+
+def shard_routing_key(event_type: str, device_id: str, shards: int) -> str:
+    """
+    Routing key a publisher must use for an event. With a single shard the
+    legacy `gps` / `fault` keys are kept.
+    """
+    if shards <= 1:
+        return event_type
+    return f"{event_type}.{shard_for_device(device_id, shards)}"
+
+
+def shard_binding_key(event_type: str, shard: int, shards: int) -> str:
+    """Routing key bound to the queue of one shard."""
+    if shards <= 1:
+        return event_type
+    return f"{event_type}.{shard}"
+
+
+def shard_queue_name(event_type: str, shard: int, shards: int) -> str:
+    """Queue consumed by one shard, e.g. `gps_queue.3`."""
+    if shards <= 1:
+        return f"{event_type}_queue"
+    return f"{event_type}_queue.{shard}"
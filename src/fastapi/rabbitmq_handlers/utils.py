@@ -0,0 +1,20 @@
+import base64
+import binascii
+
+from src.fastapi.rabbitmq_handlers.gps.codec import DEVICE_ID_OFFSET, is_gps_frame_v2
+
+
+def peek_device_id(body: bytes) -> str:
+    """
+    Extract the device ID from a raw GPS or fault message body without fully
+    decoding it. Both payload formats carry the device ID as the first
+    colon-separated field, binary GPS frames carry it after the fixed header.
+    Returns an empty string for undecodable bodies.
+    """
+    try:
+        decoded = base64.b64decode(body)
+    except (binascii.Error, ValueError):
+        return ""
+    if is_gps_frame_v2(decoded):
+        return decoded[DEVICE_ID_OFFSET:].decode("utf-8", errors="replace")
+    return decoded.split(b":", 1)[0].strip(b'"').decode("utf-8", errors="replace")
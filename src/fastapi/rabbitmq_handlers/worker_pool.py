@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import zlib
+from typing import Awaitable, Callable, List, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[AsyncSession], Awaitable[None]]
+
+
+def partition_for(key: str, partitions: int) -> int:
+    """
+    Map a key onto a partition. crc32 is used instead of `hash()` because it
+    is stable across processes and restarts.
+    """
+    return zlib.crc32(key.encode()) % partitions
+
+
+def split_workers(total: int, reserved_share: float) -> Tuple[int, int]:
+    """
+    Split `total` workers into a general and a reserved part, keeping at
+    least one worker on each side.
+    """
+    reserved = min(max(1, round(total * reserved_share)), max(1, total - 1))
+    return max(1, total - reserved), reserved
+
+
+class PartitionedWorkerPool:
+    """
+    Fixed set of asyncio workers, each draining its own bounded mailbox.
+
+    Jobs submitted with the same key always land on the same worker and run
+    in submission order, which keeps the per-device state machines consistent.
+    Jobs for different keys run concurrently. A full mailbox blocks `submit`,
+    so backpressure propagates to the broker through the channel prefetch.
+    """
+
+    def __init__(
+        self,
+        num_workers: int,
+        mailbox_size: int,
+        session_factory: Callable[[], Awaitable[AsyncSession]],
+        name: str = "ingest",
+    ):
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        self.name = name
+        self.session_factory = session_factory
+        self.mailboxes: List[asyncio.Queue] = [
+            asyncio.Queue(maxsize=mailbox_size) for _ in range(num_workers)
+        ]
+        self.workers: List[asyncio.Task] = []
+
+    @property
+    def num_workers(self) -> int:
+        return len(self.mailboxes)
+
+    def start(self) -> None:
+        self.workers = [
+            asyncio.create_task(self._run_worker(index, mailbox))
+            for index, mailbox in enumerate(self.mailboxes)
+        ]
+        logger.info(f"Started {self.num_workers} {self.name} workers")
+
+    async def submit(self, key: str, job: Job) -> None:
+        await self.mailboxes[partition_for(key, self.num_workers)].put(job)
+
+    async def join(self) -> None:
+        """Wait until every submitted job has been processed."""
+        await asyncio.gather(*(mailbox.join() for mailbox in self.mailboxes))
+
+    async def stop(self) -> None:
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        logger.info(f"Stopped {self.name} workers")
+
+    async def _run_worker(self, index: int, mailbox: asyncio.Queue) -> None:
+        async with await self.session_factory() as db_session:
+            while True:
+                job = await mailbox.get()
+                try:
+                    await job(db_session)
+                except Exception as e:
+                    logger.error(f"[{self.name}-{index}] Job failed: {str(e)}")
+                finally:
+                    mailbox.task_done()
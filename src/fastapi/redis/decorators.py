@@ -1,19 +1,98 @@
+import asyncio
 import hashlib
 import json
 import logging
+import time
 from functools import wraps
+from typing import List, Optional, Tuple, Type
 
+from src.fastapi.config import get_settings
+from src.fastapi.metrics.registry import metrics
+from src.fastapi.redis.local_cache import LocalCache
 from src.fastapi.redis.redis import redis_manager
 
 logger = logging.getLogger(__name__)
+# Every L1 tier of the process, e.g. to reset them between tests
+local_caches: List[LocalCache] = []
+# Redis value of a cached negative result; JSON never starts with "!"
+NEGATIVE_MARKER = "!"
+NEGATIVE = object()
 
 
-def cache_api_call(cache_key_prefix: str, ttl: int = 3600):
+def cache_api_call(
+    cache_key_prefix: str,
+    ttl: int = 3600,
+    local_ttl: Optional[float] = None,
+    local_size: Optional[int] = None,
+    negative_on: Tuple[Type[BaseException], ...] = (),
+    negative_ttl: int = 60,
+    last_known_on: Tuple[Type[BaseException], ...] = (),
+    last_known_ttl: float = 86400,
+):
+    """
+    Cache the result of an API call in process (L1) and in Redis (L2).
+
+    L1 entries are fresh for `local_ttl` seconds and served stale for the rest
+    of `ttl` while one background task reloads them. Concurrent misses on the
+    same arguments share one load, which reads Redis and only calls the
+    wrapped function on a Redis miss. Falsy results are never cached.
+
+    Exceptions listed in `negative_on` are definitive misses: they are cached
+    in both tiers for `negative_ttl` seconds, and a cached one is raised again
+    as the first type of `negative_on`, built from the call arguments.
+
+    When a load fails with one of `last_known_on`, the last value loaded for
+    the same arguments within `last_known_ttl` seconds is returned instead.
+
+    The wrapper exposes `local_cache`, `last_known` and `invalidate(*args)`.
+    """
+    settings = get_settings()
+    if local_ttl is None:
+        local_ttl = min(settings.CACHE_LOCAL_TTL_SECONDS, ttl)
+    local_cache = LocalCache(
+        maxsize=local_size or settings.CACHE_LOCAL_SIZE,
+        ttl=local_ttl,
+        stale_ttl=max(0.0, ttl - local_ttl),
+    )
+    local_caches.append(local_cache)
+    # Outlives both tiers, for upstream outages
+    last_known = LocalCache(
+        maxsize=local_size or settings.CACHE_LOCAL_SIZE, ttl=last_known_ttl
+    )
+    if last_known_on:
+        local_caches.append(last_known)
+    counters = {
+        name: metrics.counter(f"cache.{cache_key_prefix}.{name}")
+        for name in (
+            "l1_hit",
+            "l1_stale",
+            "l2_hit",
+            "miss",
+            "coalesced",
+            "negative",
+            "last_known",
+        )
+    }
+
+    def hit_ratio() -> float:
+        hits = sum(counters[n].value for n in ("l1_hit", "l1_stale", "l2_hit"))
+        total = hits + counters["miss"].value
+        return hits / total if total else 0.0
+
+    metrics.gauge(f"cache.{cache_key_prefix}.hit_ratio", hit_ratio)
+
     def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
+        def negative_error(args, kwargs) -> BaseException:
+            counters["negative"].inc()
+            return negative_on[0](*args, **kwargs)
+
+        # arguments -> the load shared by concurrent callers
+        inflight = {}
+
+        async def load(args, kwargs):
             if redis_manager.redis_client is None:
                 logger.error("Redis client is not initialized")
+                counters["miss"].inc()
                 return await func(*args, **kwargs)
             cache_key = (
                 f"{cache_key_prefix}:"
@@ -22,12 +101,32 @@ def cache_api_call(cache_key_prefix: str, ttl: int = 3600):
             )
             try:
                 cached_result = await redis_manager.redis_client.get(cache_key)
-                if cached_result:
-                    logger.info(f"Cache hit for {cache_key}")
-                    return json.loads(cached_result)
             except Exception as e:
                 logger.error(f"Failed to get from Redis: {str(e)}")
-            result = await func(*args, **kwargs)
+                cached_result = None
+            if (
+                negative_on
+                and cached_result
+                and cached_result.startswith(NEGATIVE_MARKER)
+            ):
+                logger.info(f"Negative cache hit for {cache_key}")
+                counters["l2_hit"].inc()
+                raise negative_error(args, kwargs)
+            if cached_result:
+                logger.info(f"Cache hit for {cache_key}")
+                counters["l2_hit"].inc()
+                return json.loads(cached_result)
+            counters["miss"].inc()
+            try:
+                result = await func(*args, **kwargs)
+            except negative_on as e:
+                try:
+                    await redis_manager.redis_client.setex(
+                        cache_key, negative_ttl, NEGATIVE_MARKER + str(e)
+                    )
+                except Exception as redis_error:
+                    logger.error(f"Failed to cache to Redis: {str(redis_error)}")
+                raise
             if result:
                 try:
                     await redis_manager.redis_client.setex(
@@ -38,6 +137,70 @@ def cache_api_call(cache_key_prefix: str, ttl: int = 3600):
                     logger.error(f"Failed to cache to Redis: {str(e)}")
             return result
 
+        async def load_local(key, args, kwargs):
+            try:
+                result = await load(args, kwargs)
+                if result:
+                    local_cache.set(key, result)
+                    if last_known_on:
+                        last_known.set(key, result)
+                return result
+            except negative_on:
+                local_cache.set(key, NEGATIVE, ttl=negative_ttl)
+                raise
+            except last_known_on as e:
+                entry = last_known.get(key)
+                if entry is None:
+                    raise
+                logger.warning(f"Serving last known {cache_key_prefix} for {args}: {e}")
+                counters["last_known"].inc()
+                return entry.value
+            finally:
+                inflight.pop(key, None)
+
+        def single_flight(key, args, kwargs):
+            future = inflight.get(key)
+            if future is None:
+                future = asyncio.ensure_future(load_local(key, args, kwargs))
+                inflight[key] = future
+            else:
+                counters["coalesced"].inc()
+            return future
+
+        def log_refresh_failure(future: asyncio.Future) -> None:
+            if not future.cancelled() and future.exception() is not None:
+                logger.error(
+                    f"Failed to refresh {cache_key_prefix}: {future.exception()}"
+                )
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            entry = local_cache.get(key)
+            if entry is not None:
+                if entry.value is NEGATIVE:
+                    counters["l1_hit"].inc()
+                    raise negative_error(args, kwargs)
+                if entry.fresh_until > time.monotonic():
+                    counters["l1_hit"].inc()
+                    return entry.value
+                counters["l1_stale"].inc()
+                if key not in inflight:
+                    single_flight(key, args, kwargs).add_done_callback(
+                        log_refresh_failure
+                    )
+                return entry.value
+            # shield: a cancelled caller must not cancel the shared load
+            return await asyncio.shield(single_flight(key, args, kwargs))
+
+        def invalidate(*args, **kwargs) -> None:
+            key = (args, tuple(sorted(kwargs.items())))
+            local_cache.discard(key)
+            last_known.discard(key)
+
+        wrapper.local_cache = local_cache
+        wrapper.last_known = last_known
+        wrapper.invalidate = invalidate
         return wrapper
 
     return decorator
@@ -0,0 +1,56 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Optional
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    fresh_until: float
+    expires_at: float
+
+
+class LocalCache:
+    """
+    In-process TTL LRU. Entries are fresh for `ttl` seconds, then stale until
+    `ttl + stale_ttl`; a stale entry may still be served while it is refreshed.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, stale_ttl: float = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value; an explicit `ttl` replaces both TTLs, with no stale time."""
+        now = time.monotonic()
+        if ttl is None:
+            entry = CacheEntry(value, now + self.ttl, now + self.ttl + self.stale_ttl)
+        else:
+            entry = CacheEntry(value, now + ttl, now + ttl)
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        self.entries.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def clear(self) -> None:
+        self.entries.clear()
@@ -1,4 +1,5 @@
 import logging
+from typing import Any, Dict, Tuple
 
 import redis.asyncio as redis
 
@@ -8,8 +9,10 @@ logger = logging.getLogger(__name__)
 
 
 class RedisManager:
-    def __init__(self):
-        self.redis_client = None
+    def __init__(self) -> None:
+        self.redis_client: Any = None
+        # Lua source -> (client, registered script)
+        self.scripts: Dict[str, Tuple[Any, Any]] = {}
 
     async def init_redis(self):
         """Initialize Redis connection"""
@@ -22,6 +25,17 @@ class RedisManager:
         self.redis_client.config_set("notify-keyspace-events", "Ex")
         logger.info("Redis connection initialized")
 
+    def script(self, source: str):
+        """
+        The Lua script `source`, registered once per client. Calling it runs
+        EVALSHA and loads the script again if the server lost it.
+        """
+        cached = self.scripts.get(source)
+        if cached is None or cached[0] is not self.redis_client:
+            cached = (self.redis_client, self.redis_client.register_script(source))
+            self.scripts[source] = cached
+        return cached[1]
+
     async def close_redis(self):
         """Close Redis connection"""
         if self.redis_client:
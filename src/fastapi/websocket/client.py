@@ -1,9 +1,17 @@
+import asyncio
+import itertools
+import json
 import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
 
 import websockets
-from tenacity import retry, stop_after_attempt, wait_fixed
+from websockets.asyncio.client import ClientConnection
 
 from src.fastapi.config import get_settings
+from src.fastapi.metrics.registry import metrics
 from src.fastapi.websocket.models import AlertEvent
 
 logger = logging.getLogger(__name__)
@@ -13,28 +21,239 @@ ALERTING_PORT = settings.ALERTING_PORT
 ALERTING_URL = f"ws://{ALERTING_HOST}:{ALERTING_PORT}"
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
-async def send_alert_event(alert_event: AlertEvent):
+class AlertConnection:
     """
-    Send an AlertEvent to the alerting system via WebSocket.
+    One long-lived WebSocket to the alerting service. Frames carry an `id`
+    that the service echoes in its ack; a reader task resolves the pending
+    ack of each id. An ack without an id answers the oldest frame written,
+    which for an array frame the service could not parse is every alert in
+    it.
+    """
+
+    def __init__(self, url: str, ack_timeout: float, max_backoff: float):
+        self.url = url
+        self.ack_timeout = ack_timeout
+        self.max_backoff = max_backoff
+        self.websocket: Optional[ClientConnection] = None
+        self.reader: Optional[asyncio.Task] = None
+        self.pending: OrderedDict[str, asyncio.Future] = OrderedDict()
+        # Alert id -> ids of the alerts written with it in one array frame
+        self.batches: Dict[str, List[str]] = {}
+        self.lock = asyncio.Lock()
+        self.backoff = 0.0
+        self.retry_at = 0.0
+
+    @property
+    def connected(self) -> bool:
+        return self.websocket is not None and self.reader is not None
+
+    async def connect(self) -> ClientConnection:
+        async with self.lock:
+            if self.websocket is not None:
+                return self.websocket
+            if time.monotonic() < self.retry_at:
+                raise ConnectionError(f"Reconnecting to {self.url} later")
+            try:
+                websocket = await websockets.connect(self.url)
+            except Exception:
+                self.backoff = min(self.max_backoff, max(0.1, self.backoff * 2))
+                self.retry_at = time.monotonic() + self.backoff
+                raise
+            if self.backoff:
+                metrics.counter("alert_pool.reconnects").inc()
+            self.backoff = 0.0
+            self.websocket = websocket
+            self.reader = asyncio.create_task(self.read(websocket))
+            logger.info(f"Connected to alerting service at {self.url}")
+            return websocket
+
+    async def read(self, websocket: ClientConnection) -> None:
+        try:
+            async for raw in websocket:
+                try:
+                    ack = json.loads(raw)
+                except ValueError:
+                    logger.error(f"Invalid ack from alerting service: {raw!r}")
+                    continue
+                # An array frame is acked with an array, one ack per alert
+                if isinstance(ack, list):
+                    for item in ack:
+                        self.resolve(item)
+                else:
+                    self.resolve(ack, whole_frame=True)
+        except Exception as e:
+            logger.warning(f"Alerting connection lost: {e}")
+        finally:
+            self.drop(websocket, ConnectionError("Alerting connection lost"))
+
+    def resolve(self, ack, whole_frame: bool = False) -> None:
+        frame_id = ack.get("id") if isinstance(ack, dict) else None
+        if frame_id is not None:
+            frame_ids = [frame_id]
+        elif self.pending:
+            # Acks come back in write order, so this one is the oldest frame's
+            oldest = next(iter(self.pending))
+            frame_ids = self.batches.get(oldest, [oldest]) if whole_frame else [oldest]
+        else:
+            frame_ids = []
+        for frame_id in frame_ids:
+            future = self.take(frame_id)
+            if future is None:
+                continue
+            if not future.done():
+                future.set_result(ack)
+            metrics.counter("alert_pool.acked").inc()
+            if isinstance(ack, dict) and ack.get("status") == "error":
+                logger.warning(f"Alerting service rejected an alert: {ack}")
+
+    def take(self, frame_id: str) -> Optional[asyncio.Future]:
+        self.batches.pop(frame_id, None)
+        return self.pending.pop(frame_id, None)
+
+    def drop(self, websocket: ClientConnection, error: Exception) -> None:
+        """Forget a dead socket and fail the acks it still owed."""
+        if self.websocket is not websocket:
+            return
+        self.websocket = None
+        self.reader = None
+        self.retry_at = 0.0
+        lost = list(self.pending.values())
+        self.pending.clear()
+        self.batches.clear()
+        for future in lost:
+            if not future.done():
+                future.set_exception(error)
+        metrics.counter("alert_pool.lost").inc(len(lost))
+
+    def expire(self, frame_id: str) -> None:
+        future = self.take(frame_id)
+        if future is not None and not future.done():
+            future.set_exception(TimeoutError(f"No ack for alert {frame_id}"))
+            metrics.counter("alert_pool.ack_timeout").inc()
+
+    def track(self, frame: dict) -> asyncio.Future:
+        frame_id = uuid.uuid4().hex
+        frame["id"] = frame_id
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        future.add_done_callback(log_failed_ack)
+        self.pending[frame_id] = future
+        timer = loop.call_later(self.ack_timeout, self.expire, frame_id)
+        future.add_done_callback(lambda _: timer.cancel())
+        return future
+
+    async def send(self, frame: dict) -> asyncio.Future:
+        """Write a frame and return the future of its ack without awaiting it."""
+        return (await self.write([frame], frame))[0]
+
+    async def send_many(self, frames: List[dict]) -> List[asyncio.Future]:
+        """Write the frames as one array frame; one ack future per frame."""
+        return await self.write(frames, frames)
+
+    async def write(
+        self, frames: List[dict], payload: Union[dict, List[dict]]
+    ) -> List[asyncio.Future]:
+        websocket = await self.connect()
+        futures = [self.track(frame) for frame in frames]
+        if len(frames) > 1:
+            batch = [frame["id"] for frame in frames]
+            for frame_id in batch:
+                self.batches[frame_id] = batch
+        try:
+            await websocket.send(json.dumps(payload, default=str))
+        except Exception as e:
+            for frame, future in zip(frames, futures):
+                self.take(frame["id"])
+                future.cancel()
+            self.drop(websocket, ConnectionError(str(e)))
+            await websocket.close()
+            raise
+        metrics.counter("alert_pool.sent").inc(len(frames))
+        return futures
+
+    async def close(self) -> None:
+        websocket, reader = self.websocket, self.reader
+        if websocket is None:
+            return
+        if self.pending:
+            # Let the acks of alerts already written come in
+            await asyncio.wait(list(self.pending.values()), timeout=self.ack_timeout)
+        self.drop(websocket, ConnectionError("Alerting connection closed"))
+        await websocket.close()
+        if reader is not None:
+            await reader
+
+
+def log_failed_ack(future: asyncio.Future) -> None:
+    # Nobody has to wait for an ack, so failures are reported here
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Alert not acknowledged: {future.exception()}")
+
+
+class AlertConnectionPool:
+    """
+    Long-lived WebSockets to the alerting service, shared by every alert of
+    the process. Alerts are spread round-robin over ALERT_POOL_SIZE
+    connections and pipelined: `send` returns once the frame is written, and
+    the ack arrives later on the returned future. Dead connections are
+    reopened on the next send, backing off up to ALERT_RECONNECT_MAX_SECONDS.
+    """
+
+    def __init__(self, url: str, size: int, ack_timeout: float, max_backoff: float):
+        self.connections: List[AlertConnection] = [
+            AlertConnection(url, ack_timeout, max_backoff) for _ in range(size)
+        ]
+        self.turn = itertools.cycle(self.connections)
+        metrics.gauge(
+            "alert_pool.in_flight",
+            lambda: sum(len(c.pending) for c in self.connections),
+        )
+        metrics.gauge(
+            "alert_pool.connected",
+            lambda: sum(c.connected for c in self.connections),
+        )
+
+    async def start(self) -> None:
+        """Open the connections; alerts reconnect on their own if this fails."""
+        for connection in self.connections:
+            try:
+                await connection.connect()
+            except Exception as e:
+                logger.error(f"Failed to connect to the alerting service: {e}")
+                return
+
+    async def send(self, frame: dict) -> asyncio.Future:
+        return await next(self.turn).send(frame)
+
+    async def send_many(self, frames: List[dict]) -> List[asyncio.Future]:
+        return await next(self.turn).send_many(frames)
+
+    async def close(self) -> None:
+        for connection in self.connections:
+            await connection.close()
+        logger.info("Alerting connections closed")
+
+
+alert_pool = AlertConnectionPool(
+    ALERTING_URL,
+    size=settings.ALERT_POOL_SIZE,
+    ack_timeout=settings.ALERT_ACK_TIMEOUT_SECONDS,
+    max_backoff=settings.ALERT_RECONNECT_MAX_SECONDS,
+)
+
+
+async def send_alert_event(alert_event: AlertEvent) -> asyncio.Future:
+    """
+    Send an AlertEvent to the alerting system over the shared connections.
+    Returns once the frame is written; the returned future holds the ack.
     """
     try:
-        async with websockets.connect(ALERTING_URL) as websocket:
-            # Serialize AlertEvent to JSON
-            payload = alert_event.model_dump_json()
-            await websocket.send(payload)
-            logger.info(
-                f"Sent alert event to WebSocket: {alert_event.event_type} "
-                f"(device: {alert_event.device_id})"
-            )
-
-            # Wait for response from alerting container
-            response = await websocket.recv()
-            if isinstance(response, bytes):
-                response = response.decode("utf-8")
-            logger.info(f"Received response from alerting container: {response}")
-
-            return response
+        ack = await alert_pool.send(alert_event.model_dump(mode="json"))
     except Exception as e:
         logger.error(f"Failed to send alert event to {ALERTING_URL}: {str(e)}")
         raise
+    logger.info(
+        f"Sent alert event to WebSocket: {alert_event.event_type} "
+        f"(device: {alert_event.device_id})"
+    )
+    return ack
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import logging
+from typing import List, Literal, Optional, Tuple
+
+from src.fastapi.config import get_settings
+from src.fastapi.metrics.registry import metrics
+from src.fastapi.redis.redis import redis_manager
+from src.fastapi.websocket.client import alert_pool, send_alert_event
+from src.fastapi.websocket.models import AlertEvent
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SPILL_KEY = "alert_outbox:spill"
+
+OverflowPolicy = Literal["drop_oldest", "block", "spill"]
+
+
+class AlertOutbox:
+    """
+    Bounded queue of alerts between the ingest handlers and the alerting
+    service. `publish` returns as soon as the alert is queued; background
+    senders write the queued alerts in batches of up to `batch_size` as one
+    array frame over `alert_pool`. Each sender waits for the acks of its
+    batch and sends again every alert that was not acked `received`, until
+    all are, before taking the next batch.
+
+    When the queue is full, `overflow` decides: `drop_oldest` discards the
+    oldest queued alert, `block` makes `publish` wait for room, and `spill`
+    appends the alert to a Redis list that the senders drain once the queue
+    is empty again.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        batch_size: int,
+        senders: int,
+        overflow: OverflowPolicy,
+        retry_seconds: float,
+    ):
+        self.size = size
+        self.batch_size = batch_size
+        self.senders = senders
+        self.overflow = overflow
+        self.retry_seconds = retry_seconds
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: List[asyncio.Task] = []
+        # Batches the senders were still retrying when stopped
+        self.unsent: List[dict] = []
+        # Spilled alerts may be waiting in Redis, from this run or the last
+        self.spill_pending = False
+        self.sent = metrics.counter("alert_outbox.sent")
+        self.dropped = metrics.counter("alert_outbox.dropped")
+        self.spilled = metrics.counter("alert_outbox.spilled")
+        self.failed = metrics.counter("alert_outbox.failed")
+        self.throttled = metrics.counter("alert_outbox.throttled")
+        self.rejected = metrics.counter("alert_outbox.rejected")
+        metrics.gauge(
+            "alert_outbox.depth",
+            lambda: 0 if self.queue is None else self.queue.qsize(),
+        )
+
+    async def publish(self, alert_event: AlertEvent) -> None:
+        """Queue an alert; sent inline while the outbox is not running."""
+        if self.queue is None:
+            await send_alert_event(alert_event)
+            return
+        frame = alert_event.model_dump(mode="json")
+        if self.overflow == "block":
+            await self.queue.put(frame)
+            return
+        if self.queue.full():
+            if self.overflow == "spill" and await self.spill([frame]):
+                return
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.dropped.inc()
+        self.queue.put_nowait(frame)
+
+    async def spill(self, frames: List[dict]) -> bool:
+        if redis_manager.redis_client is None:
+            return False
+        try:
+            await redis_manager.redis_client.rpush(
+                SPILL_KEY, *(json.dumps(frame) for frame in frames)
+            )
+        except Exception as e:
+            logger.error(f"Failed to spill alerts to Redis: {e}")
+            return False
+        self.spilled.inc(len(frames))
+        self.spill_pending = True
+        return True
+
+    async def unspill(self) -> List[dict]:
+        if redis_manager.redis_client is None:
+            return []
+        try:
+            raw = await redis_manager.redis_client.lpop(SPILL_KEY, self.batch_size)
+        except Exception as e:
+            logger.error(f"Failed to read spilled alerts from Redis: {e}")
+            return []
+        frames = [json.loads(item) for item in raw or []]
+        if len(frames) < self.batch_size:
+            self.spill_pending = False
+        return frames
+
+    async def next_batch(self, queue: asyncio.Queue) -> Tuple[List[dict], bool]:
+        """The next alerts to send, and whether they came from the queue."""
+        if queue.empty() and self.spill_pending:
+            frames = await self.unspill()
+            if frames:
+                return frames, False
+        batch = [await queue.get()]
+        while len(batch) < self.batch_size and not queue.empty():
+            batch.append(queue.get_nowait())
+        return batch, True
+
+    async def deliver(self, batch: List[dict]) -> None:
+        """
+        Send a batch and wait for its acks. Alerts acked `busy`, and alerts
+        whose ack timed out or was lost with the connection, are sent again
+        after `retry_seconds`, so neither a saturated nor an unreachable
+        service loses them. Alerts acked `error` were rejected as invalid,
+        which sending them again cannot change.
+        """
+        try:
+            while batch:
+                batch = await self.attempt(batch)
+                if batch:
+                    await asyncio.sleep(self.retry_seconds)
+        except asyncio.CancelledError:
+            # Spilled or counted as dropped by `stop`
+            self.unsent.extend(batch)
+            raise
+
+    async def attempt(self, batch: List[dict]) -> List[dict]:
+        """Send a batch once; returns the alerts to send again."""
+        try:
+            acks = await alert_pool.send_many(batch)
+        except Exception as e:
+            self.failed.inc(len(batch))
+            logger.error(f"Failed to send {len(batch)} alerts: {e}")
+            return batch
+        results = await asyncio.gather(*acks, return_exceptions=True)
+        again = []
+        for frame, ack in zip(batch, results):
+            status = ack.get("status") if isinstance(ack, dict) else None
+            if status == "received":
+                self.sent.inc()
+            elif status == "busy":
+                self.throttled.inc()
+                again.append(frame)
+            elif status == "error":
+                self.rejected.inc()
+                logger.error(f"Alerting service rejected an alert: {ack}")
+            else:
+                # Ack timed out or lost with the connection
+                self.failed.inc()
+                again.append(frame)
+        return again
+
+    async def run(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch, queued = await self.next_batch(queue)
+            try:
+                await self.deliver(batch)
+            finally:
+                if queued:
+                    for _ in batch:
+                        queue.task_done()
+
+    async def start(self) -> None:
+        self.queue = asyncio.Queue(maxsize=self.size)
+        self.spill_pending = self.overflow == "spill"
+        self.tasks = [
+            asyncio.create_task(self.run(self.queue)) for _ in range(self.senders)
+        ]
+        logger.info(f"Alert outbox started with {self.senders} senders")
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Give the senders `timeout` seconds to empty the queue, then stop."""
+        queue = self.queue
+        if queue is None:
+            return
+        self.queue = None
+        try:
+            await asyncio.wait_for(queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Alert outbox not drained in time")
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        left = self.unsent + [queue.get_nowait() for _ in range(queue.qsize())]
+        self.unsent = []
+        if left and not (self.overflow == "spill" and await self.spill(left)):
+            logger.warning(f"Dropping {len(left)} queued alerts")
+            self.dropped.inc(len(left))
+
+
+alert_outbox = AlertOutbox(
+    size=settings.ALERT_OUTBOX_SIZE,
+    batch_size=settings.ALERT_OUTBOX_BATCH_SIZE,
+    senders=settings.ALERT_OUTBOX_SENDERS,
+    overflow=settings.ALERT_OUTBOX_OVERFLOW,
+    retry_seconds=settings.ALERT_OUTBOX_RETRY_SECONDS,
+)
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from src.fastapi.config import get_settings
+from src.fastapi.http_client.client import http_client_manager
+from src.fastapi.metrics.registry import metrics
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+ALERT_RULES_URL = f"http://{settings.ALERTING_HOST}:{settings.ALERTING_PORT}/rules"
+
+Predicate = Callable[[dict], bool]
+
+
+def compile_condition(condition: Dict[str, Any]) -> Predicate:
+    """Same semantics as the alerting service's `matches_rule`."""
+    field, op, value = condition["field"], condition["op"], condition["value"]
+    if op == "gte":
+        threshold = float(value)
+
+        def at_least(data: dict) -> bool:
+            actual = data.get(field)
+            if actual is None:
+                return False
+            try:
+                # Written like `matches_rule`, under which NaN passes
+                return not float(actual) < threshold
+            except (TypeError, ValueError):
+                return False
+
+        return at_least
+    if op == "in":
+        try:
+            members: Any = frozenset(value)
+        except TypeError:
+            members = list(value)
+
+        def one_of(data: dict) -> bool:
+            actual = data.get(field)
+            if actual is None:
+                return False
+            try:
+                return actual in members
+            except TypeError:
+                return False
+
+        return one_of
+    if op == "eq":
+
+        def equal(data: dict) -> bool:
+            actual = data.get(field)
+            return actual is not None and actual == value
+
+        return equal
+    raise ValueError(f"Unknown rule operator {op!r}")
+
+
+def compile_rule_spec(spec: Dict[str, Any]) -> Dict[str, List[Predicate]]:
+    """Predicates of every rule, indexed by the event types they apply to."""
+    predicates: Dict[str, List[Predicate]] = {}
+    for rule in spec["rules"]:
+        conditions = [compile_condition(c) for c in rule["conditions"]]
+
+        def predicate(data: dict, conditions=conditions) -> bool:
+            return all(condition(data) for condition in conditions)
+
+        for event_type in rule["event_types"]:
+            predicates.setdefault(event_type, []).append(predicate)
+    return predicates
+
+
+class AlertPrefilter:
+    """
+    Drops alerts no rule of the alerting service could match before they
+    are queued. The rule spec is fetched from the service's `/rules` and
+    polled every ALERT_RULES_REFRESH_SECONDS with its version as ETag, so a
+    rule change reaches the producers without a restart. Until a spec is
+    loaded, every alert passes.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.version: Optional[str] = None
+        self.predicates: Optional[Dict[str, List[Predicate]]] = None
+        self.task: Optional[asyncio.Task] = None
+        self.passed = metrics.counter("alert_prefilter.passed")
+        self.filtered = metrics.counter("alert_prefilter.filtered")
+
+    def allows(self, event_type: str, data: dict) -> bool:
+        predicates = self.predicates
+        if predicates is None:
+            return True
+        for predicate in predicates.get(event_type, ()):
+            if predicate(data):
+                self.passed.inc()
+                return True
+        self.filtered.inc()
+        return False
+
+    def load(self, spec: Dict[str, Any]) -> None:
+        self.predicates = compile_rule_spec(spec)
+        self.version = spec["version"]
+        logger.info(f"Loaded alert rules version {self.version}")
+
+    async def refresh(self) -> bool:
+        """Fetch the rule spec; False if the loaded version is current."""
+        session = await http_client_manager.get_session()
+        headers = {}
+        if self.version is not None:
+            headers["If-None-Match"] = f'"{self.version}"'
+        async with session.get(self.url, headers=headers) as response:
+            if response.status == 304:
+                return False
+            response.raise_for_status()
+            spec = await response.json()
+        self.load(spec)
+        return True
+
+    async def run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Alert rules refresh failed: {e}")
+
+    async def start(self) -> None:
+        if not settings.ALERT_PREFILTER_ENABLED:
+            return
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Failed to load the alert rules: {e}")
+        self.task = asyncio.create_task(self.run(settings.ALERT_RULES_REFRESH_SECONDS))
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                logger.info("Alert rules refresh cancelled.")
+            self.task = None
+
+
+alert_prefilter = AlertPrefilter(ALERT_RULES_URL)
@@ -0,0 +1,128 @@
+"""
+Standalone ingest worker.
+
+Run with `python -m src.fastapi.worker`. Starts INGEST_SHARDS consumer
+processes; process `i` owns the `gps_queue.i` / `fault_queue.i` pair, so every
+device is always handled by the same process and its aggregator and idling
+state never crosses process boundaries. Publishers pick the shard with
+`shard_routing_key`.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import signal
+from multiprocessing.process import BaseProcess
+from typing import List
+
+from src.fastapi.config import get_settings
+from src.fastapi.database.database import DatabaseManager
+from src.fastapi.devices.directory import device_directory
+from src.fastapi.http_client.client import http_client_manager
+from src.fastapi.logging_config import setup_logging
+from src.fastapi.main import ingest_event, init_db
+from src.fastapi.rabbitmq_handlers.dedup import dedup_cache
+from src.fastapi.rabbitmq_handlers.fault.catalog import fault_catalog
+from src.fastapi.rabbitmq_handlers.fault.reassembly import local_fault_segments
+from src.fastapi.redis.redis import redis_manager
+from src.fastapi.websocket.client import alert_pool
+from src.fastapi.websocket.outbox import alert_outbox
+from src.fastapi.websocket.prefilter import alert_prefilter
+
+logger = logging.getLogger(__name__)
+
+
+async def serve_shard(shard: int, shards: int, shutdown: asyncio.Event) -> None:
+    await DatabaseManager.connect()
+    await init_db()
+    await redis_manager.init_redis()
+    await http_client_manager.init_session()
+    await device_directory.start()
+    await fault_catalog.start()
+    await alert_pool.start()
+    await alert_outbox.start()
+    await alert_prefilter.start()
+    if shards > 1:
+        # Every segment and every GPS event of a device reaches this process
+        await local_fault_segments.start()
+        dedup_cache.exact = get_settings().DEDUP_EXACT
+    logger.info(f"Ingest worker {shard}/{shards} started")
+
+    consumer_task = asyncio.create_task(ingest_event(shard=shard, shards=shards))
+    try:
+        shutdown_task = asyncio.create_task(shutdown.wait())
+        await asyncio.wait(
+            [consumer_task, shutdown_task], return_when=asyncio.FIRST_COMPLETED
+        )
+        shutdown_task.cancel()
+    finally:
+        consumer_task.cancel()
+        try:
+            await consumer_task
+        except asyncio.CancelledError:
+            logger.info(f"Ingest worker {shard} consumer cancelled.")
+        await alert_prefilter.stop()
+        await alert_outbox.stop()
+        await alert_pool.close()
+        await local_fault_segments.stop()
+        await fault_catalog.stop()
+        await device_directory.stop()
+        await http_client_manager.close_session()
+        await redis_manager.close_redis()
+        await DatabaseManager.disconnect()
+        logger.info(f"Ingest worker {shard} stopped")
+
+
+async def run_shard_async(shard: int, shards: int) -> None:
+    shutdown = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, shutdown.set)
+    await serve_shard(shard, shards, shutdown)
+
+
+def run_shard(shard: int, shards: int) -> None:
+    """Entry point of one child process."""
+    setup_logging()
+    asyncio.run(run_shard_async(shard, shards))
+
+
+def start_workers(shards: int) -> List[BaseProcess]:
+    # spawn keeps children free of the parent's event loop and connections
+    context = multiprocessing.get_context("spawn")
+    processes: List[BaseProcess] = []
+    for shard in range(shards):
+        process = context.Process(
+            target=run_shard, args=(shard, shards), name=f"ingest-worker-{shard}"
+        )
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def main() -> int:
+    setup_logging()
+    shards = max(1, get_settings().INGEST_SHARDS)
+    processes = start_workers(shards)
+    logger.info(f"Started {shards} ingest worker processes")
+
+    def forward_signal(signum, _frame):
+        logger.info(f"Received signal {signum}, stopping ingest workers")
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, forward_signal)
+    signal.signal(signal.SIGINT, forward_signal)
+
+    exit_code = 0
+    for process in processes:
+        process.join()
+        if process.exitcode:
+            logger.error(f"{process.name} exited with code {process.exitcode}")
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
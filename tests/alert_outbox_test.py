@@ -0,0 +1,227 @@
+import asyncio
+import json
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from websockets.asyncio.server import serve
+
+from src.fastapi.metrics.registry import metrics
+from src.fastapi.redis.redis import redis_manager
+from src.fastapi.websocket import outbox as outbox_module
+from src.fastapi.websocket.client import AlertConnectionPool
+from src.fastapi.websocket.models import AlertEvent
+from src.fastapi.websocket.outbox import SPILL_KEY, AlertOutbox
+
+
+def make_alert(device_id="dev"):
+    return AlertEvent(
+        device_id=device_id,
+        device_name="sensor-01",
+        event_type="gps",
+        timestamp=datetime(2025, 5, 7, 12, 0, 0),
+        data={"speed": 90},
+    )
+
+
+def make_outbox(overflow="drop_oldest", size=10, batch_size=5, senders=1):
+    return AlertOutbox(size, batch_size, senders, overflow, retry_seconds=0)
+
+
+def acks(*statuses):
+    """What `send_many` returns: one resolved ack future per frame."""
+    futures = []
+    for status in statuses:
+        future = asyncio.get_running_loop().create_future()
+        future.set_result({"status": status})
+        futures.append(future)
+    return futures
+
+
+def acking(status="received"):
+    async def send_many(frames):
+        return acks(*[status] * len(frames))
+
+    return send_many
+
+
+async def test_alerts_are_flushed_in_array_frames():
+    pool = MagicMock(send_many=AsyncMock(side_effect=acking()))
+    outbox = make_outbox()
+    with patch.object(outbox_module, "alert_pool", pool):
+        await outbox.start()
+        for i in range(7):
+            await outbox.publish(make_alert(f"dev{i}"))
+        await outbox.stop(timeout=1)
+
+    batches = [c.args[0] for c in pool.send_many.await_args_list]
+    assert [len(batch) for batch in batches] == [5, 2]
+    assert batches[1][1]["device_id"] == "dev6"
+
+
+async def test_publish_sends_inline_while_stopped():
+    with patch.object(outbox_module, "send_alert_event", AsyncMock()) as send:
+        await make_outbox().publish(make_alert())
+
+    send.assert_awaited_once()
+
+
+async def test_failed_batch_is_retried():
+    attempts = iter([ConnectionError("down"), None])
+
+    async def send_many(frames):
+        error = next(attempts)
+        if error:
+            raise error
+        return acks("received")
+
+    pool = MagicMock(send_many=AsyncMock(side_effect=send_many))
+    failed = metrics.counter("alert_outbox.failed").value
+    outbox = make_outbox()
+    with patch.object(outbox_module, "alert_pool", pool):
+        await outbox.start()
+        await outbox.publish(make_alert())
+        await outbox.stop(timeout=1)
+
+    assert pool.send_many.await_count == 2
+    assert metrics.counter("alert_outbox.failed").value == failed + 1
+
+
+async def test_alerts_acked_busy_are_sent_again():
+    responses = iter(
+        [acks("received", "busy", "busy"), acks("received", "busy"), acks("received")]
+    )
+
+    async def send_many(frames):
+        return next(responses)
+
+    pool = MagicMock(send_many=AsyncMock(side_effect=send_many))
+    throttled = metrics.counter("alert_outbox.throttled").value
+    outbox = make_outbox()
+    with patch.object(outbox_module, "alert_pool", pool):
+        await outbox.deliver([{"id": "a"}, {"id": "b"}, {"id": "c"}])
+
+    batches = [c.args[0] for c in pool.send_many.await_args_list]
+    assert batches == [
+        [{"id": "a"}, {"id": "b"}, {"id": "c"}],
+        [{"id": "b"}, {"id": "c"}],
+        [{"id": "c"}],
+    ]
+    assert metrics.counter("alert_outbox.throttled").value == throttled + 3
+
+
+async def test_full_outbox_drops_the_oldest_alert():
+    dropped = metrics.counter("alert_outbox.dropped").value
+    outbox = make_outbox(size=2, senders=0)
+    await outbox.start()
+    for i in range(3):
+        await outbox.publish(make_alert(f"dev{i}"))
+    queued = [outbox.queue.get_nowait()["device_id"] for _ in range(2)]
+    await outbox.stop(timeout=0)
+
+    assert queued == ["dev1", "dev2"]
+    assert metrics.counter("alert_outbox.dropped").value == dropped + 1
+
+
+async def test_full_outbox_blocks_the_publisher():
+    outbox = make_outbox("block", size=1, senders=0)
+    await outbox.start()
+    await outbox.publish(make_alert("dev0"))
+    blocked = asyncio.create_task(outbox.publish(make_alert("dev1")))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    outbox.queue.get_nowait()
+    outbox.queue.task_done()
+    await asyncio.wait_for(blocked, timeout=1)
+    outbox.queue.get_nowait()
+    outbox.queue.task_done()
+    await outbox.stop(timeout=0)
+
+
+async def test_full_outbox_spills_to_redis_and_drains_it_later():
+    client = MagicMock(rpush=AsyncMock(), lpop=AsyncMock(return_value=None))
+    outbox = make_outbox("spill", size=1, senders=0)
+    with patch.object(redis_manager, "redis_client", client):
+        await outbox.start()
+        await outbox.publish(make_alert("dev0"))
+        await outbox.publish(make_alert("dev1"))
+
+        key, raw = client.rpush.await_args.args
+        assert key == SPILL_KEY
+        assert json.loads(raw)["device_id"] == "dev1"
+
+        outbox.queue.get_nowait()
+        outbox.queue.task_done()
+        client.lpop.return_value = [raw]
+        batch, queued = await outbox.next_batch(outbox.queue)
+        await outbox.stop(timeout=0)
+
+    assert [frame["device_id"] for frame in batch] == ["dev1"]
+    assert not queued
+    assert not outbox.spill_pending
+
+
+async def test_alerts_lost_with_a_dropped_connection_are_sent_again():
+    batches = []
+
+    async def drop_first_batch(websocket):
+        async for raw in websocket:
+            frames = json.loads(raw)
+            batches.append(frames)
+            if len(batches) == 1:
+                # Acks two alerts of the batch, then the connection drops
+                acks = [{"status": "received", "id": f["id"]} for f in frames[:2]]
+                await websocket.send(json.dumps(acks))
+                await websocket.close()
+                return
+            acks = [{"status": "received", "id": f["id"]} for f in frames]
+            await websocket.send(json.dumps(acks))
+
+    sent = metrics.counter("alert_outbox.sent").value
+    failed = metrics.counter("alert_outbox.failed").value
+    async with serve(drop_first_batch, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        pool = AlertConnectionPool(
+            f"ws://127.0.0.1:{port}", 1, ack_timeout=5, max_backoff=0.1
+        )
+        outbox = make_outbox()
+        frames = [{"device_id": f"dev{i}"} for i in range(5)]
+        try:
+            with patch.object(outbox_module, "alert_pool", pool):
+                await asyncio.wait_for(outbox.deliver(frames), timeout=5)
+        finally:
+            await pool.close()
+
+    assert [f["device_id"] for f in batches[1]] == ["dev2", "dev3", "dev4"]
+    assert metrics.counter("alert_outbox.sent").value == sent + 5
+    assert metrics.counter("alert_outbox.failed").value == failed + 3
+
+
+async def test_rejected_alerts_are_counted_not_sent():
+    async def send_many(frames):
+        return acks("received", "error")
+
+    pool = MagicMock(send_many=AsyncMock(side_effect=send_many))
+    sent = metrics.counter("alert_outbox.sent").value
+    rejected = metrics.counter("alert_outbox.rejected").value
+    with patch.object(outbox_module, "alert_pool", pool):
+        await make_outbox().deliver([{"id": "a"}, {"id": "b"}])
+
+    pool.send_many.assert_awaited_once()
+    assert metrics.counter("alert_outbox.sent").value == sent + 1
+    assert metrics.counter("alert_outbox.rejected").value == rejected + 1
+
+
+async def test_stopped_sender_keeps_only_the_unacked_alerts():
+    async def send_many(frames):
+        return acks(*["received"] + ["busy"] * (len(frames) - 1))
+
+    pool = MagicMock(send_many=AsyncMock(side_effect=send_many))
+    outbox = AlertOutbox(10, 5, 1, "drop_oldest", retry_seconds=60)
+    with patch.object(outbox_module, "alert_pool", pool):
+        task = asyncio.create_task(outbox.deliver([{"id": "a"}, {"id": "b"}]))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    assert outbox.unsent == [{"id": "b"}]
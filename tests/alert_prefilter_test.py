@@ -0,0 +1,90 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.alert.rules import RULES, AlertRule, matches_rule, rule_spec
+from src.alert.schemas import AlertEvent
+from src.fastapi.websocket import prefilter as prefilter_module
+from src.fastapi.websocket.prefilter import AlertPrefilter, compile_rule_spec
+
+EVENTS = [
+    ("gps", {"speed": 70.0}),
+    ("gps", {"speed": 69.9}),
+    ("gps", {"speed": "85"}),
+    ("gps", {"speed": "fast"}),
+    ("gps", {"speed": "nan"}),
+    ("gps", {"speed": None}),
+    ("gps", {}),
+    ("fault", {"fault_code": "7"}),
+    ("fault", {"fault_code": "150"}),
+    ("fault", {"fault_code": 7}),
+    ("fault", {"fault_code": ["7"]}),
+    ("idle", {"speed": 90}),
+]
+
+MIXED_RULES = RULES + [
+    AlertRule(
+        email="ops@example.com",
+        event_types=["gps", "idle"],
+        thresholds={"status": "stopped", "engine_on": True},
+    )
+]
+
+
+def rules_session(status, body=None):
+    response = AsyncMock()
+    response.status = status
+    response.json.return_value = body
+    response.raise_for_status = MagicMock()
+    session = MagicMock()
+    session.get.return_value.__aenter__.return_value = response
+    return session
+
+
+@pytest.mark.parametrize("event_type,data", EVENTS)
+def test_compiled_spec_agrees_with_matches_rule(event_type, data):
+    predicates = compile_rule_spec(rule_spec(MIXED_RULES))
+    event = AlertEvent(
+        event_type=event_type,
+        device_id="dev1",
+        device_name="Device 1",
+        timestamp=datetime(2025, 1, 1).isoformat(),
+        data=data,
+    )
+
+    expected = any(matches_rule(event, rule) for rule in MIXED_RULES)
+    assert any(p(data) for p in predicates.get(event_type, [])) is expected
+
+
+def test_allows_everything_until_a_spec_is_loaded():
+    prefilter = AlertPrefilter("http://alert/rules")
+    assert prefilter.allows("gps", {"speed": 1.0})
+
+    prefilter.load(rule_spec(RULES))
+
+    assert not prefilter.allows("gps", {"speed": 1.0})
+    assert prefilter.allows("gps", {"speed": 99.0})
+    assert not prefilter.allows("unknown", {})
+
+
+@pytest.mark.asyncio
+async def test_refresh_sends_the_loaded_version():
+    spec = rule_spec(RULES)
+    prefilter = AlertPrefilter("http://alert/rules")
+    with patch.object(prefilter_module, "http_client_manager") as manager:
+        manager.get_session = AsyncMock(return_value=rules_session(200, spec))
+        assert await prefilter.refresh() is True
+        assert prefilter.version == spec["version"]
+
+        session = rules_session(304)
+        manager.get_session = AsyncMock(return_value=session)
+        assert await prefilter.refresh() is False
+
+    headers = session.get.call_args.kwargs["headers"]
+    assert headers == {"If-None-Match": f'"{spec["version"]}"'}
+
+
+def test_spec_version_follows_the_rules():
+    assert rule_spec(RULES)["version"] == rule_spec(list(RULES))["version"]
+    assert rule_spec(RULES)["version"] != rule_spec(MIXED_RULES)["version"]
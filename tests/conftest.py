@@ -1,14 +1,24 @@
 from contextlib import asynccontextmanager
+from types import MappingProxyType
+from unittest.mock import AsyncMock, patch
 
+import fakeredis
 import pytest
 from asgi_lifespan import LifespanManager
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from src.alert.rules import AlertRule
+from src.alert.suppression import suppression_windows
 from src.fastapi.database.database import DATABASE_URL, Base, DatabaseManager
+from src.fastapi.devices.directory import device_directory
 from src.fastapi.main import app
+from src.fastapi.rabbitmq_handlers.fault.catalog import fault_catalog
+from src.fastapi.rabbitmq_handlers.gps.device_filter import unknown_devices
+from src.fastapi.redis.decorators import local_caches
+from src.fastapi.redis.redis import redis_manager
 from tests.mocks.config_mocks import mock_get_settings  # noqa: F401
+from tests.mocks.device_repository import InMemoryDeviceRepository
 
 # -----------------------------------------------------------------------------
 # DATABASE SETUP & CLEANUP
@@ -76,11 +86,56 @@ async def cleanup_each_test(request):
             raise
 
 
+# -----------------------------------------------------------------------------
+# REDIS WITH LUA, FOR THE SCRIPTS
+# -----------------------------------------------------------------------------
+
+
+@pytest.fixture
+async def fake_redis():
+    """An in-memory Redis that runs Lua, in place of the shared client."""
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    original = redis_manager.redis_client
+    redis_manager.redis_client = client
+    yield client
+    redis_manager.redis_client = original
+    await client.aclose()
+
+
+# -----------------------------------------------------------------------------
+# DEVICES TABLE OF THE DIRECTORY
+# -----------------------------------------------------------------------------
+
+
+@pytest.fixture
+def stored_devices():
+    """The `devices` table behind `device_directory`, kept in memory."""
+    repo = InMemoryDeviceRepository()
+    with (
+        patch.object(device_directory, "repo", repo),
+        patch("src.fastapi.devices.directory.DatabaseManager.get_client") as client,
+    ):
+        client.return_value.__aenter__.return_value = AsyncMock()
+        yield repo
+
+
 # -----------------------------------------------------------------------------
 # FASTAPI CLIENT FOR API TESTING
 # -----------------------------------------------------------------------------
 
 
+@pytest.fixture(autouse=True)
+def clear_local_caches():
+    for local_cache in local_caches:
+        local_cache.clear()
+    unknown_devices.devices.clear()
+    device_directory.names.clear()
+    device_directory.pending.clear()
+    fault_catalog.labels = MappingProxyType({})
+    suppression_windows.until.clear()
+    yield
+
+
 @pytest.fixture(autouse=True)
 def reset_openapi_schema():
     app.openapi_schema = None
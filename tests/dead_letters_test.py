@@ -0,0 +1,124 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiormq.exceptions import ChannelNotFoundEntity
+from httpx import AsyncClient
+
+from fastapi import status
+from src.fastapi.dead_letters.exceptions import DeadLetterQueueNotFoundException
+from src.fastapi.dead_letters.services import DeadLetterService
+from src.fastapi.rabbitmq_handlers.retry import LAST_ERROR_HEADER, RETRY_COUNT_HEADER
+from tests.conftest import async_client  # noqa: F401
+from tests.mocks.config_mocks import VALID_SETTINGS_DATA
+
+HEADERS = {
+    str(VALID_SETTINGS_DATA["FASTAPI_API_KEY_HEADER"]): str(
+        VALID_SETTINGS_DATA["FASTAPI_API_KEY"]
+    )
+}
+
+
+@patch(
+    "src.fastapi.dead_letters.routes.dead_letter_service.count",
+    new_callable=AsyncMock,
+)
+async def test_get_dead_letter_stats(mock_count, async_client: AsyncClient):
+    mock_count.return_value = 7
+
+    r = await async_client.get("/api/dead_letters/gps_queue.2", headers=HEADERS)
+
+    assert r.status_code == status.HTTP_200_OK
+    assert r.json() == {
+        "queue_name": "gps_queue.2",
+        "dead_letter_queue": "gps_queue.2.dlq",
+        "message_count": 7,
+    }
+
+
+async def test_get_dead_letter_stats_invalid_queue(async_client: AsyncClient):
+    r = await async_client.get("/api/dead_letters/other_queue", headers=HEADERS)
+
+    assert r.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@patch(
+    "src.fastapi.dead_letters.routes.dead_letter_service.count",
+    new_callable=AsyncMock,
+)
+async def test_get_dead_letter_stats_not_found(mock_count, async_client: AsyncClient):
+    mock_count.side_effect = DeadLetterQueueNotFoundException("fault_queue")
+
+    r = await async_client.get("/api/dead_letters/fault_queue", headers=HEADERS)
+
+    assert r.status_code == status.HTTP_404_NOT_FOUND
+
+
+@patch(
+    "src.fastapi.dead_letters.routes.dead_letter_service.replay",
+    new_callable=AsyncMock,
+)
+async def test_replay_dead_letters(mock_replay, async_client: AsyncClient):
+    mock_replay.return_value = (5, 2)
+
+    r = await async_client.post(
+        "/api/dead_letters/fault_queue/replay?limit=5", headers=HEADERS
+    )
+
+    assert r.status_code == status.HTTP_200_OK
+    assert r.json() == {"queue_name": "fault_queue", "replayed": 5, "remaining": 2}
+    mock_replay.assert_awaited_once_with("fault_queue", 5)
+
+
+@patch(
+    "src.fastapi.dead_letters.routes.dead_letter_service.replay",
+    new_callable=AsyncMock,
+)
+async def test_replay_dead_letters_broker_error(mock_replay, async_client: AsyncClient):
+    mock_replay.side_effect = ConnectionError("broker down")
+
+    r = await async_client.post("/api/dead_letters/gps_queue/replay", headers=HEADERS)
+
+    assert r.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+def make_connection(queue):
+    channel = MagicMock()
+    channel.declare_queue = AsyncMock(return_value=queue)
+    channel.default_exchange.publish = AsyncMock()
+    connection = AsyncMock()
+    connection.channel.return_value = channel
+    connection.__aenter__.return_value = connection
+    return connection, channel
+
+
+@patch("src.fastapi.dead_letters.services.aio_pika.connect_robust")
+async def test_replay_resets_retry_headers(mock_connect):
+    message = MagicMock()
+    message.body = b"payload"
+    message.content_type = None
+    message.headers = {RETRY_COUNT_HEADER: 4, LAST_ERROR_HEADER: "boom", "x": "y"}
+    message.ack = AsyncMock()
+    queue = MagicMock()
+    queue.get = AsyncMock(side_effect=[message, None])
+    queue.declaration_result.message_count = 0
+    connection, channel = make_connection(queue)
+    mock_connect.return_value = connection
+
+    replayed, remaining = await DeadLetterService("amqp://").replay("gps_queue", 10)
+
+    assert (replayed, remaining) == (1, 0)
+    channel.declare_queue.assert_any_await("gps_queue.dlq", passive=True)
+    published, kwargs = channel.default_exchange.publish.await_args
+    assert kwargs["routing_key"] == "gps_queue"
+    assert published[0].headers == {"x": "y"}
+    message.ack.assert_awaited_once()
+
+
+@patch("src.fastapi.dead_letters.services.aio_pika.connect_robust")
+async def test_count_unknown_queue(mock_connect):
+    connection, channel = make_connection(None)
+    channel.declare_queue.side_effect = ChannelNotFoundEntity("no queue")
+    mock_connect.return_value = connection
+
+    with pytest.raises(DeadLetterQueueNotFoundException):
+        await DeadLetterService("amqp://").count("gps_queue")
@@ -0,0 +1,190 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.fastapi.devices import directory as directory_module
+from src.fastapi.devices.directory import DeviceDirectory, device_directory
+from src.fastapi.devices.exceptions import DeviceDiscardException, DeviceSyncException
+from src.fastapi.http_client.client import http_client_manager
+from src.fastapi.rabbitmq_handlers.gps import utils as gps_utils
+from src.fastapi.rabbitmq_handlers.gps.utils import (
+    get_device_name,
+    invalidate_device_cache,
+)
+from src.fastapi.redis.redis import redis_manager
+from tests.mocks.device_api_stub import DeviceAPIStub
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+DEVICES = {f"{1000 + i}": f"Truck {i}" for i in range(5)}
+
+
+@pytest.fixture
+async def stub():
+    stub = DeviceAPIStub(DEVICES)
+    url = await stub.start()
+    with (
+        patch.object(directory_module.settings, "DEVICE_API_URL", url),
+        patch.object(directory_module.settings, "DEVICE_SYNC_PAGE_SIZE", 2),
+        patch.object(gps_utils, "DEVICE_API_URL", url),
+        patch.object(redis_manager, "redis_client", None),
+    ):
+        yield stub
+    await http_client_manager.close_session()
+    await stub.stop()
+
+
+@pytest.fixture
+def repo():
+    repo = AsyncMock()
+    repo.fetch_names.return_value = {"1000": "Stored truck"}
+    return repo
+
+
+async def test_sync_pulls_every_page(stub, repo):
+    directory = DeviceDirectory(repo)
+
+    synced = await directory.sync(AsyncMock())
+
+    assert synced == 5
+    assert directory.names == DEVICES
+    assert [r["page"] for r in stub.list_requests] == ["1", "2", "3"]
+    assert "updated_since" not in stub.list_requests[0]
+    repo.upsert_names.assert_awaited_once()
+    assert repo.upsert_names.call_args[0][1] == DEVICES
+
+
+async def test_sync_only_pulls_changes_and_learned_names(stub, repo):
+    directory = DeviceDirectory(repo)
+    await directory.sync(AsyncMock())
+    stub.list_requests.clear()
+    stub.update("1003", "Renamed truck", datetime.max)
+    directory.learn("2000", "Learned truck")
+
+    synced = await directory.sync(AsyncMock())
+
+    assert synced == 2
+    assert "updated_since" in stub.list_requests[0]
+    assert directory.names["1003"] == "Renamed truck"
+    assert repo.upsert_names.call_args[0][1] == {
+        "1003": "Renamed truck",
+        "2000": "Learned truck",
+    }
+    assert directory.pending == {}
+
+
+async def test_sync_failure_keeps_names(stub, repo):
+    directory = DeviceDirectory(repo)
+    directory.learn("1000", "Truck 0")
+
+    # no such route on the stub: 404
+    with patch.object(directory_module.settings, "DEVICE_API_URL", stub.url + "/a/b"):
+        with pytest.raises(DeviceSyncException):
+            await directory.sync(AsyncMock())
+
+    assert directory.names == {"1000": "Truck 0"}
+    assert directory.pending == {"1000": "Truck 0"}
+    repo.upsert_names.assert_not_called()
+
+
+async def test_name_learned_during_the_upsert_is_stored_next_sync(stub, repo):
+    directory = DeviceDirectory(repo)
+
+    async def upsert_while_learning(db, names):
+        directory.learn("3000", "Late truck")
+
+    repo.upsert_names.side_effect = upsert_while_learning
+    await directory.sync(AsyncMock())
+
+    assert directory.pending == {"3000": "Late truck"}
+    repo.upsert_names.side_effect = None
+    await directory.sync(AsyncMock())
+    assert repo.upsert_names.call_args[0][1]["3000"] == "Late truck"
+
+
+async def test_failed_upsert_keeps_the_learned_names(stub, repo):
+    directory = DeviceDirectory(repo)
+    directory.learn("2000", "Learned truck")
+    repo.upsert_names.side_effect = ConnectionError("db down")
+
+    with pytest.raises(ConnectionError):
+        await directory.sync(AsyncMock())
+
+    assert directory.pending == {"2000": "Learned truck"}
+
+
+async def test_load_reads_the_table(repo):
+    directory = DeviceDirectory(repo)
+
+    await directory.load(AsyncMock())
+
+    assert directory.get("1000") == "Stored truck"
+    assert directory.get("9999") is None
+
+
+async def test_get_device_name_resolves_from_memory_first(stub):
+    device_directory.learn("1001", "Replica truck")
+
+    assert await get_device_name("1001") == "Replica truck"
+    assert await get_device_name("1002") == "Truck 2"
+
+    assert stub.lookups == ["1002"]
+    assert device_directory.pending["1002"] == "Truck 2"
+
+
+@patch("src.fastapi.rabbitmq_handlers.gps.utils.redis_manager")
+async def test_invalidate_device_cache_drops_directory_entry(
+    mock_redis_manager, stored_devices
+):
+    mock_redis_manager.redis_client = AsyncMock()
+    device_directory.learn("1001", "Old name")
+
+    await invalidate_device_cache("1001")
+
+    assert device_directory.get("1001") is None
+    assert "1001" not in device_directory.pending
+
+
+@patch("src.fastapi.rabbitmq_handlers.gps.utils.redis_manager")
+async def test_invalidated_name_is_not_loaded_again(mock_redis_manager, stored_devices):
+    mock_redis_manager.redis_client = AsyncMock()
+    stored_devices.rows.update({"1001": "Old name", "1002": "Truck 2"})
+    await device_directory.load(AsyncMock())
+
+    await invalidate_device_cache("1001")
+    restarted = DeviceDirectory(stored_devices)
+    await restarted.load(AsyncMock())
+
+    assert restarted.get("1001") is None
+    assert restarted.get("1002") == "Truck 2"
+
+
+@patch("src.fastapi.devices.directory.DatabaseManager.get_client")
+async def test_discard_fails_when_the_row_is_not_deleted(mock_get_client, repo):
+    mock_get_client.return_value.__aenter__.return_value = AsyncMock()
+    mock_get_client.side_effect = None
+    repo.delete_name.side_effect = ConnectionError("db down")
+    directory = DeviceDirectory(repo)
+    directory.learn("1001", "Old name")
+
+    with pytest.raises(DeviceDiscardException):
+        await directory.discard("1001")
+
+    assert directory.get("1001") is None
+
+
+@patch("src.fastapi.devices.directory.DatabaseManager.get_client")
+async def test_start_and_stop(mock_get_client, repo):
+    session = AsyncMock()
+    mock_get_client.return_value.__aenter__.return_value = session
+    mock_get_client.side_effect = None
+    directory = DeviceDirectory(repo)
+    directory.sync = AsyncMock()
+
+    with patch.object(directory_module.settings, "DEVICE_SYNC_INTERVAL_SECONDS", 60):
+        await directory.start()
+        await directory.stop()
+
+    repo.fetch_names.assert_awaited_once()
+    assert directory.task is None
@@ -0,0 +1,243 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.fastapi.http_client.exceptions import (
+    CircuitOpenException,
+    UpstreamThrottledException,
+)
+from src.fastapi.http_client.guard import (
+    ACQUIRE_SCRIPT,
+    FAILURE_SCRIPT,
+    BreakerState,
+    UpstreamGuard,
+    device_api_guard,
+)
+from src.fastapi.metrics.registry import metrics
+from src.fastapi.rabbitmq_handlers.gps.exceptions import GPSDeviceUnavailableException
+from src.fastapi.rabbitmq_handlers.gps.utils import fetch_device_name
+from src.fastapi.redis.redis import redis_manager
+
+
+def make_guard() -> UpstreamGuard:
+    return UpstreamGuard(
+        "test_api",
+        rate=10,
+        burst=10,
+        max_wait_ms=1000,
+        failure_threshold=3,
+        failure_window=30,
+        open_seconds=15,
+    )
+
+
+def redis_with_scripts(acquire_reply, failure_reply=0):
+    """A Redis client whose scripts answer with the given replies."""
+    scripts = {
+        ACQUIRE_SCRIPT: AsyncMock(return_value=acquire_reply),
+        FAILURE_SCRIPT: AsyncMock(return_value=failure_reply),
+    }
+    client = MagicMock()
+    client.register_script.side_effect = scripts.__getitem__
+    client.delete = AsyncMock()
+    client.scripts = scripts
+    return client
+
+
+async def test_acquire_without_waiting():
+    guard = make_guard()
+    client = redis_with_scripts([0, 0])
+
+    with patch.object(redis_manager, "redis_client", client):
+        assert await guard.acquire() is False
+
+    acquire = client.scripts[ACQUIRE_SCRIPT]
+    assert acquire.call_args.kwargs["keys"][0] == "upstream:test_api:bucket"
+    assert acquire.call_args.kwargs["args"] == [10, 10, 1000, 15000]
+    assert guard.state is BreakerState.CLOSED
+
+
+@patch("src.fastapi.http_client.guard.asyncio.sleep", new_callable=AsyncMock)
+async def test_acquire_sleeps_until_the_reserved_token(mock_sleep):
+    guard = make_guard()
+    waited = metrics.counter("upstream.test_api.throttle_wait_ms").value
+
+    with patch.object(redis_manager, "redis_client", redis_with_scripts([0, 250])):
+        await guard.acquire()
+
+    mock_sleep.assert_awaited_once_with(0.25)
+    assert metrics.counter("upstream.test_api.throttle_wait_ms").value == waited + 250
+
+
+async def test_acquire_over_budget_raises():
+    guard = make_guard()
+
+    with patch.object(redis_manager, "redis_client", redis_with_scripts([3, 2500])):
+        with pytest.raises(UpstreamThrottledException) as exc:
+            await guard.acquire()
+
+    assert exc.value.wait_ms == 2500
+
+
+async def test_open_breaker_fails_fast():
+    guard = make_guard()
+    rejected = metrics.counter("upstream.test_api.rejected").value
+
+    with patch.object(redis_manager, "redis_client", redis_with_scripts([2, 0])):
+        with pytest.raises(CircuitOpenException):
+            async with guard.call():
+                pytest.fail("the upstream must not be called")
+
+    assert guard.state is BreakerState.OPEN
+    assert metrics.counter("upstream.test_api.rejected").value == rejected + 1
+    assert metrics.snapshot()["gauges"]["upstream.test_api.breaker_state"] == 2
+
+
+async def test_failure_is_recorded_and_opens_the_breaker():
+    guard = make_guard()
+    client = redis_with_scripts([0, 0], failure_reply=1)
+
+    with patch.object(redis_manager, "redis_client", client):
+        with pytest.raises(GPSDeviceUnavailableException):
+            async with guard.call():
+                raise GPSDeviceUnavailableException("dev1", 503)
+
+    failure = client.scripts[FAILURE_SCRIPT]
+    assert failure.call_args.kwargs["args"] == [3, 30000, 15000, 0]
+    assert guard.state is BreakerState.OPEN
+
+
+async def test_client_errors_are_not_failures():
+    guard = make_guard()
+    client = redis_with_scripts([0, 0])
+
+    with patch.object(redis_manager, "redis_client", client):
+        with pytest.raises(ValueError):
+            async with guard.call():
+                raise ValueError("bad request")
+
+    client.scripts[FAILURE_SCRIPT].assert_not_called()
+
+
+async def test_successful_probe_closes_the_breaker():
+    guard = make_guard()
+    client = redis_with_scripts([1, 0])
+
+    with patch.object(redis_manager, "redis_client", client):
+        async with guard.call():
+            assert guard.state is BreakerState.HALF_OPEN
+
+    client.delete.assert_awaited_once_with(
+        "upstream:test_api:half_open",
+        "upstream:test_api:probe",
+        "upstream:test_api:failures",
+    )
+    assert guard.state is BreakerState.CLOSED
+
+
+async def test_failed_probe_reopens_the_breaker():
+    guard = make_guard()
+    client = redis_with_scripts([1, 0], failure_reply=1)
+
+    with patch.object(redis_manager, "redis_client", client):
+        with pytest.raises(TimeoutError):
+            async with guard.call():
+                raise TimeoutError()
+
+    assert client.scripts[FAILURE_SCRIPT].call_args.kwargs["args"][3] == 1
+    assert guard.state is BreakerState.OPEN
+
+
+async def test_bucket_refills_after_denying_a_call_past_the_wait(fake_redis):
+    guard = UpstreamGuard(
+        "lua_bucket",
+        rate=20,
+        burst=2,
+        max_wait_ms=10,
+        failure_threshold=3,
+        failure_window=30,
+        open_seconds=15,
+    )
+
+    assert await guard.acquire() is False
+    assert await guard.acquire() is False
+    with pytest.raises(UpstreamThrottledException) as exc:
+        await guard.acquire()
+    assert exc.value.wait_ms > 10
+
+    # A token comes back every 50 ms
+    await asyncio.sleep(0.06)
+    assert await guard.acquire() is False
+    tokens = float(await fake_redis.hget("upstream:lua_bucket:bucket", "tokens"))
+    assert 0 <= tokens < 1
+
+
+async def test_breaker_opens_then_lets_one_probe_through(fake_redis):
+    guard = UpstreamGuard(
+        "lua_breaker",
+        rate=0,
+        burst=1,
+        max_wait_ms=1000,
+        failure_threshold=2,
+        failure_window=30,
+        open_seconds=0.05,
+    )
+
+    await guard.record_failure(probe=False)
+    assert guard.state is BreakerState.CLOSED
+    await guard.record_failure(probe=False)
+    assert guard.state is BreakerState.OPEN
+    with pytest.raises(CircuitOpenException):
+        await guard.acquire()
+
+    await asyncio.sleep(0.06)
+    assert await guard.acquire() is True
+    assert guard.state is BreakerState.HALF_OPEN
+    # The probe holds the lease; other calls still fail fast
+    with pytest.raises(CircuitOpenException):
+        await guard.acquire()
+
+    await guard.record_failure(probe=True)
+    assert guard.state is BreakerState.OPEN
+    await asyncio.sleep(0.06)
+    assert await guard.acquire() is True
+    await guard.record_success(probe=True)
+    assert guard.state is BreakerState.CLOSED
+    assert await guard.acquire() is False
+
+
+async def test_guard_fails_open_without_redis():
+    guard = make_guard()
+    client = MagicMock()
+    client.register_script.return_value = AsyncMock(side_effect=ConnectionError())
+
+    with patch.object(redis_manager, "redis_client", None):
+        async with guard.call():
+            pass
+    with patch.object(redis_manager, "redis_client", client):
+        async with guard.call():
+            pass
+
+
+@patch("src.fastapi.rabbitmq_handlers.gps.utils.http_client_manager")
+async def test_open_breaker_serves_the_last_known_name(mock_manager):
+    mock_response = AsyncMock()
+    mock_response.status = 200
+    mock_response.json.return_value = {"name": "Truck"}
+    session = MagicMock()
+    session.get.return_value.__aenter__.return_value = mock_response
+    mock_manager.get_session = AsyncMock(return_value=session)
+
+    with patch.object(redis_manager, "redis_client", None):
+        assert await fetch_device_name("dev1") == "Truck"
+    fetch_device_name.local_cache.clear()
+
+    with patch.object(
+        device_api_guard, "acquire", side_effect=CircuitOpenException("device_api")
+    ), patch.object(redis_manager, "redis_client", None):
+        assert await fetch_device_name("dev1") == "Truck"
+        with pytest.raises(CircuitOpenException):
+            await fetch_device_name("dev2")
+
+    assert session.get.call_count == 1
@@ -0,0 +1,55 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.fastapi.http_client.client import HTTPClientManager
+from src.fastapi.rabbitmq_handlers.gps.utils import fetch_device_name
+
+
+async def test_get_session_opens_once_and_reuses():
+    manager = HTTPClientManager()
+
+    session = await manager.get_session()
+    try:
+        assert await manager.get_session() is session
+        assert session.connector.limit == 100
+        assert session.connector.limit_per_host == 30
+        assert session.timeout.total == 10
+        assert session.timeout.connect == 3
+    finally:
+        await manager.close_session()
+
+    assert session.closed
+    assert manager.session is None
+
+
+async def test_get_session_reopens_closed_session():
+    manager = HTTPClientManager()
+    session = await manager.init_session()
+    await session.close()
+
+    reopened = await manager.get_session()
+
+    assert reopened is not session
+    await manager.close_session()
+
+
+async def test_close_session_without_session():
+    manager = HTTPClientManager()
+
+    await manager.close_session()
+
+    assert manager.session is None
+
+
+@patch("src.fastapi.rabbitmq_handlers.gps.utils.http_client_manager")
+async def test_fetch_device_name_uses_the_shared_session(mock_manager):
+    mock_response = AsyncMock()
+    mock_response.status = 200
+    mock_response.json.return_value = {"name": "Truck"}
+    session = MagicMock()
+    session.get.return_value.__aenter__.return_value = mock_response
+    mock_manager.get_session = AsyncMock(return_value=session)
+
+    assert await fetch_device_name("dev1") == "Truck"
+    assert await fetch_device_name("dev2") == "Truck"
+
+    assert session.get.call_count == 2
@@ -1,4 +1,5 @@
 import asyncio
+import base64
 import inspect
 from http import HTTPStatus
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -10,7 +11,9 @@ from fastapi import FastAPI
 from src.fastapi.database.database import DatabaseManager
 from src.fastapi.main import (
     app,
+    consume_gps_batches,
     consume_queue,
+    consume_queue_partitioned,
     custom_openapi,
     ingest_event,
     init_db,
@@ -160,8 +163,9 @@ async def test_consume_unknown_queue(mock_db, caplog):
     assert "Unknown queue" in caplog.text
 
 
+@patch("src.fastapi.main.retry_manager.handle_failure", new_callable=AsyncMock)
 @patch("src.fastapi.main.db")
-async def test_consume_queue_error(mock_db, caplog):
+async def test_consume_queue_error(mock_db, mock_handle_failure, caplog):
     DatabaseManager.is_connected = True
 
     mock_cm = AsyncMock()
@@ -199,8 +203,12 @@ async def test_consume_queue_error(mock_db, caplog):
         await consume_queue(channel, "gps_queue")
 
     assert "Failed to process message" in caplog.text
+    message.process.assert_called_once_with(requeue=True)
+    mock_handle_failure.assert_awaited_once()
+    assert mock_handle_failure.await_args[0][:2] == ("gps_queue", message)
 
 
+@patch("src.fastapi.main.retry_manager", new_callable=AsyncMock)
 @patch("src.fastapi.main.asyncio.gather", new_callable=AsyncMock)
 @patch("src.fastapi.main.asyncio.create_task")
 @patch("src.fastapi.main.consume_queue", new_callable=AsyncMock)
@@ -210,6 +218,7 @@ async def test_ingest_event(
     mock_consume_queue,
     mock_create_task,
     mock_gather,
+    mock_retry_manager,
 ):
     mock_conn = AsyncMock()
     mock_connect_robust.return_value = mock_conn
@@ -230,6 +239,9 @@ async def test_ingest_event(
 
     await ingest_event()
 
+    mock_retry_manager.setup.assert_awaited_once_with(
+        mock_channel, ["gps_queue", "fault_queue"]
+    )
     mock_consume_queue.assert_any_call(mock_channel, "gps_queue")
     mock_consume_queue.assert_any_call(mock_channel, "fault_queue")
     assert mock_consume_queue.call_count == 2
@@ -245,6 +257,245 @@ async def test_ingest_event(
     assert g_kwargs == {}
 
 
+@patch("src.fastapi.main.handle_gps_events", new_callable=AsyncMock)
+@patch("src.fastapi.main.collect_batch", new_callable=AsyncMock)
+@patch("src.fastapi.main.db")
+async def test_consume_gps_batches(mock_db, mock_collect_batch, mock_handle_events):
+    mock_session = AsyncMock()
+    mock_cm = AsyncMock()
+    mock_cm.__aenter__.return_value = mock_session
+    mock_cm.__aexit__.return_value = None
+    fut = asyncio.Future()
+    fut.set_result(mock_cm)
+    mock_db.get_client.return_value = fut
+
+    first, last = MagicMock(), MagicMock()
+    first.body = b"payload-1"
+    last.body = b"payload-2"
+    last.ack = AsyncMock()
+    mock_collect_batch.side_effect = [[first, last], asyncio.CancelledError()]
+
+    channel = AsyncMock()
+    queue_mock = AsyncMock()
+    channel.declare_queue.return_value = queue_mock
+
+    with pytest.raises(asyncio.CancelledError):
+        await consume_gps_batches(channel, "gps_queue")
+
+    queue_mock.consume.assert_awaited_once()
+    mock_handle_events.assert_awaited_once_with(
+        mock_session, ["payload-1", "payload-2"]
+    )
+    last.ack.assert_awaited_once_with(multiple=True)
+    first.ack.assert_not_called()
+
+
+@patch("src.fastapi.main.retry_manager.handle_failure", new_callable=AsyncMock)
+@patch("src.fastapi.main.handle_gps_events", new_callable=AsyncMock)
+@patch("src.fastapi.main.collect_batch", new_callable=AsyncMock)
+@patch("src.fastapi.main.db")
+async def test_consume_gps_batches_error_still_acks(
+    mock_db, mock_collect_batch, mock_handle_events, mock_handle_failure, caplog
+):
+    mock_cm = AsyncMock()
+    mock_cm.__aenter__.return_value = AsyncMock()
+    mock_cm.__aexit__.return_value = None
+    fut = asyncio.Future()
+    fut.set_result(mock_cm)
+    mock_db.get_client.return_value = fut
+
+    message = MagicMock()
+    message.body = b"payload"
+    message.ack = AsyncMock()
+    mock_collect_batch.side_effect = [[message], asyncio.CancelledError()]
+    mock_handle_events.side_effect = Exception("db down")
+
+    with caplog.at_level("ERROR"), pytest.raises(asyncio.CancelledError):
+        await consume_gps_batches(AsyncMock(), "gps_queue")
+
+    assert "Failed to process batch" in caplog.text
+    mock_handle_failure.assert_awaited_once()
+    assert mock_handle_failure.await_args[0][:2] == ("gps_queue", message)
+    message.ack.assert_awaited_once_with(multiple=True)
+
+
+@patch("src.fastapi.main.retry_manager.handle_failure", new_callable=AsyncMock)
+@patch("src.fastapi.main.handle_gps_events", new_callable=AsyncMock)
+@patch("src.fastapi.main.collect_batch", new_callable=AsyncMock)
+@patch("src.fastapi.main.db")
+async def test_consume_gps_batches_reroutes_failed_events(
+    mock_db, mock_collect_batch, mock_handle_events, mock_handle_failure
+):
+    mock_cm = AsyncMock()
+    mock_cm.__aenter__.return_value = AsyncMock()
+    fut = asyncio.Future()
+    fut.set_result(mock_cm)
+    mock_db.get_client.return_value = fut
+
+    ok, failed = MagicMock(), MagicMock()
+    ok.body, failed.body = b"payload-1", b"payload-2"
+    failed.ack = AsyncMock()
+    error = ConnectionError("device api down")
+    mock_collect_batch.side_effect = [[ok, failed], asyncio.CancelledError()]
+    mock_handle_events.return_value = [{"device_id": "dev"}, error]
+
+    with pytest.raises(asyncio.CancelledError):
+        await consume_gps_batches(AsyncMock(), "gps_queue")
+
+    mock_handle_failure.assert_awaited_once_with("gps_queue", failed, error)
+    failed.ack.assert_awaited_once_with(multiple=True)
+
+
+@patch("src.fastapi.main.retry_manager.handle_failure", new_callable=AsyncMock)
+@patch("src.fastapi.main.handle_gps_events", new_callable=AsyncMock)
+@patch("src.fastapi.main.collect_batch", new_callable=AsyncMock)
+@patch("src.fastapi.main.db")
+async def test_consume_gps_batches_requeues_when_reroute_fails(
+    mock_db, mock_collect_batch, mock_handle_events, mock_handle_failure
+):
+    mock_cm = AsyncMock()
+    mock_cm.__aenter__.return_value = AsyncMock()
+    fut = asyncio.Future()
+    fut.set_result(mock_cm)
+    mock_db.get_client.return_value = fut
+
+    message = MagicMock()
+    message.body = b"payload"
+    message.ack, message.nack = AsyncMock(), AsyncMock()
+    mock_collect_batch.side_effect = [[message], asyncio.CancelledError()]
+    mock_handle_events.side_effect = Exception("db down")
+    mock_handle_failure.side_effect = Exception("broker down")
+
+    with pytest.raises(asyncio.CancelledError):
+        await consume_gps_batches(AsyncMock(), "gps_queue")
+
+    message.nack.assert_awaited_once_with(multiple=True, requeue=True)
+    message.ack.assert_not_called()
+
+
+@patch("src.fastapi.main.GPS_BATCH_ENABLED", True)
+@patch("src.fastapi.main.GPS_BATCH_SIZE", 100)
+@patch("src.fastapi.main.GPS_PREFETCH_COUNT", 10)
+@patch("src.fastapi.main.retry_manager", new_callable=AsyncMock)
+@patch("src.fastapi.main.asyncio.gather", new_callable=AsyncMock)
+@patch("src.fastapi.main.asyncio.create_task")
+@patch("src.fastapi.main.consume_gps_batches", new_callable=AsyncMock)
+@patch("src.fastapi.main.consume_queue", new_callable=AsyncMock)
+@patch("src.fastapi.main.aio_pika.connect_robust", new_callable=AsyncMock)
+async def test_ingest_event_batched_gps(
+    mock_connect_robust,
+    mock_consume_queue,
+    mock_consume_gps_batches,
+    mock_create_task,
+    mock_gather,
+    _,
+):
+    mock_conn = AsyncMock()
+    mock_connect_robust.return_value = mock_conn
+    control_channel, gps_channel, fault_channel = AsyncMock(), AsyncMock(), AsyncMock()
+    mock_conn.channel.side_effect = [control_channel, gps_channel, fault_channel]
+    mock_create_task.side_effect = lambda coro: coro.close()
+
+    await ingest_event()
+
+    # The batch consumer needs room for two batches in flight
+    gps_channel.set_qos.assert_awaited_once_with(prefetch_count=200)
+    mock_consume_gps_batches.assert_called_once_with(gps_channel, "gps_queue")
+    mock_consume_queue.assert_called_once_with(fault_channel, "fault_queue")
+
+
+@patch("src.fastapi.main.handle_gps_event", new_callable=AsyncMock)
+async def test_consume_queue_partitioned(mock_handle_gps_event):
+    message = MagicMock()
+    message.body = base64.b64encode(b"dev-7:1715000000.0:1:2:True:3:4:5")
+    proc_ctx = AsyncMock()
+    message.process = MagicMock(return_value=proc_ctx)
+
+    msg_iter = AsyncMock()
+    msg_iter.__aiter__.return_value = [message]
+    queue_ctx = AsyncMock()
+    queue_ctx.__aenter__.return_value = msg_iter
+    queue_mock = AsyncMock()
+    queue_mock.iterator = MagicMock(return_value=queue_ctx)
+    channel = AsyncMock()
+    channel.declare_queue.return_value = queue_mock
+
+    pool = AsyncMock()
+    await consume_queue_partitioned(channel, "gps_queue", pool)
+
+    pool.submit.assert_awaited_once()
+    key, job = pool.submit.await_args[0]
+    assert key == "dev-7"
+
+    session = AsyncMock()
+    await job(session)
+    mock_handle_gps_event.assert_awaited_once_with(session, message.body.decode())
+
+
+@patch("src.fastapi.main.CONSUMER_WORKERS", 4)
+@patch("src.fastapi.main.GPS_PREFETCH_COUNT", 40)
+@patch("src.fastapi.main.FAULT_PREFETCH_COUNT", 10)
+@patch("src.fastapi.main.retry_manager", new_callable=AsyncMock)
+@patch("src.fastapi.main.PartitionedWorkerPool")
+@patch("src.fastapi.main.asyncio.gather", new_callable=AsyncMock)
+@patch("src.fastapi.main.asyncio.create_task")
+@patch("src.fastapi.main.consume_queue_partitioned", new_callable=AsyncMock)
+@patch("src.fastapi.main.aio_pika.connect_robust", new_callable=AsyncMock)
+async def test_ingest_event_with_worker_pool(
+    mock_connect_robust,
+    mock_consume_partitioned,
+    mock_create_task,
+    mock_gather,
+    mock_pool_cls,
+    _,
+):
+    mock_conn = AsyncMock()
+    mock_connect_robust.return_value = mock_conn
+    control_channel, gps_channel, fault_channel = AsyncMock(), AsyncMock(), AsyncMock()
+    mock_conn.channel.side_effect = [control_channel, gps_channel, fault_channel]
+    gps_pool, fault_pool = MagicMock(), MagicMock()
+    gps_pool.stop, fault_pool.stop = AsyncMock(), AsyncMock()
+    mock_pool_cls.side_effect = [gps_pool, fault_pool]
+    mock_create_task.side_effect = lambda coro: coro.close()
+
+    await ingest_event()
+
+    # One of the four workers is reserved for fault events
+    assert mock_pool_cls.call_args_list[0][0][0] == 3
+    assert mock_pool_cls.call_args_list[1][0][0] == 1
+    gps_pool.start.assert_called_once()
+    fault_pool.start.assert_called_once()
+    gps_channel.set_qos.assert_awaited_once_with(prefetch_count=40)
+    fault_channel.set_qos.assert_awaited_once_with(prefetch_count=10)
+    control_channel.set_qos.assert_not_called()
+    mock_consume_partitioned.assert_any_call(gps_channel, "gps_queue", gps_pool)
+    mock_consume_partitioned.assert_any_call(fault_channel, "fault_queue", fault_pool)
+    gps_pool.stop.assert_awaited_once()
+    fault_pool.stop.assert_awaited_once()
+
+
+@patch("src.fastapi.main.FAULT_DEDICATED_CONNECTION", True)
+@patch("src.fastapi.main.retry_manager", new_callable=AsyncMock)
+@patch("src.fastapi.main.asyncio.gather", new_callable=AsyncMock)
+@patch("src.fastapi.main.asyncio.create_task")
+@patch("src.fastapi.main.consume_queue", new_callable=AsyncMock)
+@patch("src.fastapi.main.aio_pika.connect_robust", new_callable=AsyncMock)
+async def test_ingest_event_fault_dedicated_connection(
+    mock_connect_robust, mock_consume_queue, mock_create_task, mock_gather, _
+):
+    main_conn, fault_conn = AsyncMock(), AsyncMock()
+    mock_connect_robust.side_effect = [main_conn, fault_conn]
+    fault_channel = AsyncMock()
+    fault_conn.channel.return_value = fault_channel
+    mock_create_task.side_effect = lambda coro: coro.close()
+
+    await ingest_event()
+
+    mock_consume_queue.assert_any_call(fault_channel, "fault_queue")
+    fault_conn.close.assert_awaited_once()
+    main_conn.close.assert_not_called()
+
+
 async def test_sqlalchemy_exception_handler(async_client):  # noqa: F811
     """Test SQLAlchemy exception handler returns 503."""
     response = await async_client.get("/force-sqlalchemy-error")
@@ -264,6 +515,12 @@ async def test_custom_openapi_has_api_key_security(async_client):  # noqa: F811
 
 
 @patch("src.fastapi.main.ingest_event", new_callable=AsyncMock)
+@patch("src.fastapi.main.alert_prefilter", new_callable=AsyncMock)
+@patch("src.fastapi.main.alert_outbox", new_callable=AsyncMock)
+@patch("src.fastapi.main.alert_pool", new_callable=AsyncMock)
+@patch("src.fastapi.main.fault_catalog", new_callable=AsyncMock)
+@patch("src.fastapi.main.device_directory", new_callable=AsyncMock)
+@patch("src.fastapi.main.http_client_manager")
 @patch("src.fastapi.main.redis_manager.init_redis", new_callable=AsyncMock)
 @patch("src.fastapi.main.redis_manager.close_redis", new_callable=AsyncMock)
 @patch("src.fastapi.main.DatabaseManager.connect", new_callable=AsyncMock)
@@ -275,20 +532,110 @@ async def test_lifespan_startup_teardown(
     mock_connect,
     mock_close_redis,
     mock_init_redis,
+    mock_http_client_manager,
+    mock_device_directory,
+    mock_fault_catalog,
+    mock_alert_pool,
+    mock_alert_outbox,
+    mock_alert_prefilter,
     mock_ingest_event,
 ):
+    mock_http_client_manager.init_session = AsyncMock()
+    mock_http_client_manager.close_session = AsyncMock()
     app = FastAPI(lifespan=lifespan)
 
     async with app.router.lifespan_context(app):
         mock_connect.assert_awaited_once()
         mock_init_db.assert_awaited_once()
         mock_init_redis.assert_awaited_once()
+        mock_http_client_manager.init_session.assert_awaited_once()
+        mock_device_directory.start.assert_awaited_once()
+        mock_fault_catalog.start.assert_awaited_once()
+        mock_alert_pool.start.assert_awaited_once()
+        mock_alert_outbox.start.assert_awaited_once()
+        mock_alert_prefilter.start.assert_awaited_once()
 
     # teardown
     mock_close_redis.assert_awaited_once()
+    mock_http_client_manager.close_session.assert_awaited_once()
+    mock_device_directory.stop.assert_awaited_once()
+    mock_fault_catalog.stop.assert_awaited_once()
+    mock_alert_pool.close.assert_awaited_once()
+    mock_alert_outbox.stop.assert_awaited_once()
+    mock_alert_prefilter.stop.assert_awaited_once()
     mock_disconnect.assert_awaited_once()
 
 
+@patch("src.fastapi.main.retry_manager", new_callable=AsyncMock)
+@patch("src.fastapi.main.asyncio.gather", new_callable=AsyncMock)
+@patch("src.fastapi.main.asyncio.create_task")
+@patch("src.fastapi.main.consume_queue", new_callable=AsyncMock)
+@patch("src.fastapi.main.aio_pika.connect_robust", new_callable=AsyncMock)
+async def test_ingest_event_sharded(
+    mock_connect_robust,
+    mock_consume_queue,
+    mock_create_task,
+    mock_gather,
+    mock_retry_manager,
+):
+    mock_conn = AsyncMock()
+    mock_connect_robust.return_value = mock_conn
+    channel = AsyncMock()
+    mock_conn.channel.return_value = channel
+    gps_queue, fault_queue = AsyncMock(), AsyncMock()
+    channel.declare_queue.side_effect = [gps_queue, fault_queue]
+    mock_create_task.side_effect = lambda coro: coro.close()
+
+    await ingest_event(shard=1, shards=4)
+
+    channel.declare_queue.assert_any_call("gps_queue.1", durable=True)
+    channel.declare_queue.assert_any_call("fault_queue.1", durable=True)
+    mock_retry_manager.setup.assert_awaited_once_with(
+        channel, ["gps_queue.1", "fault_queue.1"]
+    )
+    gps_queue.bind.assert_awaited_once_with(
+        channel.declare_exchange.return_value, routing_key="gps.1"
+    )
+    mock_consume_queue.assert_any_call(channel, "gps_queue.1")
+    mock_consume_queue.assert_any_call(channel, "fault_queue.1")
+
+
+@patch("src.fastapi.main.INGEST_IN_PROCESS", False)
+@patch("src.fastapi.main.ingest_event", new_callable=AsyncMock)
+@patch("src.fastapi.main.alert_prefilter", new_callable=AsyncMock)
+@patch("src.fastapi.main.alert_outbox", new_callable=AsyncMock)
+@patch("src.fastapi.main.alert_pool", new_callable=AsyncMock)
+@patch("src.fastapi.main.fault_catalog", new_callable=AsyncMock)
+@patch("src.fastapi.main.device_directory", new_callable=AsyncMock)
+@patch("src.fastapi.main.http_client_manager", new_callable=AsyncMock)
+@patch("src.fastapi.main.redis_manager.init_redis", new_callable=AsyncMock)
+@patch("src.fastapi.main.redis_manager.close_redis", new_callable=AsyncMock)
+@patch("src.fastapi.main.DatabaseManager.connect", new_callable=AsyncMock)
+@patch("src.fastapi.main.DatabaseManager.disconnect", new_callable=AsyncMock)
+@patch("src.fastapi.main.init_db", new_callable=AsyncMock)
+async def test_lifespan_without_in_process_ingest(
+    mock_init_db,
+    mock_disconnect,
+    mock_connect,
+    mock_close_redis,
+    mock_init_redis,
+    mock_http_client_manager,
+    mock_device_directory,
+    mock_fault_catalog,
+    mock_alert_pool,
+    mock_alert_outbox,
+    mock_alert_prefilter,
+    mock_ingest_event,
+):
+    app = FastAPI(lifespan=lifespan)
+
+    async with app.router.lifespan_context(app):
+        assert app.state.rabbitmq_consumer_task is None
+
+    mock_ingest_event.assert_not_called()
+    mock_close_redis.assert_awaited_once()
+
+
 # Optional route for testing exception handler (not in original main.py)
 @app.get("/force-sqlalchemy-error")
 async def force_sqlalchemy_error():
@@ -0,0 +1,62 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+
+class DeviceAPIStub:
+    """
+    Local stand-in for the Device API: `GET /devices` lists devices in pages
+    and honours `updated_since`, `GET /devices/{device_id}` returns one name.
+    """
+
+    def __init__(self, devices: Dict[str, str]):
+        self.devices = dict(devices)
+        self.updated_at: Dict[str, datetime] = {
+            device_id: datetime.min for device_id in devices
+        }
+        self.list_requests: List[dict] = []
+        self.lookups: List[str] = []
+        self.runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    def update(self, device_id: str, name: str, at: datetime) -> None:
+        self.devices[device_id] = name
+        self.updated_at[device_id] = at
+
+    async def list_devices(self, request: web.Request) -> web.Response:
+        self.list_requests.append(dict(request.query))
+        page = int(request.query.get("page", "1"))
+        page_size = int(request.query.get("page_size", "100"))
+        since = request.query.get("updated_since")
+        ids = sorted(self.devices)
+        if since is not None:
+            since_at = datetime.fromisoformat(since).replace(tzinfo=None)
+            ids = [d for d in ids if self.updated_at[d] >= since_at]
+        start = (page - 1) * page_size
+        end = start + page_size
+        items = [{"id": d, "name": self.devices[d]} for d in ids[start:end]]
+        return web.json_response({"items": items})
+
+    async def get_device(self, request: web.Request) -> web.Response:
+        device_id = request.match_info["device_id"]
+        self.lookups.append(device_id)
+        if device_id not in self.devices:
+            return web.json_response({"detail": "not found"}, status=404)
+        return web.json_response({"name": self.devices[device_id]})
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/devices", self.list_devices)
+        app.router.add_get("/devices/{device_id}", self.get_device)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/devices"
+        return self.url
+
+    async def stop(self) -> None:
+        if self.runner is not None:
+            await self.runner.cleanup()
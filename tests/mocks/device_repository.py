@@ -0,0 +1,21 @@
+from typing import Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.fastapi.devices.repositories import IDeviceRepository
+
+
+class InMemoryDeviceRepository(IDeviceRepository):
+    """The `devices` table as a dict, for tests without PostgreSQL."""
+
+    def __init__(self, names: Dict[str, str] | None = None):
+        self.rows: Dict[str, str] = dict(names or {})
+
+    async def fetch_names(self, db: AsyncSession) -> Dict[str, str]:
+        return dict(self.rows)
+
+    async def upsert_names(self, db: AsyncSession, names: Dict[str, str]) -> None:
+        self.rows.update(names)
+
+    async def delete_name(self, db: AsyncSession, device_id: str) -> None:
+        self.rows.pop(device_id, None)
@@ -1,6 +1,11 @@
+import asyncio
 import json
+import time
 from unittest.mock import AsyncMock, patch
 
+import pytest
+
+from src.fastapi.metrics.registry import metrics
 from src.fastapi.redis.decorators import cache_api_call
 from src.fastapi.redis.redis import RedisManager, redis_manager
 
@@ -86,3 +91,182 @@ async def test_close_redis():
 
     mock_client.aclose.assert_awaited_once()
     assert manager.redis_client is None
+
+
+upstream_calls = []
+
+
+@cache_api_call("test_local", ttl=60, local_ttl=10)
+async def slow_function(x):
+    upstream_calls.append(x)
+    await asyncio.sleep(0.01)
+    return {"result": x * len(upstream_calls)}
+
+
+@pytest.fixture(autouse=True)
+def reset_upstream_calls():
+    upstream_calls.clear()
+
+
+async def test_local_hit_skips_redis():
+    mock_redis = AsyncMock()
+    mock_redis.get.return_value = None
+    redis_manager.redis_client = mock_redis
+
+    first = await slow_function(1)
+    second = await slow_function(1)
+
+    assert first == second == {"result": 1}
+    assert upstream_calls == [1]
+    mock_redis.get.assert_awaited_once()
+
+
+async def test_concurrent_misses_share_one_call():
+    redis_manager.redis_client = None
+    coalesced = metrics.counter("cache.test_local.coalesced").value
+
+    results = await asyncio.gather(*(slow_function(2) for _ in range(10)))
+
+    assert results == [{"result": 2}] * 10
+    assert upstream_calls == [2]
+    assert metrics.counter("cache.test_local.coalesced").value == coalesced + 9
+
+
+async def test_concurrent_misses_share_the_error():
+    redis_manager.redis_client = None
+
+    @cache_api_call("test_local_error", ttl=60)
+    async def failing_function(x):
+        upstream_calls.append(x)
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    results = await asyncio.gather(
+        failing_function(1), failing_function(1), return_exceptions=True
+    )
+
+    assert all(isinstance(r, ValueError) for r in results)
+    assert upstream_calls == [1]
+
+
+async def test_stale_entry_is_served_while_refreshing():
+    redis_manager.redis_client = None
+    await slow_function(3)
+    # age the entry past its local TTL
+    cache = slow_function.local_cache
+    for key, entry in cache.entries.items():
+        cache.entries[key] = entry._replace(fresh_until=time.monotonic() - 1)
+
+    stale = await slow_function(3)
+    await asyncio.sleep(0.05)
+
+    assert stale == {"result": 3}
+    assert upstream_calls == [3, 3]
+    assert await slow_function(3) == {"result": 6}
+
+
+async def test_invalidate_drops_local_entry():
+    redis_manager.redis_client = None
+    await slow_function(4)
+
+    slow_function.invalidate(4)
+    await slow_function(4)
+
+    assert upstream_calls == [4, 4]
+
+
+async def test_hit_ratio_gauge():
+    redis_manager.redis_client = None
+    await slow_function(5)
+    await slow_function(5)
+
+    snapshot = metrics.snapshot()
+
+    assert 0 < snapshot["gauges"]["cache.test_local.hit_ratio"] < 1
+    assert snapshot["counters"]["cache.test_local.l1_hit"] >= 1
+
+
+class NotFound(Exception):
+    def __init__(self, x):
+        super().__init__(f"{x} not found")
+
+
+@cache_api_call("test_negative", ttl=60, negative_on=(NotFound,), negative_ttl=5)
+async def lookup(x):
+    upstream_calls.append(x)
+    raise NotFound(x)
+
+
+@patch.object(redis_manager, "redis_client", new_callable=AsyncMock)
+async def test_negative_result_is_cached_in_both_tiers(mock_redis):
+    mock_redis.get.return_value = None
+
+    with pytest.raises(NotFound):
+        await lookup(1)
+    with pytest.raises(NotFound):
+        await lookup(1)
+
+    assert upstream_calls == [1]
+    mock_redis.get.assert_awaited_once()
+    key, ttl, value = mock_redis.setex.call_args[0]
+    assert key.startswith("test_negative:")
+    assert ttl == 5
+    assert value == "!1 not found"
+
+
+@patch.object(redis_manager, "redis_client", new_callable=AsyncMock)
+async def test_negative_result_from_redis(mock_redis):
+    mock_redis.get.return_value = "!2 not found"
+
+    with pytest.raises(NotFound, match="2 not found"):
+        await lookup(2)
+
+    assert upstream_calls == []
+    mock_redis.setex.assert_not_called()
+
+
+class Unavailable(Exception):
+    pass
+
+
+upstream_down = False
+
+
+@cache_api_call("test_last_known", ttl=60, last_known_on=(Unavailable,))
+async def flaky(x):
+    upstream_calls.append(x)
+    if upstream_down:
+        raise Unavailable()
+    return f"value {x}"
+
+
+async def test_last_known_value_is_served_while_upstream_fails():
+    global upstream_down
+    redis_manager.redis_client = None
+    assert await flaky(1) == "value 1"
+    flaky.local_cache.clear()
+
+    upstream_down = True
+    try:
+        assert await flaky(1) == "value 1"
+        with pytest.raises(Unavailable):
+            await flaky(2)
+    finally:
+        upstream_down = False
+
+    assert upstream_calls == [1, 1, 2]
+    assert metrics.counter("cache.test_last_known.last_known").value >= 1
+
+
+async def test_invalidate_drops_last_known_value():
+    global upstream_down
+    redis_manager.redis_client = None
+    await flaky(3)
+    flaky.invalidate(3)
+
+    upstream_down = True
+    try:
+        with pytest.raises(Unavailable):
+            await flaky(3)
+    finally:
+        upstream_down = False
@@ -0,0 +1,66 @@
+from unittest.mock import MagicMock, patch
+
+from src.alert.launcher import drain, main, start_servers
+
+
+@patch("src.alert.launcher.multiprocessing.get_context")
+def test_start_servers_spawns_each_process(mock_get_context):
+    context = MagicMock()
+    mock_get_context.return_value = context
+
+    servers = start_servers(3)
+
+    mock_get_context.assert_called_once_with("spawn")
+    assert len(servers) == 3
+    names = [c.kwargs["name"] for c in context.Process.call_args_list]
+    assert names == ["alert-server-0", "alert-server-1", "alert-server-2"]
+
+
+def test_drain_kills_servers_still_running():
+    drained = MagicMock(is_alive=MagicMock(return_value=False))
+    stuck = MagicMock(is_alive=MagicMock(return_value=True))
+
+    drain([drained, stuck], timeout=0)
+
+    drained.kill.assert_not_called()
+    stuck.kill.assert_called_once()
+
+
+@patch("src.alert.launcher.signal.signal")
+@patch("src.alert.launcher.start_servers")
+@patch("src.alert.launcher.get_settings")
+def test_main_reports_failed_server(mock_settings, mock_start_servers, _):
+    mock_settings.return_value.ALERT_PROCESSES = 2
+    healthy = MagicMock(exitcode=0, is_alive=MagicMock(return_value=False))
+    crashed = MagicMock(exitcode=1, is_alive=MagicMock(return_value=False))
+    mock_start_servers.return_value = [healthy, crashed]
+
+    assert main() == 1
+    mock_start_servers.assert_called_once_with(2)
+
+
+@patch("src.alert.launcher.drain")
+@patch("src.alert.launcher.signal.signal")
+@patch("src.alert.launcher.start_servers")
+@patch("src.alert.launcher.get_settings")
+def test_signal_is_forwarded_and_servers_drained(
+    mock_settings, mock_start_servers, mock_signal, mock_drain
+):
+    mock_settings.return_value.ALERT_PROCESSES = 2
+    mock_settings.return_value.ALERT_DRAIN_SECONDS = 15
+    servers = [MagicMock(exitcode=0), MagicMock(exitcode=0)]
+    for server in servers:
+        server.is_alive.return_value = True
+    mock_start_servers.return_value = servers
+
+    def join(_timeout):
+        # SIGTERM arrives while the launcher waits on its servers
+        handler = mock_signal.call_args_list[0].args[1]
+        handler(15, None)
+
+    servers[0].join.side_effect = join
+
+    assert main() == 0
+    for server in servers:
+        server.terminate.assert_called_once()
+    mock_drain.assert_called_once_with(servers, 15)
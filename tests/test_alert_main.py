@@ -23,7 +23,35 @@ def test_process_request_health():
     assert isinstance(result, Response)
     assert result.status_code == 200
     assert result.reason_phrase == "OK"
-    assert result.body == b"OK"
+    health = json.loads(result.body)
+    assert health["status"] == "ok"
+    assert "alerts.queue_depth" in health["gauges"]
+    assert "alerts.busy" in health["counters"]
+
+
+def test_process_request_rules():
+    result = process_request(None, Request(path="/rules", headers=Headers()))
+
+    assert result.status_code == 200
+    spec = json.loads(result.body)
+    assert result.headers["ETag"] == f'"{spec["version"]}"'
+    assert {
+        "event_types": ["gps"],
+        "conditions": [{"field": "speed", "op": "gte", "value": 70.0}],
+    } in spec["rules"]
+
+    headers = Headers({"If-None-Match": result.headers["ETag"]})
+    result = process_request(None, Request(path="/rules", headers=headers))
+
+    assert result.status_code == 304
+    assert result.body == b""
+
+
+def test_process_request_metrics():
+    result = process_request(None, Request(path="/metrics", headers=Headers()))
+
+    assert result.status_code == 200
+    assert set(json.loads(result.body)) == {"counters", "gauges", "timers"}
 
 
 def test_process_request_other():
@@ -34,11 +62,11 @@ def test_process_request_other():
 
 
 @pytest.mark.asyncio
-@patch("src.alert.main.process_alert")
+@patch("src.alert.main.alert_workers")
 @patch("src.alert.main.AlertEvent.model_validate_json")
-async def test_alerts_handler_valid_message(mock_validate_json, mock_process_alert):
+async def test_alerts_handler_valid_message(mock_validate_json, mock_alert_workers):
     mock_websocket = AsyncMock()
-    mock_event = MagicMock(event_type="type1", device_id="dev1")
+    mock_event = MagicMock(event_type="type1", device_id="dev1", id="a1")
 
     mock_validate_json.return_value = mock_event
     mock_websocket.__aiter__.return_value = ["valid_message"]
@@ -46,9 +74,16 @@ async def test_alerts_handler_valid_message(mock_validate_json, mock_process_ale
     await alerts_handler(mock_websocket)
 
     mock_validate_json.assert_called_once_with("valid_message")
-    mock_process_alert.assert_called_once_with(mock_event)
+    mock_alert_workers.submit.assert_called_once_with(mock_event)
     mock_websocket.send.assert_called_with(
-        json.dumps({"status": "received", "event_type": "type1", "device_id": "dev1"})
+        json.dumps(
+            {
+                "status": "received",
+                "event_type": "type1",
+                "device_id": "dev1",
+                "id": "a1",
+            }
+        )
     )
 
 
@@ -56,31 +91,39 @@ async def test_alerts_handler_valid_message(mock_validate_json, mock_process_ale
 @patch("src.alert.main.AlertEvent.model_validate_json")
 async def test_alerts_handler_invalid_payload(mock_validate_json):
     mock_websocket = AsyncMock()
-    mock_websocket.__aiter__.return_value = ["bad_message"]
+    mock_websocket.__aiter__.return_value = ['{"id": "a2", "device_id": 1}']
 
     mock_validate_json.side_effect = ValueError("bad data")
 
     await alerts_handler(mock_websocket)
 
     mock_websocket.send.assert_called_with(
-        json.dumps({"status": "error", "reason": "bad data"})
+        json.dumps({"status": "error", "reason": "bad data", "id": "a2"})
     )
 
 
 @pytest.mark.asyncio
-@patch("src.alert.main.process_alert", side_effect=Exception("unexpected crash"))
+@patch("src.alert.main.alert_workers")
 @patch("src.alert.main.AlertEvent.model_validate_json")
-async def test_alerts_handler_process_exception(mock_validate_json, mock_process_alert):
+async def test_alerts_handler_busy(mock_validate_json, mock_alert_workers):
     mock_websocket = AsyncMock()
-    mock_event = MagicMock(event_type="eventY", device_id="devY")
+    mock_event = MagicMock(event_type="eventY", device_id="devY", id=None)
 
     mock_websocket.__aiter__.return_value = ["messageY"]
     mock_validate_json.return_value = mock_event
+    mock_alert_workers.submit.return_value = False
 
     await alerts_handler(mock_websocket)
 
     mock_websocket.send.assert_called_with(
-        json.dumps({"status": "received", "event_type": "eventY", "device_id": "devY"})
+        json.dumps(
+            {
+                "status": "busy",
+                "event_type": "eventY",
+                "device_id": "devY",
+                "id": None,
+            }
+        )
     )
 
 
@@ -116,6 +159,9 @@ async def test_alerts_handler_unexpected_exception(mock_validate_json):
     mock_websocket.send.assert_not_called()
 
 
+@patch("src.alert.main.notifier", new_callable=AsyncMock)
+@patch("src.alert.main.alert_workers", new_callable=AsyncMock)
+@patch("src.alert.main.rule_store", new_callable=AsyncMock)
 @patch("src.alert.main.redis_manager.init_redis", new_callable=AsyncMock)
 @patch("src.alert.main.redis_manager.close_redis", new_callable=AsyncMock)
 @patch("src.alert.main.serve")
@@ -126,6 +172,9 @@ async def test_start_alert_server_lifecycle(
     mock_serve,
     mock_close_redis,
     mock_init_redis,
+    mock_rule_store,
+    mock_alert_workers,
+    mock_notifier,
 ):
     serve_context = AsyncMock()
     serve_context.__aenter__.return_value = AsyncMock()
@@ -139,6 +188,11 @@ async def test_start_alert_server_lifecycle(
 
     mock_init_redis.assert_awaited_once()
     mock_close_redis.assert_awaited_once()
+    mock_rule_store.start.assert_awaited_once()
+    mock_rule_store.stop.assert_awaited_once()
+    mock_alert_workers.start.assert_awaited_once()
+    mock_alert_workers.stop.assert_awaited_once()
+    mock_notifier.close.assert_awaited_once()
     mock_logger.info.assert_any_call("Redis initialized; alerting service started.")
     mock_logger.info.assert_any_call("Alerting service stopped.")
     mock_serve.assert_called_once()
@@ -170,10 +224,48 @@ async def test_main_function(
     assert mock_loop.add_signal_handler.call_count == 2
 
     # Ensure server is started with correct parameters
-    mock_start_server.assert_awaited_once_with("0.0.0.0", 9001, future)
+    mock_start_server.assert_awaited_once_with(
+        "0.0.0.0", 9001, future, reuse_port=False
+    )
 
 
 @patch("src.alert.main.asyncio.run")
 def test_run_app_calls_asyncio_run(mock_run):
     run_app()
     mock_run.assert_called_once()
+
+
+@pytest.mark.asyncio
+@patch("src.alert.main.alert_workers")
+async def test_alerts_handler_array_frame(mock_alert_workers):
+    event = {
+        "event_type": "gps",
+        "device_id": "dev1",
+        "device_name": "truck",
+        "timestamp": "2025-01-01T00:00:00",
+        "data": {},
+        "id": "a1",
+    }
+    mock_websocket = AsyncMock()
+    mock_websocket.__aiter__.return_value = [json.dumps([event, {"id": "a2"}])]
+
+    await alerts_handler(mock_websocket)
+
+    acks = json.loads(mock_websocket.send.call_args.args[0])
+    assert [ack["id"] for ack in acks] == ["a1", "a2"]
+    assert [ack["status"] for ack in acks] == ["received", "error"]
+    mock_alert_workers.submit.assert_called_once()
+
+
+@pytest.mark.asyncio
+@patch("src.alert.main.alert_workers")
+async def test_alerts_handler_unparsed_array_frame(mock_alert_workers):
+    mock_websocket = AsyncMock()
+    mock_websocket.__aiter__.return_value = ['[{"id": "a1"}, {"id": ']
+
+    await alerts_handler(mock_websocket)
+
+    ack = json.loads(mock_websocket.send.call_args.args[0])
+    assert ack["status"] == "error"
+    assert ack["id"] is None
+    mock_alert_workers.submit.assert_not_called()
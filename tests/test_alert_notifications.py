@@ -1,46 +1,127 @@
-from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+import socket
+from email import message_from_bytes
 
 import pytest
+from aiosmtpd.controller import Controller
 
-from src.alert.notifications import send_email
+from src.alert.metrics import metrics
+from src.alert.notifications import EmailNotifier, SMTPPool
+from src.alert.rules import AlertRule
 
+SPEEDING = AlertRule("ops@example.com", ["gps"], {"speed": 70.0})
+FAULTS = AlertRule("ops@example.com", ["fault"], {"fault_code": ["1"]})
+FLEET = AlertRule("fleet@example.com", ["gps"], {"speed": 70.0})
 
-@pytest.mark.asyncio
-@patch("src.alert.notifications.get_settings")
-@patch("src.alert.notifications.logger")
-async def test_send_email_success(mock_logger, mock_get_settings):
-    # Mock config
-    mock_settings = AsyncMock()
-    mock_settings.SMTP_FROM = "noreply@example.com"
-    mock_get_settings.return_value = mock_settings
 
-    to = "user@example.com"
-    subject = "Test Subject"
-    body = "Test Body"
+class Mailbox:
+    """aiosmtpd handler keeping the mails it accepts."""
 
-    await send_email(to, subject, body)
+    def __init__(self):
+        self.mails = []
+        self.replies = []
 
-    # Check that logging occurred
-    mock_logger.info.assert_called_once_with(f"Email sent to {to}: {subject}")
+    async def handle_DATA(self, server, session, envelope):
+        if self.replies:
+            return self.replies.pop(0)
+        self.mails.append(message_from_bytes(envelope.content))
+        return "250 OK"
 
 
-@pytest.mark.asyncio
-@patch("src.alert.notifications.get_settings")
-@patch("src.alert.notifications.logger")
-async def test_send_email_failure_logging(mock_logger, mock_get_settings):
-    # Force logger to raise inside try block
-    mock_logger.info.side_effect = Exception("Logging failed")
+@pytest.fixture
+def mailbox():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    handler = Mailbox()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    handler.port = port
+    yield handler
+    controller.stop()
 
-    mock_settings = MagicMock()
-    mock_settings.SMTP_FROM = "noreply@example.com"
-    mock_get_settings.return_value = mock_settings
 
-    to = "user@example.com"
-    subject = "Failing Subject"
-    body = "Body"
+def make_notifier(mailbox, window=0.0, max_alerts=100, pool_size=2):
+    pool = SMTPPool("127.0.0.1", mailbox.port, pool_size, timeout=5)
+    return EmailNotifier(pool, window, max_alerts, retries=2, retry_seconds=0)
 
-    await send_email(to, subject, body)
 
-    mock_logger.error.assert_called_once()
-    args, _ = mock_logger.error.call_args
-    assert "Failed to send email to" in args[0]
+async def wait_for_mails(mailbox, count, timeout=5.0):
+    async def arrived():
+        while len(mailbox.mails) < count:
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(arrived(), timeout)
+
+
+async def test_alerts_are_mailed_over_pooled_connections(mailbox):
+    opened = metrics.counter("smtp.connections_opened").value
+    notifier = make_notifier(mailbox, pool_size=2)
+    for i in range(6):
+        notifier.notify(SPEEDING, f"Alert: gps [speed={80 + i}]", "{}")
+    await wait_for_mails(mailbox, 6)
+    notifier.notify(SPEEDING, "Alert: gps [speed=99]", "{}")
+    await notifier.close()
+
+    assert len(mailbox.mails) == 7
+    assert metrics.counter("smtp.connections_opened").value == opened + 2
+
+
+async def test_alerts_of_a_recipient_and_rule_are_coalesced(mailbox):
+    notifier = make_notifier(mailbox, window=0.05)
+    for i in range(10):
+        notifier.notify(SPEEDING, f"Alert: gps [speed={80 + i}]", f"body {i}")
+    notifier.notify(FAULTS, "Alert: fault [fault_code=1]", "fault body")
+    notifier.notify(FLEET, "Alert: gps [speed=90]", "fleet body")
+    await wait_for_mails(mailbox, 3)
+    await notifier.close()
+
+    mails = {(m["To"], m["Subject"]): m for m in mailbox.mails}
+    assert len(mails) == 3
+    digest = mails[("ops@example.com", "[10 alerts] Alert: gps [speed=80]")]
+    assert "body 9" in digest.get_payload()
+    assert ("ops@example.com", "Alert: fault [fault_code=1]") in mails
+    assert ("fleet@example.com", "Alert: gps [speed=90]") in mails
+
+
+async def test_full_digest_is_sent_before_its_window_ends(mailbox):
+    notifier = make_notifier(mailbox, window=60, max_alerts=3)
+    for i in range(3):
+        notifier.notify(SPEEDING, f"Alert: gps [speed={80 + i}]", "{}")
+    await wait_for_mails(mailbox, 1)
+
+    assert mailbox.mails[0]["Subject"].startswith("[3 alerts]")
+    assert not notifier.digests
+    await notifier.close()
+
+
+async def test_close_sends_the_open_digests(mailbox):
+    notifier = make_notifier(mailbox, window=60)
+    notifier.notify(SPEEDING, "Alert: gps [speed=80]", "{}")
+    await notifier.close()
+
+    assert [m["Subject"] for m in mailbox.mails] == ["Alert: gps [speed=80]"]
+
+
+async def test_transient_failure_is_retried(mailbox):
+    mailbox.replies = ["451 4.3.0 Try again later"]
+    retried = metrics.counter("notifications.retried").value
+    notifier = make_notifier(mailbox)
+    notifier.notify(SPEEDING, "Alert: gps [speed=80]", "{}")
+    await wait_for_mails(mailbox, 1)
+    await notifier.close()
+
+    assert metrics.counter("notifications.retried").value == retried + 1
+
+
+async def test_permanent_failure_is_not_retried(mailbox):
+    mailbox.replies = ["550 5.1.1 No such user"]
+    retried = metrics.counter("notifications.retried").value
+    failed = metrics.counter("notifications.failed").value
+    notifier = make_notifier(mailbox)
+    notifier.notify(SPEEDING, "Alert: gps [speed=80]", "{}")
+    await notifier.close()
+
+    assert not mailbox.mails
+    assert metrics.counter("notifications.retried").value == retried
+    assert metrics.counter("notifications.failed").value == failed + 1
@@ -1,8 +1,41 @@
+import json
 from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from src.alert.rules import AlertRule, matches_rule
+import pytest
+
+from src.alert import rule_store as rule_store_module
+from src.alert.redis.redis import redis_manager
+from src.alert.rule_store import RuleStore
+from src.alert.rules import RULES, AlertRule, RuleSet, matches_rule
 from src.alert.schemas import AlertEvent
 
+MIXED_RULES = RULES + [
+    AlertRule("a@example.com", ["gps", "idle"], {"status": "stopped", "speed": 5}),
+    AlertRule("b@example.com", ["fault"], {"fault_code": ["7", "8"], "level": 2}),
+    AlertRule("c@example.com", ["gps"], {"zone": [["a", "b"], "c"]}),
+    AlertRule("d@example.com", ["gps"], {"meta": {"k": 1}}),
+    AlertRule("e@example.com", ["idle"], {}),
+]
+
+EVENTS = [
+    ("gps", {"speed": 70.0}),
+    ("gps", {"speed": "85", "status": "stopped"}),
+    ("gps", {"speed": 4, "status": "stopped"}),
+    ("gps", {"speed": "fast"}),
+    ("gps", {"speed": "nan"}),
+    ("gps", {"zone": ["a", "b"]}),
+    ("gps", {"zone": "c", "meta": {"k": 1}}),
+    ("gps", {"status": ["stopped"]}),
+    ("fault", {"fault_code": "7", "level": 3}),
+    ("fault", {"fault_code": "8"}),
+    ("fault", {"fault_code": "150"}),
+    ("fault", {"fault_code": 7}),
+    ("idle", {"speed": 90, "status": "stopped"}),
+    ("idle", {}),
+    ("other", {"speed": 90}),
+]
+
 
 def make_event(event_type: str, data: dict) -> AlertEvent:
     return AlertEvent(
@@ -70,3 +103,75 @@ def test_matches_rule_typeerror_on_numeric_threshold():
 
     result = matches_rule(event, rule)
     assert result is False
+
+
+@pytest.mark.parametrize("event_type,data", EVENTS)
+def test_rule_set_agrees_with_matches_rule(event_type, data):
+    event = make_event(event_type, data)
+
+    expected = [rule for rule in MIXED_RULES if matches_rule(event, rule)]
+    assert RuleSet(MIXED_RULES).match(event) == expected
+
+
+def test_rule_set_indexes_membership_thresholds():
+    ruleset = RuleSet(MIXED_RULES)
+
+    bucket = ruleset.buckets["fault"]
+    assert not bucket.scan
+    assert len(bucket.keyed["fault_code"]) == 100
+    minimums, _ = ruleset.buckets["gps"].floors["speed"]
+    assert minimums == [70.0]
+    assert ruleset.spec["version"] == ruleset.version
+
+
+def rules_json(*rules):
+    return json.dumps(
+        [
+            {"email": r.email, "event_types": r.event_types, "thresholds": r.thresholds}
+            for r in rules
+        ]
+    )
+
+
+@pytest.mark.asyncio
+async def test_rule_store_reloads_the_rules_file(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(rules_json(AlertRule("a@example.com", ["gps"], {"speed": 10})))
+    store = RuleStore()
+
+    with patch.object(rule_store_module.settings, "ALERT_RULES_FILE", str(path)):
+        assert await store.reload() is True
+        first = store.ruleset
+        assert await store.reload() is False
+
+        path.write_text("not json, but much longer than the rules were")
+        with pytest.raises(ValueError):
+            await store.reload()
+        assert store.ruleset is first
+
+        path.write_text(rules_json(AlertRule("b@example.com", ["gps"], {})))
+        assert await store.reload() is True
+
+    assert [rule.email for rule in store.ruleset.rules] == ["b@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_rule_store_reloads_from_redis():
+    client = MagicMock(get=AsyncMock(return_value=rules_json(*MIXED_RULES)))
+    store = RuleStore()
+
+    with patch.object(redis_manager, "redis_client", client):
+        assert await store.reload() is True
+        assert await store.reload() is False
+
+    assert store.ruleset.version == RuleSet(MIXED_RULES).version
+
+
+@pytest.mark.asyncio
+async def test_rule_store_keeps_the_built_in_rules_without_a_source():
+    store = RuleStore()
+
+    with patch.object(redis_manager, "redis_client", None):
+        assert await store.reload() is False
+
+    assert store.ruleset.rules == tuple(RULES)
@@ -1,41 +1,89 @@
-import asyncio
 import base64
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from src.alert.rules import RULES
+from src.alert.metrics import metrics
+from src.alert.rule_store import rule_store
+from src.alert.rules import AlertRule, RuleSet
 from src.alert.schemas import AlertEvent
+from src.alert.suppression import SuppressionWindows, suppression_windows
 from src.alert.utils import check_suppression_period, process_alert
 
 
 @pytest.mark.asyncio
 @patch("src.alert.utils.redis_manager.redis_client")
 async def test_suppressed_event_returns_true(mock_redis_client):
-    mock_redis_client.get = AsyncMock(return_value=b"suppressed")
-    mock_redis_client.setex = AsyncMock()
+    until = time.time() + 5
+    mock_redis_client.set = AsyncMock(return_value=str(until))
+    suppressed = metrics.counter("suppression.suppressed").value
 
     # 2 bytes = 5 seconds
     payload = b"0000000000000005"
     result = await check_suppression_period("fc1", payload)
 
-    mock_redis_client.get.assert_awaited_once()
-    mock_redis_client.setex.assert_not_called()
+    mock_redis_client.set.assert_awaited_once()
     assert result is True
+    assert suppression_windows.until["suppression:fc1"] == until
+    assert metrics.counter("suppression.suppressed").value == suppressed + 1
 
 
 @pytest.mark.asyncio
 @patch("src.alert.utils.redis_manager.redis_client")
 async def test_new_event_sets_suppression_and_returns_false(mock_redis_client):
-    mock_redis_client.get = AsyncMock(return_value=None)
-    mock_redis_client.setex = AsyncMock()
+    mock_redis_client.set = AsyncMock(return_value=None)
+    passed = metrics.counter("suppression.passed").value
 
     payload = b"abcde" + (5).to_bytes(2, "big")
     result = await check_suppression_period("fc1", payload)
 
-    mock_redis_client.get.assert_awaited_once()
-    mock_redis_client.setex.assert_awaited_once_with("suppression:fc1", 5, "suppressed")
+    key, value = mock_redis_client.set.await_args.args
+    assert key == "suppression:fc1"
+    assert mock_redis_client.set.await_args.kwargs == {"nx": True, "ex": 5, "get": True}
     assert result is False
+    assert suppression_windows.until[key] == float(value)
+    assert metrics.counter("suppression.passed").value == passed + 1
+
+
+@pytest.mark.asyncio
+@patch("src.alert.utils.redis_manager.redis_client")
+async def test_open_window_is_answered_locally(mock_redis_client):
+    mock_redis_client.set = AsyncMock(return_value=None)
+    payload = b"abcde" + (60).to_bytes(2, "big")
+    local_hits = metrics.counter("suppression.local_hit").value
+
+    assert await check_suppression_period("fc1", payload) is False
+    assert await check_suppression_period("fc1", payload) is True
+    assert await check_suppression_period("fc2", payload) is False
+
+    assert mock_redis_client.set.await_count == 2
+    assert metrics.counter("suppression.local_hit").value == local_hits + 1
+
+
+@pytest.mark.asyncio
+@patch("src.alert.suppression.settings.SUPPRESSION_SCOPE", "device")
+@patch("src.alert.utils.redis_manager.redis_client")
+async def test_suppression_per_device(mock_redis_client):
+    mock_redis_client.set = AsyncMock(return_value=None)
+    payload = b"abcde" + (60).to_bytes(2, "big")
+
+    assert await check_suppression_period("fc1", payload, device_id="d1") is False
+    assert await check_suppression_period("fc1", payload, device_id="d2") is False
+
+    keys = [c.args[0] for c in mock_redis_client.set.await_args_list]
+    assert keys == ["suppression:d1:fc1", "suppression:d2:fc1"]
+
+
+@pytest.mark.asyncio
+@patch("src.alert.utils.redis_manager.redis_client")
+async def test_legacy_marker_suppresses_without_local_window(mock_redis_client):
+    mock_redis_client.set = AsyncMock(return_value="suppressed")
+
+    payload = b"abcde" + (5).to_bytes(2, "big")
+    assert await check_suppression_period("fc1", payload) is True
+
+    assert not suppression_windows.until
 
 
 @pytest.mark.asyncio
@@ -49,7 +97,7 @@ async def test_redis_client_none_returns_false():
 @pytest.mark.asyncio
 @patch("src.alert.utils.redis_manager.redis_client")
 async def test_redis_raises_exception_logs_and_returns_false(mock_redis_client, caplog):
-    mock_redis_client.get = AsyncMock(side_effect=RuntimeError("Redis error"))
+    mock_redis_client.set = AsyncMock(side_effect=RuntimeError("Redis error"))
 
     payload = b"abcde" + (15).to_bytes(2, "big")
     with caplog.at_level("ERROR"):
@@ -61,7 +109,7 @@ async def test_redis_raises_exception_logs_and_returns_false(mock_redis_client,
 
 
 @pytest.mark.asyncio
-@patch("src.alert.utils.send_email", new_callable=AsyncMock)
+@patch("src.alert.utils.notifier")
 @patch("src.alert.utils.check_suppression_period", new_callable=AsyncMock)
 async def test_fault_event_suppressed(check_mock, send_mock):
     check_mock.return_value = True
@@ -79,7 +127,7 @@ async def test_fault_event_suppressed(check_mock, send_mock):
     )
 
     await process_alert(event)
-    send_mock.assert_not_awaited()
+    send_mock.notify.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -108,20 +156,14 @@ async def test_process_alert_suppression_exception(mock_logger, mock_check):
 
 
 @pytest.mark.asyncio
-@patch("src.alert.utils.send_email", new_callable=AsyncMock)
+@patch("src.alert.utils.notifier")
 @patch("src.alert.utils.check_suppression_period", new_callable=AsyncMock)
-@patch("src.alert.utils.matches_rule", return_value=True)
-@patch(
-    "src.alert.utils.RULES",
-    [
-        MagicMock(
-            email="test@example.com",
-            event_types=["fault"],
-            thresholds={"fault_code": ["1"]},
-        )
-    ],
+@patch.object(
+    rule_store,
+    "ruleset",
+    RuleSet([AlertRule("test@example.com", ["fault"], {"fault_code": ["1"]})]),
 )
-async def test_fault_event_triggers_email_skipping_assert(_, check_mock, send_mock):
+async def test_fault_event_triggers_email_skipping_assert(check_mock, send_mock):
     check_mock.return_value = False
 
     payload = base64.b64encode(b"abcd" + (5).to_bytes(2, "big")).decode()
@@ -138,23 +180,19 @@ async def test_fault_event_triggers_email_skipping_assert(_, check_mock, send_mo
 
     await process_alert(event)
 
-    args, _ = send_mock.call_args
-    assert "test@example.com" in args
+    rule, _, _ = send_mock.notify.call_args.args
+    assert rule.email == "test@example.com"
 
 
 @pytest.mark.asyncio
-@patch("src.alert.utils.send_email", new_callable=AsyncMock)
+@patch("src.alert.utils.notifier")
 @patch("src.alert.utils.check_suppression_period", new_callable=AsyncMock)
-@patch("src.alert.utils.matches_rule", return_value=False)
-@patch(
-    "src.alert.utils.RULES",
-    [
-        MagicMock(
-            email="test@example.com", event_types=["gps"], thresholds={"speed": 60}
-        )
-    ],
+@patch.object(
+    rule_store,
+    "ruleset",
+    RuleSet([AlertRule("test@example.com", ["gps"], {"speed": 60})]),
 )
-async def test_no_matching_rules_sends_nothing(_, check_mock, send_mock):
+async def test_no_matching_rules_sends_nothing(check_mock, send_mock):
     check_mock.return_value = False
 
     event = AlertEvent(
@@ -167,22 +205,18 @@ async def test_no_matching_rules_sends_nothing(_, check_mock, send_mock):
 
     await process_alert(event)
 
-    send_mock.assert_not_awaited()
+    send_mock.notify.assert_not_called()
 
 
 @pytest.mark.asyncio
-@patch("src.alert.utils.send_email", new_callable=AsyncMock)
+@patch("src.alert.utils.notifier")
 @patch("src.alert.utils.check_suppression_period", new_callable=AsyncMock)
-@patch("src.alert.utils.matches_rule", return_value=True)
-@patch(
-    "src.alert.utils.RULES",
-    [
-        MagicMock(
-            email="test@example.com", event_types=["gps"], thresholds={"speed": 60}
-        )
-    ],
+@patch.object(
+    rule_store,
+    "ruleset",
+    RuleSet([AlertRule("test@example.com", ["gps"], {"speed": 60})]),
 )
-async def test_multiple_matching_thresholds(_, check_mock, send_mock):
+async def test_multiple_matching_thresholds(check_mock, send_mock):
     check_mock.return_value = False
 
     event = AlertEvent(
@@ -195,28 +229,21 @@ async def test_multiple_matching_thresholds(_, check_mock, send_mock):
 
     await process_alert(event)
 
-    await asyncio.sleep(0)
+    send_mock.notify.assert_called_once()
 
-    send_mock.assert_awaited_once()
-
-    args, _ = send_mock.call_args
-    subject = args[1]
+    subject = send_mock.notify.call_args.args[1]
     assert "speed=70" in subject
 
 
 @pytest.mark.asyncio
-@patch("src.alert.utils.matches_rule", return_value=True)
-@patch("src.alert.utils.send_email", new_callable=AsyncMock)
+@patch.object(
+    rule_store,
+    "ruleset",
+    RuleSet([AlertRule("ops@example.com", ["status"], {})]),
+)
+@patch("src.alert.utils.notifier")
 @patch("src.alert.utils.logger")
-async def test_process_alert_threshold_key_missing(
-    mock_logger, mock_send_email, mock_matches_rule
-):
-    rule = MagicMock()
-    rule.email = "ops@example.com"
-    rule.thresholds = {"temperature": 75}
-
-    RULES.clear()
-    RULES.append(rule)
+async def test_process_alert_without_thresholds(mock_logger, mock_notifier):
 
     event = AlertEvent(
         event_type="status",
@@ -228,27 +255,17 @@ async def test_process_alert_threshold_key_missing(
 
     await process_alert(event)
 
-    await asyncio.sleep(0)
-
-    mock_send_email.assert_awaited_once()
-    args, kwargs = mock_send_email.call_args
-    assert "no matching thresholds" in args[1]
+    mock_notifier.notify.assert_called_once()
+    assert "no matching thresholds" in mock_notifier.notify.call_args.args[1]
 
 
 @pytest.mark.asyncio
-@patch("src.alert.utils.asyncio.create_task", side_effect=Exception("Task crash"))
-@patch("src.alert.utils.matches_rule", return_value=True)
+@patch("src.alert.utils.notifier")
 @patch("src.alert.utils.logger")
-async def test_process_alert_notification_failure(
-    mock_logger, mock_matches_rule, mock_create_task
-):
+async def test_process_alert_notification_failure(mock_logger, mock_notifier):
+    mock_notifier.notify.side_effect = Exception("Task crash")
     # Setup a rule with a numeric threshold
-    rule = MagicMock()
-    rule.email = "alerts@example.com"
-    rule.thresholds = {"speed": 70.0}
-
-    RULES.clear()
-    RULES.append(rule)
+    rule = AlertRule("alerts@example.com", ["gps"], {"speed": 70.0})
 
     event = AlertEvent(
         event_type="gps",
@@ -258,11 +275,28 @@ async def test_process_alert_notification_failure(
         data={"speed": 80.0},
     )
 
-    await process_alert(event)
-
-    await asyncio.sleep(0)
+    with patch.object(rule_store, "ruleset", RuleSet([rule])):
+        await process_alert(event)
 
-    mock_create_task.assert_called_once()
+    mock_notifier.notify.assert_called_once()
     mock_logger.error.assert_any_call(
         f"Failed to schedule notification for {rule.email}: Task crash"
     )
+
+
+def test_suppression_windows_expire_and_stay_bounded():
+    clock = MagicMock(return_value=100.0)
+    windows = SuppressionWindows(max_size=2, clock=clock)
+    windows.remember("a", 110.0)
+    windows.remember("b", 150.0)
+
+    assert windows.active("a")
+    clock.return_value = 120.0
+    assert not windows.active("a")
+    assert "a" not in windows.until
+
+    windows.remember("a", 130.0)
+    windows.remember("c", 160.0)
+
+    # Nothing had expired, so the oldest key made room
+    assert list(windows.until) == ["a", "c"]
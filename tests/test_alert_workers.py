@@ -0,0 +1,74 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.alert.metrics import metrics
+from src.alert.schemas import AlertEvent
+from src.alert.workers import AlertWorkerPool
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_event(n=0):
+    return AlertEvent(
+        event_type="gps",
+        device_id=f"dev{n}",
+        device_name="Device",
+        timestamp="2024-01-01T00:00:00",
+        data={"speed": 80},
+        id=f"a{n}",
+    )
+
+
+async def test_workers_process_the_queued_alerts():
+    pool = AlertWorkerPool(workers=2, queue_size=10)
+    processed = metrics.timer("alerts.process").count
+    with patch("src.alert.workers.process_alert", new_callable=AsyncMock) as process:
+        await pool.start()
+        assert all(pool.submit(make_event(n)) for n in range(5))
+        await pool.stop(timeout=1)
+
+    assert process.await_count == 5
+    assert metrics.timer("alerts.process").count == processed + 5
+    assert not pool.tasks
+
+
+async def test_full_queue_refuses_alerts():
+    busy = metrics.counter("alerts.busy").value
+    release = asyncio.Event()
+
+    async def slow(_event):
+        await release.wait()
+
+    pool = AlertWorkerPool(workers=1, queue_size=1)
+    with patch("src.alert.workers.process_alert", side_effect=slow):
+        await pool.start()
+        assert pool.submit(make_event(0))
+        await asyncio.sleep(0)  # the worker takes it
+        assert pool.submit(make_event(1))
+        assert pool.saturated
+        assert not pool.submit(make_event(2))
+        release.set()
+        await pool.stop(timeout=1)
+
+    assert metrics.counter("alerts.busy").value == busy + 1
+
+
+async def test_failing_alert_does_not_stop_the_worker():
+    failed = metrics.counter("alerts.failed").value
+    pool = AlertWorkerPool(workers=1, queue_size=10)
+    process = AsyncMock(side_effect=[RuntimeError("boom"), None])
+    with patch("src.alert.workers.process_alert", process):
+        await pool.start()
+        pool.submit(make_event(0))
+        pool.submit(make_event(1))
+        await pool.stop(timeout=1)
+
+    assert process.await_count == 2
+    assert metrics.counter("alerts.failed").value == failed + 1
+
+
+async def test_submit_before_start_fails():
+    with pytest.raises(RuntimeError):
+        AlertWorkerPool(workers=1, queue_size=1).submit(make_event())
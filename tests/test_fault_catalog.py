@@ -0,0 +1,100 @@
+from types import MappingProxyType
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.fastapi.rabbitmq_handlers.fault import catalog as catalog_module
+from src.fastapi.rabbitmq_handlers.fault.catalog import (
+    FaultCatalog,
+    fetch_fault_catalog,
+)
+from src.fastapi.rabbitmq_handlers.fault.exceptions import FaultCatalogException
+from src.fastapi.rabbitmq_handlers.fault.schemas import FaultLabelRecord
+
+
+def api_session(status, body):
+    response = AsyncMock()
+    response.status = status
+    response.json.return_value = body
+    response.text.return_value = str(body)
+    session = MagicMock()
+    session.get.return_value.__aenter__.return_value = response
+    return session
+
+
+@pytest.mark.asyncio
+@patch("src.fastapi.rabbitmq_handlers.fault.catalog.http_client_manager")
+async def test_fetch_fault_catalog_accepts_both_shapes(mock_manager):
+    mock_manager.get_session = AsyncMock(
+        return_value=api_session(200, [{"code": 1, "label": "Overheat"}])
+    )
+    assert await fetch_fault_catalog() == [
+        FaultLabelRecord(fault_code="1", label="Overheat")
+    ]
+
+    mock_manager.get_session = AsyncMock(
+        return_value=api_session(
+            200, {"items": [{"fault_code": "2", "label": "Low oil"}]}
+        )
+    )
+    assert await fetch_fault_catalog() == [
+        FaultLabelRecord(fault_code="2", label="Low oil")
+    ]
+
+
+@pytest.mark.asyncio
+@patch("src.fastapi.rabbitmq_handlers.fault.catalog.http_client_manager")
+async def test_fetch_fault_catalog_error(mock_manager):
+    mock_manager.get_session = AsyncMock(return_value=api_session(404, "missing"))
+
+    with pytest.raises(FaultCatalogException, match="404"):
+        await fetch_fault_catalog()
+
+
+@pytest.mark.asyncio
+@patch(
+    "src.fastapi.rabbitmq_handlers.fault.catalog.fetch_fault_catalog",
+    new_callable=AsyncMock,
+)
+async def test_refresh_swaps_the_whole_catalog(mock_fetch):
+    catalog = FaultCatalog()
+    mock_fetch.return_value = [FaultLabelRecord(fault_code="1", label="Overheat")]
+    await catalog.refresh()
+    before = catalog.labels
+
+    mock_fetch.return_value = [FaultLabelRecord(fault_code="2", label="Low oil")]
+    await catalog.refresh()
+
+    assert dict(before) == {"1": "Overheat"}
+    assert dict(catalog.labels) == {"2": "Low oil"}
+    assert isinstance(catalog.labels, MappingProxyType)
+    assert catalog.get("2") == "Low oil"
+    assert catalog.get("1") is None
+
+
+def test_learn_adds_a_code_without_touching_the_current_version():
+    catalog = FaultCatalog()
+    catalog.labels = MappingProxyType({"1": "Overheat"})
+    before = catalog.labels
+
+    catalog.learn("7", "Brake wear")
+
+    assert dict(before) == {"1": "Overheat"}
+    assert catalog.get("7") == "Brake wear"
+
+
+@pytest.mark.asyncio
+@patch.object(catalog_module.settings, "FAULT_CATALOG_REFRESH_SECONDS", 0)
+@patch(
+    "src.fastapi.rabbitmq_handlers.fault.catalog.fetch_fault_catalog",
+    new_callable=AsyncMock,
+)
+async def test_start_survives_an_unreachable_api(mock_fetch):
+    catalog = FaultCatalog()
+    mock_fetch.side_effect = FaultCatalogException(503)
+
+    await catalog.start()
+
+    assert catalog.labels == {}
+    assert catalog.task is None
+    await catalog.stop()
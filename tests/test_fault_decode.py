@@ -59,3 +59,16 @@ def test_from_base64_invalid(raw_str, exc_msg):
         FaultEventCreate.from_base64(raw_str)
     # The original base64 string should appear in the exception message
     assert raw_str in str(excinfo.value)
+
+
+@pytest.mark.parametrize(
+    "parts",
+    [
+        ["", "1617181920", "10101010", "3", "0", "1"],
+        ["1", "1617181920", "", "3", "0", "1"],
+        ["1", "1617181920", "10101010", "3", "-1", "1"],
+    ],
+)
+def test_from_base64_range_checks(parts):
+    with pytest.raises(FaultDecodeException):
+        FaultEventCreate.from_base64(encode_colon_payload(parts))
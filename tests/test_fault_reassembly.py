@@ -0,0 +1,108 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.fastapi.metrics.registry import metrics
+from src.fastapi.rabbitmq_handlers.fault.reassembly import (
+    LocalFaultSegments,
+    local_fault_segments,
+)
+from src.fastapi.rabbitmq_handlers.fault.utils import (
+    restore_fault_segments,
+    store_fault_segment,
+)
+from src.fastapi.redis.redis import redis_manager
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_segments_complete_in_any_order():
+    store = LocalFaultSegments(ttl=60, clock=Clock())
+
+    assert store.store("k", 2, "00000011", 3) == (1, None)
+    assert store.store("k", 0, "00000001", 3) == (2, None)
+    # a redelivered segment is not counted twice
+    assert store.store("k", 0, "00000001", 3) == (2, None)
+    count, segments = store.store("k", 1, "00000010", 3)
+
+    assert count == 3
+    assert segments == ["00000001", "00000010", "00000011"]
+    assert "k" not in store.partials
+
+
+def test_segment_out_of_range():
+    store = LocalFaultSegments(ttl=60, clock=Clock())
+
+    with pytest.raises(ValueError):
+        store.store("k", 3, "00000001", 3)
+
+
+def test_sweep_expires_stale_partials_and_reports_missing_indexes(caplog):
+    clock = Clock()
+    store = LocalFaultSegments(ttl=60, clock=clock)
+    expired = metrics.counter("fault_reassembly.expired_incomplete").value
+    missing = metrics.counter("fault_reassembly.missing_segments").value
+    store.store("old", 1, "00000001", 4)
+    clock.now = 30
+    store.store("new", 0, "00000001", 2)
+    clock.now = 61
+
+    assert store.sweep() == 1
+
+    assert list(store.partials) == ["new"]
+    assert metrics.counter("fault_reassembly.expired_incomplete").value == (expired + 1)
+    assert metrics.counter("fault_reassembly.missing_segments").value == missing + 3
+    assert "missing [0, 2, 3]" in caplog.text
+
+
+def test_new_segment_extends_the_partial():
+    clock = Clock()
+    store = LocalFaultSegments(ttl=60, clock=clock)
+    store.store("k", 0, "00000001", 3)
+    clock.now = 50
+    store.store("k", 1, "00000001", 3)
+    clock.now = 100
+
+    assert store.sweep() == 0
+
+
+@patch(
+    "src.fastapi.rabbitmq_handlers.fault.reassembly.settings.FAULT_REASSEMBLY_LOCAL",
+    True,
+)
+async def test_store_fault_segment_stays_in_process_while_active():
+    client = MagicMock()
+    timestamp = datetime(2025, 1, 1, 12, 0)
+    await local_fault_segments.start()
+    try:
+        with patch.object(redis_manager, "redis_client", client):
+            assert await store_fault_segment("dev1", "fc1", timestamp, 0, "01", 2) == (
+                1,
+                None,
+            )
+            count, segments = await store_fault_segment(
+                "dev1", "fc1", timestamp, 1, "10", 2
+            )
+            await restore_fault_segments("dev1", "fc1", timestamp, segments)
+    finally:
+        await local_fault_segments.stop()
+
+    assert segments == ["01", "10"]
+    client.register_script.assert_not_called()
+    client.pipeline.assert_not_called()
+    assert not local_fault_segments.active
+    assert not local_fault_segments.partials
+
+
+async def test_start_is_a_no_op_unless_enabled():
+    await local_fault_segments.start()
+
+    assert not local_fault_segments.active
+    assert local_fault_segments.task is None
@@ -2,21 +2,24 @@ from datetime import datetime, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from tenacity import RetryError
 
 from src.fastapi.rabbitmq_handlers.fault.exceptions import (
     FaultDatabaseSaveException,
     FaultLabelAPIException,
+    FaultLabelUnavailableException,
     FaultRateLimitException,
 )
 from src.fastapi.rabbitmq_handlers.fault.models import FaultEventModel
 from src.fastapi.rabbitmq_handlers.fault.schemas import FaultEventResponse
 from src.fastapi.rabbitmq_handlers.fault.utils import (
-    assemble_all_fault_segments,
-    cache_fault_segment,
+    STORE_SEGMENT_SCRIPT,
+    assemble_fault_payload,
     fetch_fault_label,
+    restore_fault_segments,
     save_fault_event,
+    store_fault_segment,
 )
+from src.fastapi.redis.redis import redis_manager
 
 
 @pytest.mark.asyncio
@@ -46,38 +49,31 @@ async def test_fetch_fault_label_unknown_label(mock_get):
 
 @pytest.mark.asyncio
 @patch("aiohttp.ClientSession.get")
-@patch("tenacity.wait_exponential.__call__", return_value=0.01)
-async def test_fetch_fault_label_rate_limit(_, mock_get):
+async def test_fetch_fault_label_rate_limit(mock_get):
     mock_response = AsyncMock()
     mock_response.status = 429
     mock_response.text.return_value = "Too many requests"
     mock_get.return_value.__aenter__.return_value = mock_response
 
-    with pytest.raises(RetryError) as exc_info:
+    with pytest.raises(FaultRateLimitException):
         await fetch_fault_label("12")
 
-    assert isinstance(exc_info.value.last_attempt.exception(), FaultRateLimitException)
-
 
 @pytest.mark.asyncio
 @patch("aiohttp.ClientSession.get")
-@patch("tenacity.wait_exponential.__call__", return_value=0.01)
-async def test_fetch_fault_label_server_error(_, mock_get):
+async def test_fetch_fault_label_server_error(mock_get):
     mock_response = AsyncMock()
     mock_response.status = 500
     mock_response.text.return_value = "Internal Server Error"
     mock_get.return_value.__aenter__.return_value = mock_response
 
-    with pytest.raises(RetryError) as exc_info:
+    with pytest.raises(FaultLabelUnavailableException):
         await fetch_fault_label("12")
 
-    assert isinstance(exc_info.value.last_attempt.exception(), FaultLabelAPIException)
-
 
 @pytest.mark.asyncio
 @patch("aiohttp.ClientSession.get")
-@patch("tenacity.wait_exponential.__call__", return_value=0.01)
-async def test_fetch_fault_label_unexpected_status(_, mock_get):
+async def test_fetch_fault_label_unexpected_status(mock_get):
     mock_response = AsyncMock()
     mock_response.status = 404
     mock_response.text.return_value = "Not Found"
@@ -85,17 +81,16 @@ async def test_fetch_fault_label_unexpected_status(_, mock_get):
     # Setup async context manager mocks
     mock_get.return_value.__aenter__.return_value = mock_response
 
-    with pytest.raises(RetryError) as exc_info:
+    with pytest.raises(FaultLabelAPIException) as exc_info:
         await fetch_fault_label("12")
 
-    # Assert the final raised exception is the expected one
-    assert isinstance(exc_info.value.last_attempt.exception(), FaultLabelAPIException)
+    # Client errors are not worth retrying
+    assert not isinstance(exc_info.value, FaultLabelUnavailableException)
 
 
 @pytest.mark.asyncio
 @patch("aiohttp.ClientSession.get")
-@patch("tenacity.wait_exponential.__call__", return_value=0.01)
-async def test_fetch_fault_label_list_with_valid_label(_, mock_get):
+async def test_fetch_fault_label_list_with_valid_label(mock_get):
     mock_response = AsyncMock()
     mock_response.status = 200
     mock_response.json.return_value = [{"label": "Overheat"}]
@@ -108,8 +103,7 @@ async def test_fetch_fault_label_list_with_valid_label(_, mock_get):
 
 @pytest.mark.asyncio
 @patch("aiohttp.ClientSession.get")
-@patch("tenacity.wait_exponential.__call__", return_value=0.01)
-async def test_fetch_fault_label_unexpected_response_type(_, mock_get):
+async def test_fetch_fault_label_unexpected_response_type(mock_get):
     mock_response = AsyncMock()
     mock_response.status = 200
     mock_response.json.return_value = "unexpected string"
@@ -177,117 +171,123 @@ async def test_save_fault_event_failure(mock_fault_model):
     assert "fc1" in str(exc_info.value)
 
 
+def segments_script(reply):
+    """A Redis client whose segment script answers with `reply`."""
+    script = AsyncMock(return_value=reply)
+    client = MagicMock()
+    client.register_script.return_value = script
+    return client, script
+
+
 @pytest.mark.asyncio
-@patch("src.fastapi.rabbitmq_handlers.fault.utils.redis_manager.redis_client")
-async def test_cache_fault_segment_success(mock_redis_client):
-    # Arrange
-    mock_redis_client.hset = AsyncMock()
-    mock_redis_client.expire = AsyncMock()
-    mock_redis_client.hlen = AsyncMock(return_value=5)
-
-    device_id = "dev1"
-    fault_code = "fc1"
+async def test_store_fault_segment_pending():
+    client, script = segments_script([1])
     timestamp = datetime(2025, 1, 1, 12, 0)
-    sequence = 2
-    fault_bits = "010101"
-
-    # Act
-    count = await cache_fault_segment(
-        device_id=device_id,
-        fault_code=fault_code,
-        timestamp=timestamp,
-        sequence=sequence,
-        fault_bits=fault_bits,
-        expire_secs=1800,
-    )
 
-    # Assert
-    key = f"fault_parts:{device_id}:{fault_code}:{timestamp}"
-    mock_redis_client.hset.assert_awaited_once_with(key, sequence, fault_bits)
-    mock_redis_client.expire.assert_awaited_once_with(key, 1800)
-    mock_redis_client.hlen.assert_awaited_once_with(key)
-    assert count == 5
+    with patch.object(redis_manager, "redis_client", client):
+        count, segments = await store_fault_segment(
+            device_id="dev1",
+            fault_code="fc1",
+            timestamp=timestamp,
+            sequence=2,
+            fault_bits="010101",
+            total_number=3,
+            expire_secs=1800,
+        )
+
+    assert (count, segments) == (1, None)
+    client.register_script.assert_called_once_with(STORE_SEGMENT_SCRIPT)
+    script.assert_awaited_once_with(
+        keys=[f"fault_parts:dev1:fc1:{timestamp}"], args=[2, "010101", 3, 1800]
+    )
 
 
 @pytest.mark.asyncio
-@patch("src.fastapi.rabbitmq_handlers.fault.utils.redis_manager.redis_client")
-async def test_cache_fault_segment_failure(mock_redis_client):
-    # Arrange
-    mock_redis_client.hset = AsyncMock(side_effect=RuntimeError("Redis down"))
-    mock_redis_client.expire = AsyncMock()
-    mock_redis_client.hlen = AsyncMock()
-
-    with pytest.raises(RuntimeError, match="Redis down"):
-        await cache_fault_segment(
-            device_id="dev1",
-            fault_code="fc1",
-            timestamp=datetime.now(),
-            sequence=1,
-            fault_bits="1111",
+async def test_store_fault_segment_returns_the_completed_set():
+    client, _ = segments_script([2, "01010101", "10101010"])
+
+    with patch.object(redis_manager, "redis_client", client):
+        count, segments = await store_fault_segment(
+            "dev1", "fc1", datetime.now(), 1, "10101010", 2
         )
 
+    assert count == 2
+    assert segments == ["01010101", "10101010"]
+
 
 @pytest.mark.asyncio
-@patch("src.fastapi.rabbitmq_handlers.fault.utils.redis_manager.redis_client")
-async def test_assemble_all_fault_segments_success(mock_redis_client):
-    # Arrange
-    mock_redis_client.hgetall = AsyncMock(
-        return_value={b"0": b"01010101", b"1": b"10101010"}
+async def test_store_fault_segment_script_completes_the_set_once(fake_redis):
+    timestamp = datetime(2025, 1, 1, 12, 0)
+    key = f"fault_parts:dev1:fc1:{timestamp}"
+
+    first = await store_fault_segment("dev1", "fc1", timestamp, 2, "11", 3, 1800)
+    again = await store_fault_segment("dev1", "fc1", timestamp, 2, "11", 3, 1800)
+    second = await store_fault_segment("dev1", "fc1", timestamp, 0, "01010101", 3)
+
+    assert (first, again, second) == ((1, None), (1, None), (2, None))
+    assert await fake_redis.hgetall(key) == {"2": "11", "0": "01010101"}
+    assert 0 < await fake_redis.ttl(key) <= 3600
+
+    count, segments = await store_fault_segment(
+        "dev1", "fc1", timestamp, 1, "10101010", 3
     )
-    mock_redis_client.delete = AsyncMock()
 
-    device_id = "dev123"
-    fault_code = "FC01"
+    assert count == 3
+    assert segments == ["01010101", "10101010", "11"]
+    assert not await fake_redis.exists(key)
+
+
+@pytest.mark.asyncio
+async def test_store_fault_segment_script_reports_a_missing_index(fake_redis):
     timestamp = datetime(2025, 1, 1, 12, 0)
-    total_number = 2
-
-    # Act
-    bitstring, payload = await assemble_all_fault_segments(
-        device_id=device_id,
-        fault_code=fault_code,
-        timestamp=timestamp,
-        total_number=total_number,
+
+    await store_fault_segment("dev1", "fc1", timestamp, 0, "01010101", 2)
+    # An index past the total fills the count but not the set
+    count, segments = await store_fault_segment(
+        "dev1", "fc1", timestamp, 5, "11111111", 2
     )
 
-    # Assert
-    assert bitstring == "0101010110101010"
-    expected_bytes = bytes([int("01010101", 2), int("10101010", 2)])
-    assert payload == expected_bytes
-    mock_redis_client.hgetall.assert_awaited_once()
-    mock_redis_client.delete.assert_awaited_once()
+    assert count == 2
+    assert segments == ["01010101", None]
 
 
 @pytest.mark.asyncio
-@patch("src.fastapi.rabbitmq_handlers.fault.utils.redis_manager.redis_client")
-async def test_assemble_all_fault_segments_incomplete_data(mock_redis_client):
-    # Simulate missing segment "1"
-    mock_redis_client.hgetall = AsyncMock(return_value={b"0": b"01010101"})
-    mock_redis_client.delete = AsyncMock()
-
-    with pytest.raises(KeyError):
-        await assemble_all_fault_segments(
-            device_id="dev1",
-            fault_code="FC99",
-            timestamp=datetime.now(),
-            total_number=2,
-        )
+async def test_store_fault_segment_failure():
+    client = MagicMock()
+    client.register_script.return_value = AsyncMock(
+        side_effect=RuntimeError("Redis down")
+    )
 
-    mock_redis_client.delete.assert_awaited_once()
+    with patch.object(redis_manager, "redis_client", client):
+        with pytest.raises(RuntimeError, match="Redis down"):
+            await store_fault_segment("dev1", "fc1", datetime.now(), 1, "1111", 2)
 
 
 @pytest.mark.asyncio
-@patch("src.fastapi.rabbitmq_handlers.fault.utils.redis_manager.redis_client")
-async def test_assemble_all_fault_segments_redis_failure(mock_redis_client):
-    # Simulate Redis failure
-    mock_redis_client.hgetall = AsyncMock(side_effect=RuntimeError("Redis unreachable"))
-    mock_redis_client.delete = AsyncMock()
-
-    with pytest.raises(RuntimeError, match="Redis unreachable"):
-        await assemble_all_fault_segments(
-            device_id="dev5", fault_code="fc5", timestamp=datetime.now(), total_number=1
-        )
+async def test_restore_fault_segments():
+    client = MagicMock()
+    pipe = client.pipeline.return_value
+    pipe.execute = AsyncMock()
+    timestamp = datetime(2025, 1, 1, 12, 0)
+
+    with patch.object(redis_manager, "redis_client", client):
+        await restore_fault_segments("dev1", "fc1", timestamp, ["01", None, "11"])
+
+    key = f"fault_parts:dev1:fc1:{timestamp}"
+    pipe.hset.assert_called_once_with(key, mapping={"0": "01", "2": "11"})
+    pipe.expire.assert_called_once_with(key, 3600)
+    pipe.execute.assert_awaited_once()
+
+
+def test_assemble_fault_payload():
+    payload = assemble_fault_payload(["01010101", "10101010", "11"])
+
+    assert payload == bytes([0b01010101, 0b10101010, 0b11])
+
 
-    mock_redis_client.delete.assert_awaited_once()
+def test_assemble_fault_payload_missing_segment():
+    with pytest.raises(ValueError, match=r"\[1\]"):
+        assemble_fault_payload(["01010101", None])
 
 
 def test_fault_event_model_repr():
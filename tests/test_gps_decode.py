@@ -1,8 +1,10 @@
 import base64
 from datetime import datetime
+from typing import Any, Dict
 
 import pytest
 
+from src.fastapi.rabbitmq_handlers.gps.codec import GPS_FRAME_V2, encode_gps_frame
 from src.fastapi.rabbitmq_handlers.gps.schemas import GPSDecodeException, GPSEventCreate
 
 
@@ -87,3 +89,82 @@ def test_from_base64_strips_quotes():
     assert event.latitude == float(parts[5])
     assert event.longitude == float(parts[6])
     assert event.fuel_gauge == float(parts[7])
+
+
+def encode_frame(**overrides) -> str:
+    fields: Dict[str, Any] = {
+        "device_id": "dev123",
+        "timestamp": 1617181920.5,
+        "speed": 55.5,
+        "odometer": 1000.25,
+        "power_on": True,
+        "latitude": 16.047079,
+        "longitude": 108.20623,
+        "fuel_gauge": 42.0,
+    }
+    fields.update(overrides)
+    return base64.b64encode(encode_gps_frame(**fields)).decode()
+
+
+def test_from_base64_binary_frame():
+    event = GPSEventCreate.from_base64(encode_frame())
+
+    assert event.device_id == "dev123"
+    assert event.timestamp == datetime.fromtimestamp(1617181920.5)
+    assert event.speed == 55.5
+    assert event.odometer == 1000.25
+    assert event.power_on is True
+    assert event.latitude == 16.047079
+    assert event.longitude == 108.20623
+    assert event.fuel_gauge == 42.0
+
+
+def test_binary_frame_is_smaller_than_text():
+    text = encode_colon_payload(
+        ["dev123", "1617181920.5", "55.5", "1000.25", "True"]
+        + ["16.047079", "108.20623", "42.0"]
+    )
+    assert len(encode_frame()) < len(text)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        encode_frame(speed=None),
+        encode_frame(odometer=None),
+        encode_frame(speed=-1.0),
+        base64.b64encode(base64.b64decode(encode_frame())[:-2]).decode(),
+        base64.b64encode(bytes([GPS_FRAME_V2, 0, 0])).decode(),
+    ],
+)
+def test_from_base64_invalid_binary_frame(payload):
+    with pytest.raises(GPSDecodeException):
+        GPSEventCreate.from_base64(payload)
+
+
+def test_from_base64_rejects_negative_speed():
+    b64 = encode_colon_payload(
+        ["dev", "1617181920.0", "-5", "1000", "True", "0", "0", "0"]
+    )
+
+    with pytest.raises(GPSDecodeException) as excinfo:
+        GPSEventCreate.from_base64(b64)
+
+    assert "greater than or equal to 0" in str(excinfo.value)
+
+
+def test_decode_many_keeps_errors_in_place():
+    payloads = [
+        encode_colon_payload(["a", "1617181920.0", "10", "1", "True", "1", "2", "3"]),
+        "garbage!",
+        encode_frame(device_id="b", speed=20.0),
+        encode_frame(device_id="c", odometer=-1.0),
+    ]
+
+    events = GPSEventCreate.decode_many(payloads)
+
+    assert events[0] == GPSEventCreate.from_base64(payloads[0])
+    assert isinstance(events[1], GPSDecodeException)
+    assert isinstance(events[2], GPSEventCreate)
+    assert (events[2].device_id, events[2].speed) == ("b", 20.0)
+    assert isinstance(events[3], GPSDecodeException)
@@ -0,0 +1,38 @@
+import asyncio
+
+from src.fastapi.rabbitmq_handlers.batching import collect_batch
+
+
+async def test_collect_batch_stops_at_max_size():
+    buffer: asyncio.Queue = asyncio.Queue()
+    for i in range(5):
+        buffer.put_nowait(i)
+
+    batch = await collect_batch(buffer, max_size=3, linger=1)
+
+    assert batch == [0, 1, 2]
+    assert buffer.qsize() == 2
+
+
+async def test_collect_batch_stops_after_linger():
+    buffer: asyncio.Queue = asyncio.Queue()
+    buffer.put_nowait("first")
+
+    batch = await collect_batch(buffer, max_size=10, linger=0.01)
+
+    assert batch == ["first"]
+
+
+async def test_collect_batch_picks_up_late_arrivals():
+    buffer: asyncio.Queue = asyncio.Queue()
+    buffer.put_nowait("first")
+
+    async def late_put():
+        await asyncio.sleep(0.01)
+        buffer.put_nowait("second")
+
+    task = asyncio.create_task(late_put())
+    batch = await collect_batch(buffer, max_size=2, linger=1)
+    await task
+
+    assert batch == ["first", "second"]
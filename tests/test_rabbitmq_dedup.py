@@ -0,0 +1,132 @@
+import pytest
+
+from src.fastapi.metrics.registry import metrics
+from src.fastapi.rabbitmq_handlers.dedup import BloomFilter, DedupCache, DedupVerdict
+from tests.mocks.config_mocks import HEADERS
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def counter_values():
+    return {
+        name: metrics.counter(f"dedup.{name}").value
+        for name in ("hit", "miss", "false_positive", "redis_hit")
+    }
+
+
+def make_cache(clock, **kwargs):
+    options = dict(
+        window_seconds=60, lru_size=100, bloom_capacity=1000, bloom_error_rate=0.01
+    )
+    options.update(kwargs)
+    return DedupCache(clock=clock, **options)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"gps_event:dev{i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other:{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_check_classifies_keys():
+    clock = FakeClock()
+    cache = make_cache(clock, exact=False)
+    before = counter_values()
+
+    # cold cache: new keys are confirmed in Redis
+    assert cache.check("a") is DedupVerdict.UNCONFIRMED
+    assert cache.check("a") is DedupVerdict.DUPLICATE
+    clock.now = 61.0
+    assert cache.check("b") is DedupVerdict.NEW
+
+    after = counter_values()
+    assert after["hit"] - before["hit"] == 1
+    assert after["miss"] - before["miss"] == 2
+
+
+def test_exact_mode_is_the_default_and_always_asks_redis():
+    clock = FakeClock()
+    cache = make_cache(clock)
+    clock.now = 61.0
+
+    assert cache.check("a") is DedupVerdict.UNCONFIRMED
+
+
+def test_duplicate_across_a_capacity_rotation_is_confirmed_in_redis():
+    clock = FakeClock()
+    cache = make_cache(clock, exact=False, lru_size=1, bloom_capacity=2)
+    overflows = metrics.counter("dedup.bloom_overflow").value
+    clock.now = 61.0
+    assert cache.check("a") is DedupVerdict.NEW
+    assert cache.check("b") is DedupVerdict.NEW
+    for key in ("c", "d", "e"):
+        cache.check(key)
+
+    # Two rotations dropped the generation holding "a", well inside the window
+    clock.now += 1
+    assert cache.check("a") is DedupVerdict.UNCONFIRMED
+    assert metrics.counter("dedup.bloom_overflow").value == overflows + 2
+
+    # Once a full window passed, misses are trusted again
+    clock.now += 61
+    assert cache.check("f") is DedupVerdict.NEW
+
+
+def test_evicted_key_is_a_possible_hit():
+    clock = FakeClock(now=61.0)
+    cache = make_cache(clock, lru_size=1)
+    before = counter_values()
+    cache.check("a")
+    cache.check("b")
+
+    assert cache.check("a") is DedupVerdict.POSSIBLE
+    cache.record_redis_reply(DedupVerdict.POSSIBLE, is_new=True)
+    cache.record_redis_reply(DedupVerdict.POSSIBLE, is_new=False)
+
+    after = counter_values()
+    assert after["false_positive"] - before["false_positive"] == 1
+    assert after["redis_hit"] - before["redis_hit"] == 1
+
+
+def test_forget_turns_a_hit_into_a_possible_hit():
+    clock = FakeClock(now=61.0)
+    cache = make_cache(clock, exact=False)
+    cache.check("a")
+
+    cache.forget("a")
+
+    assert cache.check("a") is DedupVerdict.POSSIBLE
+
+
+def test_generations_expire():
+    clock = FakeClock(now=61.0)
+    cache = make_cache(clock, exact=False)
+    cache.check("a")
+
+    clock.now += 61
+    cache.check("b")
+    clock.now += 61
+    cache.check("c")
+
+    assert cache.check("a") is DedupVerdict.NEW
+
+
+@pytest.mark.asyncio
+async def test_metrics_route(async_client):
+    metrics.counter("dedup.hit")
+
+    response = await async_client.get("/api/metrics", headers=HEADERS)
+
+    assert response.status_code == 200
+    assert "dedup.hit" in response.json()["counters"]
@@ -1,9 +1,11 @@
 import base64
 from datetime import datetime
+from types import MappingProxyType
 from unittest.mock import AsyncMock, patch
 
 import pytest
 
+from src.fastapi.rabbitmq_handlers.fault.catalog import fault_catalog
 from src.fastapi.rabbitmq_handlers.fault.exceptions import (
     FaultCacheSegmentException,
     FaultConstructPayloadException,
@@ -11,10 +13,15 @@ from src.fastapi.rabbitmq_handlers.fault.exceptions import (
     FaultDecodeException,
     FaultDeviceAPIException,
     FaultLabelAPIException,
+    FaultRateLimitException,
     FaultSendAlertException,
 )
 from src.fastapi.rabbitmq_handlers.fault.handler import handle_fault_event
-from src.fastapi.rabbitmq_handlers.gps.exceptions import GPSDeviceAPIException
+from src.fastapi.rabbitmq_handlers.gps.device_filter import unknown_devices
+from src.fastapi.rabbitmq_handlers.gps.exceptions import (
+    GPSDeviceAPIException,
+    GPSDeviceNotFoundException,
+)
 
 
 @pytest.mark.asyncio
@@ -64,6 +71,24 @@ async def test_device_name_not_found(mock_from_base64, mock_fetch_device_name):
     assert "Failed to fetch device name" in result["error"]
 
 
+@pytest.mark.asyncio
+@patch(
+    "src.fastapi.rabbitmq_handlers.fault.handler.fetch_device_name",
+    new_callable=AsyncMock,
+)
+@patch("src.fastapi.rabbitmq_handlers.fault.handler.FaultEventCreate.from_base64")
+async def test_unknown_device_is_filtered(mock_from_base64, mock_fetch_device_name):
+    mock_from_base64.return_value = AsyncMock(device_id="dev404")
+    mock_fetch_device_name.side_effect = GPSDeviceNotFoundException("dev404")
+
+    first = await handle_fault_event(db=AsyncMock(), payload="foo")
+    second = await handle_fault_event(db=AsyncMock(), payload="foo")
+
+    assert first == second == {"error": str(FaultDeviceAPIException("dev404"))}
+    mock_fetch_device_name.assert_awaited_once()
+    assert "dev404" in unknown_devices.devices
+
+
 @pytest.mark.asyncio
 @patch(
     "src.fastapi.rabbitmq_handlers.fault.handler.fetch_device_name",
@@ -96,7 +121,7 @@ async def test_device_name_empty(mock_from_base64, mock_fetch_device_name):
 
 @pytest.mark.asyncio
 @patch(
-    "src.fastapi.rabbitmq_handlers.fault.handler.cache_fault_segment",
+    "src.fastapi.rabbitmq_handlers.fault.handler.store_fault_segment",
     new_callable=AsyncMock,
 )
 @patch(
@@ -105,7 +130,7 @@ async def test_device_name_empty(mock_from_base64, mock_fetch_device_name):
 )
 @patch("src.fastapi.rabbitmq_handlers.fault.handler.FaultEventCreate.from_base64")
 async def test_cache_fault_segment_error(
-    mock_from_base64, mock_fetch_device_name, mock_cache_fault_segment
+    mock_from_base64, mock_fetch_device_name, mock_store_fault_segment
 ):
     dummy = AsyncMock(
         device_id="dev",
@@ -117,7 +142,7 @@ async def test_cache_fault_segment_error(
     )
     mock_from_base64.return_value = dummy
     mock_fetch_device_name.return_value = "name"
-    mock_cache_fault_segment.side_effect = FaultCacheSegmentException("dev", "fc")
+    mock_store_fault_segment.side_effect = FaultCacheSegmentException("dev", "fc")
 
     # Execute
     result = await handle_fault_event(db=AsyncMock(), payload="foo")
@@ -130,7 +155,7 @@ async def test_cache_fault_segment_error(
 
 @pytest.mark.asyncio
 @patch(
-    "src.fastapi.rabbitmq_handlers.fault.handler.cache_fault_segment",
+    "src.fastapi.rabbitmq_handlers.fault.handler.store_fault_segment",
     new_callable=AsyncMock,
 )
 @patch(
@@ -139,7 +164,7 @@ async def test_cache_fault_segment_error(
 )
 @patch("src.fastapi.rabbitmq_handlers.fault.handler.FaultEventCreate.from_base64")
 async def test_pending_segments(
-    mock_from_base64, mock_fetch_device_name, mock_cache_fault_segment
+    mock_from_base64, mock_fetch_device_name, mock_store_fault_segment
 ):
     # Prepare a dummy FaultEventCreate instance
     dummy = AsyncMock(
@@ -152,7 +177,7 @@ async def test_pending_segments(
     )
     mock_from_base64.return_value = dummy
     mock_fetch_device_name.return_value = "name"
-    mock_cache_fault_segment.return_value = 1
+    mock_store_fault_segment.return_value = (1, None)
 
     # Call handler
     result = await handle_fault_event(db=AsyncMock(), payload="foo")
@@ -165,11 +190,14 @@ async def test_pending_segments(
 
 @pytest.mark.asyncio
 @patch(
-    "src.fastapi.rabbitmq_handlers.fault.handler.assemble_all_fault_segments",
+    "src.fastapi.rabbitmq_handlers.fault.handler.fetch_fault_label",
     new_callable=AsyncMock,
 )
 @patch(
-    "src.fastapi.rabbitmq_handlers.fault.handler.cache_fault_segment",
+    "src.fastapi.rabbitmq_handlers.fault.handler.assemble_fault_payload",
+)
+@patch(
+    "src.fastapi.rabbitmq_handlers.fault.handler.store_fault_segment",
     new_callable=AsyncMock,
 )
 @patch(
@@ -180,8 +208,9 @@ async def test_pending_segments(
 async def test_construct_fault_payload_error(
     mock_from_base64,
     mock_fetch_device_name,
-    mock_cache_fault_segment,
-    mock_assemble_all,
+    mock_store_fault_segment,
+    mock_assemble_fault_payload,
+    mock_fetch_fault_label,
 ):
     # Dummy fault event
     dummy = AsyncMock(
@@ -194,8 +223,11 @@ async def test_construct_fault_payload_error(
     )
     mock_from_base64.return_value = dummy
     mock_fetch_device_name.return_value = "name"
-    mock_cache_fault_segment.return_value = 1  # all parts received
-    mock_assemble_all.side_effect = FaultConstructPayloadException("dev", "fc")
+    mock_store_fault_segment.return_value = (1, ["fb"])  # all parts received
+    mock_assemble_fault_payload.side_effect = FaultConstructPayloadException(
+        "dev", "fc"
+    )
+    mock_fetch_fault_label.return_value = "label"
 
     # Execute
     result = await handle_fault_event(db=AsyncMock(), payload="foo")
@@ -212,11 +244,10 @@ async def test_construct_fault_payload_error(
     new_callable=AsyncMock,
 )
 @patch(
-    "src.fastapi.rabbitmq_handlers.fault.handler.assemble_all_fault_segments",
-    new_callable=AsyncMock,
+    "src.fastapi.rabbitmq_handlers.fault.handler.assemble_fault_payload",
 )
 @patch(
-    "src.fastapi.rabbitmq_handlers.fault.handler.cache_fault_segment",
+    "src.fastapi.rabbitmq_handlers.fault.handler.store_fault_segment",
     new_callable=AsyncMock,
 )
 @patch(
@@ -227,8 +258,8 @@ async def test_construct_fault_payload_error(
 async def test_fetch_fault_label_error(
     mock_from_base64,
     mock_fetch_device_name,
-    mock_cache_fault_segment,
-    mock_assemble_all_fault_segments,
+    mock_store_fault_segment,
+    mock_assemble_fault_payload,
     mock_fetch_fault_label,
 ):
     # Setup dummy FaultEventCreate object
@@ -242,8 +273,8 @@ async def test_fetch_fault_label_error(
     )
     mock_from_base64.return_value = dummy
     mock_fetch_device_name.return_value = "name"
-    mock_cache_fault_segment.return_value = 1
-    mock_assemble_all_fault_segments.return_value = ("PL", b"bytes")
+    mock_store_fault_segment.return_value = (1, ["fb"])
+    mock_assemble_fault_payload.return_value = b"bytes"
     mock_fetch_fault_label.side_effect = FaultLabelAPIException("fc")
 
     # Call handler
@@ -264,11 +295,10 @@ async def test_fetch_fault_label_error(
     new_callable=AsyncMock,
 )
 @patch(
-    "src.fastapi.rabbitmq_handlers.fault.handler.assemble_all_fault_segments",
-    new_callable=AsyncMock,
+    "src.fastapi.rabbitmq_handlers.fault.handler.assemble_fault_payload",
 )
 @patch(
-    "src.fastapi.rabbitmq_handlers.fault.handler.cache_fault_segment",
+    "src.fastapi.rabbitmq_handlers.fault.handler.store_fault_segment",
     new_callable=AsyncMock,
 )
 @patch(
@@ -279,8 +309,8 @@ async def test_fetch_fault_label_error(
 async def test_save_fault_error(
     mock_from_base64,
     mock_fetch_device_name,
-    mock_cache_fault_segment,
-    mock_assemble_all_fault_segments,
+    mock_store_fault_segment,
+    mock_assemble_fault_payload,
     mock_fetch_fault_label,
     mock_save_fault_event,
 ):
@@ -295,8 +325,8 @@ async def test_save_fault_error(
     )
     mock_from_base64.return_value = dummy
     mock_fetch_device_name.return_value = "name"
-    mock_cache_fault_segment.return_value = 1
-    mock_assemble_all_fault_segments.return_value = ("PL", b"bytes")
+    mock_store_fault_segment.return_value = (1, ["fb"])
+    mock_assemble_fault_payload.return_value = b"bytes"
     mock_fetch_fault_label.return_value = "LBL"
     mock_save_fault_event.side_effect = FaultDatabaseSaveException("dev", "fc")
 
@@ -312,7 +342,7 @@ async def test_save_fault_error(
 
 @pytest.mark.asyncio
 @patch(
-    "src.fastapi.rabbitmq_handlers.fault.handler.send_alert_event",
+    "src.fastapi.rabbitmq_handlers.fault.handler.alert_outbox.publish",
     new_callable=AsyncMock,
 )
 @patch(
@@ -324,11 +354,10 @@ async def test_save_fault_error(
     new_callable=AsyncMock,
 )
 @patch(
-    "src.fastapi.rabbitmq_handlers.fault.handler.assemble_all_fault_segments",
-    new_callable=AsyncMock,
+    "src.fastapi.rabbitmq_handlers.fault.handler.assemble_fault_payload",
 )
 @patch(
-    "src.fastapi.rabbitmq_handlers.fault.handler.cache_fault_segment",
+    "src.fastapi.rabbitmq_handlers.fault.handler.store_fault_segment",
     new_callable=AsyncMock,
 )
 @patch(
@@ -339,11 +368,11 @@ async def test_save_fault_error(
 async def test_send_alert_error(
     mock_from_base64,
     mock_fetch_device_name,
-    mock_cache_fault_segment,
-    mock_assemble_all_fault_segments,
+    mock_store_fault_segment,
+    mock_assemble_fault_payload,
     mock_fetch_fault_label,
     mock_save_fault_event,
-    mock_send_alert_event,
+    mock_publish_alert,
 ):
     # Dummy event
     dummy = AsyncMock(
@@ -356,11 +385,11 @@ async def test_send_alert_error(
     )
     mock_from_base64.return_value = dummy
     mock_fetch_device_name.return_value = "name"
-    mock_cache_fault_segment.return_value = 1
-    mock_assemble_all_fault_segments.return_value = ("PL", b"bytes")
+    mock_store_fault_segment.return_value = (1, ["fb"])
+    mock_assemble_fault_payload.return_value = b"bytes"
     mock_fetch_fault_label.return_value = "LBL"
     mock_save_fault_event.return_value = None
-    mock_send_alert_event.side_effect = FaultSendAlertException("fc")
+    mock_publish_alert.side_effect = FaultSendAlertException("fc")
 
     # Run handler
     result = await handle_fault_event(db=AsyncMock(), payload="foo")
@@ -370,12 +399,12 @@ async def test_send_alert_error(
     assert "fc" in result["error"]
 
     # Ensure alert was attempted
-    mock_send_alert_event.assert_awaited_once()
+    mock_publish_alert.assert_awaited_once()
 
 
 @pytest.mark.asyncio
 @patch(
-    "src.fastapi.rabbitmq_handlers.fault.handler.send_alert_event",
+    "src.fastapi.rabbitmq_handlers.fault.handler.alert_outbox.publish",
     new_callable=AsyncMock,
 )
 @patch(
@@ -387,11 +416,10 @@ async def test_send_alert_error(
     new_callable=AsyncMock,
 )
 @patch(
-    "src.fastapi.rabbitmq_handlers.fault.handler.assemble_all_fault_segments",
-    new_callable=AsyncMock,
+    "src.fastapi.rabbitmq_handlers.fault.handler.assemble_fault_payload",
 )
 @patch(
-    "src.fastapi.rabbitmq_handlers.fault.handler.cache_fault_segment",
+    "src.fastapi.rabbitmq_handlers.fault.handler.store_fault_segment",
     new_callable=AsyncMock,
 )
 @patch(
@@ -402,11 +430,11 @@ async def test_send_alert_error(
 async def test_full_success(
     mock_from_base64,
     mock_fetch_device_name,
-    mock_cache_fault_segment,
-    mock_assemble_all_fault_segments,
+    mock_store_fault_segment,
+    mock_assemble_fault_payload,
     mock_fetch_fault_label,
     mock_save_fault_event,
-    mock_send_alert_event,
+    mock_publish_alert,
 ):
     # Setup dummy event
     dummy = AsyncMock(
@@ -419,8 +447,8 @@ async def test_full_success(
     )
     mock_from_base64.return_value = dummy
     mock_fetch_device_name.return_value = "device-name"
-    mock_cache_fault_segment.return_value = 1
-    mock_assemble_all_fault_segments.return_value = ("RAW_PAYLOAD", b"\x00\x01")
+    mock_store_fault_segment.return_value = (1, ["fb"])
+    mock_assemble_fault_payload.return_value = b"\x00\x01"
     mock_fetch_fault_label.return_value = "LABEL_X"
 
     # Run handler
@@ -436,4 +464,100 @@ async def test_full_success(
 
     # Confirm DB save and WebSocket alert were both invoked
     mock_save_fault_event.assert_awaited_once()
-    mock_send_alert_event.assert_awaited_once()
+    # The row keeps the bit-string joined from the segments
+    assert mock_save_fault_event.call_args.args[1].fault_payload == "fb"
+    mock_publish_alert.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch(
+    "src.fastapi.rabbitmq_handlers.fault.handler.restore_fault_segments",
+    new_callable=AsyncMock,
+)
+@patch(
+    "src.fastapi.rabbitmq_handlers.fault.handler.fetch_fault_label",
+    new_callable=AsyncMock,
+)
+@patch(
+    "src.fastapi.rabbitmq_handlers.fault.handler.store_fault_segment",
+    new_callable=AsyncMock,
+)
+@patch(
+    "src.fastapi.rabbitmq_handlers.fault.handler.fetch_device_name",
+    new_callable=AsyncMock,
+)
+@patch("src.fastapi.rabbitmq_handlers.fault.handler.FaultEventCreate.from_base64")
+async def test_transient_label_error_restores_segments(
+    mock_from_base64,
+    mock_fetch_device_name,
+    mock_store_fault_segment,
+    mock_fetch_fault_label,
+    mock_restore_fault_segments,
+):
+    timestamp = datetime(2023, 1, 1, 12, 0)
+    mock_from_base64.return_value = AsyncMock(
+        device_id="dev",
+        timestamp=timestamp,
+        fault_bits="fb",
+        fault_code="fc",
+        sequence=1,
+        total_number=2,
+    )
+    mock_fetch_device_name.return_value = "name"
+    mock_store_fault_segment.return_value = (2, ["00000001", "fb"])
+    mock_fetch_fault_label.side_effect = FaultRateLimitException("fc")
+
+    with pytest.raises(FaultRateLimitException):
+        await handle_fault_event(db=AsyncMock(), payload="foo")
+
+    mock_restore_fault_segments.assert_awaited_once_with(
+        "dev", "fc", timestamp, ["00000001", "fb"]
+    )
+
+
+@pytest.mark.asyncio
+@patch(
+    "src.fastapi.rabbitmq_handlers.fault.handler.alert_outbox.publish",
+    new_callable=AsyncMock,
+)
+@patch(
+    "src.fastapi.rabbitmq_handlers.fault.handler.save_fault_event",
+    new_callable=AsyncMock,
+)
+@patch(
+    "src.fastapi.rabbitmq_handlers.fault.handler.fetch_fault_label",
+    new_callable=AsyncMock,
+)
+@patch(
+    "src.fastapi.rabbitmq_handlers.fault.handler.store_fault_segment",
+    new_callable=AsyncMock,
+)
+@patch(
+    "src.fastapi.rabbitmq_handlers.fault.handler.fetch_device_name",
+    new_callable=AsyncMock,
+)
+@patch("src.fastapi.rabbitmq_handlers.fault.handler.FaultEventCreate.from_base64")
+async def test_label_from_the_catalog(
+    mock_from_base64,
+    mock_fetch_device_name,
+    mock_store_fault_segment,
+    mock_fetch_fault_label,
+    mock_save_fault_event,
+    mock_publish_alert,
+):
+    mock_from_base64.return_value = AsyncMock(
+        device_id="dev",
+        timestamp=datetime(2023, 1, 1, 12, 0),
+        fault_bits="00000001",
+        fault_code="12",
+        sequence=0,
+        total_number=1,
+    )
+    mock_fetch_device_name.return_value = "name"
+    mock_store_fault_segment.return_value = (1, ["00000001"])
+    fault_catalog.labels = MappingProxyType({"12": "Overheat"})
+
+    result = await handle_fault_event(db=AsyncMock(), payload="foo")
+
+    assert result["fault_label"] == "Overheat"
+    mock_fetch_fault_label.assert_not_awaited()
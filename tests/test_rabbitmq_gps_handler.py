@@ -1,31 +1,38 @@
 from datetime import datetime
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pendulum
 import pytest
-from tenacity import RetryError
+from sqlalchemy.exc import IntegrityError, PendingRollbackError
 
+from src.fastapi.rabbitmq_handlers.gps.device_filter import unknown_devices
 from src.fastapi.rabbitmq_handlers.gps.exceptions import (
     GPSDatabaseException,
+    GPSDecodeException,
     GPSDeviceAPIException,
+    GPSDeviceNotFoundException,
     GPSRateLimitException,
     GPSRedisException,
     GPSRedisNotInitializedException,
 )
-from src.fastapi.rabbitmq_handlers.gps.handler import handle_gps_event
+from src.fastapi.rabbitmq_handlers.gps.handler import (
+    handle_gps_event,
+    handle_gps_events,
+)
 from src.fastapi.rabbitmq_handlers.gps.models import GPSEventModel
 from src.fastapi.rabbitmq_handlers.gps.schemas import GPSEventCreate, GPSEventResponse
 from src.fastapi.rabbitmq_handlers.gps.utils import (
-    cache_processed_key,
-    check_duplicate_event,
     dispatch_alert_event,
     fetch_device_name,
     get_device_name,
     invalidate_device_cache,
     persist_gps_event,
+    persist_gps_events,
+    reject_unknown_device,
     save_gps_event,
 )
 from src.fastapi.websocket.models import AlertEvent
+from src.fastapi.websocket.prefilter import alert_prefilter
 
 
 # region Fixtures
@@ -63,6 +70,15 @@ def db_session():
     return AsyncMock()
 
 
+def make_states(load_result=None):
+    states = MagicMock()
+    states.load = AsyncMock(return_value=load_result or [None])
+    states.apply = AsyncMock()
+    states.save = AsyncMock()
+    states.release = AsyncMock()
+    return states
+
+
 # endregion
 
 
@@ -77,74 +93,46 @@ async def test_handle_gps_event_decode_error(mock_decode):
 
 
 @patch("src.fastapi.rabbitmq_handlers.gps.handler.decode_payload")
-@patch("src.fastapi.rabbitmq_handlers.gps.handler.check_duplicate_event")
-async def test_handle_gps_event_duplicate_event(mock_check_duplicate, mock_decode):
-    mock_check_duplicate.return_value = {"error": "Duplicate event"}
+@patch("src.fastapi.rabbitmq_handlers.gps.handler.new_device_states")
+async def test_handle_gps_event_duplicate_event(mock_new_states, mock_decode):
+    states = mock_new_states.return_value = make_states([{"error": "Duplicate event"}])
     mock_decode.return_value = AsyncMock()
 
     db = AsyncMock()
     response = await handle_gps_event(db, "some-payload")
 
     assert response == {"error": "Duplicate event"}
+    states.save.assert_not_called()
 
 
 @patch("src.fastapi.rabbitmq_handlers.gps.handler.decode_payload")
-@patch("src.fastapi.rabbitmq_handlers.gps.handler.check_duplicate_event")
+@patch("src.fastapi.rabbitmq_handlers.gps.handler.new_device_states")
 @patch("src.fastapi.rabbitmq_handlers.gps.handler.get_device_name")
 async def test_handle_gps_event_get_device_name_error(
-    mock_get_device_name, mock_check_duplicate, mock_decode
+    mock_get_device_name, mock_new_states, mock_decode
 ):
     mock_get_device_name.return_value = {"error": "Failed to fetch device name"}
     mock_decode.return_value = AsyncMock()
-    mock_check_duplicate.return_value = None
+    states = mock_new_states.return_value = make_states()
     db = AsyncMock()
     response = await handle_gps_event(db, "some-payload")
 
     assert response == {"error": "Failed to fetch device name"}
+    states.apply.assert_not_called()
 
 
 @patch("src.fastapi.rabbitmq_handlers.gps.handler.decode_payload")
-@patch("src.fastapi.rabbitmq_handlers.gps.handler.check_duplicate_event")
+@patch("src.fastapi.rabbitmq_handlers.gps.handler.new_device_states")
 @patch("src.fastapi.rabbitmq_handlers.gps.handler.get_device_name")
 @patch("src.fastapi.rabbitmq_handlers.gps.handler.GPSEventResponse")
-@patch("src.fastapi.rabbitmq_handlers.gps.handler.cache_processed_key")
-async def test_handle_gps_event_cache_error(
-    mock_cache_processed_key,
-    mock_gps_event,
-    mock_get_device_name,
-    mock_check_duplicate,
-    mock_decode,
-):
-    mock_cache_processed_key.return_value = {"error": "Failed to cache key"}
-    mock_gps_event.return_value = AsyncMock()
-    mock_get_device_name.return_value = "Device Name"
-    mock_decode.return_value = AsyncMock()
-    mock_check_duplicate.return_value = None
-
-    db = AsyncMock()
-    response = await handle_gps_event(db, "payload")
-
-    assert response == {"error": "Failed to cache key"}
-
-
-@patch("src.fastapi.rabbitmq_handlers.gps.handler.decode_payload")
-@patch("src.fastapi.rabbitmq_handlers.gps.handler.check_duplicate_event")
-@patch("src.fastapi.rabbitmq_handlers.gps.handler.get_device_name")
-@patch("src.fastapi.rabbitmq_handlers.gps.handler.GPSEventResponse")
-@patch("src.fastapi.rabbitmq_handlers.gps.handler.cache_processed_key")
 @patch("src.fastapi.rabbitmq_handlers.gps.handler.persist_gps_event")
 @patch("src.fastapi.rabbitmq_handlers.gps.handler.dispatch_alert_event")
-@patch("src.fastapi.daily_summary.aggregator.DailyAggregator.process_event")
-@patch("src.fastapi.idling_hotspots.detector.IdlingEventDetector.process_event")
 async def test_handle_gps_event_success(
-    mock_idling_detector_process_event,
-    mock_daily_summary_process_event,
     mock_dispatch_alert_event,
     mock_persist_gps_event,
-    mock_cache_processed_key,
     mock_gps_event,
     mock_get_device_name,
-    mock_check_duplicate,
+    mock_new_states,
     mock_decode,
 ):
     gps_event = AsyncMock()
@@ -156,9 +144,9 @@ async def test_handle_gps_event_success(
     gps_event.fuel_gauge = 95.0
     mock_decode.return_value = gps_event
 
-    mock_check_duplicate.return_value = None
+    states = mock_new_states.return_value = make_states()
     mock_get_device_name.return_value = "Device Name"
-    mock_gps_event.return_value = GPSEventResponse(
+    mock_gps_event.from_event.return_value = GPSEventResponse(
         device_id="dev123",
         device_name="Device Name",
         timestamp=datetime(2025, 5, 7, 10, 0, 0),
@@ -169,16 +157,19 @@ async def test_handle_gps_event_success(
         longitude=56.78,
         fuel_gauge=95.0,
     )
-    mock_cache_processed_key.return_value = None
     mock_persist_gps_event.return_value = None
     mock_dispatch_alert_event.return_value = None
-    mock_daily_summary_process_event.return_value = None
-    mock_idling_detector_process_event.return_value = None
 
     db = AsyncMock()
     response = await handle_gps_event(db, "payload")
 
     assert response["device_id"] == "dev123"
+    mock_gps_event.from_event.assert_called_once_with(gps_event, "Device Name")
+    # The response is dumped once and shared with the alert
+    assert mock_dispatch_alert_event.call_args[0][3] is response
+    states.load.assert_awaited_once_with([gps_event])
+    states.apply.assert_awaited_once_with(db, mock_gps_event.from_event.return_value)
+    states.save.assert_awaited_once()
 
 
 @patch("aiohttp.ClientSession.get")
@@ -193,18 +184,15 @@ async def test_fetch_device_name_success(mock_get):
 
 
 @patch("aiohttp.ClientSession.get")
-@patch("tenacity.wait_exponential.__call__", return_value=0.01)
-async def test_fetch_device_name_rate_limit(_, mock_get):
+async def test_fetch_device_name_rate_limit(mock_get):
     mock_response = AsyncMock()
     mock_response.status = 429
     mock_response.text.return_value = "Too many requests"
     mock_get.return_value.__aenter__.return_value = mock_response
 
-    with pytest.raises(RetryError) as exc_info:
+    with pytest.raises(GPSRateLimitException):
         await fetch_device_name("dev123")
 
-    assert isinstance(exc_info.value.last_attempt.exception(), GPSRateLimitException)
-
 
 @patch("aiohttp.ClientSession.get")
 async def test_fetch_device_name_server_error(mock_get):
@@ -225,12 +213,16 @@ async def test_fetch_device_name_other_error(mock_get):
     mock_response.text.return_value = "Not found"
     mock_get.return_value.__aenter__.return_value = mock_response
 
-    with pytest.raises(GPSDeviceAPIException):
+    with pytest.raises(GPSDeviceNotFoundException):
         await fetch_device_name("dev123")
+    # cached negatively: no second request
+    with pytest.raises(GPSDeviceNotFoundException):
+        await fetch_device_name("dev123")
+    mock_get.assert_called_once()
 
 
 @patch("src.fastapi.rabbitmq_handlers.gps.utils.redis_manager")
-async def test_invalidate_device_cache_success(mock_redis_manager):
+async def test_invalidate_device_cache_success(mock_redis_manager, stored_devices):
     mock_redis_manager.redis_client = AsyncMock()
     mock_redis_manager.redis_client.delete = AsyncMock()
     await invalidate_device_cache("dev123")
@@ -238,7 +230,9 @@ async def test_invalidate_device_cache_success(mock_redis_manager):
 
 
 @patch("src.fastapi.rabbitmq_handlers.gps.utils.redis_manager")
-async def test_invalidate_device_cache_redis_exception(mock_redis_manager):
+async def test_invalidate_device_cache_redis_exception(
+    mock_redis_manager, stored_devices
+):
     mock_redis_manager.redis_client = AsyncMock()
     mock_redis_manager.redis_client.delete.side_effect = Exception("Redis fail")
 
@@ -247,48 +241,13 @@ async def test_invalidate_device_cache_redis_exception(mock_redis_manager):
 
 
 @patch("src.fastapi.rabbitmq_handlers.gps.utils.redis_manager")
-async def test_invalidate_device_cache_no_client(mock_redis_manager):
+async def test_invalidate_device_cache_no_client(mock_redis_manager, stored_devices):
     mock_redis_manager.redis_client = None
 
     with pytest.raises(GPSRedisNotInitializedException):
         await invalidate_device_cache("dev123")
 
 
-@patch("src.fastapi.redis.redis.redis_manager.redis_client", new_callable=AsyncMock)
-async def test_check_duplicate_event_no_duplicate(mock_redis_client, gps_event_create):
-    mock_redis_client.setnx.return_value = True
-    result = await check_duplicate_event(gps_event_create)
-
-    assert result is None
-    mock_redis_client.setnx.assert_called_once_with(
-        f"gps_event:{gps_event_create.device_id}:{gps_event_create.timestamp}",
-        "processed",
-    )
-
-
-@patch("src.fastapi.redis.redis.redis_manager.redis_client", new_callable=AsyncMock)
-async def test_check_duplicate_event_duplicate(mock_redis_client, gps_event_create):
-    mock_redis_client.setnx.return_value = False
-    result = await check_duplicate_event(gps_event_create)
-
-    assert result == {"error": "Duplicate event"}
-
-
-@patch("src.fastapi.redis.redis.redis_manager.redis_client", None)
-async def test_check_duplicate_event_redis_not_initialized(gps_event_create):
-    result = await check_duplicate_event(gps_event_create)
-
-    assert result == {"error": str(GPSRedisNotInitializedException("check_duplicate"))}
-
-
-@patch("src.fastapi.redis.redis.redis_manager.redis_client", new_callable=AsyncMock)
-async def test_check_duplicate_event_redis_error(mock_redis_client, gps_event_create):
-    mock_redis_client.setnx.side_effect = Exception("Redis error")
-    result = await check_duplicate_event(gps_event_create)
-
-    assert isinstance(result, dict)
-
-
 @patch(
     "src.fastapi.rabbitmq_handlers.gps.utils.fetch_device_name", new_callable=AsyncMock
 )
@@ -310,22 +269,28 @@ async def test_get_device_name_not_found(mock_fetch_device_name):
     assert result == {"error": str(GPSDeviceAPIException("device_123"))}
 
 
-@patch("src.fastapi.redis.redis.redis_manager.redis_client", new_callable=AsyncMock)
-async def test_cache_processed_key_success(mock_redis_client):
-    key = "gps_event:device_123:2024-05-20T08:30:00+07:00"
-    result = await cache_processed_key(key)
+@patch(
+    "src.fastapi.rabbitmq_handlers.gps.utils.fetch_device_name", new_callable=AsyncMock
+)
+async def test_get_device_name_unknown_device_is_remembered(mock_fetch_device_name):
+    mock_fetch_device_name.side_effect = GPSDeviceNotFoundException("device_404")
+    result = await get_device_name("device_404")
 
-    assert result is None
-    mock_redis_client.setex.assert_called_once_with(key, 3600, "processed")
+    assert result == {"error": str(GPSDeviceNotFoundException("device_404"))}
+    assert reject_unknown_device("device_404") == result
+    assert reject_unknown_device("device_123") is None
 
 
-@patch("src.fastapi.redis.redis.redis_manager.redis_client", new_callable=AsyncMock)
-async def test_cache_processed_key_redis_error(mock_redis_client):
-    key = "gps_event:device_123:2024-05-20T08:30:00+07:00"
-    mock_redis_client.setex.side_effect = Exception("Redis error")
-    result = await cache_processed_key(key)
+@patch("src.fastapi.rabbitmq_handlers.gps.handler.decode_payload")
+@patch("src.fastapi.rabbitmq_handlers.gps.handler.new_device_states")
+async def test_handle_gps_event_drops_unknown_device(mock_new_states, mock_decode):
+    mock_decode.return_value = AsyncMock(device_id="device_404")
+    unknown_devices.add("device_404")
+
+    response = await handle_gps_event(AsyncMock(), "some-payload")
 
-    assert isinstance(result, dict)
+    assert response == {"error": str(GPSDeviceNotFoundException("device_404"))}
+    mock_new_states.assert_not_called()
 
 
 @patch(
@@ -351,16 +316,17 @@ async def test_persist_gps_event_error(
 
 
 @patch(
-    "src.fastapi.rabbitmq_handlers.gps.utils.send_alert_event", new_callable=AsyncMock
+    "src.fastapi.rabbitmq_handlers.gps.utils.alert_outbox.publish",
+    new_callable=AsyncMock,
 )
 async def test_dispatch_alert_event_success(
-    mock_send_alert_event, gps_event_create, gps_event_response
+    mock_publish_alert, gps_event_create, gps_event_response
 ):
     device_name = "device_name"
     await dispatch_alert_event(gps_event_create, device_name, gps_event_response)
 
-    mock_send_alert_event.assert_called_once()
-    alert = mock_send_alert_event.call_args[0][0]
+    mock_publish_alert.assert_called_once()
+    alert = mock_publish_alert.call_args[0][0]
     assert isinstance(alert, AlertEvent)
     assert alert.event_type == "gps"
     assert alert.device_id == gps_event_create.device_id
@@ -369,15 +335,16 @@ async def test_dispatch_alert_event_success(
 
 
 @patch(
-    "src.fastapi.rabbitmq_handlers.gps.utils.send_alert_event", new_callable=AsyncMock
+    "src.fastapi.rabbitmq_handlers.gps.utils.alert_outbox.publish",
+    new_callable=AsyncMock,
 )
 async def test_dispatch_alert_event_error(
-    mock_send_alert_event, gps_event_create, gps_event_response
+    mock_publish_alert, gps_event_create, gps_event_response
 ):
-    mock_send_alert_event.side_effect = Exception("WebSocket error")
+    mock_publish_alert.side_effect = Exception("WebSocket error")
     await dispatch_alert_event(gps_event_create, "device_name", gps_event_response)
 
-    mock_send_alert_event.assert_called_once()
+    mock_publish_alert.assert_called_once()
 
 
 async def test_save_gps_event_success(db_session, gps_event_response):
@@ -402,3 +369,125 @@ async def test_save_gps_event_database_error(db_session, gps_event_response):
         await save_gps_event(db_session, gps_event_response)
 
     db_session.rollback.assert_called_once()
+
+
+@patch("src.fastapi.rabbitmq_handlers.gps.handler.decode_payloads")
+@patch("src.fastapi.rabbitmq_handlers.gps.handler.new_device_states")
+@patch("src.fastapi.rabbitmq_handlers.gps.handler.get_device_names")
+@patch("src.fastapi.rabbitmq_handlers.gps.handler.persist_gps_events")
+@patch("src.fastapi.rabbitmq_handlers.gps.handler.dispatch_alert_event")
+async def test_handle_gps_events_batch(
+    mock_dispatch_alert_event,
+    mock_persist_gps_events,
+    mock_get_device_names,
+    mock_new_states,
+    mock_decode,
+    gps_event_create,
+):
+    unknown_event = gps_event_create.model_copy(update={"device_id": "unknown"})
+    duplicate_event = gps_event_create.model_copy()
+    mock_decode.return_value = [
+        gps_event_create,
+        GPSDecodeException("p2", "bad payload"),
+        duplicate_event,
+        unknown_event,
+    ]
+    states = mock_new_states.return_value = make_states(
+        [None, {"error": "Duplicate event"}, None]
+    )
+    mock_get_device_names.return_value = {
+        "device_123": "Device Name",
+        "unknown": {"error": "Device not found"},
+    }
+
+    db = AsyncMock()
+    results = await handle_gps_events(db, ["p1", "p2", "p3", "p4"])
+
+    assert results[0]["device_name"] == "Device Name"
+    assert "bad payload" in results[1]["error"]
+    assert results[2] == {"error": "Duplicate event"}
+    assert results[3] == {"error": "Device not found"}
+    mock_get_device_names.assert_awaited_once_with(["device_123", "unknown"])
+    saved = mock_persist_gps_events.call_args[0][1]
+    assert [r.device_id for r in saved] == ["device_123"]
+    mock_dispatch_alert_event.assert_called_once()
+    states.apply.assert_awaited_once()
+    states.save.assert_awaited_once()
+
+
+@patch("src.fastapi.rabbitmq_handlers.gps.handler.decode_payloads")
+@patch("src.fastapi.rabbitmq_handlers.gps.handler.new_device_states")
+@patch("src.fastapi.rabbitmq_handlers.gps.handler.persist_gps_events")
+async def test_handle_gps_events_all_duplicates(
+    mock_persist_gps_events, mock_new_states, mock_decode, gps_event_create
+):
+    mock_decode.return_value = [gps_event_create]
+    mock_new_states.return_value = make_states([{"error": "Duplicate event"}])
+
+    results = await handle_gps_events(AsyncMock(), ["p1"])
+
+    assert results == [{"error": "Duplicate event"}]
+    mock_persist_gps_events.assert_not_called()
+
+
+@patch(
+    "src.fastapi.rabbitmq_handlers.gps.handler.gps_repo.save_many",
+    new_callable=AsyncMock,
+)
+async def test_persist_gps_events_success(
+    mock_gps_repo_save_many, db_session, gps_event_response
+):
+    await persist_gps_events(db_session, [gps_event_response])
+
+    mock_gps_repo_save_many.assert_called_once_with(db_session, [gps_event_response])
+
+
+class OneFailedCommitSession:
+    """Like AsyncSession, unusable after a failed commit until rolled back."""
+
+    def __init__(self):
+        self.added = []
+        self.saved = []
+        self.fail_next = True
+        self.needs_rollback = False
+
+    def add_all(self, models):
+        self.added.extend(models)
+
+    async def commit(self):
+        if self.needs_rollback:
+            raise PendingRollbackError("rollback first")
+        if self.fail_next:
+            self.fail_next = False
+            self.needs_rollback = True
+            raise IntegrityError("INSERT", {}, Exception("duplicate key"))
+        self.saved.extend(self.added)
+        self.added = []
+
+    async def rollback(self):
+        self.added = []
+        self.needs_rollback = False
+
+
+async def test_persist_gps_events_after_a_failed_commit(gps_event_response):
+    db = OneFailedCommitSession()
+    next_event = gps_event_response.model_copy(update={"device_id": "device_456"})
+
+    with pytest.raises(IntegrityError):
+        await persist_gps_events(db, [gps_event_response])
+    await persist_gps_events(db, [next_event])
+
+    assert [model.device_id for model in db.saved] == ["device_456"]
+
+
+@patch(
+    "src.fastapi.rabbitmq_handlers.gps.utils.alert_outbox.publish",
+    new_callable=AsyncMock,
+)
+async def test_dispatch_alert_event_prefiltered(
+    mock_publish_alert, gps_event_create, gps_event_response
+):
+    with patch.object(alert_prefilter, "predicates", {"gps": [lambda data: False]}):
+        await dispatch_alert_event(gps_event_create, "device_name", gps_event_response)
+
+    mock_publish_alert.assert_not_called()
@@ -0,0 +1,243 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.fastapi.daily_summary.aggregator import DailyAggregator
+from src.fastapi.daily_summary.strategies import (
+    DefaultOperationalHoursStrategy,
+    DefaultTripDefinitionStrategy,
+)
+from src.fastapi.idling_hotspots.detector import IdlingEventDetector
+from src.fastapi.idling_hotspots.schemas import IdlingDetectedEvent
+from src.fastapi.rabbitmq_handlers.dedup import DedupCache
+from src.fastapi.rabbitmq_handlers.gps.exceptions import GPSRedisNotInitializedException
+from src.fastapi.rabbitmq_handlers.gps.schemas import GPSEventCreate, GPSEventResponse
+from src.fastapi.rabbitmq_handlers.gps.state import DeviceStates
+
+TIMESTAMP = datetime(2025, 5, 20, 8, 30)
+
+
+@pytest.fixture
+def aggregator():
+    return DailyAggregator(
+        DefaultTripDefinitionStrategy(), DefaultOperationalHoursStrategy()
+    )
+
+
+@pytest.fixture
+def detector():
+    return IdlingEventDetector()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def dedup(clock):
+    return DedupCache(
+        window_seconds=60,
+        lru_size=100,
+        bloom_capacity=1000,
+        bloom_error_rate=0.01,
+        exact=False,
+        clock=clock,
+    )
+
+
+def make_event(device_id="dev1", speed=0.0, seconds=0) -> GPSEventCreate:
+    return GPSEventCreate(
+        device_id=device_id,
+        timestamp=TIMESTAMP.replace(second=seconds),
+        speed=speed,
+        odometer=100.0,
+        power_on=True,
+        latitude=10.0,
+        longitude=106.0,
+        fuel_gauge=50.0,
+    )
+
+
+def make_pipeline(redis_client, replies):
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=replies)
+    redis_client.pipeline.return_value = pipe
+    return pipe
+
+
+@patch("src.fastapi.redis.redis.redis_manager.redis_client", new_callable=MagicMock)
+async def test_load_dedups_and_reads_state_in_one_round_trip(
+    mock_redis_client, aggregator, detector, dedup
+):
+    cached_idling = IdlingDetectedEvent(
+        device_id="dev1",
+        start_time=TIMESTAMP,
+        end_time=TIMESTAMP,
+        latitude=10.0,
+        longitude=106.0,
+    )
+    # one SET NX reply, one summary GET, one idling GET; the second event is
+    # a local hit
+    pipe = make_pipeline(
+        mock_redis_client,
+        [True, None, detector.serialize_idling_event(cached_idling)],
+    )
+    states = DeviceStates(aggregator, detector, dedup)
+    events = [make_event(seconds=1), make_event(seconds=1)]
+
+    results = await states.load(events)
+
+    assert results == [None, {"error": "Duplicate event"}]
+    pipe.execute.assert_awaited_once()
+    pipe.set.assert_called_once_with(
+        "gps_event:dev1:2025-05-20 08:30:01", "processed", nx=True, ex=3600
+    )
+    pipe.get.assert_any_call("summary:dev1_2025-05-20")
+    pipe.get.assert_any_call("idling_events:dev1")
+    assert states.summaries == {"summary:dev1_2025-05-20": None}
+    assert states.idling["dev1"] == cached_idling
+
+
+@patch("src.fastapi.redis.redis.redis_manager.redis_client", new_callable=MagicMock)
+async def test_apply_and_save_write_back_in_one_round_trip(
+    mock_redis_client, aggregator, detector, dedup
+):
+    make_pipeline(mock_redis_client, [True, True, None, None])
+    states = DeviceStates(aggregator, detector, dedup)
+    events = [make_event(seconds=1), make_event(seconds=2)]
+    await states.load(events)
+
+    for event in events:
+        await states.apply(AsyncMock(), GPSEventResponse.from_event(event, "Truck"))
+    save_pipe = make_pipeline(mock_redis_client, [True, True])
+    await states.save()
+
+    save_pipe.execute.assert_awaited_once()
+    summary_key, _, serialized = save_pipe.setex.call_args[0]
+    assert summary_key == "summary:dev1_2025-05-20"
+    assert aggregator.deserialize_summary(serialized).vehicle_id == "dev1"
+    idling_key, serialized = save_pipe.set.call_args[0]
+    assert idling_key == "idling_events:dev1"
+    idling = detector.deserialize_idling_event(serialized)
+    assert idling.end_time == TIMESTAMP.replace(second=2)
+    assert summary_key in aggregator.saved_keys
+
+
+@patch("src.fastapi.idling_hotspots.detector.idling_repo.save_idling_event")
+@patch("src.fastapi.redis.redis.redis_manager.redis_client", new_callable=MagicMock)
+async def test_save_clears_finished_idling_event(
+    mock_redis_client, mock_save_idling_event, aggregator, detector, dedup
+):
+    cached_idling = IdlingDetectedEvent(
+        device_id="dev1",
+        start_time=TIMESTAMP,
+        end_time=TIMESTAMP,
+        latitude=10.0,
+        longitude=106.0,
+    )
+    make_pipeline(
+        mock_redis_client,
+        [True, None, detector.serialize_idling_event(cached_idling)],
+    )
+    states = DeviceStates(aggregator, detector, dedup)
+    event = make_event(speed=40.0, seconds=5)
+    await states.load([event])
+
+    await states.apply(AsyncMock(), GPSEventResponse.from_event(event, "Truck"))
+    save_pipe = make_pipeline(mock_redis_client, [True, 1])
+    await states.save()
+
+    mock_save_idling_event.assert_awaited_once()
+    save_pipe.delete.assert_called_once_with("idling_events:dev1")
+    save_pipe.set.assert_not_called()
+
+
+@patch("src.fastapi.redis.redis.redis_manager.redis_client", new_callable=MagicMock)
+async def test_load_redis_error(mock_redis_client, aggregator, detector, dedup):
+    pipe = make_pipeline(mock_redis_client, [])
+    pipe.execute.side_effect = Exception("connection lost")
+
+    states = DeviceStates(aggregator, detector, dedup)
+    results = await states.load([make_event()])
+
+    assert "connection lost" in results[0]["error"]
+    # the redelivery must not be a local hit
+    make_pipeline(mock_redis_client, [True, None, None])
+    assert await states.load([make_event()]) == [None]
+
+
+@patch("src.fastapi.redis.redis.redis_manager.redis_client", None)
+async def test_load_redis_not_initialized(aggregator, detector, dedup):
+    results = await DeviceStates(aggregator, detector, dedup).load([make_event()])
+
+    assert results == [{"error": str(GPSRedisNotInitializedException("load_state"))}]
+
+
+@patch("src.fastapi.redis.redis.redis_manager.redis_client", new_callable=MagicMock)
+async def test_warm_cache_accepts_new_events_locally_and_records_them_on_load(
+    mock_redis_client, aggregator, detector, dedup, clock
+):
+    clock.now = 61.0
+    # summary GET, idling GET, then the plain SET of the fresh key
+    pipe = make_pipeline(mock_redis_client, [None, None, True])
+    states = DeviceStates(aggregator, detector, dedup)
+    event = make_event(seconds=3)
+
+    assert await states.load([event]) == [None]
+    # Recorded before the event is persisted, for redeliveries after a crash
+    pipe.set.assert_called_once_with(
+        "gps_event:dev1:2025-05-20 08:30:03", "processed", ex=3600
+    )
+
+    await states.apply(AsyncMock(), GPSEventResponse.from_event(event, "Truck"))
+    save_pipe = make_pipeline(mock_redis_client, [True, True])
+    await states.save()
+
+    assert all(
+        call.args[0] != "gps_event:dev1:2025-05-20 08:30:03"
+        for call in save_pipe.set.call_args_list
+    )
+
+
+@patch("src.fastapi.redis.redis.redis_manager.redis_client", new_callable=MagicMock)
+async def test_local_duplicate_skips_redis(
+    mock_redis_client, aggregator, detector, dedup
+):
+    dedup.check("gps_event:dev1:2025-05-20 08:30:04")
+
+    results = await DeviceStates(aggregator, detector, dedup).load(
+        [make_event(seconds=4)]
+    )
+
+    assert results == [{"error": "Duplicate event"}]
+    mock_redis_client.pipeline.assert_not_called()
+
+
+@patch(
+    "src.fastapi.rabbitmq_handlers.gps.state.release_processed_keys",
+    new_callable=AsyncMock,
+)
+@patch("src.fastapi.redis.redis.redis_manager.redis_client", new_callable=MagicMock)
+async def test_release_drops_local_and_redis_keys(
+    mock_redis_client, mock_release, aggregator, detector, dedup, clock
+):
+    clock.now = 61.0
+    make_pipeline(mock_redis_client, [None, None, True])
+    states = DeviceStates(aggregator, detector, dedup)
+    key = "gps_event:dev1:2025-05-20 08:30:05"
+    await states.load([make_event(seconds=5)])
+
+    await states.release(key)
+
+    assert key not in dedup.recent
+    mock_release.assert_awaited_once_with(key)
@@ -0,0 +1,137 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import aiohttp
+import pytest
+
+from src.fastapi.rabbitmq_handlers.gps.exceptions import (
+    GPSDecodeException,
+    GPSDeviceAPIException,
+    GPSDeviceUnavailableException,
+)
+from src.fastapi.rabbitmq_handlers.retry import (
+    LAST_ERROR_HEADER,
+    RETRY_COUNT_HEADER,
+    RetryManager,
+    dead_letter_queue_name,
+    is_retryable,
+    retry_delay_ms,
+    retry_queue_name,
+)
+
+
+def make_message(headers=None):
+    message = MagicMock()
+    message.body = b"payload"
+    message.headers = headers or {}
+    message.content_type = None
+    return message
+
+
+async def make_manager(tiers=3, base_delay_ms=100):
+    manager = RetryManager()
+    manager.tiers = tiers
+    manager.base_delay_ms = base_delay_ms
+    channel = MagicMock()
+    channel.declare_exchange = AsyncMock()
+    channel.declare_queue = AsyncMock()
+    channel.default_exchange.publish = AsyncMock()
+    await manager.setup(channel, ["gps_queue"])
+    return manager, channel
+
+
+def test_naming_and_delays():
+    assert retry_queue_name("gps_queue.2", 1) == "gps_queue.2.retry.1"
+    assert dead_letter_queue_name("fault_queue") == "fault_queue.dlq"
+    assert [retry_delay_ms(tier, 1000) for tier in range(3)] == [1000, 2000, 4000]
+
+
+@pytest.mark.parametrize(
+    "exc, expected",
+    [
+        (GPSDeviceUnavailableException("boom"), True),
+        (aiohttp.ClientConnectionError(), True),
+        (TimeoutError(), True),
+        (GPSDeviceAPIException("404"), False),
+        (ValueError("bad"), False),
+    ],
+)
+def test_is_retryable(exc, expected):
+    assert is_retryable(exc) is expected
+
+
+async def test_setup_declares_tiers_and_dead_letter_queue():
+    manager, channel = await make_manager()
+
+    channel.declare_queue.assert_any_await(
+        "gps_queue.retry.2",
+        durable=True,
+        arguments={
+            "x-message-ttl": 400,
+            "x-dead-letter-exchange": "",
+            "x-dead-letter-routing-key": "gps_queue",
+        },
+    )
+    channel.declare_queue.assert_any_await("gps_queue.dlq", durable=True)
+    channel.declare_queue.return_value.bind.assert_awaited_once_with(
+        manager.dead_letter_exchange, routing_key="gps_queue"
+    )
+
+
+async def test_transient_failure_goes_to_next_tier():
+    manager, channel = await make_manager()
+
+    await manager.handle_failure(
+        "gps_queue",
+        make_message({RETRY_COUNT_HEADER: 1}),
+        GPSDeviceUnavailableException("boom"),
+    )
+
+    channel.default_exchange.publish.assert_awaited_once()
+    published, kwargs = channel.default_exchange.publish.await_args
+    assert kwargs["routing_key"] == "gps_queue.retry.1"
+    assert published[0].headers[RETRY_COUNT_HEADER] == 2
+    manager.dead_letter_exchange.publish.assert_not_awaited()
+
+
+async def test_exhausted_retries_go_to_dead_letter_queue():
+    manager, channel = await make_manager(tiers=3)
+
+    await manager.handle_failure(
+        "gps_queue",
+        make_message({RETRY_COUNT_HEADER: 3}),
+        GPSDeviceUnavailableException("boom"),
+    )
+
+    channel.default_exchange.publish.assert_not_awaited()
+    published, kwargs = manager.dead_letter_exchange.publish.await_args
+    assert kwargs["routing_key"] == "gps_queue"
+    assert "boom" in published[0].headers[LAST_ERROR_HEADER]
+
+
+async def test_permanent_failure_goes_straight_to_dead_letter_queue():
+    manager, channel = await make_manager()
+
+    await manager.handle_failure("gps_queue", make_message(), ValueError("bug"))
+
+    channel.default_exchange.publish.assert_not_awaited()
+    manager.dead_letter_exchange.publish.assert_awaited_once()
+
+
+async def test_malformed_message_is_dropped():
+    manager, channel = await make_manager()
+
+    await manager.handle_failure(
+        "gps_queue", make_message(), GPSDecodeException("garbage")
+    )
+
+    channel.default_exchange.publish.assert_not_awaited()
+    manager.dead_letter_exchange.publish.assert_not_awaited()
+
+
+async def test_failure_before_setup_is_dropped(caplog):
+    manager = RetryManager()
+
+    with caplog.at_level("ERROR"):
+        await manager.handle_failure("gps_queue", make_message(), ValueError("x"))
+
+    assert "Retry queues not set up" in caplog.text
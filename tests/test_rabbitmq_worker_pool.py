@@ -0,0 +1,136 @@
+import asyncio
+import base64
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.fastapi.rabbitmq_handlers.gps.codec import encode_gps_frame
+from src.fastapi.rabbitmq_handlers.utils import peek_device_id
+from src.fastapi.rabbitmq_handlers.worker_pool import (
+    PartitionedWorkerPool,
+    partition_for,
+    split_workers,
+)
+
+
+def make_session_factory():
+    async def session_factory():
+        session_cm = AsyncMock()
+        session_cm.__aenter__.return_value = AsyncMock()
+        return session_cm
+
+    return session_factory
+
+
+def test_partition_for_is_stable():
+    assert partition_for("device_1", 8) == partition_for("device_1", 8)
+    assert 0 <= partition_for("device_1", 8) < 8
+
+
+def test_pool_requires_a_worker():
+    with pytest.raises(ValueError):
+        PartitionedWorkerPool(0, 10, make_session_factory())
+
+
+def test_peek_device_id():
+    body = base64.b64encode(b"42:1715000000.0:10:100:True:1:2:3")
+    assert peek_device_id(body) == "42"
+
+
+def test_peek_device_id_binary_frame():
+    frame = encode_gps_frame("truck-7", 1715000000.0, 10, 100, True, 1, 2, 3)
+    assert peek_device_id(base64.b64encode(frame)) == "truck-7"
+
+
+def test_peek_device_id_invalid_body():
+    assert peek_device_id(b"not base64!") == ""
+
+
+async def test_pool_keeps_per_device_order():
+    pool = PartitionedWorkerPool(4, 10, make_session_factory())
+    pool.start()
+    seen: list[tuple[str, int]] = []
+
+    def job(device_id: str, seq: int):
+        async def run(_session):
+            # Yield so interleaving would show up if ordering were broken
+            await asyncio.sleep(0)
+            seen.append((device_id, seq))
+
+        return run
+
+    for seq in range(5):
+        for device_id in ("a", "b", "c"):
+            await pool.submit(device_id, job(device_id, seq))
+
+    await pool.join()
+    await pool.stop()
+
+    for device_id in ("a", "b", "c"):
+        assert [s for d, s in seen if d == device_id] == list(range(5))
+
+
+async def test_pool_runs_devices_in_parallel():
+    pool = PartitionedWorkerPool(2, 10, make_session_factory())
+    pool.start()
+    slow_device = "a"
+    fast_device = next(
+        d
+        for d in ("b", "c", "d", "e")
+        if partition_for(d, 2) != partition_for(slow_device, 2)
+    )
+    release = asyncio.Event()
+    finished: list[str] = []
+
+    async def slow_job(_session):
+        await release.wait()
+        finished.append(slow_device)
+
+    async def fast_job(_session):
+        finished.append(fast_device)
+        release.set()
+
+    await pool.submit(slow_device, slow_job)
+    await pool.submit(fast_device, fast_job)
+    await asyncio.wait_for(pool.join(), timeout=1)
+    await pool.stop()
+
+    assert finished == [fast_device, slow_device]
+
+
+async def test_pool_survives_failing_job():
+    pool = PartitionedWorkerPool(1, 10, make_session_factory())
+    pool.start()
+    done = []
+
+    async def failing_job(_session):
+        raise RuntimeError("boom")
+
+    async def ok_job(_session):
+        done.append(True)
+
+    await pool.submit("a", failing_job)
+    await pool.submit("a", ok_job)
+    await pool.join()
+    await pool.stop()
+
+    assert done == [True]
+
+
+async def test_pool_mailbox_is_bounded():
+    pool = PartitionedWorkerPool(1, 1, make_session_factory())
+
+    async def job(_session):
+        return None
+
+    await pool.submit("a", job)
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(pool.submit("a", job), timeout=0.05)
+
+
+@pytest.mark.parametrize(
+    "total, share, expected",
+    [(4, 0.25, (3, 1)), (8, 0.25, (6, 2)), (2, 0.9, (1, 1)), (10, 0.0, (9, 1))],
+)
+def test_split_workers_reserves_a_share(total, share, expected):
+    assert split_workers(total, share) == expected
@@ -1,42 +1,200 @@
+import asyncio
+import json
 from datetime import datetime
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, patch
 
 import pytest
+from websockets.asyncio.server import serve
 
-from src.fastapi.websocket.client import send_alert_event
+from src.fastapi.metrics.registry import metrics
+from src.fastapi.websocket import client as client_module
+from src.fastapi.websocket.client import (
+    AlertConnection,
+    AlertConnectionPool,
+    send_alert_event,
+)
 from src.fastapi.websocket.models import AlertEvent
 
 
+def make_alert(device_id="device123"):
+    return AlertEvent(
+        device_id=device_id,
+        device_name="sensor-01",
+        event_type="overheat",
+        timestamp=datetime(2025, 5, 7, 12, 0, 0),
+        data={"cpu": 90},
+    )
+
+
+def url_of(server):
+    port = server.sockets[0].getsockname()[1]
+    return f"ws://127.0.0.1:{port}"
+
+
+async def test_frames_are_pipelined_and_acks_matched_by_id():
+    received = []
+
+    async def ack_in_reverse(websocket):
+        # Nothing is acked before every frame has arrived
+        async for raw in websocket:
+            received.append(json.loads(raw))
+            if len(received) == 3:
+                for frame in reversed(received):
+                    await websocket.send(
+                        json.dumps({"status": "received", "id": frame["id"]})
+                    )
+
+    async with serve(ack_in_reverse, "127.0.0.1", 0) as server:
+        pool = AlertConnectionPool(url_of(server), 1, ack_timeout=5, max_backoff=1)
+        try:
+            acks = [
+                await pool.send(make_alert(f"dev{i}").model_dump(mode="json"))
+                for i in range(3)
+            ]
+            results = await asyncio.gather(*acks)
+        finally:
+            await pool.close()
+
+    assert [frame["device_id"] for frame in received] == ["dev0", "dev1", "dev2"]
+    assert [ack["id"] for ack in results] == [frame["id"] for frame in received]
+
+
+async def test_array_frame_is_acked_per_alert():
+    async def ack_array(websocket):
+        async for raw in websocket:
+            frames = json.loads(raw)
+            await websocket.send(
+                json.dumps([{"status": "received", "id": f["id"]} for f in frames])
+            )
+
+    async with serve(ack_array, "127.0.0.1", 0) as server:
+        pool = AlertConnectionPool(url_of(server), 1, ack_timeout=5, max_backoff=1)
+        try:
+            frames = [{"n": 1}, {"n": 2}]
+            acks = await pool.send_many(frames)
+            results = await asyncio.wait_for(asyncio.gather(*acks), timeout=1)
+        finally:
+            await pool.close()
+
+    assert [ack["id"] for ack in results] == [frame["id"] for frame in frames]
+
+
+async def test_acks_without_id_resolve_in_order():
+    async def ack_without_id(websocket):
+        async for _ in websocket:
+            await websocket.send(json.dumps({"status": "received"}))
+
+    async with serve(ack_without_id, "127.0.0.1", 0) as server:
+        connection = AlertConnection(url_of(server), ack_timeout=5, max_backoff=1)
+        try:
+            first = await connection.send({"n": 1})
+            second = await connection.send({"n": 2})
+            await asyncio.wait_for(asyncio.gather(first, second), timeout=1)
+        finally:
+            await connection.close()
+
+    assert not connection.pending
+
+
+async def test_unparsed_array_frame_fails_every_alert_in_it():
+    async def reject_array(websocket):
+        async for raw in websocket:
+            if raw.startswith("["):
+                ack = {"status": "error", "reason": "bad frame", "id": None}
+                await websocket.send(json.dumps(ack))
+            else:
+                await websocket.send(json.dumps({"status": "received"}))
+
+    async with serve(reject_array, "127.0.0.1", 0) as server:
+        connection = AlertConnection(url_of(server), ack_timeout=5, max_backoff=1)
+        try:
+            batch = await connection.send_many([{"n": 1}, {"n": 2}, {"n": 3}])
+            single = await connection.send({"n": 4})
+            results = await asyncio.wait_for(asyncio.gather(*batch), timeout=1)
+            after = await asyncio.wait_for(single, timeout=1)
+        finally:
+            await connection.close()
+
+    assert [ack["status"] for ack in results] == ["error"] * 3
+    assert after["status"] == "received"
+    assert not connection.pending
+    assert not connection.batches
+
+
+async def test_reconnects_after_the_server_drops_the_connection():
+    connections = []
+
+    async def drop_first_connection(websocket):
+        connections.append(websocket)
+        async for raw in websocket:
+            if len(connections) == 1:
+                await websocket.close()
+                return
+            frame = json.loads(raw)
+            await websocket.send(json.dumps({"status": "received", "id": frame["id"]}))
+
+    lost = metrics.counter("alert_pool.lost").value
+    async with serve(drop_first_connection, "127.0.0.1", 0) as server:
+        connection = AlertConnection(url_of(server), ack_timeout=5, max_backoff=1)
+        try:
+            ack = await connection.send({"n": 1})
+            with pytest.raises(ConnectionError):
+                await asyncio.wait_for(ack, timeout=1)
+            ack = await connection.send({"n": 2})
+            assert (await asyncio.wait_for(ack, timeout=1))["status"] == "received"
+        finally:
+            await connection.close()
+
+    assert len(connections) == 2
+    assert metrics.counter("alert_pool.lost").value == lost + 1
+
+
+async def test_missing_ack_times_out():
+    async def never_ack(websocket):
+        async for _ in websocket:
+            pass
+
+    timeouts = metrics.counter("alert_pool.ack_timeout").value
+    async with serve(never_ack, "127.0.0.1", 0) as server:
+        connection = AlertConnection(url_of(server), ack_timeout=0.05, max_backoff=1)
+        try:
+            ack = await connection.send({"n": 1})
+            with pytest.raises(TimeoutError):
+                await ack
+        finally:
+            await connection.close()
+
+    assert not connection.pending
+    assert metrics.counter("alert_pool.ack_timeout").value == timeouts + 1
+
+
 async def test_send_alert_event_success():
-    mock_ws = AsyncMock()
-    mock_ws.recv.return_value = "ack"
-    mock_connect = MagicMock()
-    mock_connect.return_value.__aenter__.return_value = mock_ws
+    async def ack(websocket):
+        async for raw in websocket:
+            frame = json.loads(raw)
+            await websocket.send(json.dumps({"status": "received", "id": frame["id"]}))
+
+    async with serve(ack, "127.0.0.1", 0) as server:
+        pool = AlertConnectionPool(url_of(server), 2, ack_timeout=5, max_backoff=1)
+        await pool.start()
+        try:
+            with patch.object(client_module, "alert_pool", pool):
+                response = await send_alert_event(make_alert())
+                assert (await response)["status"] == "received"
+        finally:
+            await pool.close()
+
+
+async def test_send_alert_event_failure_backs_off():
+    mock_connect = AsyncMock(side_effect=OSError("fail"))
+    pool = AlertConnectionPool("ws://127.0.0.1:1", 1, ack_timeout=5, max_backoff=1)
 
     with patch("src.fastapi.websocket.client.websockets.connect", mock_connect):
-        alert_event = AlertEvent(
-            device_id="device123",
-            device_name="sensor-01",
-            event_type="overheat",
-            timestamp=datetime(2025, 5, 7, 12, 0, 0),
-            data={"cpu": 90},
-        )
-        response = await send_alert_event(alert_event)
-
-    mock_ws.send.assert_awaited_once()
-    mock_ws.recv.assert_awaited_once()
-    assert response == "ack"
-
-
-async def test_send_alert_event_failure():
-    mock_connect = MagicMock(side_effect=Exception("fail"))
-    with patch("src.fastapi.websocket.client.websockets.connect", mock_connect):
-        alert = AlertEvent(
-            device_id="device123",
-            device_name="sensor-01",
-            event_type="overheat",
-            timestamp=datetime(2025, 5, 7, 12, 0, 0),
-            data={"cpu": 90},
-        )
-        with pytest.raises(Exception):
-            await send_alert_event.__wrapped__(alert)
+        with patch.object(client_module, "alert_pool", pool):
+            with pytest.raises(OSError):
+                await send_alert_event(make_alert())
+            # The next attempt waits out the backoff instead of connecting
+            with pytest.raises(ConnectionError):
+                await send_alert_event(make_alert())
+
+    mock_connect.assert_awaited_once()
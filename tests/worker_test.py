@@ -0,0 +1,115 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.fastapi.rabbitmq_handlers.sharding import (
+    shard_binding_key,
+    shard_for_device,
+    shard_queue_name,
+    shard_routing_key,
+)
+from src.fastapi.worker import main, serve_shard, start_workers
+
+
+def test_single_shard_keeps_legacy_names():
+    assert shard_routing_key("gps", "1", 1) == "gps"
+    assert shard_binding_key("fault", 0, 1) == "fault"
+    assert shard_queue_name("gps", 0, 1) == "gps_queue"
+
+
+def test_publisher_and_consumer_agree_on_shard():
+    shards = 4
+    for device_id in map(str, range(1, 50)):
+        shard = shard_for_device(device_id, shards)
+        assert shard_routing_key("gps", device_id, shards) == shard_binding_key(
+            "gps", shard, shards
+        )
+        assert shard_queue_name("gps", shard, shards) == f"gps_queue.{shard}"
+
+
+@patch("src.fastapi.worker.ingest_event", new_callable=AsyncMock)
+@patch("src.fastapi.worker.dedup_cache")
+@patch("src.fastapi.worker.alert_prefilter", new_callable=AsyncMock)
+@patch("src.fastapi.worker.alert_outbox", new_callable=AsyncMock)
+@patch("src.fastapi.worker.alert_pool", new_callable=AsyncMock)
+@patch("src.fastapi.worker.local_fault_segments", new_callable=AsyncMock)
+@patch("src.fastapi.worker.fault_catalog", new_callable=AsyncMock)
+@patch("src.fastapi.worker.device_directory", new_callable=AsyncMock)
+@patch("src.fastapi.worker.http_client_manager", new_callable=AsyncMock)
+@patch("src.fastapi.worker.redis_manager")
+@patch("src.fastapi.worker.DatabaseManager")
+@patch("src.fastapi.worker.init_db", new_callable=AsyncMock)
+async def test_serve_shard_until_shutdown(
+    mock_init_db,
+    mock_db_manager,
+    mock_redis_manager,
+    mock_http_client_manager,
+    mock_device_directory,
+    mock_fault_catalog,
+    mock_local_fault_segments,
+    mock_alert_pool,
+    mock_alert_outbox,
+    mock_alert_prefilter,
+    mock_dedup_cache,
+    mock_ingest_event,
+):
+    mock_dedup_cache.exact = True
+    mock_db_manager.connect = AsyncMock()
+    mock_db_manager.disconnect = AsyncMock()
+    mock_redis_manager.init_redis = AsyncMock()
+    mock_redis_manager.close_redis = AsyncMock()
+    consumer_started = asyncio.Event()
+
+    async def consume_forever(**_kwargs):
+        consumer_started.set()
+        await asyncio.Event().wait()
+
+    mock_ingest_event.side_effect = consume_forever
+    shutdown = asyncio.Event()
+
+    task = asyncio.create_task(serve_shard(2, 4, shutdown))
+    await consumer_started.wait()
+    shutdown.set()
+    await asyncio.wait_for(task, timeout=1)
+
+    mock_ingest_event.assert_called_once_with(shard=2, shards=4)
+    mock_redis_manager.close_redis.assert_awaited_once()
+    mock_http_client_manager.close_session.assert_awaited_once()
+    mock_device_directory.stop.assert_awaited_once()
+    mock_local_fault_segments.start.assert_awaited_once()
+    mock_local_fault_segments.stop.assert_awaited_once()
+    mock_fault_catalog.start.assert_awaited_once()
+    mock_fault_catalog.stop.assert_awaited_once()
+    mock_alert_pool.start.assert_awaited_once()
+    mock_alert_pool.close.assert_awaited_once()
+    mock_alert_outbox.start.assert_awaited_once()
+    mock_alert_outbox.stop.assert_awaited_once()
+    mock_alert_prefilter.start.assert_awaited_once()
+    mock_alert_prefilter.stop.assert_awaited_once()
+    mock_db_manager.disconnect.assert_awaited_once()
+    # Devices are pinned to this shard: local dedup misses are trusted
+    assert mock_dedup_cache.exact is False
+
+
+@patch("src.fastapi.worker.multiprocessing.get_context")
+def test_start_workers_spawns_one_process_per_shard(mock_get_context):
+    context = MagicMock()
+    mock_get_context.return_value = context
+
+    processes = start_workers(3)
+
+    mock_get_context.assert_called_once_with("spawn")
+    assert len(processes) == 3
+    shard_args = [c.kwargs["args"] for c in context.Process.call_args_list]
+    assert shard_args == [(0, 3), (1, 3), (2, 3)]
+
+
+@patch("src.fastapi.worker.signal.signal")
+@patch("src.fastapi.worker.start_workers")
+@patch("src.fastapi.worker.get_settings")
+def test_main_reports_failed_worker(mock_settings, mock_start_workers, _):
+    mock_settings.return_value.INGEST_SHARDS = 2
+    healthy, crashed = MagicMock(exitcode=0), MagicMock(exitcode=1)
+    mock_start_workers.return_value = [healthy, crashed]
+
+    assert main() == 1
+    mock_start_workers.assert_called_once_with(2)